@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import argparse
+import collections
 import hashlib
 import json
 import os
 import re
+import select
 import sys
 import time
+import tracemalloc
 import urllib.request
 
 import websocket
@@ -25,6 +28,27 @@ REPLY_STUCK_STOP_SEC = float(os.environ.get("CHATGPT_SEND_REPLY_STUCK_STOP_SEC",
 ASSISTANT_STABILITY_SEC = float(os.environ.get("CHATGPT_SEND_ASSISTANT_STABILITY_SEC", "0.9"))
 ASSISTANT_PROBE_STABILITY_SEC = float(os.environ.get("CHATGPT_SEND_ASSISTANT_PROBE_STABILITY_SEC", "0.4"))
 ASSISTANT_STABILITY_POLL_SEC = float(os.environ.get("CHATGPT_SEND_ASSISTANT_STABILITY_POLL_SEC", "0.2"))
+REPLY_WAIT_POLL_SEC = max(0.0, float(os.environ.get("CHATGPT_SEND_REPLY_WAIT_POLL_SEC", "0.5")))
+# Reads of the full reply text once compact polls report it settled.
+REPLY_FULL_TEXT_ATTEMPTS = 3
+# Prompts longer than this are streamed with Input.insertText instead of being
+# embedded into the Runtime.evaluate source.
+LARGE_PROMPT_CHARS = int(os.environ.get("CHATGPT_SEND_LARGE_PROMPT_CHARS", "12000"))
+INSERT_CHUNK_CHARS = max(256, int(os.environ.get("CHATGPT_SEND_INSERT_CHUNK_CHARS", "4096")))
+# Origin of the ChatGPT UI; the profiling harness points this at a local fake page.
+CHATGPT_ORIGIN = (os.environ.get("CHATGPT_SEND_CHATGPT_ORIGIN", "https://chatgpt.com") or "https://chatgpt.com").rstrip("/")
+CDP_STATS_ENABLED = os.environ.get("CHATGPT_SEND_CDP_STATS", "0") == "1"
+# tracemalloc + RSS counters in wait heartbeats and a MEM_STATS line on close.
+MEM_STATS_ENABLED = os.environ.get("CHATGPT_SEND_MEM_STATS", "0") == "1"
+# Opt-in call tracer: a non-empty dir enables it; the ring keeps the last N slices.
+CDP_TRACE_DIR = os.environ.get("CHATGPT_SEND_CDP_TRACE_DIR", "").strip()
+CDP_TRACE_EVENTS = max(100, int(os.environ.get("CHATGPT_SEND_CDP_TRACE_EVENTS", "4000")))
+# Per-chat cost of the reply-wait DOM polls (<dir>/<chat_id>.json); read by chat_rollover.py.
+POLL_STATS_DIR = os.environ.get("CHATGPT_SEND_POLL_STATS_DIR", "").strip()
+# --preflight-and-send: how long to wait for the shell's decision, and how old
+# the snapshot may be before the pre-send gates are re-run against the page.
+PREFLIGHT_DECISION_TIMEOUT_SEC = float(os.environ.get("CHATGPT_SEND_PREFLIGHT_DECISION_TIMEOUT_SEC", "300"))
+PREFLIGHT_MAX_AGE_SEC = float(os.environ.get("CHATGPT_SEND_PREFLIGHT_MAX_AGE_SEC", "5"))
 UI_CONTRACT_SCHEMA_VERSION = "v1"
 NORM_VERSION = "v1"
 
@@ -44,6 +68,22 @@ def error_marker(code: str, detail: str = "") -> None:
     sys.stderr.flush()
 
 
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * (os.sysconf("SC_PAGE_SIZE") // 1024)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def mem_fields() -> str:
+    """Heartbeat suffix ` mem_kb= mem_peak_kb= rss_kb=`; empty unless CHATGPT_SEND_MEM_STATS=1."""
+    if not MEM_STATS_ENABLED or not tracemalloc.is_tracing():
+        return ""
+    cur, peak = tracemalloc.get_traced_memory()
+    return f" mem_kb={cur // 1024} mem_peak_kb={peak // 1024} rss_kb={rss_kb()}"
+
+
 def http_json(url: str, timeout: float = 5.0):
     req = urllib.request.Request(url, headers={"User-Agent": "chatgpt-send"})
     with urllib.request.urlopen(req, timeout=timeout) as r:
@@ -53,7 +93,7 @@ def http_json(url: str, timeout: float = 5.0):
 def chat_id_from_url(url: str) -> str | None:
     if not url:
         return None
-    m = re.match(r"^https://chatgpt\.com/c/([0-9a-fA-F-]{16,})", url)
+    m = re.match(re.escape(CHATGPT_ORIGIN) + r"/c/([0-9a-fA-F-]{16,})", url)
     return m.group(1) if m else None
 
 
@@ -75,16 +115,16 @@ def find_target_tab(tabs: list[dict], target_url: str) -> dict | None:
         return None
 
     # Non-conversation URL: use the last matching ChatGPT tab.
-    if target_url.startswith("https://chatgpt.com"):
-        is_home = target_url in ("https://chatgpt.com", "https://chatgpt.com/")
+    if target_url.startswith(CHATGPT_ORIGIN):
+        is_home = target_url in (CHATGPT_ORIGIN, CHATGPT_ORIGIN + "/")
         best = None
         best_conv = None
         for t in tabs:
             u = normalize_url(t.get("url") or "")
-            if not u.startswith("https://chatgpt.com"):
+            if not u.startswith(CHATGPT_ORIGIN):
                 continue
             # Prefer "home/new chat" tabs, not /c/ conversation tabs.
-            if u.startswith("https://chatgpt.com/c/"):
+            if u.startswith(CHATGPT_ORIGIN + "/c/"):
                 best_conv = t
                 continue
             best = t
@@ -106,25 +146,177 @@ def find_target_tab(tabs: list[dict], target_url: str) -> dict | None:
     return None
 
 
+# First matching needle names a Runtime.evaluate expression in the trace.
+EVAL_LABELS = (
+    ("preflightSnapshot", "preflight"),
+    ("lastAssistantTail", "state_compact"),
+    ("lastAssistantSig", "state"),
+    ("messages: selected", "fetch_last"),
+    ("insertedPreview", "send"),
+    ("sendEnabled", "ready"),
+    ("document.readyState", "ready_state"),
+    ("return !!ed;", "composer"),
+)
+
+
+def eval_label(expression: str) -> str:
+    for needle, label in EVAL_LABELS:
+        if needle in expression:
+            return label
+    return "other"
+
+
+class CDPTracer:
+    """Ring buffer of CDP round-trips, dumped as Chrome trace-event JSON.
+
+    Every CDP call becomes one complete ("X") slice; Runtime.evaluate calls
+    nest under an eval:<label> slice that carries the context-destroyed
+    retries. Per-name totals cover the whole process, not just the ring.
+    """
+
+    def __init__(self, capacity: int = CDP_TRACE_EVENTS, process_name: str = "cdp_chatgpt"):
+        self.events: collections.deque = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.process_name = process_name
+        # cdp_chatgpt.py mode (preflight_and_send, fetch_last, ...), named in CDP_TRACE.
+        self.mode = ""
+        self.pid = os.getpid()
+        self.totals: dict[str, dict] = {}
+        self._t0 = time.perf_counter()
+        self._wall0_us = int(time.time() * 1_000_000)
+
+    def now_us(self) -> int:
+        return self._wall0_us + int((time.perf_counter() - self._t0) * 1_000_000)
+
+    def record(self, name: str, cat: str, start_us: int, args: dict) -> None:
+        dur = max(0, self.now_us() - start_us)
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(
+            {"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": dur, "pid": self.pid, "tid": 1, "args": args}
+        )
+        acc = self.totals.setdefault(
+            name, {"count": 0, "total_us": 0, "max_us": 0, "errors": 0, "timeouts": 0, "retries": 0}
+        )
+        acc["count"] += 1
+        acc["total_us"] += dur
+        acc["max_us"] = max(acc["max_us"], dur)
+        acc["retries"] += int(args.get("retries") or 0)
+        if args.get("outcome") == "timeout":
+            acc["timeouts"] += 1
+        elif args.get("outcome") == "error":
+            acc["errors"] += 1
+
+    def summary(self) -> dict:
+        out = {}
+        for name, acc in sorted(self.totals.items()):
+            out[name] = {
+                "count": acc["count"],
+                "total_ms": round(acc["total_us"] / 1000, 1),
+                "mean_ms": round(acc["total_us"] / 1000 / max(1, acc["count"]), 2),
+                "max_ms": round(acc["max_us"] / 1000, 1),
+                "errors": acc["errors"],
+                "timeouts": acc["timeouts"],
+                "retries": acc["retries"],
+            }
+        return out
+
+    def to_json(self) -> dict:
+        meta = {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 1, "args": {"name": self.process_name}}
+        return {
+            "traceEvents": [meta] + list(self.events),
+            "displayTimeUnit": "ms",
+            "otherData": {"pid": self.pid, "dropped": self.dropped, "methods": self.summary()},
+        }
+
+    def dump(self, trace_dir: str) -> str:
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(trace_dir, f"cdp_trace_{int(time.time() * 1000)}_{self.pid}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+
 class CDP:
+    # Traffic counters for CHATGPT_SEND_CDP_STATS; class defaults keep test
+    # doubles built with CDP.__new__ working.
+    calls = 0
+    evals = 0
+    bytes_out = 0
+    bytes_in = 0
+    recv_waits = 0
+    tracer: CDPTracer | None = None
+    _trace_label = ""
+
     def __init__(self, ws_url: str, timeout: float = 15.0):
-        self.ws = websocket.create_connection(ws_url, timeout=timeout)
+        self.ws_url = ws_url
+        # websocket-client validates UTF-8 of every text frame in pure Python
+        # (one str per byte) unless wsaccel is installed; json.loads already
+        # rejects malformed payloads, so skip it.
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, skip_utf8_validation=True)
         self.ws.settimeout(timeout)
         self.next_id = 1
+        if CDP_TRACE_DIR:
+            self.tracer = CDPTracer()
 
     def close(self):
+        if CDP_STATS_ENABLED:
+            emit_cdp_stats(self)
+        if MEM_STATS_ENABLED:
+            emit_mem_stats(self)
+        if self.tracer is not None and CDP_TRACE_DIR:
+            try:
+                path = self.tracer.dump(CDP_TRACE_DIR)
+                mode = f" mode={self.tracer.mode}" if self.tracer.mode else ""
+                sys.stderr.write(
+                    f"CDP_TRACE path={path} events={len(self.tracer.events)} dropped={self.tracer.dropped}{mode}\n"
+                )
+            except OSError as e:
+                sys.stderr.write(f"CDP_TRACE error={e}\n")
         try:
             self.ws.close()
         except Exception:
             pass
 
     def call(self, method: str, params: dict | None = None, timeout: float | None = None) -> dict:
+        if self.tracer is None:
+            return self._call(method, params, timeout)
+        start = self.tracer.now_us()
+        out0, in0, waits0 = self.bytes_out, self.bytes_in, self.recv_waits
+        args = {"outcome": "ok"}
+        if self._trace_label:
+            args["label"] = self._trace_label
+        try:
+            return self._call(method, params, timeout)
+        except TimeoutError:
+            args["outcome"] = "timeout"
+            raise
+        except Exception:
+            args["outcome"] = "error"
+            raise
+        finally:
+            # in_bytes includes event frames that arrived while we waited.
+            args.update(
+                out_bytes=self.bytes_out - out0,
+                in_bytes=self.bytes_in - in0,
+                recv_waits=self.recv_waits - waits0,
+            )
+            self.tracer.record(method, "cdp", start, args)
+
+    def _call(self, method: str, params: dict | None, timeout: float | None) -> dict:
         msg_id = self.next_id
         self.next_id += 1
         payload = {"id": msg_id, "method": method}
         if params:
             payload["params"] = params
-        self.ws.send(json.dumps(payload))
+        out = json.dumps(payload)
+        self.calls += 1
+        if method == "Runtime.evaluate":
+            self.evals += 1
+        self.bytes_out += len(out) if out.isascii() else len(out.encode("utf-8"))
+        self.ws.send(out)
 
         deadline = time.time() + (timeout if timeout is not None else 30.0)
         while True:
@@ -138,19 +330,49 @@ class CDP:
             except (WebSocketTimeoutException, TimeoutError):
                 # Transient idle gaps on CDP websocket are expected; keep waiting
                 # until our method-level deadline is reached.
+                self.recv_waits += 1
+                continue
+            if isinstance(raw, bytes):
+                self.bytes_in += len(raw)
+            else:
+                self.bytes_in += len(raw) if raw.isascii() else len(raw.encode("utf-8"))
+            # Events (Runtime.consoleAPICalled, Page.*) are ignored; skip parsing
+            # them so a long wait does not build a throwaway dict per event.
+            if raw[:9] in ('{"method"', b'{"method"'):
                 continue
             data = json.loads(raw)
             if data.get("id") == msg_id:
                 if "error" in data:
                     raise RuntimeError(f"CDP error for {method}: {data['error']}")
                 return data.get("result") or {}
-            # Otherwise it's an event; ignore.
 
     def eval(self, expression: str, timeout: float = 30.0):
+        # Tests drive CDP.eval with duck-typed objects that only provide call().
+        if getattr(self, "tracer", None) is None:
+            return CDP._eval(self, expression, timeout, {})
+        label = eval_label(expression)
+        args = {"label": label, "outcome": "ok", "retries": 0, "expr_chars": len(expression)}
+        start = self.tracer.now_us()
+        self._trace_label = label
+        try:
+            return self._eval(expression, timeout, args)
+        except TimeoutError:
+            args["outcome"] = "timeout"
+            raise
+        except Exception:
+            args["outcome"] = "error"
+            raise
+        finally:
+            self._trace_label = ""
+            self.tracer.record("eval:" + label, "eval", start, args)
+
+    def _eval(self, expression: str, timeout: float, trace_args: dict):
         # During navigations/react re-renders, Chrome can throw transient errors like
         # "Execution context was destroyed" / "Promise was collected". Retry a bit.
         last_err = None
-        for _ in range(3):
+        for attempt in range(3):
+            if attempt:
+                trace_args["retries"] = attempt
             try:
                 res = self.call(
                     "Runtime.evaluate",
@@ -172,11 +394,13 @@ class CDP:
                 msg = str(e)
                 last_err = e
                 if "Execution context was destroyed" in msg or "Promise was collected" in msg:
+                    trace_args["retry_reason"] = msg[:120]
                     time.sleep(0.15)
                     continue
                 raise
             except TimeoutError as e:
                 last_err = e
+                trace_args["retry_reason"] = "timeout"
                 time.sleep(0.15)
                 continue
         if last_err:
@@ -184,8 +408,14 @@ class CDP:
         return None
 
 
-def js_state_expr() -> str:
-    return r"""
+def js_state_expr(compact: bool = False) -> str:
+    """Page state for the wait loops.
+
+    compact=True drops the full message texts: the page returns the last
+    TAIL_CHARS of the normalized assistant text plus its length and an FNV-1a
+    hash, so the per-poll payload stays constant-size.
+    """
+    return (r"""
 (() => {
   const q = (sel) => document.querySelector(sel);
   const qa = (sel) => Array.from(document.querySelectorAll(sel));
@@ -226,16 +456,37 @@ def js_state_expr() -> str:
   return {
     url: location.href,
     userCount: users.length,
-    lastUser: lastU,
     lastUserSig: lastUserSig,
     assistantCount: assistants.length,
-    lastAssistant: lastA,
     lastAssistantSig: lastSig,
     assistantAfterLastUser: assistantAfterLastUser,
     stopVisible: !!stop,
+    __TEXT_FIELDS__
   };
 })()
 """.strip()
+        .replace("__TEXT_FIELDS__", _JS_STATE_COMPACT_FIELDS if compact else _JS_STATE_FULL_FIELDS)
+        .replace("__TAIL_CHARS__", str(TAIL_CHARS))
+    )
+
+
+_JS_STATE_FULL_FIELDS = "lastUser: lastU, lastAssistant: lastA,"
+
+# Mirrors NormText.assistant: canonical whitespace, typing cursor stripped.
+_JS_STATE_COMPACT_FIELDS = r"""...(() => {
+      const a = (lastA || '').replace(/\u00a0/g, ' ').replace(/\r\n?/g, '\n').trim()
+        .replace(/\s+/g, ' ').replace(/[▍▋▌]+\s*$/, '').trim();
+      let h = 0x811c9dc5;
+      for (let i = 0; i < a.length; i++) {
+        h = Math.imul(h ^ a.charCodeAt(i), 0x01000193);
+      }
+      return {
+        lastUserLen: (lastU || '').length,
+        lastAssistantTail: a.slice(-__TAIL_CHARS__),
+        lastAssistantLen: a.length,
+        lastAssistantHash: (h >>> 0).toString(16),
+      };
+    })(),"""
 
 
 def js_fetch_last_expr(limit: int) -> str:
@@ -373,11 +624,26 @@ def js_send_ready_expr() -> str:
 """.strip()
 
 
+def js_preflight_expr(limit: int) -> str:
+    """fetch-last, send-ready and full state in one Runtime.evaluate round."""
+    return (
+        "(() => {\n"
+        "  const preflightSnapshot = {\n"
+        f"    fetch: {js_fetch_last_expr(limit)},\n"
+        f"    ready: {js_send_ready_expr()},\n"
+        f"    state: {js_state_expr()},\n"
+        "  };\n"
+        "  return preflightSnapshot;\n"
+        "})()"
+    )
+
+
 def js_send_expr(prompt: str, preferred_method: str = "button") -> str:
     # Use JSON encoding to avoid quoting issues.
     # ChatGPT composer uses a ProseMirror contenteditable div (#prompt-textarea).
     p = json.dumps(prompt)
     preferred = json.dumps((preferred_method or "button").strip().lower())
+    dispatch = _js_dispatch_block()
     return f"""
 (() => {{
   const text = {p};
@@ -427,6 +693,15 @@ def js_send_expr(prompt: str, preferred_method: str = "button") -> str:
   if (!inserted) return {{ok:false, error:'failed to insert prompt text'}};
   if (inserted !== expected) return {{ok:false, error:'prompt_insert_mismatch', insertedPreview: inserted.slice(0, 80), expectedPreview: expected.slice(0, 80)}};
 
+{dispatch}
+}})()
+""".strip()
+
+
+def _js_dispatch_block() -> str:
+    # Shared tail of the send expressions: expects `ed`, `preferred` and
+    # `inserted` in scope and returns the dispatch result object.
+    return r"""
   const form = ed.closest('form') || document;
   const btn =
     form.querySelector('button[data-testid="send-button"]') ||
@@ -434,41 +709,103 @@ def js_send_expr(prompt: str, preferred_method: str = "button") -> str:
     form.querySelector('button[aria-label*="Send"]') ||
     form.querySelector('button[type="submit"]');
 
-  const sendByEnter = () => {{
-    try {{
+  const sendByEnter = () => {
+    try {
       ed.focus();
-      ed.dispatchEvent(new KeyboardEvent('keydown', {{key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}}));
-      ed.dispatchEvent(new KeyboardEvent('keypress', {{key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}}));
-      ed.dispatchEvent(new KeyboardEvent('keyup', {{key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}}));
-      return {{ok:true, method:'enter'}};
-    }} catch (e) {{
-      return {{ok:false, error:'enter-dispatch-failed'}};
-    }}
-  }};
+      ed.dispatchEvent(new KeyboardEvent('keydown', {key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}));
+      ed.dispatchEvent(new KeyboardEvent('keypress', {key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}));
+      ed.dispatchEvent(new KeyboardEvent('keyup', {key:'Enter', code:'Enter', which:13, keyCode:13, bubbles:true}));
+      return {ok:true, method:'enter'};
+    } catch (e) {
+      return {ok:false, error:'enter-dispatch-failed'};
+    }
+  };
 
-  if (preferred === 'enter') {{
+  if (preferred === 'enter') {
     const enterRes = sendByEnter();
-    if (enterRes.ok) {{
-      return {{ok:true, insertedPreview: inserted.slice(0, 60), method:'enter'}};
-    }}
-    if (btn) {{
+    if (enterRes.ok) {
+      return {ok:true, insertedPreview: inserted.slice(0, 60), method:'enter'};
+    }
+    if (btn) {
       btn.click();
-      return {{ok:true, insertedPreview: inserted.slice(0, 60), method:'button_fallback'}};
-    }}
-    return {{ok:false, error:'send_unavailable_after_enter'}};
-  }}
+      return {ok:true, insertedPreview: inserted.slice(0, 60), method:'button_fallback'};
+    }
+    return {ok:false, error:'send_unavailable_after_enter'};
+  }
 
-  if (btn) {{
+  if (btn) {
     btn.click();
-    return {{ok:true, insertedPreview: inserted.slice(0, 60), method:'button'}};
-  }}
+    return {ok:true, insertedPreview: inserted.slice(0, 60), method:'button'};
+  }
   const enterRes = sendByEnter();
-  if (enterRes.ok) {{
-    return {{ok:true, insertedPreview: inserted.slice(0, 60), method:'enter_fallback'}};
+  if (enterRes.ok) {
+    return {ok:true, insertedPreview: inserted.slice(0, 60), method:'enter_fallback'};
+  }
+  return {ok:false, error:'send_unavailable_no_button_no_enter'};
+""".strip("\n")
+
+
+def js_prepare_composer_expr() -> str:
+    # Clear the composer and leave the caret in it for Input.insertText.
+    return r"""
+(() => {
+  const norm = (s) => (s || '').replace(/\u00a0/g, ' ').replace(/\s+/g, ' ').trim();
+  const q = (sel) => document.querySelector(sel);
+  const ed =
+    q('#prompt-textarea[contenteditable="true"]') ||
+    q('#prompt-textarea') ||
+    q('[contenteditable="true"].ProseMirror');
+  if (!ed) return {ok:false, error:'prompt editor not found'};
+  try {
+    ed.focus();
+    const sel = window.getSelection();
+    const range = document.createRange();
+    range.selectNodeContents(ed);
+    sel.removeAllRanges();
+    sel.addRange(range);
+    document.execCommand('insertText', false, '');
+  } catch (e) {
+    ed.textContent = '';
+    ed.dispatchEvent(new Event('input', {bubbles:true}));
+  }
+  const afterClear = norm(ed.innerText || ed.textContent || '');
+  if (afterClear) return {ok:false, error:'composer_not_cleared', afterClearLen: afterClear.length};
+  ed.focus();
+  return {ok:true};
+})()
+""".strip()
+
+
+def js_verified_dispatch_expr(expected_sha256: str, preferred_method: str = "button") -> str:
+    # Verifies the composer by SHA-256 of its normalized text (same
+    # normalization as stable_text_hash) and only then dispatches. Only the
+    # digest crosses the websocket, never the prompt itself.
+    expected = json.dumps(expected_sha256)
+    preferred = json.dumps((preferred_method or "button").strip().lower())
+    return f"""
+(async () => {{
+  const expected = {expected};
+  const preferred = {preferred};
+  const norm = (s) => (s || '').replace(/\\u00a0/g, ' ').replace(/\\s+/g, ' ').trim();
+  const q = (sel) => document.querySelector(sel);
+  const ed =
+    q('#prompt-textarea[contenteditable="true"]') ||
+    q('#prompt-textarea') ||
+    q('[contenteditable="true"].ProseMirror');
+  if (!ed) return {{ok:false, error:'prompt editor not found'}};
+  const inserted = norm(ed.innerText || ed.textContent || '');
+  if (!inserted) return {{ok:false, error:'failed to insert prompt text'}};
+  let digest = '';
+  try {{
+    const buf = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(inserted));
+    digest = Array.from(new Uint8Array(buf)).map((b) => b.toString(16).padStart(2, '0')).join('');
+  }} catch (e) {{
+    return {{ok:false, error:'prompt_digest_unavailable', insertedLen: inserted.length}};
   }}
-  return {{ok:false, error:'send_unavailable_no_button_no_enter'}};
+  if (digest !== expected) return {{ok:false, error:'prompt_insert_mismatch', insertedLen: inserted.length, insertedPreview: inserted.slice(0, 80), insertedSha: digest.slice(0, 12)}};
+{{dispatch}}
 }})()
-""".strip()
+""".strip().replace("{dispatch}", _js_dispatch_block())
 
 
 def js_press_enter_expr() -> str:
@@ -546,40 +883,130 @@ def js_click_stop_expr() -> str:
 """.strip()
 
 
+TYPING_CURSOR_RE = re.compile(r"[▍▋▌]+\s*$")
+WHITESPACE_RE = re.compile(r"\s+")
+TAIL_CHARS = 500
+NORM_CACHE_SIZE = 32
+
+
 def normalize_assistant_text(s: str) -> str:
-    # Normalize whitespace and strip transient typing cursor glyphs.
-    txt = canonical_normalize_text(s)
-    txt = re.sub(r"[▍▋▌]+\s*$", "", txt).strip()
-    return txt
+    return norm_text(s).assistant
 
 
 def canonical_normalize_text(s: str) -> str:
     txt = (s or "").replace("\u00a0", " ")
     txt = txt.replace("\r\n", "\n").replace("\r", "\n")
-    return re.sub(r"\s+", " ", txt.strip())
+    return WHITESPACE_RE.sub(" ", txt.strip())
 
 
 def normalize_text_for_compare(s: str) -> str:
-    return canonical_normalize_text(s)
+    return norm_text(s).norm
 
 
-def stable_text_hash(s: str) -> str:
-    norm = normalize_text_for_compare(s)
+def _sha256_text(norm: str) -> str:
     if not norm:
         return ""
     return hashlib.sha256(norm.encode("utf-8", errors="ignore")).hexdigest()
 
 
+class NormText:
+    """One raw page string with its normalized forms, each computed at most once."""
+
+    __slots__ = ("raw", "_norm", "_assistant", "_hash", "_tail_hash", "_assistant_tail_hash")
+
+    def __init__(self, raw: str):
+        self.raw = raw or ""
+        self._norm: str | None = None
+        self._assistant: str | None = None
+        self._hash: str | None = None
+        self._tail_hash: str | None = None
+        self._assistant_tail_hash: str | None = None
+
+    @property
+    def norm(self) -> str:
+        if self._norm is None:
+            self._norm = canonical_normalize_text(self.raw)
+        return self._norm
+
+    @property
+    def assistant(self) -> str:
+        # Same as norm, minus a transient typing cursor glyph at the end.
+        if self._assistant is None:
+            self._assistant = TYPING_CURSOR_RE.sub("", self.norm).strip()
+        return self._assistant
+
+    @property
+    def hash(self) -> str:
+        if self._hash is None:
+            self._hash = _sha256_text(self.norm)
+        return self._hash
+
+    @property
+    def signature(self) -> str:
+        h = self.hash
+        return f"{h[:12]}:{len(self.norm)}" if h else ""
+
+    @property
+    def tail(self) -> str:
+        return self.norm[-TAIL_CHARS:]
+
+    @property
+    def tail_hash(self) -> str:
+        if self._tail_hash is None:
+            self._tail_hash = _sha256_text(canonical_normalize_text(self.tail))
+        return self._tail_hash
+
+    @property
+    def assistant_tail_hash(self) -> str:
+        if self._assistant_tail_hash is None:
+            self._assistant_tail_hash = _sha256_text(canonical_normalize_text(self.assistant[-TAIL_CHARS:]))
+        return self._assistant_tail_hash
+
+
+_NORM_CACHE: dict[str, NormText] = {}
+
+
+def norm_text(raw: str) -> NormText:
+    """Return the memoized NormText for `raw` (small LRU keyed by the raw string)."""
+    raw = raw or ""
+    hit = _NORM_CACHE.pop(raw, None)
+    if hit is None:
+        hit = NormText(raw)
+        if len(_NORM_CACHE) >= NORM_CACHE_SIZE:
+            _NORM_CACHE.pop(next(iter(_NORM_CACHE)))
+    _NORM_CACHE[raw] = hit
+    return hit
+
+
+def assistant_norm_for_state(st: dict, prev: NormText | None, prev_sig: str) -> NormText:
+    """Poll fast path: reuse `prev` while lastAssistantSig and the raw text are unchanged.
+
+    Compact states (js_state_expr(compact=True)) only carry the normalized tail.
+    """
+    raw = (st.get("lastAssistantTail") if "lastAssistantTail" in st else st.get("lastAssistant")) or ""
+    raw = raw.strip()
+    sig = (st.get("lastAssistantSig") or "").strip()
+    if prev is not None and sig and sig == prev_sig and len(raw) == len(prev.raw) and raw == prev.raw:
+        return prev
+    return norm_text(raw)
+
+
+def assistant_content_key(st: dict, nt: NormText) -> str:
+    if "lastAssistantHash" in st:
+        return f"{st.get('lastAssistantHash') or ''}:{int(st.get('lastAssistantLen') or 0)}"
+    return nt.assistant
+
+
+def stable_text_hash(s: str) -> str:
+    return norm_text(s).hash
+
+
 def text_signature(s: str) -> str:
-    norm = normalize_text_for_compare(s)
-    if not norm:
-        return ""
-    h = hashlib.sha256(norm.encode("utf-8", errors="ignore")).hexdigest()
-    return f"{h[:12]}:{len(norm)}"
+    return norm_text(s).signature
 
 
 def reply_fingerprint_and_anchor(prompt: str, st: dict) -> tuple[str, str]:
-    last_assistant = normalize_assistant_text(st.get("lastAssistant") or "")
+    last_assistant = norm_text(st.get("lastAssistant") or "").assistant
     last_assistant_sig = (st.get("lastAssistantSig") or "").strip()
     last_user_sig = (st.get("lastUserSig") or "").strip()
     user_count = int(st.get("userCount") or 0)
@@ -622,6 +1049,48 @@ def should_skip_duplicate_send(prompt: str, baseline: dict) -> bool:
     return prompt_echo_matches(prompt, last_user)
 
 
+def insert_prompt_chunked(cdp: CDP, prompt: str) -> dict:
+    prep = cdp.eval(js_prepare_composer_expr(), timeout=10.0) or {}
+    if not prep.get("ok"):
+        return prep
+    chunks = 0
+    for i in range(0, len(prompt), INSERT_CHUNK_CHARS):
+        cdp.call("Input.insertText", {"text": prompt[i : i + INSERT_CHUNK_CHARS]}, timeout=15.0)
+        chunks += 1
+    return {"ok": True, "chunks": chunks}
+
+
+def send_prompt(cdp: CDP, prompt: str, preferred_method: str) -> dict:
+    """Insert `prompt` into the composer and dispatch it.
+
+    Short prompts keep the single Runtime.evaluate path. Long ones are streamed
+    in INSERT_CHUNK_CHARS pieces through Input.insertText and verified in the
+    page by digest before dispatch.
+    """
+    if len(prompt) <= LARGE_PROMPT_CHARS:
+        return cdp.eval(js_send_expr(prompt, preferred_method), timeout=10.0) or {}
+    t0 = time.time()
+    ins = insert_prompt_chunked(cdp, prompt)
+    if not ins.get("ok"):
+        return ins
+    expected = stable_text_hash(prompt)
+    res = cdp.eval(js_verified_dispatch_expr(expected, preferred_method), timeout=20.0) or {}
+    progress(
+        f"phase=send event=chunked_insert chars={len(prompt)} chunks={ins.get('chunks', 0)} "
+        f"verify={'ok' if res.get('ok') else res.get('error', 'unknown')} elapsed_ms={int((time.time() - t0) * 1000)}"
+    )
+    return res
+
+
+def read_prompt_input(prompt: str | None, prompt_file: str | None) -> str | None:
+    if prompt_file:
+        if prompt_file == "-":
+            return sys.stdin.read()
+        with open(prompt_file, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    return prompt
+
+
 def wait_for_user_echo(cdp: CDP, baseline: dict, prompt: str, timeout_s: float = 8.0) -> dict | None:
     """Wait until the sent prompt is visible as the newest user message."""
     deadline = time.time() + timeout_s
@@ -655,14 +1124,16 @@ def wait_for_assistant_stable_after_anchor(
     last_state: dict = {}
     last_marker: tuple[str, str, int] | None = None
     quiet_since = 0.0
+    nt: NormText | None = None
+    sig = ""
 
     while time.time() < deadline:
         st = cdp.eval(state_expr, timeout=10.0) or {}
         last_state = st
         stop_visible = bool(st.get("stopVisible"))
         after_anchor = bool(st.get("assistantAfterLastUser"))
-        raw_txt = (st.get("lastAssistant") or "").strip()
-        norm_txt = normalize_assistant_text(raw_txt)
+        nt = assistant_norm_for_state(st, nt, sig)
+        norm_txt = nt.assistant
         sig = (st.get("lastAssistantSig") or "").strip()
 
         if after_anchor and norm_txt and not stop_visible:
@@ -684,7 +1155,7 @@ def wait_for_assistant_stable_after_anchor(
 def wait_for_dispatch_signal(cdp: CDP, baseline: dict, max_wait_s: float = 8.0) -> bool:
     """Return True if UI indicates prompt was dispatched (stop/activity/user turn)."""
     deadline = time.time() + max_wait_s
-    state_expr = js_state_expr()
+    state_expr = js_state_expr(compact=True)
     b_user = int(baseline.get("userCount") or 0)
     b_stop = bool(baseline.get("stopVisible"))
     b_user_sig = (baseline.get("lastUserSig") or "").strip()
@@ -810,11 +1281,106 @@ def try_reuse_after_echo_miss_reset(
     return False, "", st or {}
 
 
-def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url: str | None = None) -> str:
+class PollCost:
+    """Running cost of the reply-wait state polls: O(1) state, no samples kept.
+
+    The page-side scan walks every message node, so its time grows with the
+    thread; `scan_avg_ms` is what chat_rollover.py compares against its limit.
+    """
+
+    __slots__ = ("polls", "total_ms", "max_ms", "messages")
+
+    def __init__(self) -> None:
+        self.polls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.messages = 0
+
+    def scan(self, cdp: CDP, expr: str) -> dict:
+        t = time.perf_counter()
+        st = cdp.eval(expr, timeout=10.0) or {}
+        ms = (time.perf_counter() - t) * 1000.0
+        self.polls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if isinstance(st, dict):
+            self.messages = int(st.get("userCount") or 0) + int(st.get("assistantCount") or 0)
+        return st
+
+    def avg_ms(self) -> float:
+        return self.total_ms / self.polls if self.polls else 0.0
+
+    def emit(self, target_url: str | None) -> None:
+        if not self.polls:
+            return
+        sys.stderr.write(
+            f"POLL_STATS polls={self.polls} scan_avg_ms={self.avg_ms():.1f} scan_max_ms={self.max_ms:.1f}"
+            f" messages={self.messages}\n"
+        )
+        sys.stderr.flush()
+        chat_id = chat_id_from_url(target_url or "")
+        if not POLL_STATS_DIR or not chat_id:
+            return
+        obj = {
+            "chat_id": chat_id,
+            "polls": self.polls,
+            "scan_avg_ms": round(self.avg_ms(), 1),
+            "scan_max_ms": round(self.max_ms, 1),
+            "messages": self.messages,
+            "ts": int(time.time()),
+        }
+        try:
+            os.makedirs(POLL_STATS_DIR, exist_ok=True)
+            path = os.path.join(POLL_STATS_DIR, f"{chat_id}.json")
+            tmp = f"{path}.tmp-{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(obj, f, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError as e:
+            error_marker("W_POLL_STATS_WRITE_FAILED", f"err={e}")
+
+
+def read_full_reply(cdp: CDP) -> str | None:
+    """Full text of the last assistant turn; None if every attempt failed or came back empty."""
+    for attempt in range(1, REPLY_FULL_TEXT_ATTEMPTS + 1):
+        if attempt > 1:
+            time.sleep(REPLY_WAIT_POLL_SEC)
+        try:
+            full = cdp.eval(js_state_expr(), timeout=10.0) or {}
+        except Exception as e:
+            error_marker("REPLY_WAIT", f"full_text_retry attempt={attempt} err={e}")
+            continue
+        text = (full.get("lastAssistant") or "").strip()
+        if text:
+            return text
+        error_marker("REPLY_WAIT", f"full_text_retry attempt={attempt} err=empty")
+    return None
+
+
+def wait_for_response(
+    cdp: CDP, baseline: dict, timeout_s: float, *, target_url: str | None = None, anchored: bool = False
+) -> str:
+    """Wait for the reply and return its full text.
+
+    anchored=True: `baseline` was taken after the prompt echoed as the last
+    user turn, so any assistant turn after it is this prompt's reply, even one
+    that had already finished by the time the anchor was read.
+    """
+    cost = PollCost()
+    try:
+        return _wait_for_response(cdp, baseline, timeout_s, target_url=target_url, anchored=anchored, cost=cost)
+    finally:
+        cost.emit(target_url)
+
+
+def _wait_for_response(
+    cdp: CDP, baseline: dict, timeout_s: float, *, target_url: str | None, anchored: bool, cost: PollCost
+) -> str:
     t0 = time.time()
     deadline = t0 + timeout_s
     activity_deadline = t0 + min(timeout_s, max(15.0, ACTIVITY_TIMEOUT_SEC))
-    state_expr = js_state_expr()
+    # Polls use the compact state; the full reply text is read once at the end.
+    state_expr = js_state_expr(compact=True)
 
     b_user = int(baseline.get("userCount") or 0)
     b_user_sig = (baseline.get("lastUserSig") or "").strip()
@@ -827,7 +1393,7 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
     saw_stop = False
     next_heartbeat = t0
     while time.time() < activity_deadline:
-        st = cdp.eval(state_expr, timeout=10.0) or {}
+        st = cost.scan(cdp, state_expr)
         user_count = int(st.get("userCount") or 0)
         user_sig = (st.get("lastUserSig") or "").strip()
         asst_count = int(st.get("assistantCount") or 0)
@@ -842,6 +1408,7 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
                 f" stop={int(stop_visible)}"
                 f" user_sig_changed={int(bool(user_sig and user_sig != b_user_sig))}"
                 f" asst_sig_changed={int(bool(sig and sig != b_sig))}"
+                f"{mem_fields()}"
             )
             next_heartbeat = time.time() + HEARTBEAT_SEC
         if stop_visible:
@@ -852,6 +1419,7 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
             or asst_count > b_asst
             or (sig and sig != b_sig)
             or stop_visible
+            or (anchored and bool(st.get("assistantAfterLastUser")))
         ):
             saw_activity = True
             progress(
@@ -860,7 +1428,7 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
                 f" user={user_count} asst={asst_count} stop={int(stop_visible)}"
             )
             break
-        time.sleep(0.5)
+        time.sleep(REPLY_WAIT_POLL_SEC)
     else:
         waited = time.time() - t0
         error_marker(
@@ -874,6 +1442,7 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
 
     # Wait until generation is done: stop button hidden AND last assistant state stabilizes.
     last_marker = None
+    full_marker = None
     last_raw_text = ""
     stable = 0
     changed_vs_baseline = False
@@ -881,12 +1450,15 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
     stop_stuck_marker = None
     stop_stuck_since = 0.0
     stop_stuck_recovered = False
+    nt: NormText | None = None
+    sig = ""
     while time.time() < deadline:
-        st = cdp.eval(state_expr, timeout=10.0) or {}
-        raw_txt = (st.get("lastAssistant") or "").strip()
-        txt = normalize_assistant_text(raw_txt)
-        tail = normalize_text_for_compare(txt)[-500:]
-        tail_hash = stable_text_hash(tail) if tail else "none"
+        st = cost.scan(cdp, state_expr)
+        nt = assistant_norm_for_state(st, nt, sig)
+        compact = "lastAssistantTail" in st
+        txt = nt.assistant
+        raw_txt = "" if compact else nt.raw
+        tail_hash = nt.assistant_tail_hash or "none"
         user_sig = (st.get("lastUserSig") or "").strip()
         sig = (st.get("lastAssistantSig") or "").strip()
         asst_count = int(st.get("assistantCount") or 0)
@@ -900,8 +1472,11 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
                 f" hash={tail_hash}"
                 f" stable={stable}"
                 f" changed={int(changed_vs_baseline)}"
+                f"{mem_fields()}"
+            )
+            error_marker(
+                "REPLY_WAIT", f"heartbeat stop_visible={1 if stop_visible else 0} hash={tail_hash}{mem_fields()}"
             )
-            error_marker("REPLY_WAIT", f"heartbeat stop_visible={1 if stop_visible else 0} hash={tail_hash}")
             next_heartbeat = time.time() + HEARTBEAT_SEC
         if stop_visible:
             saw_stop = True
@@ -940,14 +1515,25 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
         if asst_count > b_asst or (sig and sig != b_sig) or (user_sig and user_sig != b_user_sig):
             changed_vs_baseline = True
 
-        marker = (sig, txt, asst_count)
+        marker = (sig, assistant_content_key(st, nt), asst_count)
         if marker == last_marker:
             stable += 1
         else:
             stable = 0
             last_marker = marker
-        if raw_txt:
+        if compact and txt and stable >= 1 and not stop_visible and full_marker != marker:
+            # Text looks settled: fetch the full reply once for this marker.
+            full_text = read_full_reply(cdp)
+            if full_text is None:
+                # The compact tail is only a snippet; never hand it out as the reply.
+                error_marker("E_REPLY_FULL_TEXT_FAILED", f"phase=wait_finish attempts={REPLY_FULL_TEXT_ATTEMPTS}")
+                raise RuntimeError("Failed to read the full assistant reply (phase=wait_finish)")
+            last_raw_text = full_text
+            full_marker = marker
+        elif raw_txt:
             last_raw_text = raw_txt
+        # Compact polls may only answer with the text read for this very state.
+        reply = raw_txt or (last_raw_text if not compact or full_marker == marker else "")
 
         # If we observed activity and generation is not active, return when
         # the last assistant state stays unchanged for a short period.
@@ -955,11 +1541,11 @@ def wait_for_response(cdp: CDP, baseline: dict, timeout_s: float, *, target_url:
             not stop_visible
             and stable >= 2
             and (changed_vs_baseline or saw_stop or saw_activity)
-            and (txt or last_raw_text)
+            and reply
         ):
             progress(f"phase=wait_finish event=completed elapsed={time.time()-t0:.1f}s")
-            return (raw_txt or last_raw_text).strip()
-        time.sleep(0.5)
+            return reply.strip()
+        time.sleep(REPLY_WAIT_POLL_SEC)
     waited_finish = time.time() - t0
     error_marker("E_ACTIVITY_TIMEOUT", f"phase=wait_finish waited={waited_finish:.1f}s")
     raise TimeoutError(f"Timed out waiting for assistant to finish (phase=wait_finish waited={waited_finish:.1f}s)")
@@ -1004,7 +1590,8 @@ def wait_until_send_ready(cdp: CDP, timeout_s: float = 180.0) -> bool:
     next_heartbeat = t0
     saw_generation_in_progress = False
     ready_expr = js_send_ready_expr()
-    state_expr = js_state_expr()
+    # The stale-stop marker only needs counts and signatures.
+    state_expr = js_state_expr(compact=True)
     stale_marker = None
     stale_since = 0.0
     while time.time() < deadline:
@@ -1056,6 +1643,7 @@ def wait_until_send_ready(cdp: CDP, timeout_s: float = 180.0) -> bool:
                 f" has_editor={int(has_editor)}"
                 f" has_send={int(has_send)}"
                 f" stop={int(stop_visible)}"
+                f"{mem_fields()}"
             )
             next_heartbeat = time.time() + HEARTBEAT_SEC
         time.sleep(0.5)
@@ -1065,6 +1653,22 @@ def wait_until_send_ready(cdp: CDP, timeout_s: float = 180.0) -> bool:
     raise TimeoutError("Timed out waiting for ChatGPT to become ready for a new prompt")
 
 
+def note_tab_navigation(cdp: CDP) -> None:
+    # Drop the shared /json/list cache (bin/tab_inventory.py) so status/doctor
+    # do not serve the pre-navigation URL until the TTL runs out.
+    if not (os.environ.get("CHATGPT_SEND_TAB_CACHE_DIR") or "").strip():
+        return
+    m = re.match(r"^wss?://[^/]+:(\d+)/", getattr(cdp, "ws_url", "") or "")
+    if not m:
+        return
+    try:
+        import tab_inventory
+
+        tab_inventory.invalidate(int(m.group(1)))
+    except Exception:
+        pass
+
+
 def ensure_target_route(cdp: CDP, target_url: str) -> bool:
     """Ensure we are on the expected /c/<id> conversation before sending."""
     target_chat_id = chat_id_from_url(target_url)
@@ -1085,6 +1689,7 @@ def ensure_target_route(cdp: CDP, target_url: str) -> bool:
             break
         try:
             cdp.call("Page.navigate", {"url": target_url}, timeout=10.0)
+            note_tab_navigation(cdp)
             progress(f"phase=route_guard event=navigate attempt={attempt}")
         except Exception as e:
             progress(f"phase=route_guard event=navigate_error attempt={attempt} err={e}")
@@ -1108,6 +1713,11 @@ def fetch_last_messages(cdp: CDP, target_url: str, limit: int = 6) -> dict:
 
     st = cdp.eval(js_fetch_last_expr(n), timeout=20.0) or {}
     ready = cdp.eval(js_send_ready_expr(), timeout=10.0) or {}
+    return fetch_last_payload(st, ready, target_url, n)
+
+
+def fetch_last_payload(st: dict, ready: dict, target_url: str, n: int) -> dict:
+    """Build the --fetch-last JSON from js_fetch_last_expr/js_send_ready_expr results."""
     messages = st.get("messages") or []
 
     clean_msgs: list[dict] = []
@@ -1116,16 +1726,15 @@ def fetch_last_messages(cdp: CDP, target_url: str, limit: int = 6) -> dict:
         if role not in ("user", "assistant"):
             continue
         txt = (m.get("text") or "").strip()
-        norm = normalize_text_for_compare(txt)
-        tail = norm[-500:]
+        nt = norm_text(txt)
         clean_msgs.append(
             {
                 "role": role,
                 "text": txt,
                 "text_len": int(m.get("text_len") or len(txt)),
-                "tail_hash": stable_text_hash(tail) if tail else "",
+                "tail_hash": nt.tail_hash,
                 "sig": (m.get("sig") or "").strip(),
-                "preview": norm[:220],
+                "preview": nt.norm[:220],
             }
         )
 
@@ -1204,12 +1813,12 @@ def fetch_last_messages(cdp: CDP, target_url: str, limit: int = 6) -> dict:
     fingerprint_v1 = hashlib.sha256(
         fingerprint_payload.encode("utf-8", errors="ignore")
     ).hexdigest()
-    user_tail = normalize_text_for_compare(last_user)[-500:]
-    assistant_tail = normalize_text_for_compare(last_assistant)[-500:]
-    user_tail_hash = stable_text_hash(user_tail) if user_tail else ""
-    assistant_tail_hash = stable_text_hash(assistant_tail) if assistant_tail else ""
-    last_user_text_sig = text_signature(last_user)
-    assistant_text_sig = text_signature(last_assistant)
+    user_nt = norm_text(last_user)
+    assistant_nt = norm_text(last_assistant)
+    user_tail_hash = user_nt.tail_hash
+    assistant_tail_hash = assistant_nt.tail_hash
+    last_user_text_sig = user_nt.signature
+    assistant_text_sig = assistant_nt.signature
     checkpoint_ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     checkpoint_id = f"SPC-{checkpoint_ts}-{(assistant_tail_hash[:8] if assistant_tail_hash else 'none')}"
 
@@ -1231,13 +1840,13 @@ def fetch_last_messages(cdp: CDP, target_url: str, limit: int = 6) -> dict:
         "last_user_text": last_user,
         "last_user_text_sig": last_user_text_sig,
         "last_user_sig": last_user_sig,
-        "last_user_hash": stable_text_hash(last_user),
+        "last_user_hash": user_nt.hash,
         "assistant_text": last_assistant,
         "assistant_text_sig": assistant_text_sig,
         "last_assistant_sig": last_assistant_sig,
         "assistant_tail_hash": assistant_tail_hash,
-        "assistant_tail_len": len(assistant_tail),
-        "assistant_preview": normalize_text_for_compare(last_assistant)[:220],
+        "assistant_tail_len": len(assistant_nt.tail),
+        "assistant_preview": assistant_nt.norm[:220],
         "user_tail_hash": user_tail_hash,
         "ui_state": ui_state,
         "ui_contract_sig": ui_contract_sig,
@@ -1296,6 +1905,79 @@ def precheck_reply_before_send(cdp: CDP, target_url: str, prompt: str, timeout_s
     return False, "", baseline
 
 
+def preflight_decision(prompt: str, state: dict) -> str:
+    if should_skip_duplicate_send(prompt, state):
+        return "prompt_present"
+    if bool(state.get("stopVisible")):
+        return "generation_in_progress"
+    return "need_send"
+
+
+def preflight_snapshot(cdp: CDP, target_url: str, prompt: str, limit: int = 6) -> tuple[dict, dict]:
+    """Route, UI contract, fetch-last, dedupe decision and baseline from one DOM scan.
+
+    Returns (payload, baseline): payload is the --fetch-last JSON plus a
+    "preflight" block for the shell, baseline is the js_state_expr() result the
+    send path starts from. The classic guards only run when the snapshot shows
+    a page without a composer or the wrong conversation.
+    """
+    n = max(1, min(int(limit), 50))
+    expr = js_preflight_expr(n)
+    evals0 = cdp.evals
+    t0 = time.time()
+    route = "ok"
+    sys.stderr.write(f"FETCH_LAST start n={n} source=preflight\n")
+    sys.stderr.flush()
+    snap = cdp.eval(expr, timeout=20.0) or {}
+    if not (snap.get("ready") or {}).get("hasEditor") and not (snap.get("state") or {}).get("stopVisible"):
+        wait_for_composer(cdp, timeout_s=30.0)
+        route = "composer_wait"
+        snap = cdp.eval(expr, timeout=20.0) or {}
+    target_chat_id = chat_id_from_url(target_url)
+    current_url = normalize_url((snap.get("state") or {}).get("url") or "")
+    if target_chat_id and chat_id_from_url(current_url) != target_chat_id:
+        if not ensure_target_route(cdp, target_url):
+            error_marker("E_ROUTE_MISMATCH_FATAL", "failed_to_activate_expected_target_chat")
+            raise RuntimeError("Route mismatch: failed to activate expected target chat.")
+        route = "renav"
+        snap = cdp.eval(expr, timeout=20.0) or {}
+
+    ready = snap.get("ready") or {}
+    state = snap.get("state") or {}
+    payload = fetch_last_payload(snap.get("fetch") or {}, ready, target_url, n)
+    missing = ui_contract_missing(ready, state)
+    decision = preflight_decision(prompt, state)
+    evals = cdp.evals - evals0
+    scan_ms = int((time.time() - t0) * 1000)
+    payload["preflight"] = {
+        "decision": decision,
+        "route": route,
+        "ui_contract_ok": not missing,
+        "ui_contract_missing": missing,
+        "evals": evals,
+        "scan_ms": scan_ms,
+    }
+    error_marker(
+        "PREFLIGHT",
+        f"decision={decision} route={route} ui_contract={'ok' if not missing else 'fail'} evals={evals} scan_ms={scan_ms}",
+    )
+    return payload, state
+
+
+def read_preflight_decision(path: str, timeout_s: float) -> str:
+    """One line from the shell: "send", or "abort <reason>". EOF/timeout abort."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        ready, _, _ = select.select([f], [], [], max(0.0, timeout_s))
+        if not ready:
+            error_marker("E_PREFLIGHT_DECISION_TIMEOUT", f"waited={timeout_s:.1f}s")
+            return "abort decision_timeout"
+        return (f.readline() or "").strip() or "abort eof"
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
 def is_generation_in_progress(cdp: CDP) -> bool:
     """Return True when ChatGPT currently shows the Stop button."""
     try:
@@ -1345,6 +2027,17 @@ def is_generation_in_progress(cdp: CDP) -> bool:
     return False
 
 
+def ui_contract_missing(ready: dict, state: dict) -> list[str]:
+    missing: list[str] = []
+    if not bool(ready.get("hasEditor")):
+        missing.append("composer")
+    if "assistantAfterLastUser" not in state:
+        missing.append("assistantAfterLastUser")
+    if not (bool(ready.get("hasSend")) or bool(ready.get("stopVisible"))):
+        missing.append("submit_control")
+    return missing
+
+
 def probe_ui_contract(cdp: CDP) -> bool:
     ready = cdp.eval(js_send_ready_expr(), timeout=10.0) or {}
     state = cdp.eval(js_state_expr(), timeout=10.0) or {}
@@ -1353,14 +2046,7 @@ def probe_ui_contract(cdp: CDP) -> bool:
     has_send_button = bool(ready.get("hasSend"))
     has_stop_button = bool(ready.get("stopVisible"))
     can_compute_assistant_after_anchor = "assistantAfterLastUser" in state
-
-    missing: list[str] = []
-    if not has_composer:
-        missing.append("composer")
-    if not can_compute_assistant_after_anchor:
-        missing.append("assistantAfterLastUser")
-    if not (has_send_button or has_stop_button):
-        missing.append("submit_control")
+    missing = ui_contract_missing(ready, state)
 
     error_marker(
         "UI_CONTRACT",
@@ -1403,6 +2089,31 @@ def emit_timing(
     sys.stderr.flush()
 
 
+def emit_cdp_stats(cdp: CDP) -> None:
+    sys.stderr.write(
+        f"CDP_STATS calls={cdp.calls} evals={cdp.evals} bytes_out={cdp.bytes_out} bytes_in={cdp.bytes_in}\n"
+    )
+    sys.stderr.flush()
+
+
+def emit_mem_stats(cdp: CDP) -> None:
+    traced_kb = peak_kb = 0
+    if tracemalloc.is_tracing():
+        cur, peak = tracemalloc.get_traced_memory()
+        traced_kb, peak_kb = cur // 1024, peak // 1024
+    try:
+        import resource
+
+        rss_peak_kb = int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    except Exception:
+        rss_peak_kb = 0
+    sys.stderr.write(
+        f"MEM_STATS traced_kb={traced_kb} traced_peak_kb={peak_kb} rss_kb={rss_kb()} rss_peak_kb={rss_peak_kb}"
+        f" evals={cdp.evals}\n"
+    )
+    sys.stderr.flush()
+
+
 def mark_timeout_kind(message: str, phase: str = "main") -> None:
     msg = (message or "").lower()
     if "runtime.evaluate" in msg:
@@ -1411,52 +2122,164 @@ def mark_timeout_kind(message: str, phase: str = "main") -> None:
         error_marker("COMPOSER_TIMEOUT", f"phase={phase}")
 
 
-def soft_reset_tab(cdp: CDP, target_url: str, reason: str, timeout_s: float = 60.0) -> bool:
-    sys.stderr.write(f"SOFT_RESET start reason={reason}\n")
-    sys.stderr.flush()
-    try:
+SOFT_RESET_TIER_ORDER = ("nudge", "renav", "reload", "hard_reload")
+# Verify budget per tier; the last tier gets whatever is left of timeout_s.
+SOFT_RESET_TIER_VERIFY_SEC = {"nudge": 4.0, "renav": 12.0, "reload": 30.0}
+# A missing echo needs fresh conversation data, which a nudge cannot give.
+SOFT_RESET_MIN_TIER_BY_REASON = {"echo_miss_post_verify": "renav"}
+
+
+def soft_reset_tiers(min_tier: str = "nudge") -> list[str]:
+    raw = os.environ.get("CHATGPT_SEND_SOFT_RESET_TIERS", ",".join(SOFT_RESET_TIER_ORDER))
+    wanted = [t.strip() for t in raw.split(",") if t.strip() in SOFT_RESET_TIER_ORDER]
+    floor = SOFT_RESET_TIER_ORDER.index(min_tier) if min_tier in SOFT_RESET_TIER_ORDER else 0
+    tiers = [t for t in SOFT_RESET_TIER_ORDER if t in wanted and SOFT_RESET_TIER_ORDER.index(t) >= floor]
+    return tiers or ["hard_reload"]
+
+
+def js_soft_nudge_expr() -> str:
+    # Wake a stalled SPA without touching the network: lifecycle events make
+    # React re-check visibility/focus, scrolling re-mounts virtualized turns.
+    return r"""
+(() => {
+  try {
+    document.dispatchEvent(new Event('visibilitychange'));
+    window.dispatchEvent(new Event('focus'));
+    window.dispatchEvent(new Event('resize'));
+    const turns = document.querySelectorAll('[data-message-author-role]');
+    const last = turns.length ? turns[turns.length - 1] : null;
+    if (last && last.scrollIntoView) last.scrollIntoView({block: 'end'});
+    const ed =
+      document.querySelector('#prompt-textarea[contenteditable="true"]') ||
+      document.querySelector('#prompt-textarea') ||
+      document.querySelector('[contenteditable="true"].ProseMirror');
+    if (ed && ed.focus) ed.focus();
+    return {ok: true, turns: turns.length, hasEditor: !!ed};
+  } catch (e) {
+    return {ok: false, error: String(e)};
+  }
+})()
+""".strip()
+
+
+def js_client_renav_expr(target_url: str) -> str:
+    # Client-side re-navigation to the same /c/<id>: the router re-runs the
+    # route loaders without re-downloading the app bundle.
+    path = json.dumps(re.sub(r"^https?://[^/]+", "", normalize_url(target_url)) or "/")
+    return f"""
+(() => {{
+  try {{
+    const path = {path};
+    const link = Array.from(document.querySelectorAll('nav a[href], aside a[href]'))
+      .find((a) => a.getAttribute('href') === path);
+    history.pushState({{renav: Date.now()}}, '', path);
+    window.dispatchEvent(new PopStateEvent('popstate', {{state: history.state}}));
+    if (link) link.click();
+    return {{ok: true, via: link ? 'link' : 'popstate'}};
+  }} catch (e) {{
+    return {{ok: false, error: String(e)}};
+  }}
+}})()
+""".strip()
+
+
+def _wait_ready_state(cdp: CDP, timeout_s: float) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            ready = str(cdp.eval("document.readyState", timeout=10.0) or "").strip().lower()
+            if ready == "complete":
+                return
+        except TimeoutError as e:
+            mark_timeout_kind(str(e), phase="soft_reset_ready_state")
+        time.sleep(0.2)
+
+
+def _soft_reset_tier(cdp: CDP, tier: str, target_url: str, verify_s: float) -> None:
+    """Run one recovery tier and verify the chat is usable; raises on failure."""
+    if tier == "nudge":
+        # A nudge only counts when it clears a stop/generating state that was
+        # visible before it ran; anything else goes to the next tier.
+        pre = cdp.eval(js_send_ready_expr(), timeout=10.0) or {}
+        if not pre.get("stopVisible"):
+            raise RuntimeError("nudge_nothing_to_clear")
+        res = cdp.eval(js_soft_nudge_expr(), timeout=10.0) or {}
+        if not res.get("ok"):
+            raise RuntimeError(f"nudge_failed:{res.get('error') or 'unknown'}")
+    elif tier == "renav":
+        res = cdp.eval(js_client_renav_expr(target_url), timeout=10.0) or {}
+        if not res.get("ok"):
+            raise RuntimeError(f"renav_failed:{res.get('error') or 'unknown'}")
+        time.sleep(0.3)
+    else:
         try:
             cdp.call("Page.bringToFront", timeout=10.0)
         except Exception:
             pass
         try:
-            cdp.call("Page.reload", {"ignoreCache": True}, timeout=15.0)
+            cdp.call("Page.reload", {"ignoreCache": tier == "hard_reload"}, timeout=15.0)
         except Exception:
             pass
+        _wait_ready_state(cdp, max(10.0, verify_s))
+    if not ensure_target_route(cdp, target_url):
+        raise RuntimeError("route_mismatch_after_soft_reset")
+    wait_for_composer(cdp, timeout_s=min(30.0, verify_s))
+    wait_until_send_ready(cdp, timeout_s=verify_s)
+    if tier == "nudge":
+        # wait_until_send_ready may give up on a stale stop and call it idle.
+        post = cdp.eval(js_send_ready_expr(), timeout=10.0) or {}
+        if post.get("stopVisible"):
+            raise RuntimeError("nudge_stop_still_visible")
 
-        # Wait page readyState=complete after reload/navigation.
-        deadline = time.time() + max(10.0, timeout_s)
-        ready_expr = "document.readyState"
-        while time.time() < deadline:
-            try:
-                ready = str(cdp.eval(ready_expr, timeout=10.0) or "").strip().lower()
-                if ready == "complete":
-                    break
-            except TimeoutError as e:
-                mark_timeout_kind(str(e), phase="soft_reset_ready_state")
-            time.sleep(0.2)
 
-        if not ensure_target_route(cdp, target_url):
-            raise RuntimeError("route_mismatch_after_soft_reset")
-        wait_for_composer(cdp, timeout_s=30.0)
-        wait_until_send_ready(cdp, timeout_s=min(timeout_s, 90.0))
-        sys.stderr.write(f"SOFT_RESET done outcome=success reason={reason}\n")
+def soft_reset_tab(cdp: CDP, target_url: str, reason: str, timeout_s: float = 60.0) -> bool:
+    """Recover a stuck tab with the cheapest tier that works.
+
+    Tiers (CHATGPT_SEND_SOFT_RESET_TIERS): in-page nudge, client-side
+    re-navigation, cached reload, ignoreCache reload. Every attempt emits
+    `SOFT_RESET tier=<t> outcome=ok|fail elapsed_ms=<n>`.
+    """
+    sys.stderr.write(f"SOFT_RESET start reason={reason}\n")
+    sys.stderr.flush()
+    t0 = time.time()
+    tiers = soft_reset_tiers(SOFT_RESET_MIN_TIER_BY_REASON.get(reason, "nudge"))
+    last_err: Exception | None = None
+    for i, tier in enumerate(tiers):
+        remaining = max(10.0, timeout_s - (time.time() - t0))
+        verify_s = remaining if i == len(tiers) - 1 else min(remaining, SOFT_RESET_TIER_VERIFY_SEC.get(tier, remaining))
+        tier_t0 = time.time()
+        try:
+            _soft_reset_tier(cdp, tier, target_url, verify_s)
+        except Exception as e:
+            last_err = e
+            sys.stderr.write(
+                f"SOFT_RESET tier={tier} outcome=fail elapsed_ms={int((time.time() - tier_t0) * 1000)}"
+                f" reason={reason} err={str(e)[:160]}\n"
+            )
+            sys.stderr.flush()
+            continue
+        tier_ms = int((time.time() - tier_t0) * 1000)
+        sys.stderr.write(f"SOFT_RESET tier={tier} outcome=ok elapsed_ms={tier_ms} reason={reason}\n")
+        sys.stderr.write(
+            f"SOFT_RESET done outcome=success reason={reason} tier={tier} elapsed_ms={int((time.time() - t0) * 1000)}\n"
+        )
         sys.stderr.flush()
         return True
-    except TimeoutError as e:
-        mark_timeout_kind(str(e), phase="soft_reset")
-        error_marker("E_SOFT_RESET_FAILED", f"reason={reason} err={e}")
-        return False
-    except Exception as e:
-        error_marker("E_SOFT_RESET_FAILED", f"reason={reason} err={e}")
-        return False
+    if isinstance(last_err, TimeoutError):
+        mark_timeout_kind(str(last_err), phase="soft_reset")
+    error_marker("E_SOFT_RESET_FAILED", f"reason={reason} err={last_err}")
+    return False
+
+
+MODE_NAMES = ("precheck_only", "fetch_last", "send_no_wait", "reply_ready_probe", "soft_reset_only", "probe_contract")
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--cdp-port", type=int, default=9222)
     ap.add_argument("--chatgpt-url", required=True)
-    ap.add_argument("--prompt", required=True)
+    ap.add_argument("--prompt")
+    ap.add_argument("--prompt-file", help="read the prompt from a file ('-' = stdin) instead of argv")
     ap.add_argument("--timeout", type=float, default=900.0)
     ap.add_argument("--precheck-only", action="store_true")
     ap.add_argument("--fetch-last", action="store_true")
@@ -1466,7 +2289,25 @@ def main() -> int:
     ap.add_argument("--soft-reset-only", action="store_true")
     ap.add_argument("--probe-contract", action="store_true")
     ap.add_argument("--soft-reset-reason", default="manual")
+    ap.add_argument(
+        "--preflight-and-send",
+        action="store_true",
+        help="one-scan preflight; write it to --preflight-out, then send only if --decision-in says 'send'",
+    )
+    ap.add_argument("--preflight-out", help="file/FIFO for the preflight JSON (fetch-last schema + 'preflight')")
+    ap.add_argument("--decision-in", default="-", help="file/FIFO with the shell's decision line ('-' = stdin)")
     args = ap.parse_args()
+    if MEM_STATS_ENABLED:
+        # One frame per allocation keeps the tracing overhead low enough for soaks.
+        tracemalloc.start(1)
+    try:
+        args.prompt = read_prompt_input(args.prompt, args.prompt_file)
+    except OSError as e:
+        sys.stderr.write(f"Could not read --prompt-file: {e}\n")
+        return 2
+    if args.prompt is None:
+        sys.stderr.write("One of --prompt or --prompt-file is required\n")
+        return 2
     t_main_start = time.time()
     mode_flags = [args.precheck_only, args.fetch_last, args.send_no_wait, args.reply_ready_probe, args.soft_reset_only, args.probe_contract]
     if sum(1 for x in mode_flags if x) > 1:
@@ -1474,6 +2315,9 @@ def main() -> int:
             "Only one mode is allowed: --precheck-only | --fetch-last | --send-no-wait | --reply-ready-probe | --soft-reset-only | --probe-contract\n"
         )
         return 2
+    if args.preflight_and_send and (sum(1 for x in mode_flags if x) - int(args.send_no_wait) > 0 or not args.preflight_out):
+        sys.stderr.write("--preflight-and-send needs --preflight-out and combines only with --send-no-wait\n")
+        return 2
 
     progress(f"phase=start cdp_port={args.cdp_port} timeout={args.timeout}")
     tabs = http_json(f"http://127.0.0.1:{args.cdp_port}/json/list", timeout=5.0)
@@ -1491,6 +2335,12 @@ def main() -> int:
     try:
         cdp = CDP(ws_url, timeout=15.0)
         progress("phase=cdp_connect event=ok")
+        if cdp.tracer is not None:
+            mode = next((name for name, on in zip(MODE_NAMES, mode_flags) if on), "send")
+            if args.preflight_and_send:
+                mode = f"preflight_and_{mode}"
+            cdp.tracer.mode = mode
+            cdp.tracer.process_name = f"cdp_chatgpt {mode} pid={os.getpid()}"
     except WebSocketBadStatusException as e:
         msg = str(e)
         if "remote-allow-origins" in msg or "Rejected an incoming WebSocket connection" in msg:
@@ -1516,7 +2366,8 @@ def main() -> int:
         except Exception:
             pass
 
-        wait_for_composer(cdp, timeout_s=30.0)
+        if not args.preflight_and_send:
+            wait_for_composer(cdp, timeout_s=30.0)
         if args.fetch_last:
             payload = fetch_last_messages(cdp, args.chatgpt_url, limit=int(args.fetch_last_n))
             emit_timing(total_ms=int((time.time() - t_main_start) * 1000))
@@ -1548,13 +2399,13 @@ def main() -> int:
             stop_visible = bool(st.get("stopVisible"))
             assistant_after_anchor = bool(st.get("assistantAfterLastUser"))
             existing_answer = (st.get("lastAssistant") or "").strip()
-            tail = normalize_text_for_compare(existing_answer)[-500:]
-            tail_hash = stable_text_hash(tail) if tail else ""
+            answer_nt = norm_text(existing_answer)
+            tail_hash = answer_nt.tail_hash
             error_marker(
                 "REPLY_PROGRESS",
                 "assistant_after_anchor="
                 f"{1 if assistant_after_anchor else 0}"
-                f" assistant_tail_len={len(tail)}"
+                f" assistant_tail_len={len(answer_nt.tail)}"
                 f" assistant_tail_hash={tail_hash or 'none'}"
                 f" stop_visible={1 if stop_visible else 0}",
             )
@@ -1588,21 +2439,42 @@ def main() -> int:
             ok = probe_ui_contract(cdp)
             return 0 if ok else 22
 
+        baseline = None
+        if args.preflight_and_send:
+            payload, snapshot_state = preflight_snapshot(cdp, args.chatgpt_url, args.prompt, limit=int(args.fetch_last_n))
+            t_snapshot = time.time()
+            with open(args.preflight_out, "w", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            verdict = read_preflight_decision(args.decision_in, PREFLIGHT_DECISION_TIMEOUT_SEC)
+            if verdict != "send":
+                progress(f"phase=preflight event=abort verdict={verdict.replace(' ', '_')}")
+                return 10
+            age_s = time.time() - t_snapshot
+            # An idle, prompt-free snapshot that is still fresh already covers
+            # the busy/idle/route gates below; anything else re-checks the page.
+            if payload["preflight"]["decision"] == "need_send" and age_s <= PREFLIGHT_MAX_AGE_SEC:
+                baseline = snapshot_state
+            progress(
+                "phase=preflight event=send"
+                f" baseline={'snapshot' if baseline is not None else 'rescan'} age_ms={int(age_s * 1000)}"
+            )
+
         t_send_start = time.time()
-        # Handle active generation before sending, based on policy.
-        if not pre_send_busy_policy(cdp, args.chatgpt_url):
-            return 11
-        # If ChatGPT is still generating previous answer, wait before sending.
-        wait_until_send_ready(cdp, timeout_s=min(float(args.timeout), 300.0))
-        if not pre_send_idle_gate(cdp, args.chatgpt_url, timeout_s=PRE_SEND_IDLE_STOP_TIMEOUT_SEC):
-            error_marker("E_PRE_SEND_IDLE_FAILED", "stop_stuck_after_recovery")
-            return 4
-        if not ensure_target_route(cdp, args.chatgpt_url):
-            error_marker("E_ROUTE_MISMATCH_FATAL", "failed_to_activate_expected_target_chat")
-            sys.stderr.write("Route mismatch: failed to activate expected target chat.\n")
-            return 2
+        if baseline is None:
+            # Handle active generation before sending, based on policy.
+            if not pre_send_busy_policy(cdp, args.chatgpt_url):
+                return 11
+            # If ChatGPT is still generating previous answer, wait before sending.
+            wait_until_send_ready(cdp, timeout_s=min(float(args.timeout), 300.0))
+            if not pre_send_idle_gate(cdp, args.chatgpt_url, timeout_s=PRE_SEND_IDLE_STOP_TIMEOUT_SEC):
+                error_marker("E_PRE_SEND_IDLE_FAILED", "stop_stuck_after_recovery")
+                return 4
+            if not ensure_target_route(cdp, args.chatgpt_url):
+                error_marker("E_ROUTE_MISMATCH_FATAL", "failed_to_activate_expected_target_chat")
+                sys.stderr.write("Route mismatch: failed to activate expected target chat.\n")
+                return 2
 
-        baseline = cdp.eval(js_state_expr(), timeout=10.0) or {}
+            baseline = cdp.eval(js_state_expr(), timeout=10.0) or {}
         progress(
             "phase=baseline"
             f" user={int(baseline.get('userCount') or 0)}"
@@ -1644,7 +2516,7 @@ def main() -> int:
             dispatch_order = ["enter", "button"]
         max_send_attempts = len(dispatch_order)
         for attempt, preferred_method in enumerate(dispatch_order, start=1):
-            send_res = cdp.eval(js_send_expr(args.prompt, preferred_method), timeout=10.0) or {}
+            send_res = send_prompt(cdp, args.prompt, preferred_method)
             if isinstance(send_res, dict) and send_res.get("ok"):
                 method = send_res.get("method", "unknown")
                 progress(f"phase=send event=ok method={method} attempt={attempt}")
@@ -1752,7 +2624,13 @@ def main() -> int:
 
         # Phase-2 post-verify: wait for assistant content after the user anchor.
         t_wait_reply_start = time.time()
-        answer = wait_for_response(cdp, baseline, timeout_s=float(args.timeout), target_url=args.chatgpt_url)
+        answer = wait_for_response(
+            cdp,
+            baseline,
+            timeout_s=float(args.timeout),
+            target_url=args.chatgpt_url,
+            anchored=anchor_state is not None,
+        )
         send_ms = int((t_wait_reply_start - t_send_start) * 1000)
         wait_reply_ms = int((time.time() - t_wait_reply_start) * 1000)
         emit_timing(
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""FIFO broker for the shared-browser CDP slots.
+
+Layout inside the slot dir (default /tmp):
+  chatgpt-send-cdp-slot.<n>.lock         flock target held by the slot owner
+  chatgpt-send-cdp-slot.<n>.holder.json  claim: run_id, pid, phase, acquired_ms
+  chatgpt-send-cdp-slot.queue/           one ticket (+ wake-up FIFO) per waiter
+  chatgpt-send-cdp-slot.guard            short flock serializing queue/claims
+
+A waiter at queue position p is granted only while at least p+1 slots are
+free, so grants follow arrival order. Waiters block on their FIFO; `release`
+wakes only as many head-of-queue waiters as there are free slots, instead of
+every waiter polling every slot file. The caller takes the slot flock itself
+right after the grant, so a crashed owner frees the slot with its process;
+claims of dead PIDs are dropped. chatgpt_send speaks the same protocol from
+bash (cdp_slot_acquire in lib/chatgpt_send/core.sh) so a phase does not pay
+for a python start; both kinds of waiter share one queue.
+"""
+import argparse
+import errno
+import fcntl
+import json
+import os
+import select
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAX_SLOTS = int(os.environ.get("CHATGPT_SEND_MAX_CDP_SLOTS", "2") or 2)
+TIMEOUT_SEC = float(os.environ.get("CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC", "180"))
+# Fallback re-check while subscribed; covers slots freed without `release`
+# (crashed owner, legacy flock-only acquirers).
+RECHECK_SEC = 1.0
+PREFIX = "chatgpt-send-cdp-slot"
+EXIT_TIMEOUT = 73
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def pid_alive(pid: Any) -> bool:
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def marker(code: str, **fields: Any) -> None:
+    parts = " ".join(f"{k}={'none' if v is None or v == '' else v}" for k, v in fields.items())
+    sys.stderr.write(f"{code} {parts}\n")
+    sys.stderr.flush()
+
+
+def read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def write_json(path: Path, obj: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class SlotPool:
+    def __init__(self, slot_dir: str, max_slots: int):
+        self.dir = Path(slot_dir)
+        self.max_slots = max(1, int(max_slots))
+        self.guard_file = self.dir / f"{PREFIX}.guard"
+        self.queue_dir = self.dir / f"{PREFIX}.queue"
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+
+    def lock_file(self, slot: int) -> Path:
+        return self.dir / f"{PREFIX}.{slot}.lock"
+
+    def holder_file(self, slot: int) -> Path:
+        return self.dir / f"{PREFIX}.{slot}.holder.json"
+
+    @contextmanager
+    def guard(self):
+        with open(self.guard_file, "a+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def flock_free(self, slot: int) -> bool:
+        try:
+            fd = os.open(self.lock_file(slot), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            return True
+        finally:
+            os.close(fd)
+
+    def holder(self, slot: int) -> Optional[Dict[str, Any]]:
+        """Live claim on a slot; claims of dead owners are dropped."""
+        path = self.holder_file(slot)
+        h = read_json(path)
+        if h and not pid_alive(h.get("pid")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            marker("W_CDP_SLOT_STALE_HOLDER", slot=slot, holder_run_id=h.get("run_id"), holder_pid=h.get("pid"))
+            return None
+        return h
+
+    def free_slots(self) -> List[int]:
+        return [i for i in range(self.max_slots) if self.holder(i) is None and self.flock_free(i)]
+
+    def tickets(self) -> List[Dict[str, Any]]:
+        """Live tickets, oldest first; tickets of dead waiters are dropped."""
+        out = []
+        for path in sorted(self.queue_dir.glob("*.json")):
+            t = read_json(path)
+            if not t or not pid_alive(t.get("pid")):
+                self._drop_ticket(path.stem)
+                continue
+            t["ticket"] = path.stem
+            out.append(t)
+        return out
+
+    def _drop_ticket(self, ticket: str) -> None:
+        for suffix in (".json", ".fifo"):
+            try:
+                (self.queue_dir / (ticket + suffix)).unlink()
+            except OSError:
+                pass
+
+    def wake_heads(self) -> int:
+        """Wake the oldest waiters that can be granted now; call under guard()."""
+        n = len(self.free_slots())
+        woken = 0
+        for t in self.tickets()[:n]:
+            fifo = self.queue_dir / (t["ticket"] + ".fifo")
+            try:
+                fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, b"1")
+                woken += 1
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return woken
+
+
+def cmd_acquire(args) -> int:
+    pool = SlotPool(args.dir, args.max_slots)
+    pid = args.pid or os.getppid()
+    t0 = now_ms()
+    ticket = f"{time.time_ns():020d}_{pid}"
+    fifo = pool.queue_dir / (ticket + ".fifo")
+    os.mkfifo(fifo, 0o600)
+    # Holding our own write end keeps the FIFO from reporting EOF between wake-ups.
+    rfd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+    wfd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+    write_json(pool.queue_dir / (ticket + ".json"), {"run_id": args.run_id, "pid": pid, "phase": args.phase, "enqueued_ms": t0})
+
+    deadline = t0 + int(args.timeout_sec * 1000)
+    queued_behind: Optional[int] = None
+    try:
+        while True:
+            now = now_ms()
+            with pool.guard():
+                queue = pool.tickets()
+                position = next((i for i, t in enumerate(queue) if t["ticket"] == ticket), 0)
+                if queued_behind is None:
+                    queued_behind = position
+                free = pool.free_slots()
+                if position < len(free):
+                    slot = free[0]
+                    write_json(
+                        pool.holder_file(slot),
+                        {"run_id": args.run_id, "pid": pid, "phase": args.phase, "acquired_ms": now},
+                    )
+                    pool._drop_ticket(ticket)
+                    print(f"granted slot={slot} wait_ms={now - t0} queued_behind={queued_behind} queue_depth={len(queue) - 1}")
+                    return 0
+            if now >= deadline:
+                print(f"timeout wait_ms={now - t0} position={position + 1} queue_depth={len(queue)}")
+                return EXIT_TIMEOUT
+            wait_s = max(0.01, min(RECHECK_SEC, (deadline - now) / 1000.0))
+            ready, _, _ = select.select([rfd], [], [], wait_s)
+            if ready:
+                try:
+                    while os.read(rfd, 4096):
+                        pass
+                except OSError as e:
+                    if e.errno != errno.EAGAIN:
+                        raise
+    finally:
+        os.close(rfd)
+        os.close(wfd)
+        with pool.guard():
+            pool._drop_ticket(ticket)
+            pool.wake_heads()
+
+
+def cmd_release(args) -> int:
+    pool = SlotPool(args.dir, max(args.max_slots, args.slot + 1))
+    with pool.guard():
+        h = read_json(pool.holder_file(args.slot))
+        if h and h.get("run_id") == args.run_id:
+            try:
+                pool.holder_file(args.slot).unlink()
+            except OSError:
+                pass
+        woken = pool.wake_heads()
+    print(f"released slot={args.slot} woken={woken}")
+    return 0
+
+
+def cmd_status(args) -> int:
+    pool = SlotPool(args.dir, args.max_slots)
+    now = now_ms()
+    with pool.guard():
+        holders = []
+        for i in range(pool.max_slots):
+            h = pool.holder(i)
+            holders.append(
+                {
+                    "slot": i,
+                    "run_id": (h or {}).get("run_id"),
+                    "phase": (h or {}).get("phase"),
+                    "held_ms": (now - int(h.get("acquired_ms") or now)) if h else None,
+                    "flock_free": pool.flock_free(i),
+                }
+            )
+        queue = [
+            {"run_id": t.get("run_id"), "phase": t.get("phase"), "waited_ms": now - int(t.get("enqueued_ms") or now)}
+            for t in pool.tickets()
+        ]
+    if args.json:
+        print(json.dumps({"ts_ms": now, "slots": holders, "queue": queue}, ensure_ascii=False, sort_keys=True))
+        return 0
+    busy = sum(1 for h in holders if h["run_id"] or not h["flock_free"])
+    oldest = max((q["waited_ms"] for q in queue), default=0)
+    print(f"CDP_SLOTS max={pool.max_slots} busy={busy} queue_depth={len(queue)} oldest_wait_ms={oldest}")
+    for h in holders:
+        print(
+            f"CDP_SLOT slot={h['slot']} holder_run_id={h['run_id'] or 'none'} phase={h['phase'] or 'none'}"
+            f" held_ms={h['held_ms'] if h['held_ms'] is not None else 'none'} flock_free={1 if h['flock_free'] else 0}"
+        )
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="FIFO broker for shared-browser CDP slots.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("acquire", help="queue for a slot; prints `granted slot=...` (rc 0) or `timeout ...` (rc 73)")
+    a.add_argument("--dir", required=True)
+    a.add_argument("--max-slots", type=int, default=MAX_SLOTS)
+    a.add_argument("--run-id", required=True)
+    a.add_argument("--pid", type=int, default=0, help="owner pid checked for liveness (default: parent)")
+    a.add_argument("--phase", default="run")
+    a.add_argument("--timeout-sec", type=float, default=TIMEOUT_SEC)
+
+    r = sub.add_parser("release", help="drop the slot claim and wake the waiters that can take a slot")
+    r.add_argument("--dir", required=True)
+    r.add_argument("--max-slots", type=int, default=MAX_SLOTS)
+    r.add_argument("--slot", type=int, required=True)
+    r.add_argument("--run-id", required=True)
+
+    s = sub.add_parser("status", help="slot holders and queue depth")
+    s.add_argument("--dir", required=True)
+    s.add_argument("--max-slots", type=int, default=MAX_SLOTS)
+    s.add_argument("--json", action="store_true")
+
+    args = ap.parse_args()
+    handlers = {"acquire": cmd_acquire, "release": cmd_release, "status": cmd_status}
+    return handlers[args.cmd](args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
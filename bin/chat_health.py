@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Per-chat performance profiles for the chat pool.
+
+Long specialist threads get slower: the DOM scans behind --fetch-last grow
+with the thread and generation itself slows down. `ingest` folds the markers
+cdp_chatgpt.py leaves in a run's transport.log into a profile per chat:
+
+  turns         replies observed (TIMING lines with wait_reply_ms)
+  latencies_ms  the last WINDOW wait_reply_ms samples (p50/p95 and trend)
+  soft_resets   `SOFT_RESET start` lines
+  echo_misses   `E_MESSAGE_NOT_ECHOED` lines
+
+Each source file keeps its read offset in the profile, so re-ingesting a log
+that grew (a retried attempt appends to the same transport.log) only reads
+the new part.
+
+The trend is a least-squares slope of latency per turn over the window; the
+projected p95 (`p95 + slope * HORIZON_TURNS`) is what marks a chat degraded
+before it actually crosses the threshold, so routing can move work off it
+early. A chat whose p95 or turn count crosses the ROTATE_* limits should be
+rotated into a fresh chat.
+
+Subcommands:
+  ingest   fold transport logs into one chat's profile
+  score    CHAT_HEALTH line per chat
+  rank     order pool URLs healthiest first (CHAT_ROUTE lines)
+  suggest  CHAT_ROTATE lines for chats that should move to a fresh thread
+"""
+import argparse
+import datetime as dt
+import fcntl
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from latency_sketch import LatencySketch  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE = os.environ.get("CHATGPT_SEND_CHAT_HEALTH_STORE", "") or str(ROOT / "state" / "chat_health.json")
+WINDOW = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_WINDOW", "50"))
+MIN_SAMPLES = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_MIN_SAMPLES", "3"))
+HORIZON_TURNS = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_HORIZON_TURNS", "10"))
+DEGRADED_P95_MS = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_DEGRADED_P95_MS", "60000"))
+ROTATE_P95_MS = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_ROTATE_P95_MS", "120000"))
+ROTATE_TURNS = int(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_ROTATE_TURNS", "150"))
+MAX_SOFT_RESET_RATE = float(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_MAX_SOFT_RESET_RATE", "0.2"))
+MAX_ECHO_MISS_RATE = float(os.environ.get("CHATGPT_SEND_CHAT_HEALTH_MAX_ECHO_MISS_RATE", "0.2"))
+MAX_SOURCES = 256
+
+CHAT_URL_RE = re.compile(r"^https://chatgpt\.com/c/([A-Za-z0-9-]+)$")
+CHAT_ID_RE = re.compile(r"^[A-Za-z0-9-]+$")
+WAIT_REPLY_RE = re.compile(r"^TIMING .*\bwait_reply_ms=([0-9]+)")
+SOFT_RESET_RE = re.compile(r"\bSOFT_RESET start\b")
+ECHO_MISS_RE = re.compile(r"\bE_MESSAGE_NOT_ECHOED\b")
+STATUS_ORDER = {"new": 0, "ok": 0, "degraded": 1, "rotate": 2}
+
+
+def now_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def chat_key(ref: str) -> Tuple[str, str]:
+    """(chat_id, url) for a pool URL or a bare chat id."""
+    ref = (ref or "").strip()
+    m = CHAT_URL_RE.match(ref)
+    if m:
+        return m.group(1), ref
+    if CHAT_ID_RE.match(ref):
+        return ref, f"https://chatgpt.com/c/{ref}"
+    raise ValueError(f"bad chat url: {ref!r}")
+
+
+def read_pool_file(path: str) -> List[str]:
+    urls = []
+    for line in Path(path).read_text(encoding="utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+class HealthStore:
+    """JSON profile store; writers serialize on `<store>.lock` and replace atomically."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and isinstance(data.get("chats"), dict):
+                return data
+        except Exception:
+            pass
+        return {"version": 1, "chats": {}}
+
+    def save(self, data: dict) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = self.lock_path.open("a")
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        return fh
+
+
+def new_profile(chat_id: str, url: str) -> dict:
+    return {
+        "chat_id": chat_id,
+        "url": url,
+        "turns": 0,
+        "soft_resets": 0,
+        "echo_misses": 0,
+        "latencies_ms": [],
+        "sources": {},
+        "updated_at": "",
+    }
+
+
+def scan_log(path: Path, offset: int) -> Tuple[int, List[int], int, int]:
+    """Read `path` from `offset`; returns (new_offset, wait_reply_ms samples, soft resets, echo misses)."""
+    samples: List[int] = []
+    soft_resets = 0
+    echo_misses = 0
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return offset, samples, 0, 0
+    if size < offset:
+        # Truncated or replaced: read it again from the start.
+        offset = 0
+    with path.open("rb") as fh:
+        fh.seek(offset)
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                # Partial last line; pick it up on the next ingest.
+                break
+            offset += len(raw)
+            line = raw.decode("utf-8", errors="replace")
+            m = WAIT_REPLY_RE.search(line)
+            if m:
+                samples.append(int(m.group(1)))
+            elif SOFT_RESET_RE.search(line):
+                soft_resets += 1
+            elif ECHO_MISS_RE.search(line):
+                echo_misses += 1
+    return offset, samples, soft_resets, echo_misses
+
+
+def slope_per_turn(values: List[int]) -> float:
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(values) / n
+    num = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    den = sum((i - mean_x) ** 2 for i in range(n))
+    return num / den if den else 0.0
+
+
+def assess(profile: dict) -> dict:
+    """Score 0..100 (higher is healthier) and status new|ok|degraded|rotate."""
+    lat = [int(v) for v in profile.get("latencies_ms") or []]
+    turns = int(profile.get("turns") or 0)
+    soft_resets = int(profile.get("soft_resets") or 0)
+    echo_misses = int(profile.get("echo_misses") or 0)
+    sketch = LatencySketch()
+    for v in lat:
+        sketch.add(v)
+    p50 = int(sketch.quantile(0.50)) if lat else 0
+    p95 = int(sketch.quantile(0.95)) if lat else 0
+    slope = slope_per_turn(lat)
+    projected = int(p95 + max(0.0, slope) * HORIZON_TURNS)
+    soft_reset_rate = soft_resets / max(turns, 1)
+    echo_miss_rate = echo_misses / max(turns, 1)
+
+    reasons = []
+    if turns >= ROTATE_TURNS:
+        reasons.append("turns")
+    if len(lat) >= MIN_SAMPLES and p95 >= ROTATE_P95_MS:
+        reasons.append("p95")
+    if reasons:
+        status = "rotate"
+    else:
+        if len(lat) >= MIN_SAMPLES and projected >= DEGRADED_P95_MS:
+            reasons.append("latency")
+        if turns >= MIN_SAMPLES and soft_reset_rate >= MAX_SOFT_RESET_RATE:
+            reasons.append("soft_resets")
+        if turns >= MIN_SAMPLES and echo_miss_rate >= MAX_ECHO_MISS_RATE:
+            reasons.append("echo_misses")
+        if reasons:
+            status = "degraded"
+        elif len(lat) < MIN_SAMPLES:
+            status = "new"
+        else:
+            status = "ok"
+
+    penalty = 0.0
+    if len(lat) >= MIN_SAMPLES:
+        penalty += 50 * min(1.0, projected / max(ROTATE_P95_MS, 1))
+    penalty += 20 * min(1.0, turns / max(ROTATE_TURNS, 1))
+    if turns >= MIN_SAMPLES:
+        penalty += 15 * min(1.0, soft_reset_rate / max(MAX_SOFT_RESET_RATE, 1e-9))
+        penalty += 15 * min(1.0, echo_miss_rate / max(MAX_ECHO_MISS_RATE, 1e-9))
+    return {
+        "status": status,
+        "score": int(round(100 - penalty)),
+        "reason": ",".join(reasons) or "none",
+        "turns": turns,
+        "samples": len(lat),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "slope_ms_per_turn": round(slope, 1),
+        "projected_p95_ms": projected,
+        "soft_resets": soft_resets,
+        "soft_reset_rate": round(soft_reset_rate, 3),
+        "echo_misses": echo_misses,
+        "echo_miss_rate": round(echo_miss_rate, 3),
+    }
+
+
+def health_line(chat_id: str, url: str, h: dict) -> str:
+    return (
+        f"CHAT_HEALTH chat_id={chat_id} status={h['status']} score={h['score']} reason={h['reason']}"
+        f" turns={h['turns']} samples={h['samples']} p50_ms={h['p50_ms']} p95_ms={h['p95_ms']}"
+        f" slope_ms_per_turn={h['slope_ms_per_turn']} projected_p95_ms={h['projected_p95_ms']}"
+        f" soft_resets={h['soft_resets']} soft_reset_rate={h['soft_reset_rate']}"
+        f" echo_misses={h['echo_misses']} echo_miss_rate={h['echo_miss_rate']} chat_url={url}"
+    )
+
+
+def profiles_for(data: dict, refs: Optional[Iterable[str]]) -> List[Tuple[str, str, dict]]:
+    chats = data.get("chats") or {}
+    if refs is None:
+        return [(cid, str(p.get("url") or chat_key(cid)[1]), p) for cid, p in sorted(chats.items())]
+    out = []
+    for ref in refs:
+        cid, url = chat_key(ref)
+        out.append((cid, url, chats.get(cid) or new_profile(cid, url)))
+    return out
+
+
+def selected_refs(args: argparse.Namespace) -> Optional[List[str]]:
+    refs: List[str] = []
+    if getattr(args, "file", ""):
+        refs.extend(read_pool_file(args.file))
+    refs.extend(getattr(args, "url", None) or [])
+    if not refs and not getattr(args, "file", ""):
+        return None
+    return refs
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    cid, url = chat_key(args.chat_url)
+    store = HealthStore(args.store)
+    lock = store.locked()
+    try:
+        data = store.load()
+        profile = data["chats"].get(cid) or new_profile(cid, url)
+        sources: Dict[str, int] = profile.setdefault("sources", {})
+        added = {"samples": 0, "soft_resets": 0, "echo_misses": 0}
+        for log in args.logs:
+            path = Path(log).resolve()
+            key = str(path)
+            offset, samples, soft_resets, echo_misses = scan_log(path, int(sources.get(key, 0)))
+            sources.pop(key, None)
+            sources[key] = offset
+            profile["latencies_ms"] = (list(profile.get("latencies_ms") or []) + samples)[-WINDOW:]
+            profile["turns"] = int(profile.get("turns") or 0) + len(samples)
+            profile["soft_resets"] = int(profile.get("soft_resets") or 0) + soft_resets
+            profile["echo_misses"] = int(profile.get("echo_misses") or 0) + echo_misses
+            added["samples"] += len(samples)
+            added["soft_resets"] += soft_resets
+            added["echo_misses"] += echo_misses
+        while len(sources) > MAX_SOURCES:
+            sources.pop(next(iter(sources)))
+        changed = any(added.values())
+        if changed:
+            profile["url"] = url
+            profile["updated_at"] = now_iso()
+            data["chats"][cid] = profile
+            store.save(data)
+    finally:
+        lock.close()
+    print(
+        f"CHAT_HEALTH_INGEST chat_id={cid} samples={added['samples']} soft_resets={added['soft_resets']}"
+        f" echo_misses={added['echo_misses']} stored={1 if changed else 0}"
+    )
+    return 0
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    data = HealthStore(args.store).load()
+    for cid, url, profile in profiles_for(data, selected_refs(args)):
+        print(health_line(cid, url, assess(profile)))
+    return 0
+
+
+def cmd_rank(args: argparse.Namespace) -> int:
+    refs = selected_refs(args) or []
+    data = HealthStore(args.store).load()
+    rows = []
+    for idx, (cid, url, profile) in enumerate(profiles_for(data, refs)):
+        h = assess(profile)
+        rows.append((STATUS_ORDER[h["status"]], -h["score"], idx, cid, url, h))
+    rows.sort()
+    need = args.need if args.need > 0 else len(rows)
+    in_use_unhealthy = 0
+    for rank, (_, _, _, cid, url, h) in enumerate(rows, start=1):
+        use = rank <= need
+        if use and h["status"] in ("degraded", "rotate"):
+            in_use_unhealthy += 1
+        print(
+            f"CHAT_ROUTE rank={rank} use={1 if use else 0} status={h['status']} score={h['score']}"
+            f" p95_ms={h['p95_ms']} projected_p95_ms={h['projected_p95_ms']} turns={h['turns']} chat_url={url}"
+        )
+    healthy = sum(1 for r in rows if r[5]["status"] in ("new", "ok"))
+    print(
+        f"CHAT_HEALTH_ROUTING total={len(rows)} need={need} healthy={healthy}"
+        f" skipped={max(len(rows) - need, 0)} unhealthy_in_use={in_use_unhealthy}"
+    )
+    return 0
+
+
+def cmd_suggest(args: argparse.Namespace) -> int:
+    data = HealthStore(args.store).load()
+    count = 0
+    for cid, url, profile in profiles_for(data, selected_refs(args)):
+        h = assess(profile)
+        if h["status"] != "rotate":
+            continue
+        count += 1
+        print(
+            f"CHAT_ROTATE chat_id={cid} reason={h['reason']} turns={h['turns']} p95_ms={h['p95_ms']}"
+            f" chat_url={url} hint=move_thread_to_fresh_chat"
+        )
+    print(f"CHAT_ROTATE_SUMMARY count={count}")
+    return 0
+
+
+def add_select_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--file", default="", help="chat pool file (one URL per line)")
+    p.add_argument("--url", action="append", help="chat URL or id (repeatable)")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--store", default=DEFAULT_STORE, help="profile store (default: state/chat_health.json)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="fold transport logs into one chat's profile")
+    p_ingest.add_argument("--chat-url", required=True)
+    p_ingest.add_argument("logs", nargs="+")
+    p_ingest.set_defaults(fn=cmd_ingest)
+
+    p_score = sub.add_parser("score", help="CHAT_HEALTH line per chat (all stored chats by default)")
+    add_select_args(p_score)
+    p_score.set_defaults(fn=cmd_score)
+
+    p_rank = sub.add_parser("rank", help="order pool URLs healthiest first")
+    add_select_args(p_rank)
+    p_rank.add_argument("--need", type=int, default=0, help="chats the run will use (0 = all)")
+    p_rank.set_defaults(fn=cmd_rank)
+
+    p_suggest = sub.add_parser("suggest", help="chats to rotate into a fresh thread")
+    add_select_args(p_suggest)
+    p_suggest.set_defaults(fn=cmd_suggest)
+
+    args = ap.parse_args()
+    try:
+        return args.fn(args)
+    except ValueError as e:
+        print(f"E_CHAT_HEALTH {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
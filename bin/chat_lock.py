@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""Per-chat single-flight lock service with a FIFO wait queue.
+
+Layout inside the lock dir, per chat key:
+  chat_<key>.lock         flock target held by the owning chatgpt_send process
+  chat_<key>.holder.json  holder claim: run_id, pid, phase, expected hold time
+  chat_<key>.queue/       one ticket (+ wake-up FIFO) per waiter, oldest first
+  chat_<key>.stats.json   EWMA of hold times, used for wait estimates
+  chat_<key>.guard        short flock serializing queue/holder updates
+
+Only the oldest live ticket may claim the lock, so handoff is FIFO. Waiters
+block on their FIFO; `release` (or a head waiter giving up) wakes only the
+new head, the rest re-check on their own interval. Dead holders and waiters are
+detected by PID liveness. The lock file itself is never removed: a flock held
+without a claim is attributed to the live processes that have it open.
+"""
+import argparse
+import errno
+import fcntl
+import json
+import os
+import select
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TIMEOUT_SEC = float(os.environ.get("CHATGPT_SEND_CHAT_LOCK_TIMEOUT_SEC", "20"))
+# Unset: the wait cap is MAX_WAIT_FACTOR x the base timeout, so a hold-time
+# estimate can actually extend the wait.
+MAX_WAIT_SEC = os.environ.get("CHATGPT_SEND_CHAT_LOCK_MAX_WAIT_SEC", "")
+MAX_WAIT_FACTOR = 3
+ORPHAN_CHECK_SEC = float(os.environ.get("CHATGPT_SEND_CHAT_LOCK_ORPHAN_CHECK_SEC", "10"))
+# Fallback re-check while subscribed; covers dead holders that never release.
+RECHECK_SEC = 1.0
+EWMA_ALPHA = 0.3
+EXIT_TIMEOUT = 75
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def pid_alive(pid: Any) -> bool:
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def marker(code: str, **fields: Any) -> None:
+    parts = " ".join(f"{k}={'none' if v is None or v == '' else v}" for k, v in fields.items())
+    sys.stderr.write(f"{code} {parts}\n")
+    sys.stderr.flush()
+
+
+def read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def write_json(path: Path, obj: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ChatLock:
+    def __init__(self, lock_dir: str, key: str):
+        self.dir = Path(lock_dir)
+        self.key = key
+        self.lock_file = self.dir / f"chat_{key}.lock"
+        self.holder_file = self.dir / f"chat_{key}.holder.json"
+        self.stats_file = self.dir / f"chat_{key}.stats.json"
+        self.guard_file = self.dir / f"chat_{key}.guard"
+        self.queue_dir = self.dir / f"chat_{key}.queue"
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def guard(self):
+        with open(self.guard_file, "a+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def flock_free(self) -> bool:
+        try:
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            return True
+        finally:
+            os.close(fd)
+
+    def fd_holders(self) -> List[int]:
+        """PIDs (other than ours) with the lock file open, via /proc; [] if unknown."""
+        try:
+            st = os.stat(self.lock_file)
+        except OSError:
+            return []
+        me = os.getpid()
+        out = []
+        for proc in Path("/proc").glob("[0-9]*"):
+            pid = int(proc.name)
+            if pid == me:
+                continue
+            try:
+                fds = list((proc / "fd").iterdir())
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    fst = os.stat(fd)
+                except OSError:
+                    continue
+                if fst.st_ino == st.st_ino and fst.st_dev == st.st_dev:
+                    out.append(pid)
+                    break
+        return sorted(out)
+
+    def tickets(self) -> List[Dict[str, Any]]:
+        """Live tickets, oldest first; tickets of dead waiters are dropped."""
+        out = []
+        for path in sorted(self.queue_dir.glob("*.json")):
+            t = read_json(path)
+            if not t or not pid_alive(t.get("pid")):
+                self._drop_ticket(path.stem)
+                if t:
+                    marker("W_CHAT_LOCK_STALE_WAITER", key=self.key, run_id=t.get("run_id"), pid=t.get("pid"))
+                continue
+            t["ticket"] = path.stem
+            out.append(t)
+        return out
+
+    def _drop_ticket(self, ticket: str) -> None:
+        for suffix in (".json", ".fifo"):
+            try:
+                (self.queue_dir / (ticket + suffix)).unlink()
+            except OSError:
+                pass
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        return read_json(self.holder_file)
+
+    def ewma_hold_ms(self) -> Optional[int]:
+        st = read_json(self.stats_file) or {}
+        v = st.get("ewma_hold_ms")
+        return int(v) if isinstance(v, (int, float)) and v > 0 else None
+
+    def wake_head(self) -> int:
+        """Wake the oldest live waiter, the only one that may claim next."""
+        for t in self.tickets():
+            try:
+                fd = os.open(self.queue_dir / (t["ticket"] + ".fifo"), os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                continue
+            try:
+                os.write(fd, b"1")
+                return 1
+            except OSError:
+                continue
+            finally:
+                os.close(fd)
+        return 0
+
+
+def expected_remaining_ms(holder: Optional[Dict[str, Any]], now: int) -> Optional[int]:
+    if not holder:
+        return None
+    exp = holder.get("expected_hold_ms")
+    if not isinstance(exp, (int, float)) or exp <= 0:
+        return None
+    return max(0, int(holder.get("acquired_ms") or now) + int(exp) - now)
+
+
+def cmd_acquire(args) -> int:
+    lock = ChatLock(args.dir, args.key)
+    pid = args.pid or os.getppid()
+    t0 = now_ms()
+    ticket = f"{time.time_ns():020d}_{pid}"
+    fifo = lock.queue_dir / (ticket + ".fifo")
+    os.mkfifo(fifo, 0o600)
+    # Holding our own write end keeps the FIFO from reporting EOF between wake-ups.
+    rfd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+    wfd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+    write_json(lock.queue_dir / (ticket + ".json"), {"run_id": args.run_id, "pid": pid, "enqueued_ms": t0})
+
+    base_deadline = t0 + int(args.timeout_sec * 1000)
+    max_wait_sec = args.max_wait_sec if args.max_wait_sec is not None else MAX_WAIT_FACTOR * args.timeout_sec
+    hard_deadline = t0 + int(max(args.timeout_sec, max_wait_sec) * 1000)
+    deadline = base_deadline
+    last_position = None
+    last_holder_run_id = None
+    stale_since: Optional[int] = None
+    extended = False
+    position = None
+    granted = False
+    try:
+        while True:
+            now = now_ms()
+            with lock.guard():
+                queue = lock.tickets()
+                position = next((i for i, t in enumerate(queue) if t["ticket"] == ticket), 0)
+                holder = lock.holder()
+                if holder and holder.get("run_id") == args.run_id:
+                    # Leftover claim of this same run (re-exec): ours to take over.
+                    holder = None
+                if holder and not pid_alive(holder.get("pid")):
+                    marker(
+                        "W_CHAT_LOCK_STALE_HOLDER",
+                        key=args.key,
+                        holder_run_id=holder.get("run_id"),
+                        holder_pid=holder.get("pid"),
+                        phase=holder.get("phase"),
+                    )
+                    try:
+                        lock.holder_file.unlink()
+                    except OSError:
+                        pass
+                    holder = None
+                granted = False
+                if position == 0 and holder is None:
+                    if lock.flock_free():
+                        granted = True
+                        stale_since = None
+                    elif stale_since is None:
+                        stale_since = now
+                    elif now - stale_since >= ORPHAN_CHECK_SEC * 1000:
+                        # No live claim but the flock stays taken, e.g. a child of
+                        # a dead holder inherited the fd and may still be working.
+                        # Never swap the inode under it: publish the fd owner as
+                        # the holder, so the dead-PID check hands the lock on once
+                        # it exits and waiters see who they are waiting for.
+                        fd_pids = lock.fd_holders()
+                        marker(
+                            "W_CHAT_LOCK_ORPHAN_FD",
+                            key=args.key,
+                            held_ms=now - stale_since,
+                            pids=",".join(str(p) for p in fd_pids),
+                        )
+                        if fd_pids:
+                            holder = {
+                                "run_id": f"orphan-fd-{fd_pids[0]}",
+                                "pid": fd_pids[0],
+                                "chat_url": "",
+                                "phase": "orphan_fd",
+                                "acquired_ms": stale_since,
+                                "updated_ms": now,
+                                "expected_hold_ms": None,
+                            }
+                            write_json(lock.holder_file, holder)
+                        stale_since = None
+                if granted:
+                    ewma = lock.ewma_hold_ms()
+                    write_json(
+                        lock.holder_file,
+                        {
+                            "run_id": args.run_id,
+                            "pid": pid,
+                            "chat_url": args.chat_url,
+                            "phase": "acquired",
+                            "acquired_ms": now,
+                            "updated_ms": now,
+                            "expected_hold_ms": ewma,
+                        },
+                    )
+                    lock._drop_ticket(ticket)
+                    print(f"granted wait_ms={now - t0} queued_behind={last_position or 0} expected_hold_ms={ewma or 0}")
+                    return 0
+                ewma = lock.ewma_hold_ms()
+            holder_run_id = (holder or {}).get("run_id")
+            if position != last_position or holder_run_id != last_holder_run_id:
+                marker(
+                    "CHAT_LOCK_QUEUED",
+                    key=args.key,
+                    position=position + 1,
+                    queue_len=len(queue),
+                    holder_run_id=holder_run_id,
+                    holder_phase=(holder or {}).get("phase"),
+                    holder_age_ms=(now - int(holder["acquired_ms"])) if holder and holder.get("acquired_ms") else None,
+                    expected_remaining_ms=expected_remaining_ms(holder, now),
+                    run_id=args.run_id,
+                )
+                last_position = position
+                last_holder_run_id = holder_run_id
+            # A live holder with a known hold estimate buys waiters more time:
+            # the wait ends at the predicted handoff plus the base timeout.
+            remaining = expected_remaining_ms(holder, now)
+            if remaining is not None and ewma:
+                predicted = now + remaining + position * ewma
+                new_deadline = min(hard_deadline, max(base_deadline, predicted + int(args.timeout_sec * 1000)))
+                if new_deadline > deadline:
+                    deadline = new_deadline
+                    if not extended:
+                        marker(
+                            "CHAT_LOCK_WAIT_EXTENDED",
+                            key=args.key,
+                            position=position + 1,
+                            expected_remaining_ms=remaining,
+                            deadline_ms=deadline - t0,
+                            run_id=args.run_id,
+                        )
+                        extended = True
+            if now >= deadline:
+                print(
+                    f"timeout wait_ms={now - t0} position={position + 1}"
+                    f" holder_run_id={(holder or {}).get('run_id') or 'none'}"
+                    f" holder_phase={(holder or {}).get('phase') or 'none'}"
+                )
+                return EXIT_TIMEOUT
+            wait_s = max(0.01, min(RECHECK_SEC, (deadline - now) / 1000.0))
+            ready, _, _ = select.select([rfd], [], [], wait_s)
+            if ready:
+                try:
+                    while os.read(rfd, 4096):
+                        pass
+                except OSError as e:
+                    if e.errno != errno.EAGAIN:
+                        raise
+    finally:
+        os.close(rfd)
+        os.close(wfd)
+        with lock.guard():
+            lock._drop_ticket(ticket)
+            # A head that gives up hands its turn on; other departures change
+            # nothing for the head.
+            if position == 0 and not granted:
+                lock.wake_head()
+
+
+def cmd_release(args) -> int:
+    lock = ChatLock(args.dir, args.key)
+    hold_ms = None
+    with lock.guard():
+        holder = lock.holder()
+        if holder and holder.get("run_id") == args.run_id:
+            hold_ms = max(0, now_ms() - int(holder.get("acquired_ms") or now_ms()))
+            try:
+                lock.holder_file.unlink()
+            except OSError:
+                pass
+            st = read_json(lock.stats_file) or {}
+            prev = st.get("ewma_hold_ms")
+            ewma = hold_ms if not isinstance(prev, (int, float)) else (EWMA_ALPHA * hold_ms + (1 - EWMA_ALPHA) * prev)
+            write_json(
+                lock.stats_file,
+                {"ewma_hold_ms": int(ewma), "last_hold_ms": hold_ms, "releases": int(st.get("releases") or 0) + 1},
+            )
+        woken = lock.wake_head()
+    print(f"released hold_ms={hold_ms if hold_ms is not None else 'none'} woken={woken}")
+    return 0
+
+
+def cmd_phase(args) -> int:
+    lock = ChatLock(args.dir, args.key)
+    with lock.guard():
+        holder = lock.holder()
+        if not holder or holder.get("run_id") != args.run_id:
+            return 1
+        holder["phase"] = args.phase
+        holder["updated_ms"] = now_ms()
+        if args.expected_remaining_ms is not None:
+            holder["expected_hold_ms"] = holder["updated_ms"] - int(holder.get("acquired_ms") or 0) + args.expected_remaining_ms
+        write_json(lock.holder_file, holder)
+    return 0
+
+
+def cmd_status(args) -> int:
+    base = Path(args.dir)
+    rows = []
+    now = now_ms()
+    keys = sorted({p.name[len("chat_"):].split(".", 1)[0] for p in base.glob("chat_*.*")}) if base.is_dir() else []
+    for key in keys:
+        if args.key and key != args.key:
+            continue
+        lock = ChatLock(args.dir, key)
+        holder = lock.holder()
+        queue = [{"run_id": t.get("run_id"), "pid": t.get("pid"), "waited_ms": now - int(t.get("enqueued_ms") or now)} for t in lock.tickets()]
+        if holder:
+            holder = dict(holder)
+            holder["alive"] = pid_alive(holder.get("pid"))
+            holder["held_ms"] = now - int(holder.get("acquired_ms") or now)
+            holder["expected_remaining_ms"] = expected_remaining_ms(holder, now)
+        if not holder and not queue and not args.all:
+            continue
+        rows.append({"key": key, "holder": holder, "queue": queue, "ewma_hold_ms": lock.ewma_hold_ms()})
+    if args.json:
+        print(json.dumps({"ts_ms": now, "locks": rows}, ensure_ascii=False, sort_keys=True))
+        return 0
+    for r in rows:
+        h = r["holder"] or {}
+        print(
+            f"CHAT_LOCK key={r['key']} holder_run_id={h.get('run_id') or 'none'} alive={1 if h.get('alive') else 0}"
+            f" phase={h.get('phase') or 'none'} held_ms={h.get('held_ms', 0)}"
+            f" expected_remaining_ms={h.get('expected_remaining_ms') if h.get('expected_remaining_ms') is not None else 'none'}"
+            f" queue={len(r['queue'])} ewma_hold_ms={r['ewma_hold_ms'] or 'none'}"
+        )
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-chat single-flight lock queue.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("acquire", help="queue for the lock; prints `granted ...` (rc 0) or `timeout ...` (rc 75)")
+    a.add_argument("--dir", required=True)
+    a.add_argument("--key", required=True)
+    a.add_argument("--run-id", required=True)
+    a.add_argument("--pid", type=int, default=0, help="owner pid checked for liveness (default: parent)")
+    a.add_argument("--chat-url", default="")
+    a.add_argument("--timeout-sec", type=float, default=TIMEOUT_SEC)
+    a.add_argument(
+        "--max-wait-sec",
+        type=float,
+        default=float(MAX_WAIT_SEC) if MAX_WAIT_SEC else None,
+        help=f"wait cap when the holder is expected to finish soon (default: {MAX_WAIT_FACTOR}x --timeout-sec)",
+    )
+
+    r = sub.add_parser("release", help="drop the holder claim, record hold time, wake the head waiter")
+    r.add_argument("--dir", required=True)
+    r.add_argument("--key", required=True)
+    r.add_argument("--run-id", required=True)
+
+    p = sub.add_parser("phase", help="update the holder phase and optional remaining-time estimate")
+    p.add_argument("--dir", required=True)
+    p.add_argument("--key", required=True)
+    p.add_argument("--run-id", required=True)
+    p.add_argument("--phase", required=True)
+    p.add_argument("--expected-remaining-ms", type=int)
+
+    s = sub.add_parser("status", help="list held/queued chat locks")
+    s.add_argument("--dir", required=True)
+    s.add_argument("--key", default="")
+    s.add_argument("--all", action="store_true", help="include idle locks")
+    s.add_argument("--json", action="store_true")
+
+    args = ap.parse_args()
+    handlers = {"acquire": cmd_acquire, "release": cmd_release, "phase": cmd_phase, "status": cmd_status}
+    return handlers[args.cmd](args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Long-thread rollover: move a specialist thread into a fresh chat.
+
+Every reply-wait poll in cdp_chatgpt.py scans all message nodes of the page,
+and the ChatGPT UI itself slows down on huge threads, so per-turn cost grows
+with the thread. Instead of letting a multi-day loop degrade, chatgpt_send
+bootstraps a new /c/ chat with a compact handoff and continues there.
+
+Inputs (all local, no CDP):
+  conversation store  <conv_root>/<chat_id>/index.json + messages.jsonl
+  poll stats          <poll_stats_dir>/<chat_id>.json, written by
+                      cdp_chatgpt.PollCost after each reply wait
+  checkpoint          state/last_specialist_checkpoint.json
+
+Subcommands:
+  check    ROLLOVER_CHECK line; exit 0 either way, `due=1` when a limit is hit
+  handoff  print the handoff text that follows the bootstrap prompt
+  record   append one rollover to the lineage log
+  lineage  print the chain of chats a thread went through
+"""
+import argparse
+import datetime as dt
+import fcntl
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from conversation_store import ChatStore  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONV_ROOT = os.environ.get("CHATGPT_SEND_CONV_STORE_DIR", "") or str(ROOT / "state" / "conversations")
+DEFAULT_POLL_STATS_DIR = os.environ.get("CHATGPT_SEND_POLL_STATS_DIR", "") or str(ROOT / "state" / "poll_stats")
+DEFAULT_LINEAGE = os.environ.get("CHATGPT_SEND_ROLLOVER_LINEAGE_FILE", "") or str(ROOT / "state" / "chat_lineage.jsonl")
+DEFAULT_CHECKPOINT = str(ROOT / "state" / "last_specialist_checkpoint.json")
+MAX_MESSAGES = int(os.environ.get("CHATGPT_SEND_ROLLOVER_MAX_MESSAGES", "300"))
+MAX_SCAN_MS = float(os.environ.get("CHATGPT_SEND_ROLLOVER_MAX_SCAN_MS", "400"))
+# A single slow reply wait with one or two polls is noise, not a trend.
+MIN_POLLS = int(os.environ.get("CHATGPT_SEND_ROLLOVER_MIN_POLLS", "3"))
+HANDOFF_CHARS = int(os.environ.get("CHATGPT_SEND_ROLLOVER_HANDOFF_CHARS", "6000"))
+HANDOFF_MSG_CHARS = int(os.environ.get("CHATGPT_SEND_ROLLOVER_HANDOFF_MSG_CHARS", "1500"))
+
+CHAT_URL_RE = re.compile(r"^https://chatgpt\.com/c/([0-9A-Za-z-]{16,})$")
+WHITESPACE_RE = re.compile(r"[ \t]+")
+
+
+def now_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def chat_id_of(url: str) -> str:
+    m = CHAT_URL_RE.match((url or "").strip())
+    if not m:
+        raise ValueError(f"not a conversation url: {url!r}")
+    return m.group(1)
+
+
+def read_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def stored_count(conv_root: Path, chat_id: str) -> int:
+    try:
+        return int(ChatStore(conv_root, chat_id).read_index().get("count") or 0)
+    except ValueError:
+        return 0
+
+
+def assess(conv_root: Path, stats_dir: Path, chat_id: str) -> dict:
+    stats = read_json(stats_dir / f"{chat_id}.json")
+    polls = int(stats.get("polls") or 0)
+    scan_avg_ms = float(stats.get("scan_avg_ms") or 0.0)
+    # The store only grows from fetch-last windows; the page count from the
+    # last reply wait covers turns the store never saw.
+    messages = max(stored_count(conv_root, chat_id), int(stats.get("messages") or 0))
+    reasons: List[str] = []
+    if MAX_MESSAGES > 0 and messages >= MAX_MESSAGES:
+        reasons.append("messages")
+    if MAX_SCAN_MS > 0 and polls >= MIN_POLLS and scan_avg_ms >= MAX_SCAN_MS:
+        reasons.append("scan_ms")
+    return {
+        "chat_id": chat_id,
+        "due": bool(reasons),
+        "reason": ",".join(reasons) or "none",
+        "messages": messages,
+        "scan_avg_ms": scan_avg_ms,
+        "polls": polls,
+    }
+
+
+def clip(text: str, limit: int) -> str:
+    text = "\n".join(WHITESPACE_RE.sub(" ", ln).rstrip() for ln in (text or "").strip().splitlines())
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    if len(text) <= limit:
+        return text
+    # Keep the head (usually the point) and the tail (usually the next step).
+    half = max(1, (limit - 5) // 2)
+    return text[:half].rstrip() + "\n[…]\n" + text[-half:].lstrip()
+
+
+def build_handoff(from_url: str, reason: str, msgs: List[dict], count: int, checkpoint: dict) -> str:
+    lines = [
+        "ROLLOVER HANDOFF",
+        f"This chat continues a previous thread that got too long ({reason}).",
+        f"Previous chat: {from_url} ({count} messages).",
+    ]
+    if checkpoint.get("checkpoint_id"):
+        lines.append(f"Last checkpoint: {checkpoint.get('checkpoint_id')} ts={checkpoint.get('ts') or 'unknown'}")
+    if checkpoint.get("summary"):
+        lines.append(f"Last reply summary: {checkpoint.get('summary')}")
+    footer = "Continue the work from where the previous chat stopped; do not repeat finished steps."
+    # Newest first against the budget, printed oldest first; 64 covers the
+    # "Last N messages" header.
+    budget = max(0, HANDOFF_CHARS - sum(len(x) + 1 for x in lines) - len(footer) - 64)
+    picked: List[str] = []
+    for m in reversed(msgs):
+        block = f"--- {m.get('role')} (seq {m.get('seq')})\n{clip(m.get('text') or '', HANDOFF_MSG_CHARS)}"
+        if len(block) + 1 > budget:
+            break
+        picked.append(block)
+        budget -= len(block) + 1
+    if picked:
+        lines.append(f"Last {len(picked)} messages of the previous chat:")
+        lines.extend(reversed(picked))
+    else:
+        lines.append("No stored messages of the previous chat are available.")
+    lines.append(footer)
+    return "\n".join(lines)
+
+
+def cmd_check(args: argparse.Namespace) -> int:
+    res = assess(Path(args.conv_root), Path(args.poll_stats_dir), chat_id_of(args.chat_url))
+    print(
+        f"ROLLOVER_CHECK due={1 if res['due'] else 0} reason={res['reason']} chat_id={res['chat_id']} "
+        f"messages={res['messages']} max_messages={MAX_MESSAGES} scan_avg_ms={res['scan_avg_ms']:.1f} "
+        f"max_scan_ms={MAX_SCAN_MS:.0f} polls={res['polls']}"
+    )
+    return 0
+
+
+def cmd_handoff(args: argparse.Namespace) -> int:
+    chat_id = chat_id_of(args.chat_url)
+    store = ChatStore(Path(args.conv_root), chat_id)
+    msgs = store.messages()
+    count = max(len(msgs), int(store.read_index().get("count") or 0))
+    checkpoint = read_json(Path(args.checkpoint))
+    if (checkpoint.get("chat_id") or "") != chat_id:
+        checkpoint = {}
+    print(build_handoff(args.chat_url.strip(), args.reason or "manual", msgs, count, checkpoint))
+    return 0
+
+
+def cmd_record(args: argparse.Namespace) -> int:
+    # The old chat's numbers at the moment it was left behind.
+    res = assess(Path(args.conv_root), Path(args.poll_stats_dir), chat_id_of(args.from_url))
+    rec = {
+        "ts": now_iso(),
+        "from_url": args.from_url.strip(),
+        "from_chat_id": res["chat_id"],
+        "to_url": args.to_url.strip(),
+        "to_chat_id": chat_id_of(args.to_url),
+        "reason": args.reason or "manual",
+        "messages": res["messages"],
+        "scan_avg_ms": res["scan_avg_ms"],
+        "run_id": args.run_id or "",
+    }
+    path = Path(args.lineage)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        f.write(json.dumps(rec, ensure_ascii=False, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    print(
+        f"ROLLOVER_LINEAGE from_chat_id={rec['from_chat_id']} to_chat_id={rec['to_chat_id']} "
+        f"reason={rec['reason']} messages={rec['messages']} scan_avg_ms={rec['scan_avg_ms']:.1f} "
+        f"run_id={rec['run_id'] or 'none'}"
+    )
+    return 0
+
+
+def read_lineage(path: Path) -> List[dict]:
+    out: List[dict] = []
+    try:
+        fh = path.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return out
+    with fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(rec, dict) and rec.get("from_chat_id") and rec.get("to_chat_id"):
+                out.append(rec)
+    return out
+
+
+def cmd_lineage(args: argparse.Namespace) -> int:
+    recs = read_lineage(Path(args.lineage))
+    prev = {r["to_chat_id"]: r for r in recs}
+    chat_id: Optional[str] = chat_id_of(args.chat_url)
+    chain: List[dict] = []
+    seen = set()
+    while chat_id in prev and chat_id not in seen:
+        seen.add(chat_id)
+        chain.append(prev[chat_id])
+        chat_id = prev[chat_id]["from_chat_id"]
+    for depth, r in enumerate(reversed(chain), start=1):
+        print(
+            f"CHAT_LINEAGE depth={depth} from_chat_id={r['from_chat_id']} to_chat_id={r['to_chat_id']} "
+            f"reason={r.get('reason') or 'none'} messages={r.get('messages') or 0} ts={r.get('ts') or 'none'}"
+        )
+    print(f"CHAT_LINEAGE_SUMMARY chat_id={chat_id_of(args.chat_url)} rollovers={len(chain)} root_chat_id={chat_id}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Roll a long specialist thread over into a fresh chat.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_check = sub.add_parser("check", help="is the chat past the message-count or scan-time limit")
+    ap_check.add_argument("--chat-url", required=True)
+    ap_check.add_argument("--conv-root", default=DEFAULT_CONV_ROOT)
+    ap_check.add_argument("--poll-stats-dir", default=DEFAULT_POLL_STATS_DIR)
+    ap_check.set_defaults(func=cmd_check)
+
+    ap_handoff = sub.add_parser("handoff", help="compact handoff text for the new chat")
+    ap_handoff.add_argument("--chat-url", required=True)
+    ap_handoff.add_argument("--reason", default="manual")
+    ap_handoff.add_argument("--conv-root", default=DEFAULT_CONV_ROOT)
+    ap_handoff.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    ap_handoff.set_defaults(func=cmd_handoff)
+
+    ap_record = sub.add_parser("record", help="append a rollover to the lineage log")
+    ap_record.add_argument("--from-url", required=True)
+    ap_record.add_argument("--to-url", required=True)
+    ap_record.add_argument("--reason", default="manual")
+    ap_record.add_argument("--run-id", default="")
+    ap_record.add_argument("--conv-root", default=DEFAULT_CONV_ROOT)
+    ap_record.add_argument("--poll-stats-dir", default=DEFAULT_POLL_STATS_DIR)
+    ap_record.add_argument("--lineage", default=DEFAULT_LINEAGE)
+    ap_record.set_defaults(func=cmd_record)
+
+    ap_lineage = sub.add_parser("lineage", help="print the chats a thread was rolled over from")
+    ap_lineage.add_argument("--chat-url", required=True)
+    ap_lineage.add_argument("--lineage", default=DEFAULT_LINEAGE)
+    ap_lineage.set_defaults(func=cmd_lineage)
+
+    args = ap.parse_args()
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"E_ROLLOVER_ARG {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
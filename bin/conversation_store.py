@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+import argparse
+import datetime as dt
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from log_sanitize import sanitize_text  # noqa: E402
+
+
+DEFAULT_ROOT = os.environ.get("CHATGPT_SEND_CONV_STORE_DIR", "")
+INDEX_TAIL = int(os.environ.get("CHATGPT_SEND_CONV_STORE_INDEX_TAIL", "64"))
+# Per-chat log cap: past it messages.jsonl rotates to messages.1.jsonl and the
+# previous rotation is dropped, so one chat keeps at most ~2x this on disk.
+MAX_BYTES = int(os.environ.get("CHATGPT_SEND_CONV_STORE_MAX_BYTES", str(4 * 1024 * 1024)))
+CHAT_ID_RE = re.compile(r"^[0-9A-Za-z-]{8,}$")
+WHITESPACE_RE = re.compile(r"\s+")
+HEX_RE = re.compile(r"^[0-9a-f]{8,64}$")
+
+
+def now_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def text_hash(text: str) -> str:
+    """Same canonical hash as cdp_chatgpt.NormText.hash / PROMPT_HASH."""
+    txt = (text or "").replace("\u00a0", " ").replace("\r\n", "\n").replace("\r", "\n")
+    norm = WHITESPACE_RE.sub(" ", txt.strip())
+    if not norm:
+        return ""
+    return hashlib.sha256(norm.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def msg_key(role: str, h: str) -> str:
+    return f"{role}:{h}"
+
+
+class ChatStore:
+    """Append-only message log for one chat.
+
+    `messages.jsonl` holds `append` records with increasing `seq` and `replace`
+    records that supersede an earlier seq (a regenerated or finished reply).
+    `index.json` keeps the message count and the keys of the last messages, so
+    ingest can align a fetch-last window without reading the whole log.
+    Texts are stored secret-redacted (hashes are of the original text), and a
+    log over MAX_BYTES is rotated to `messages.1.jsonl`.
+    """
+
+    def __init__(self, root: Path, chat_id: str):
+        if not CHAT_ID_RE.match(chat_id or ""):
+            raise ValueError(f"bad chat_id: {chat_id!r}")
+        self.chat_id = chat_id
+        self.dir = root / chat_id
+        self.log_path = self.dir / "messages.jsonl"
+        self.rotated_path = self.dir / "messages.1.jsonl"
+        self.index_path = self.dir / "index.json"
+        self.lock_path = self.dir / ".lock"
+
+    def read_index(self) -> dict:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                return data
+        except Exception:
+            pass
+        return {"chat_id": self.chat_id, "count": 0, "gaps": 0, "tail": []}
+
+    def write_index(self, index: dict) -> None:
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp.write_text(json.dumps(index, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def messages(self) -> List[dict]:
+        """Materialize the log: one entry per seq, replace records applied."""
+        by_seq: Dict[int, dict] = {}
+        for path in (self.rotated_path, self.log_path):
+            try:
+                fh = path.open("r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                        seq = int(rec["seq"])
+                    except Exception:
+                        continue
+                    if rec.get("op") == "replace" and seq in by_seq:
+                        rec["gap_before"] = by_seq[seq].get("gap_before", False)
+                    by_seq[seq] = rec
+        return [by_seq[k] for k in sorted(by_seq)]
+
+    def size_bytes(self) -> int:
+        total = 0
+        for path in (self.rotated_path, self.log_path):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def ingest(self, fetched: List[dict], run_id: str) -> dict:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a+", encoding="utf-8") as lock_fh:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+            index = self.read_index()
+            tail = [msg_key(t[1], t[2]) for t in index.get("tail") or []]
+            keys = [msg_key(m["role"], m["hash"]) for m in fetched]
+            plan = align(tail, keys)
+            count = int(index.get("count") or 0)
+            ts = now_iso()
+            records: List[dict] = []
+            tail_rows = list(index.get("tail") or [])
+
+            def record(op: str, seq: int, m: dict, gap: bool) -> dict:
+                text = sanitize_text(m["text"])
+                return {
+                    "seq": seq,
+                    "op": op,
+                    "role": m["role"],
+                    "hash": m["hash"],
+                    "sig": m.get("sig") or "",
+                    "text_len": len(text),
+                    "text": text,
+                    "ts": ts,
+                    "run_id": run_id,
+                    "gap_before": gap,
+                }
+
+            start, replace_last, gap = plan
+            if replace_last:
+                seq = int(tail_rows[-1][0])
+                records.append(record("replace", seq, fetched[start - 1], False))
+                tail_rows[-1] = [seq, fetched[start - 1]["role"], fetched[start - 1]["hash"]]
+            for i, m in enumerate(fetched[start:]):
+                count += 1
+                records.append(record("append", count, m, gap and i == 0))
+                tail_rows.append([count, m["role"], m["hash"]])
+            if records:
+                with self.log_path.open("a", encoding="utf-8") as f:
+                    for rec in records:
+                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                    rotate = f.tell() > MAX_BYTES > 0
+                if rotate:
+                    os.replace(self.log_path, self.rotated_path)
+                    index["rotations"] = int(index.get("rotations") or 0) + 1
+                index.update(
+                    {
+                        "chat_id": self.chat_id,
+                        "count": count,
+                        "gaps": int(index.get("gaps") or 0) + (1 if gap and len(fetched) > start else 0),
+                        "tail": tail_rows[-max(1, INDEX_TAIL):],
+                        "updated_ts": ts,
+                        "last_run_id": run_id,
+                    }
+                )
+                self.write_index(index)
+        return {
+            "appended": len(fetched) - start,
+            "replaced": 1 if replace_last else 0,
+            "gap": 1 if gap and len(fetched) > start else 0,
+            "total": count,
+        }
+
+
+def align(tail: List[str], keys: List[str]) -> Tuple[int, bool, bool]:
+    """Place a fetched window against the stored tail.
+
+    Returns (start, replace_last, gap): fetched[start:] are new messages;
+    replace_last means fetched[start-1] supersedes the last stored message
+    (same position, different assistant text); gap means the window does not
+    overlap the store at all, so turns between them were never seen.
+    """
+    if not tail:
+        return 0, False, False
+    for k in range(min(len(tail), len(keys)), 0, -1):
+        if tail[-k:] == keys[:k]:
+            return k, False, False
+    # The last stored reply changed (finished streaming or regenerated):
+    # everything before it still lines up.
+    if tail[-1].startswith("assistant:"):
+        head = tail[:-1]
+        for k in range(min(len(head), len(keys) - 1), 0, -1):
+            if head[-k:] == keys[:k] and keys[k].startswith("assistant:"):
+                return k + 1, True, False
+    return 0, False, True
+
+
+def fetched_messages(data: dict) -> List[dict]:
+    out: List[dict] = []
+    for m in data.get("messages") or []:
+        role = (m.get("role") or "").strip()
+        text = m.get("text") or ""
+        h = text_hash(text)
+        if role not in ("user", "assistant") or not h:
+            continue
+        out.append({"role": role, "text": text.strip(), "hash": h, "sig": (m.get("sig") or "").strip()})
+    # A reply that is still streaming is stored once it settles.
+    if out and out[-1]["role"] == "assistant" and data.get("stop_visible"):
+        out.pop()
+    return out
+
+
+def resolve_anchor(msgs: List[dict], anchor: str) -> Optional[int]:
+    """Return the seq after which messages are wanted, or None when not found."""
+    anchor = (anchor or "").strip()
+    if anchor in ("", "all", "0", "seq:0"):
+        return 0
+    if anchor.startswith("seq:"):
+        try:
+            seq = int(anchor[4:])
+        except ValueError:
+            return None
+        return seq if any(int(m["seq"]) == seq for m in msgs) else None
+    if anchor.startswith("sig:"):
+        want = anchor[4:]
+        hits = [m for m in msgs if m.get("sig") == want]
+    else:
+        prefix = anchor[5:] if anchor.startswith("hash:") else anchor
+        prefix = prefix.lower()
+        if not HEX_RE.match(prefix):
+            return None
+        hits = [m for m in msgs if (m.get("hash") or "").startswith(prefix)]
+    if not hits:
+        return None
+    return int(hits[-1]["seq"])
+
+
+def public_view(m: dict) -> dict:
+    return {k: m.get(k) for k in ("seq", "role", "hash", "sig", "text_len", "ts", "run_id", "gap_before", "text")}
+
+
+def store_root(args: argparse.Namespace) -> Path:
+    root = (args.root or DEFAULT_ROOT or "").strip()
+    if not root:
+        raise SystemExit("conversation_store: --root or CHATGPT_SEND_CONV_STORE_DIR is required")
+    return Path(root)
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    try:
+        data = json.loads(Path(args.fetch_json).read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"E_CONV_STORE_INPUT path={args.fetch_json} error={type(e).__name__}", file=sys.stderr)
+        return 2
+    chat_id = (args.chat_id or data.get("chat_id") or "").strip()
+    if not chat_id:
+        print(f"CONV_STORE skip reason=no_chat_id run_id={args.run_id or 'none'}")
+        return 0
+    try:
+        store = ChatStore(store_root(args), chat_id)
+    except ValueError:
+        print(f"CONV_STORE skip reason=bad_chat_id chat_id={chat_id} run_id={args.run_id or 'none'}")
+        return 0
+    res = store.ingest(fetched_messages(data), args.run_id or "")
+    if res["gap"]:
+        print(f"W_CONV_STORE_GAP chat_id={chat_id} appended={res['appended']} run_id={args.run_id or 'none'}", file=sys.stderr)
+    print(
+        f"CONV_STORE ingest chat_id={chat_id} appended={res['appended']} replaced={res['replaced']} "
+        f"gap={res['gap']} total={res['total']} run_id={args.run_id or 'none'}"
+    )
+    return 0
+
+
+def cmd_since(args: argparse.Namespace) -> int:
+    store = ChatStore(store_root(args), args.chat_id)
+    msgs = store.messages()
+    after = resolve_anchor(msgs, args.anchor)
+    if after is None:
+        print(f"E_CONV_ANCHOR_NOT_FOUND chat_id={args.chat_id} anchor={args.anchor}", file=sys.stderr)
+        return 3
+    out = [m for m in msgs if int(m["seq"]) > after]
+    if args.limit and args.limit > 0:
+        out = out[-args.limit:]
+    if args.json:
+        payload = {
+            "chat_id": args.chat_id,
+            "anchor": args.anchor or "all",
+            "after_seq": after,
+            "count": len(out),
+            "gap": any(m.get("gap_before") for m in out),
+            "messages": [public_view(m) for m in out],
+        }
+        print(json.dumps(payload, ensure_ascii=False))
+        return 0
+    for m in out:
+        gap = " gap_before=1" if m.get("gap_before") else ""
+        print(f"--- seq={m['seq']} role={m['role']} hash={(m.get('hash') or '')[:12]}{gap}")
+        print(m.get("text") or "")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    store = ChatStore(store_root(args), args.chat_id)
+    msgs = store.messages()
+    if args.format == "jsonl":
+        for m in msgs:
+            print(json.dumps(public_view(m), ensure_ascii=False))
+        return 0
+    print(f"# Conversation {args.chat_id}")
+    for i, m in enumerate(msgs):
+        print()
+        if m.get("gap_before") or (i == 0 and int(m["seq"]) > 1):
+            print("> (earlier turns not captured)")
+            print()
+        print(f"## {m['role'].capitalize()} (seq {m['seq']})")
+        print()
+        print(m.get("text") or "")
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    root = store_root(args)
+    rows = []
+    if root.is_dir():
+        for d in sorted(p for p in root.iterdir() if p.is_dir()):
+            try:
+                store = ChatStore(root, d.name)
+            except ValueError:
+                continue
+            index = store.read_index()
+            size = store.size_bytes()
+            rows.append(
+                {
+                    "chat_id": d.name,
+                    "messages": int(index.get("count") or 0),
+                    "gaps": int(index.get("gaps") or 0),
+                    "bytes": size,
+                    "updated_ts": index.get("updated_ts") or "",
+                }
+            )
+    if args.json:
+        print(json.dumps({"root": str(root), "chats": rows}, ensure_ascii=False))
+        return 0
+    for r in rows:
+        print(
+            f"CONV_STORE_STATS chat_id={r['chat_id']} messages={r['messages']} gaps={r['gaps']} "
+            f"bytes={r['bytes']} updated={r['updated_ts'] or 'none'}"
+        )
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Per-chat offline message store built from fetch-last snapshots.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_ingest = sub.add_parser("ingest", help="append the new turns of a --fetch-last JSON snapshot")
+    ap_ingest.add_argument("--root", default=None)
+    ap_ingest.add_argument("--fetch-json", required=True)
+    ap_ingest.add_argument("--chat-id", default=None, help="override chat_id from the snapshot")
+    ap_ingest.add_argument("--run-id", default="")
+    ap_ingest.set_defaults(func=cmd_ingest)
+
+    ap_since = sub.add_parser("since", help="print stored messages after an anchor (seq:N, hash prefix, sig:SIG)")
+    ap_since.add_argument("--root", default=None)
+    ap_since.add_argument("--chat-id", required=True)
+    ap_since.add_argument("--anchor", default="all")
+    ap_since.add_argument("--limit", type=int, default=0)
+    ap_since.add_argument("--json", action="store_true")
+    ap_since.set_defaults(func=cmd_since)
+
+    ap_export = sub.add_parser("export", help="export a whole stored conversation")
+    ap_export.add_argument("--root", default=None)
+    ap_export.add_argument("--chat-id", required=True)
+    ap_export.add_argument("--format", default="md", choices=("md", "jsonl"))
+    ap_export.set_defaults(func=cmd_export)
+
+    ap_stats = sub.add_parser("stats", help="list stored chats with message counts")
+    ap_stats.add_argument("--root", default=None)
+    ap_stats.add_argument("--json", action="store_true")
+    ap_stats.set_defaults(func=cmd_stats)
+
+    args = ap.parse_args()
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"E_CONV_STORE_ARG {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        try:
+            sys.stdout.close()
+        except Exception:
+            pass
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
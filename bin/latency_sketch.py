@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""Streaming latency quantiles for release-gate runs.
+
+Each latency marker family (`[LOCK] wait_ms=`, `precheck_ms=`, `send_ms=`,
+...) feeds a LatencySketch: exact samples up to EXACT_CAP, then log-spaced
+buckets with REL_ERR relative error, so memory stays bounded however large
+the logs are. Sketches merge, and release_gate_check.sh stores one per run
+(`state/runs/<run_id>/latency_sketch.json`), so runs can be compared and
+trended without re-reading their logs.
+
+Subcommands:
+  scan    stream log files/dirs into a sketch file
+  merge   combine sketch files (e.g. all soak runs of one release)
+  report  per-run p50/p95/p99 with confidence intervals, MAX_P95_* checks
+          and run-to-run regressions
+"""
+import argparse
+import heapq
+import json
+import math
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+REL_ERR = 0.01
+EXACT_CAP = 2048
+Z_95 = 1.96
+SKETCH_FILE = "latency_sketch.json"
+# SLOT_ACQUIRE/SLOT_RELEASE events kept in memory before a sorted run spills.
+SPILL_EVENTS = 65536
+
+LATENCY_MARKERS = {
+    "LOCK_WAIT_MS": re.compile(r"\[LOCK\].*wait_ms=([0-9]+)"),
+    "LOCK_HELD_MS": re.compile(r"\[LOCK\].*lock_held_ms=([0-9]+)"),
+    "SLOT_WAIT_MS": re.compile(r"\bSLOT_ACQUIRE .*?\bwait_ms=([0-9]+)"),
+    "SLOT_HELD_MS": re.compile(r"\bSLOT_RELEASE .*?\bheld_ms=([0-9]+)"),
+    "PRECHECK_MS": re.compile(r"\bprecheck_ms=([0-9]+(?:\.[0-9]+)?)"),
+    "SEND_MS": re.compile(r"\bsend_ms=([0-9]+(?:\.[0-9]+)?)"),
+    "WAIT_REPLY_MS": re.compile(r"\bwait_reply_ms=([0-9]+(?:\.[0-9]+)?)"),
+    "TOTAL_MS": re.compile(r"\btotal_ms=([0-9]+(?:\.[0-9]+)?)"),
+}
+SOFT_RESET_TIER_RE = re.compile(r"\bSOFT_RESET tier=([a-z_]+) outcome=ok elapsed_ms=([0-9]+)")
+NEGATIVE_TOKENS = ("NEGATIVE_EXPECTED", "EXPECT_ERROR=")
+
+
+class LatencySketch:
+    """Mergeable quantile sketch; exact until EXACT_CAP samples."""
+
+    def __init__(self, rel_err: float = REL_ERR, exact_cap: int = EXACT_CAP):
+        self.rel_err = rel_err
+        self.exact_cap = exact_cap
+        self.gamma = (1 + rel_err) / (1 - rel_err)
+        self.log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.exact: Optional[List[float]] = []
+        self.zeros = 0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, value: float, n: int = 1) -> None:
+        value = max(0.0, float(value))
+        self.count += n
+        self.total += value * n
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self.exact is not None:
+            self.exact.extend([value] * n)
+            if len(self.exact) > self.exact_cap:
+                exact, self.exact = self.exact, None
+                for v in exact:
+                    self._bucket_add(v, 1)
+            return
+        self._bucket_add(value, n)
+
+    def _bucket_add(self, value: float, n: int) -> None:
+        if value <= 0:
+            self.zeros += n
+            return
+        key = int(math.ceil(math.log(value) / self.log_gamma))
+        self.buckets[key] = self.buckets.get(key, 0) + n
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.count == 0:
+            return
+        if self.exact is not None and other.exact is not None and len(self.exact) + len(other.exact) <= self.exact_cap:
+            self.exact.extend(other.exact)
+        else:
+            if self.exact is not None:
+                exact, self.exact = self.exact, None
+                for v in exact:
+                    self._bucket_add(v, 1)
+            if other.exact is not None:
+                for v in other.exact:
+                    self._bucket_add(v, 1)
+            else:
+                self.zeros += other.zeros
+                for key, n in other.buckets.items():
+                    self.buckets[key] = self.buckets.get(key, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def value_at_rank(self, rank: int) -> float:
+        """Value of the rank-th smallest sample (0-based), clamped to the range."""
+        if self.count == 0:
+            return 0.0
+        rank = max(0, min(rank, self.count - 1))
+        if self.exact is not None:
+            self.exact.sort()
+            return float(self.exact[rank])
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return float(min(max(value, self.min or 0.0), self.max or value))
+        return float(self.max or 0.0)
+
+    def quantile(self, q: float) -> float:
+        # Same rank rule as the gate always used: ceil(q * n)-th sample.
+        return self.value_at_rank(int(math.ceil(q * self.count)) - 1)
+
+    def quantile_ci(self, q: float, z: float = Z_95) -> Tuple[float, float]:
+        """Distribution-free CI of the q-quantile from binomial order statistics."""
+        n = self.count
+        if n == 0:
+            return 0.0, 0.0
+        spread = z * math.sqrt(n * q * (1 - q))
+        lo = int(math.floor(n * q - spread)) - 1
+        hi = int(math.ceil(n * q + spread)) - 1
+        return self.value_at_rank(lo), self.value_at_rank(hi)
+
+    def to_json(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "rel_err": self.rel_err,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+        if self.exact is not None:
+            out["exact"] = self.exact
+        else:
+            out["zeros"] = self.zeros
+            out["buckets"] = {str(k): v for k, v in sorted(self.buckets.items())}
+        return out
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> "LatencySketch":
+        s = cls(rel_err=float(obj.get("rel_err") or REL_ERR))
+        s.count = int(obj.get("count") or 0)
+        s.total = float(obj.get("sum") or 0.0)
+        s.min = obj.get("min")
+        s.max = obj.get("max")
+        if "exact" in obj:
+            s.exact = [float(v) for v in obj["exact"]]
+        else:
+            s.exact = None
+            s.zeros = int(obj.get("zeros") or 0)
+            s.buckets = {int(k): int(v) for k, v in (obj.get("buckets") or {}).items()}
+        return s
+
+
+def parse_thresholds(text: str, profile_name: str) -> Dict[str, float]:
+    lines = text.splitlines()
+    target = f"THRESHOLDS_{profile_name.upper()}"
+    in_target = False
+    in_code = False
+    out: Dict[str, float] = {}
+    for raw in lines:
+        stripped = raw.strip()
+        if not in_target:
+            if target in stripped:
+                in_target = True
+            continue
+        if not in_code:
+            if stripped.startswith("```"):
+                in_code = True
+            continue
+        if stripped.startswith("```"):
+            break
+        m = re.match(r"^([A-Z0-9_]+)=([0-9]+(?:\.[0-9]+)?)$", stripped)
+        if m:
+            out[m.group(1)] = float(m.group(2))
+    if out:
+        return out
+    # Backward compatibility fallback: parse flat KEY=VALUE lines from whole doc.
+    for raw in lines:
+        m = re.match(r"^([A-Z0-9_]+)=([0-9]+(?:\.[0-9]+)?)$", raw.strip())
+        if m:
+            out[m.group(1)] = float(m.group(2))
+    return out
+
+
+def iter_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def is_negative_line(line: str) -> bool:
+    """A single marker anywhere makes the whole file an expected-negative log."""
+    return any(tok in line for tok in NEGATIVE_TOKENS)
+
+
+class SlotInflight:
+    """Peak concurrent CDP slot holders from SLOT_ACQUIRE/SLOT_RELEASE events.
+
+    Events are buffered up to SPILL_EVENTS, then sorted and spilled to a temp
+    file; peak() merges the sorted runs with a running in-flight counter, so
+    memory stays bounded however many events the logs hold. A release sorts
+    before an acquire with the same timestamp.
+    """
+
+    def __init__(self, spill_events: int = SPILL_EVENTS):
+        self.spill_events = spill_events
+        self.buf: List[Tuple[int, int]] = []
+        self.runs: List[Any] = []
+
+    def add(self, ts_ms: int, acquire: bool) -> None:
+        self.buf.append((ts_ms, 1 if acquire else 0))
+        if len(self.buf) >= self.spill_events:
+            self._spill()
+
+    def _spill(self) -> None:
+        f = tempfile.TemporaryFile("w+", encoding="utf-8")
+        f.writelines(f"{ts} {kind}\n" for ts, kind in sorted(self.buf))
+        f.seek(0)
+        self.runs.append(f)
+        self.buf = []
+
+    def merge(self, other: "SlotInflight") -> None:
+        self.runs.extend(other.runs)
+        other.runs = []
+        for ts, kind in other.buf:
+            self.add(ts, bool(kind))
+        other.buf = []
+
+    @staticmethod
+    def _read_run(f) -> Iterator[Tuple[int, int]]:
+        for line in f:
+            ts, kind = line.split()
+            yield int(ts), int(kind)
+
+    def peak(self) -> int:
+        streams = [self._read_run(f) for f in self.runs] + [iter(sorted(self.buf))]
+        inflight = peak = 0
+        try:
+            for _, kind in heapq.merge(*streams):
+                if kind:
+                    inflight += 1
+                    peak = max(peak, inflight)
+                else:
+                    inflight = max(0, inflight - 1)
+        finally:
+            for f in self.runs:
+                f.close()
+            self.runs, self.buf = [], []
+        return peak
+
+
+def scan_line(line: str, sketches: Dict[str, LatencySketch]) -> List[str]:
+    """Feed one log line into the per-metric sketches; returns the metrics hit."""
+    hit = []
+    for metric, rx in LATENCY_MARKERS.items():
+        m = rx.search(line)
+        if m:
+            sketches.setdefault(metric, LatencySketch()).add(float(m.group(1)))
+            hit.append(metric)
+    m = SOFT_RESET_TIER_RE.search(line)
+    if m:
+        metric = f"SOFT_RESET_{m.group(1).upper()}_MS"
+        sketches.setdefault(metric, LatencySketch()).add(float(m.group(2)))
+        hit.append(metric)
+    return hit
+
+
+def log_files(paths: Iterable[str]) -> List[Path]:
+    out: List[Path] = []
+    for p in paths:
+        path = Path(p)
+        if path.is_dir():
+            out.extend(
+                f for f in sorted(path.rglob("*"))
+                if f.is_file() and f.name not in (SKETCH_FILE, "gate_check.log")
+            )
+        elif path.is_file():
+            out.append(path)
+    return out
+
+
+def scan_files(files: Iterable[Path]) -> Dict[str, LatencySketch]:
+    sketches: Dict[str, LatencySketch] = {}
+    for path in files:
+        # One pass per file: its samples count only if no negative marker shows up.
+        file_sketches: Dict[str, LatencySketch] = {}
+        negative = False
+        try:
+            for line in iter_lines(path):
+                negative = negative or is_negative_line(line)
+                if not negative:
+                    scan_line(line, file_sketches)
+        except OSError:
+            continue
+        if negative:
+            continue
+        for metric, sketch in file_sketches.items():
+            sketches.setdefault(metric, LatencySketch()).merge(sketch)
+    return sketches
+
+
+def dump_sketches(path: Path, run_id: str, sketches: Dict[str, LatencySketch], **extra: Any) -> None:
+    obj = {"run_id": run_id, "metrics": {k: s.to_json() for k, s in sorted(sketches.items())}}
+    obj.update(extra)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_sketches(path: Path) -> Tuple[str, Dict[str, LatencySketch]]:
+    obj = json.loads(path.read_text(encoding="utf-8"))
+    metrics = {k: LatencySketch.from_json(v) for k, v in (obj.get("metrics") or {}).items()}
+    return str(obj.get("run_id") or path.parent.name), metrics
+
+
+def resolve_source(src: str, runs_dir: Path) -> Tuple[str, Dict[str, LatencySketch]]:
+    """A sketch file, a run dir (stored sketch or a fresh scan) or a run id."""
+    path = Path(src)
+    if not path.exists() and (runs_dir / src).is_dir():
+        path = runs_dir / src
+    if path.is_file() and path.suffix == ".json":
+        return load_sketches(path)
+    if path.is_dir():
+        if (path / SKETCH_FILE).is_file():
+            return load_sketches(path / SKETCH_FILE)
+        return path.name, scan_files(log_files([str(path)]))
+    raise FileNotFoundError(src)
+
+
+def fmt(v: float) -> str:
+    return str(int(round(v))) if abs(v - round(v)) < 1e-9 or v >= 100 else f"{v:.1f}"
+
+
+def cmd_scan(args) -> int:
+    sketches = scan_files(log_files(args.paths))
+    dump_sketches(Path(args.out), args.run_id, sketches)
+    n = sum(s.count for s in sketches.values())
+    print(f"LATENCY_SCAN run_id={args.run_id} metrics={len(sketches)} samples={n} out={args.out}")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    merged: Dict[str, LatencySketch] = {}
+    runs = []
+    for src in args.sources:
+        run_id, sketches = resolve_source(src, Path(args.runs_dir))
+        runs.append(run_id)
+        for metric, s in sketches.items():
+            merged.setdefault(metric, LatencySketch()).merge(s)
+    dump_sketches(Path(args.out), args.label, merged, merged_runs=runs)
+    print(f"LATENCY_MERGE label={args.label} runs={len(runs)} metrics={len(merged)} out={args.out}")
+    return 0
+
+
+def cmd_report(args) -> int:
+    runs_dir = Path(args.runs_dir)
+    thresholds: Dict[str, float] = {}
+    if args.thresholds:
+        thresholds = parse_thresholds(Path(args.thresholds).read_text(encoding="utf-8", errors="ignore"), args.profile)
+    loaded = []
+    for src in args.sources:
+        try:
+            loaded.append(resolve_source(src, runs_dir))
+        except (OSError, ValueError) as e:
+            print(f"E_LATENCY_SOURCE source={src} error={type(e).__name__}", file=sys.stderr)
+            return 2
+    metrics = sorted({m for _, sk in loaded for m in sk})
+    rows = []
+    trends = []
+    bad = 0
+    for metric in metrics:
+        limit = thresholds.get(f"MAX_P95_{metric}")
+        prev = None
+        for run_id, sketches in loaded:
+            s = sketches.get(metric)
+            if s is None or s.count == 0:
+                continue
+            lo, hi = s.quantile_ci(0.95)
+            p95 = s.quantile(0.95)
+            status = "none"
+            if limit is not None:
+                # over: the point estimate breaks the limit; at_risk: only the CI does.
+                status = "over" if p95 > limit else ("at_risk" if hi > limit else "ok")
+                bad += status == "over"
+            row = {
+                "run_id": run_id, "metric": metric, "n": s.count,
+                "p50": s.quantile(0.5), "p95": p95, "p99": s.quantile(0.99),
+                "p95_ci": [lo, hi], "max": s.max or 0.0, "limit": limit, "status": status,
+            }
+            rows.append(row)
+            if prev is not None:
+                p_lo, p_hi = prev["p95_ci"]
+                if lo > p_hi:
+                    verdict = "regression"
+                    bad += 1
+                elif hi < p_lo:
+                    verdict = "improvement"
+                else:
+                    verdict = "flat"
+                delta = (p95 - prev["p95"]) / prev["p95"] * 100 if prev["p95"] else 0.0
+                trends.append({
+                    "metric": metric, "from": prev["run_id"], "to": run_id,
+                    "p95_from": prev["p95"], "p95_to": p95, "delta_pct": round(delta, 1), "verdict": verdict,
+                })
+            prev = row
+    if args.json:
+        print(json.dumps({"runs": [r for r, _ in loaded], "rows": rows, "trends": trends}, sort_keys=True))
+    else:
+        for r in rows:
+            lo, hi = r["p95_ci"]
+            print(
+                f"LATENCY run={r['run_id']} metric={r['metric']} n={r['n']} p50={fmt(r['p50'])} p95={fmt(r['p95'])}"
+                f" p99={fmt(r['p99'])} p95_ci={fmt(lo)}..{fmt(hi)} max={fmt(r['max'])}"
+                f" limit={fmt(r['limit']) if r['limit'] is not None else 'none'} status={r['status']}"
+            )
+        for t in trends:
+            print(
+                f"LATENCY_TREND metric={t['metric']} from={t['from']} to={t['to']} p95_from={fmt(t['p95_from'])}"
+                f" p95_to={fmt(t['p95_to'])} delta_pct={t['delta_pct']} verdict={t['verdict']}"
+            )
+    return 1 if (args.strict and bad) else 0
+
+
+def main() -> int:
+    root = Path(__file__).resolve().parent.parent
+    ap = argparse.ArgumentParser(description="Streaming latency quantiles for release-gate runs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("scan", help="stream logs (files or dirs) into a sketch file")
+    s.add_argument("--run-id", required=True)
+    s.add_argument("--out", required=True)
+    s.add_argument("paths", nargs="+")
+
+    m = sub.add_parser("merge", help="combine runs into one sketch file")
+    m.add_argument("--label", required=True)
+    m.add_argument("--out", required=True)
+    m.add_argument("--runs-dir", default=str(root / "state" / "runs"))
+    m.add_argument("sources", nargs="+", help="sketch files, run dirs or run ids")
+
+    r = sub.add_parser("report", help="percentiles with CIs, threshold checks and run-to-run trend")
+    r.add_argument("--thresholds", default=str(root / "docs" / "RELEASE_GATE.md"))
+    r.add_argument("--profile", default="prod", choices=("prod", "soak"))
+    r.add_argument("--runs-dir", default=str(root / "state" / "runs"))
+    r.add_argument("--json", action="store_true")
+    r.add_argument("--strict", action="store_true", help="rc 1 on a threshold breach or a regression")
+    r.add_argument("sources", nargs="+", help="sketch files, run dirs or run ids, oldest first")
+
+    args = ap.parse_args()
+    handlers = {"scan": cmd_scan, "merge": cmd_merge, "report": cmd_report}
+    try:
+        return handlers[args.cmd](args)
+    except BrokenPipeError:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -26,6 +26,7 @@ while [[ $# -gt 0 ]]; do
     --probe-chat-url) PROBE_CHAT_URL="$2"; shift 2;;
     --no-state-write) SKIP_STATE_WRITE=1; shift;;
     --init-specialist) INIT_SPECIALIST=1; shift;;
+    --rollover) ROLLOVER_NOW=1; shift;;
     --topic) INIT_TOPIC="$2"; shift 2;;
     --set-active-title) SET_ACTIVE_TITLE="$2"; shift 2;;
     --open-browser) OPEN_BROWSER=1; shift;;
@@ -42,6 +43,15 @@ while [[ $# -gt 0 ]]; do
         EXPLAIN_TARGET="latest"; shift
       fi
       ;;
+    --history)
+      DO_HISTORY=1
+      if [[ $# -ge 2 ]] && [[ "${2:-}" != --* ]]; then
+        HISTORY_ANCHOR="$2"; shift 2
+      else
+        shift
+      fi
+      ;;
+    --history-limit) HISTORY_LIMIT="$2"; shift 2;;
     --step) DO_STEP=1; shift;;
     --action) STEP_ACTION="$2"; shift 2;;
     --message) STEP_MESSAGE="$2"; shift 2;;
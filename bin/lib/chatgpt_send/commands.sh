@@ -481,8 +481,28 @@ PY
   return "$st"
 }
 
+chatgpt_send_history_command() {
+  # Answer from the conversation store only; the browser is never touched.
+  local url chat_id
+  local -a args=()
+  url="${CHATGPT_URL:-}"
+  if ! is_chat_conversation_url "${url:-}"; then
+    url="$(read_work_chat_url | head -n 1 || true)"
+  fi
+  chat_id="$(chat_id_from_url "${url:-}" 2>/dev/null || true)"
+  if [[ -z "${chat_id:-}" ]]; then
+    echo "E_CONV_STORE_NO_CHAT url=${url:-none} run_id=${RUN_ID}" >&2
+    return 2
+  fi
+  args=(--root "$CONV_STORE_DIR" --chat-id "$chat_id" --anchor "${HISTORY_ANCHOR:-all}" --limit "${HISTORY_LIMIT:-0}")
+  if [[ "${OUTPUT_JSON:-0}" == "1" ]]; then
+    args+=(--json)
+  fi
+  python3 "${SCRIPT_DIR}/conversation_store.py" since "${args[@]}"
+}
+
 chatgpt_send_explain_command() {
-  python3 - "$ROOT" "${EXPLAIN_TARGET:-latest}" "${OUTPUT_JSON:-0}" <<'PY'
+  python3 - "$ROOT" "${EXPLAIN_TARGET:-latest}" "${OUTPUT_JSON:-0}" "$SCRIPT_DIR" <<'PY'
 import json
 import pathlib
 import re
@@ -500,6 +520,19 @@ try:
 except Exception:
     _resolve_error_spec = None
     _resolve_error_spec_with_meta = None
+sys.path.insert(0, sys.argv[4])
+try:
+    from log_sink import tail_log_lines as _tail_log_lines  # type: ignore
+except Exception:
+    _tail_log_lines = None
+
+def tail_log_local(path, n):
+    if _tail_log_lines is None:
+        return []
+    try:
+        return _tail_log_lines(path, n)
+    except Exception:
+        return []
 
 def resolve_error_spec_local(code):
     if not _resolve_error_spec:
@@ -791,6 +824,11 @@ else:
             obj["evidence"].append({"file": str(run_dir / "summary.json"), "hint": f"outcome={(summary.get('outcome') or 'none')} exit_status={summary.get('exit_status')}"})
         if manifest:
             obj["evidence"].append({"file": str(run_dir / "manifest.json"), "hint": f"chat_url={(manifest.get('chat_url') or '')[:64]}"})
+        transport_log = run_dir / "transport.log"
+        transport_tail = tail_log_local(transport_log, 200)
+        if transport_tail:
+            last_err = next((ln.strip() for ln in reversed(transport_tail) if re.match(r"^E_[A-Z0-9_]+", ln.strip())), "")
+            obj["evidence"].append({"file": str(transport_log), "hint": f"last_error={(last_err or 'none')[:160]}"})
 
         if bool(ui_diag.get("login_detected")):
             nxt.insert(0, "UI показывает login screen: войти вручную в ChatGPT.")
@@ -2020,6 +2058,11 @@ if [[ $DO_EXPLAIN -eq 1 ]]; then
   exit $?
 fi
 
+if [[ $DO_HISTORY -eq 1 ]]; then
+  chatgpt_send_history_command
+  exit $?
+fi
+
 if [[ -n "${PROBE_CHAT_URL//[[:space:]]/}" ]]; then
   if ! is_chat_conversation_url "${PROBE_CHAT_URL}"; then
     echo "E_ARG_INVALID key=probe_chat_url value=${PROBE_CHAT_URL} run_id=${RUN_ID}" >&2
@@ -2210,7 +2253,7 @@ PY
 
     if (( cdp_ok == 1 )); then
       echo "  open_chat_tabs:"
-      curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+      cdp_tab_list_json | python3 -c '
 import json,re,sys
 try:
     tabs=json.load(sys.stdin)
@@ -2224,7 +2267,7 @@ for t in tabs:
 for tid,u,title in hits[:12]:
     print("   -", tid, u, ("(" + title + ")") if title else "")
 print("   total:", len(hits))
-'
+' || true
     fi
   fi
   echo "DOCTOR done invariants_ok=${invariants_ok} fail_count=${fail_count} run_id=${RUN_ID}" >&2
@@ -2303,6 +2346,21 @@ print(json.dumps(db, ensure_ascii=False, sort_keys=True))
   exit 0
 fi
 
+if [[ $ROLLOVER_NOW -eq 1 ]]; then
+  # Rollover = init-specialist whose first message carries a handoff of the
+  # current work chat; the pin step below records the lineage.
+  if [[ $CHATGPT_URL_EXPLICIT -eq 1 ]]; then
+    ROLLOVER_FROM_URL="$CHATGPT_URL"
+  else
+    ROLLOVER_FROM_URL="$(read_work_chat_url)"
+  fi
+  if ! is_chat_conversation_url "${ROLLOVER_FROM_URL:-}"; then
+    echo "E_ROLLOVER_NO_WORK_CHAT got=${ROLLOVER_FROM_URL:-none} run_id=${RUN_ID}" >&2
+    exit 2
+  fi
+  INIT_SPECIALIST=1
+fi
+
 if [[ $INIT_SPECIALIST -eq 1 ]]; then
   if [[ "${WAIT_ONLY}" == "1" ]]; then
     emit_wait_only_block "init_specialist"
@@ -2329,9 +2387,43 @@ if [[ $INIT_SPECIALIST -eq 1 ]]; then
     PROMPT+=$'\n\n'"Тема: ${topic}"
   fi
   PROMPT_FILE=""
+  if [[ -n "${ROLLOVER_FROM_URL:-}" ]]; then
+    handoff="$(python3 "${SCRIPT_DIR}/chat_rollover.py" handoff \
+      --chat-url "$ROLLOVER_FROM_URL" \
+      --reason "$ROLLOVER_REASON" \
+      --conv-root "$CONV_STORE_DIR" \
+      --checkpoint "$LAST_SPECIALIST_CHECKPOINT_FILE")" || {
+      echo "E_ROLLOVER_HANDOFF_FAILED from_url=${ROLLOVER_FROM_URL} run_id=${RUN_ID}" >&2
+      exit 1
+    }
+    PROMPT+=$'\n\n'"${handoff}"
+    echo "ROLLOVER_START from_url=${ROLLOVER_FROM_URL} reason=${ROLLOVER_REASON} handoff_chars=${#handoff} run_id=${RUN_ID}" >&2
+  fi
 
   # Prepare a nicer session name/title for the newly created chat.
-  if [[ -n "${topic//[[:space:]]/}" ]]; then
+  rollover_from_name=""
+  if [[ -n "${ROLLOVER_FROM_URL:-}" ]]; then
+    rollover_from_name="$(chats_db_find_name_by_url "$ROLLOVER_FROM_URL" | grep -vx 'last' | head -n 1 || true)"
+  fi
+  if [[ -n "${ROLLOVER_FROM_URL:-}" ]]; then
+    # Keep the thread recognizable: <old-name>-r<timestamp>, title carried over.
+    base_slug="${rollover_from_name:-session}"
+    base_slug="${base_slug%-r[0-9]*}"
+    INIT_SESSION_NAME="$(chats_db_unique_name "${base_slug}-r$(date +%Y%m%d-%H%M%S)")"
+    rollover_title=""
+    if [[ -n "${rollover_from_name:-}" ]]; then
+      rollover_title="$(chats_db_read | python3 -c '
+import json,re,sys
+try:
+    db=json.load(sys.stdin)
+except Exception:
+    sys.exit(0)
+title=((db.get("chats") or {}).get(sys.argv[1]) or {}).get("title") or ""
+print(re.sub(r" \((rollover )?[0-9]{4}-[0-9]{2}-[0-9]{2}\)$", "", title))
+' "$rollover_from_name" 2>/dev/null || true)"
+    fi
+    INIT_SESSION_TITLE="${rollover_title:-Specialist session} (rollover $(date +%Y-%m-%d))"
+  elif [[ -n "${topic//[[:space:]]/}" ]]; then
     INIT_SESSION_TITLE="${topic} ($(date +%Y-%m-%d))"
     base_slug="$(slugify_ascii "$topic")"
     if [[ -z "${base_slug//[[:space:]]/}" ]]; then
@@ -5,6 +5,7 @@ usage() {
 Usage:
   chatgpt_send [options] (--prompt TEXT | --prompt-file PATH | < prompt.txt)
   chatgpt_send --init-specialist
+  chatgpt_send --rollover [--chatgpt-url URL]
   chatgpt_send --set-chatgpt-url URL
   chatgpt_send --clear-chatgpt-url
   chatgpt_send --show-chatgpt-url
@@ -45,6 +46,7 @@ Options:
   --no-state-write              do not update pinned/active state (used by probe/check scripts)
   --init-specialist             open browser (if needed) and send bootstrap prompt to create/pin a new Specialist chat
   --topic TEXT                  (with --init-specialist) short task/topic; used as first message and saved in sessions list
+  --rollover                    move the work chat into a fresh Specialist chat (bootstrap + compact handoff, lineage recorded)
   --set-chatgpt-url URL         persist default chat URL (same chat every run)
   --clear-chatgpt-url           remove persisted default chat URL
   --show-chatgpt-url            print persisted/default chat URL and exit
@@ -54,9 +56,12 @@ Options:
   --list-chats                  list saved Specialist chats (name -> url)
   --status                      operator-friendly status (can_send/blockers/next)
   --explain TARGET              explain an error code or a run (`latest`, RUN_ID, or path)
+  --history [ANCHOR]            print stored messages of the current chat after ANCHOR
+                                (`all`, `seq:N`, hash prefix, `sig:SIG`; offline, no browser)
+  --history-limit N             with --history: only the last N messages
   step <MODE>                   UX facade step (read/send/auto) over existing safe core
   --doctor                      print a quick health report (CDP, pinned chat, sessions)
-  --json                        with --doctor/--status/--explain: output JSON
+  --json                        with --doctor/--status/--explain/--history: output JSON
   --message TEXT                with `step send/auto`: message to send via existing pipeline
   --max-steps N                 with `step auto`: max transitions (MVP default 1)
   --until STAGE                 with `step auto`: target stage hint (reserved/MVP passthrough)
@@ -470,6 +475,14 @@ stop_profile_chrome() {
 }
 
 graceful_restart_browser() {
+  local st=0
+  cdp_browser_acquire graceful_restart_browser || return $?
+  graceful_restart_browser_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+graceful_restart_browser_locked() {
   local reason="${1:-manual}"
   local target_url="${2:-https://chatgpt.com/}"
   local st=0
@@ -534,12 +547,28 @@ graceful_restart_browser() {
 }
 
 timeout_budget_file_path() {
-  printf '%s\n' "${CHATGPT_SEND_TIMEOUT_BUDGET_FILE:-$ROOT/state/timeout_budget_events.log}"
+  # One store per browser: fleet children on the same CDP port share a
+  # CHATGPT_SEND_TIMEOUT_BUDGET_DIR (spawn_second_agent exports /tmp).
+  if [[ -n "${CHATGPT_SEND_TIMEOUT_BUDGET_FILE:-}" ]]; then
+    printf '%s\n' "$CHATGPT_SEND_TIMEOUT_BUDGET_FILE"
+  elif [[ -n "${CHATGPT_SEND_TIMEOUT_BUDGET_DIR:-}" ]]; then
+    printf '%s\n' "${CHATGPT_SEND_TIMEOUT_BUDGET_DIR}/chatgpt-send-timeout-budget.cdp${CDP_PORT:-9222}.tsv"
+  else
+    printf '%s\n' "$ROOT/state/timeout_budget_events.log"
+  fi
 }
 
 timeout_budget_record_event() {
+  # Sliding-window budget kept as at most ~60 `<bucket_start>\t<kind>\t<count>`
+  # lines, so each record costs the same however many events the window saw.
+  # Increment, expiry and the check run under one flock: concurrent runs
+  # never lose events. Legacy `<ts>\t<kind>` lines count as one event each.
+  # Without the lock the store is left alone: this event goes uncounted
+  # rather than racing another run's read-modify-write.
   local kind="${1:-status4_timeout}"
-  local window max now file tmp count_total count_runtime count_composer
+  local window max now width bucket file fd b k c lock_wait bumped=0
+  local count_total=0 count_runtime=0 count_composer=0
+  local -a keep=()
   window="$TIMEOUT_BUDGET_WINDOW_SEC"
   max="$TIMEOUT_BUDGET_MAX"
   [[ "$window" =~ ^[0-9]+$ ]] || window=300
@@ -547,29 +576,52 @@ timeout_budget_record_event() {
   if (( max <= 0 )); then
     return 0
   fi
-  now="$(date +%s)"
+  printf -v now '%(%s)T' -1
+  width=$(( window / 60 ))
+  (( width >= 1 )) || width=1
+  bucket=$(( now - now % width ))
   file="$(timeout_budget_file_path)"
   mkdir -p "$(dirname "$file")" >/dev/null 2>&1 || true
-  touch "$file" >/dev/null 2>&1 || true
-  printf '%s\t%s\n' "$now" "$kind" >>"$file"
-
-  tmp="$(mktemp)"
-  awk -F '\t' -v now="$now" -v window="$window" '
-    NF >= 1 {
-      ts = $1 + 0
-      if (ts >= (now - window)) print $0
-    }
-  ' "$file" >"$tmp" 2>/dev/null || true
-  mv "$tmp" "$file" >/dev/null 2>&1 || true
-
-  count_total="$(wc -l <"$file" 2>/dev/null | tr -d '[:space:]' || true)"
-  [[ "$count_total" =~ ^[0-9]+$ ]] || count_total=0
-  count_runtime="$(grep -c $'\truntime_eval' "$file" 2>/dev/null || true)"
-  [[ "$count_runtime" =~ ^[0-9]+$ ]] || count_runtime=0
-  count_composer="$(grep -c $'\tcomposer' "$file" 2>/dev/null || true)"
-  [[ "$count_composer" =~ ^[0-9]+$ ]] || count_composer=0
-
-  echo "TIMEOUT_BUDGET event=${kind} total=${count_total} runtime_eval=${count_runtime} composer=${count_composer} max=${max} window_sec=${window} run_id=${RUN_ID}" >&2
+  lock_wait="${TIMEOUT_BUDGET_LOCK_WAIT_SEC:-10}"
+  [[ "$lock_wait" =~ ^[0-9]+$ ]] || lock_wait=10
+  if ! { exec {fd}>>"${file}.lock"; } 2>/dev/null; then
+    echo "W_TIMEOUT_BUDGET_LOCK_TIMEOUT event=${kind} wait_sec=0 reason=lock_open_failed file=${file}.lock action=skip_update run_id=${RUN_ID}" >&2
+    return 0
+  fi
+  if ! flock -x -w "$lock_wait" "$fd" >/dev/null 2>&1; then
+    exec {fd}>&- || true
+    echo "W_TIMEOUT_BUDGET_LOCK_TIMEOUT event=${kind} wait_sec=${lock_wait} file=${file}.lock action=skip_update run_id=${RUN_ID}" >&2
+    return 0
+  fi
+  if [[ -f "$file" ]]; then
+    while IFS=$'\t' read -r b k c; do
+      [[ "$b" =~ ^[0-9]+$ ]] || continue
+      [[ "$c" =~ ^[0-9]+$ ]] || c=1
+      (( b + width > now - window )) || continue
+      if (( b == bucket )) && [[ "$k" == "$kind" ]]; then
+        c=$((c + 1))
+        bumped=1
+      fi
+      keep+=("${b}"$'\t'"${k}"$'\t'"${c}")
+      count_total=$((count_total + c))
+      case "$k" in
+        runtime_eval*) count_runtime=$((count_runtime + c)) ;;
+        composer*) count_composer=$((count_composer + c)) ;;
+      esac
+    done <"$file"
+  fi
+  if (( bumped == 0 )); then
+    keep+=("${bucket}"$'\t'"${kind}"$'\t'"1")
+    count_total=$((count_total + 1))
+    case "$kind" in
+      runtime_eval*) count_runtime=$((count_runtime + 1)) ;;
+      composer*) count_composer=$((count_composer + 1)) ;;
+    esac
+  fi
+  printf '%s\n' "${keep[@]}" >"${file}.tmp.$$" 2>/dev/null && mv -f "${file}.tmp.$$" "$file" >/dev/null 2>&1 || true
+  exec {fd}>&- || true
+
+  echo "TIMEOUT_BUDGET event=${kind} total=${count_total} runtime_eval=${count_runtime} composer=${count_composer} max=${max} window_sec=${window} bucket_sec=${width} cdp_port=${CDP_PORT:-9222} run_id=${RUN_ID}" >&2
   if (( count_total >= max )); then
     echo "E_TIMEOUT_BUDGET_EXCEEDED runtime_eval=${count_runtime} composer=${count_composer} total=${count_total} max=${max} window_sec=${window} action=${TIMEOUT_BUDGET_ACTION} run_id=${RUN_ID}" >&2
     return 1
@@ -663,8 +715,11 @@ PY
 acquire_chat_single_flight_lock() {
   # Usage: acquire_chat_single_flight_lock <chat_url>
   # Returns non-zero only when lock acquisition fails.
+  # Waiters queue FIFO in bin/chat_lock.py (holder metadata, queue position,
+  # wake-up on release, stale-PID detection); the flock fd held here keeps the
+  # lock crash-safe for the lifetime of this process.
   local chat_url="${1:-}"
-  local key lock_file timeout_s st
+  local key lock_file timeout_s max_wait_s st grant
   CHAT_SINGLE_FLIGHT_HELD=0
   CHAT_SINGLE_FLIGHT_FILE=""
   CHAT_SINGLE_FLIGHT_KEY=""
@@ -677,6 +732,9 @@ acquire_chat_single_flight_lock() {
   timeout_s="${CHAT_SINGLE_FLIGHT_TIMEOUT_SEC:-20}"
   [[ "$timeout_s" =~ ^[0-9]+$ ]] || timeout_s=20
   (( timeout_s < 1 )) && timeout_s=1
+  # The hold-time extension needs headroom above the base timeout.
+  max_wait_s="${CHAT_SINGLE_FLIGHT_MAX_WAIT_SEC:-}"
+  [[ "$max_wait_s" =~ ^[0-9]+$ ]] || max_wait_s=$(( timeout_s * 3 ))
   key="$(printf '%s' "$chat_url" | stable_hash | cut -c1-16)"
   [[ -n "${key:-}" ]] || key="none"
   mkdir -p "${CHAT_SINGLE_FLIGHT_LOCK_DIR}" >/dev/null 2>&1 || true
@@ -687,27 +745,471 @@ acquire_chat_single_flight_lock() {
     echo "W_CHAT_SINGLE_FLIGHT_NO_FLOCK key=${key} chat_url=${chat_url} run_id=${RUN_ID}" >&2
     return 0
   fi
-  exec {CHAT_SINGLE_FLIGHT_FD}>"$lock_file"
   set +e
-  flock -x -w "$timeout_s" -E 75 "$CHAT_SINGLE_FLIGHT_FD"
+  grant="$(python3 "${SCRIPT_DIR}/chat_lock.py" acquire \
+    --dir "${CHAT_SINGLE_FLIGHT_LOCK_DIR}" \
+    --key "$key" \
+    --run-id "$RUN_ID" \
+    --pid "$$" \
+    --chat-url "$chat_url" \
+    --timeout-sec "$timeout_s" \
+    --max-wait-sec "$max_wait_s")"
   st=$?
+  if [[ $st -eq 0 ]]; then
+    exec {CHAT_SINGLE_FLIGHT_FD}>"$lock_file"
+    # Immediate after a grant; the wait only matters for a holder outside the queue.
+    flock -x -w "$timeout_s" -E 75 "$CHAT_SINGLE_FLIGHT_FD"
+    st=$?
+    if [[ $st -ne 0 ]]; then
+      exec {CHAT_SINGLE_FLIGHT_FD}>&- || true
+      python3 "${SCRIPT_DIR}/chat_lock.py" release --dir "${CHAT_SINGLE_FLIGHT_LOCK_DIR}" --key "$key" --run-id "$RUN_ID" >/dev/null 2>&1
+      grant="timeout flock_after_grant=1"
+    fi
+  fi
   set -e
   if [[ $st -ne 0 ]]; then
-    exec {CHAT_SINGLE_FLIGHT_FD}>&- || true
     CHAT_SINGLE_FLIGHT_FILE=""
     CHAT_SINGLE_FLIGHT_KEY=""
     if [[ $st -eq 75 ]]; then
-      echo "E_CHAT_SINGLE_FLIGHT_TIMEOUT key=${key} timeout_sec=${timeout_s} chat_url=${chat_url} run_id=${RUN_ID}" >&2
+      echo "E_CHAT_SINGLE_FLIGHT_TIMEOUT key=${key} timeout_sec=${timeout_s} ${grant#timeout } chat_url=${chat_url} run_id=${RUN_ID}" >&2
       return 75
     fi
     echo "E_CHAT_SINGLE_FLIGHT_FAIL key=${key} status=${st} chat_url=${chat_url} run_id=${RUN_ID}" >&2
     return "$st"
   fi
   CHAT_SINGLE_FLIGHT_HELD=1
-  echo "CHAT_SINGLE_FLIGHT acquired key=${key} lock_file=${lock_file} chat_url=${chat_url} run_id=${RUN_ID}" >&2
+  echo "CHAT_SINGLE_FLIGHT acquired key=${key} lock_file=${lock_file} ${grant#granted } chat_url=${chat_url} run_id=${RUN_ID}" >&2
+  return 0
+}
+
+chat_single_flight_phase() {
+  # Usage: chat_single_flight_phase <phase> [expected_remaining_ms]
+  # Publishes what the holder is doing so queued runs can see it.
+  [[ "${CHAT_SINGLE_FLIGHT_HELD:-0}" == "1" ]] || return 0
+  local -a extra=()
+  if [[ "${2:-}" =~ ^[0-9]+$ ]]; then
+    extra=(--expected-remaining-ms "$2")
+  fi
+  python3 "${SCRIPT_DIR}/chat_lock.py" phase \
+    --dir "${CHAT_SINGLE_FLIGHT_LOCK_DIR}" \
+    --key "${CHAT_SINGLE_FLIGHT_KEY}" \
+    --run-id "$RUN_ID" \
+    --phase "$1" \
+    "${extra[@]}" >/dev/null 2>&1 || true
+}
+
+release_chat_single_flight_lock() {
+  # Drop the flock first so the woken head waiter finds it free.
+  [[ "${CHAT_SINGLE_FLIGHT_HELD:-0}" == "1" ]] || return 0
+  local released
+  CHAT_SINGLE_FLIGHT_HELD=0
+  if [[ -n "${CHAT_SINGLE_FLIGHT_FD:-}" ]]; then
+    exec {CHAT_SINGLE_FLIGHT_FD}>&- || true
+  fi
+  released="$(python3 "${SCRIPT_DIR}/chat_lock.py" release \
+    --dir "${CHAT_SINGLE_FLIGHT_LOCK_DIR}" \
+    --key "${CHAT_SINGLE_FLIGHT_KEY}" \
+    --run-id "$RUN_ID" 2>/dev/null || true)"
+  echo "CHAT_SINGLE_FLIGHT ${released:-released} key=${CHAT_SINGLE_FLIGHT_KEY} run_id=${RUN_ID}" >&2
+}
+
+CDP_SLOT_FD=""
+CDP_SLOT_ID=""
+CDP_SLOT_PHASE=""
+CDP_SLOT_DEPTH=0
+CDP_SLOT_ACQ_MS=0
+CDP_SLOT_WAIT_SAMPLES=()
+CDP_SLOT_HELD_SAMPLES=()
+CDP_SLOT_FIRST_MS=0
+CDP_BROWSER_FD=""
+CDP_BROWSER_MODE=""
+CDP_BROWSER_DEPTH=0
+CDP_BROWSER_OP=""
+CDP_BROWSER_ACQ_MS=0
+
+cdp_slot_enabled() {
+  [[ "${CDP_SLOT_SCOPE:-run}" == "phase" ]] || return 1
+  ! mock_transport_enabled
+}
+
+cdp_slot_clock() {
+  # Sets CDP_SLOT_NOW_US/CDP_SLOT_NOW_MS without a fork; the slot paths run
+  # this several times per phase.
+  local t
+  if [[ -n "${EPOCHREALTIME:-}" ]]; then
+    t="${EPOCHREALTIME//[!0-9]/}"
+    CDP_SLOT_NOW_US=$(( 10#$t ))
+  else
+    CDP_SLOT_NOW_US=$(( $(now_ms) * 1000 ))
+  fi
+  CDP_SLOT_NOW_MS=$(( CDP_SLOT_NOW_US / 1000 ))
+}
+
+cdp_slot_queue_empty() {
+  ! compgen -G "${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.queue/*.json" >/dev/null
+}
+
+cdp_slot_claim_ours_or_stale() {
+  # Usage: cdp_slot_claim_ours_or_stale <holder_json>
+  # True when the slot has no claim, our own claim, or a claim of a dead PID.
+  # Builtins only: this runs for every slot on every queue scan.
+  local claim="$1" line=""
+  [[ -s "$claim" ]] || return 0
+  read -r line <"$claim" || true
+  [[ "$line" == *"\"run_id\": \"${RUN_ID}\""* ]] && return 0
+  [[ "$line" =~ \"pid\":\ ([0-9]+) ]] && ! kill -0 "${BASH_REMATCH[1]}" >/dev/null 2>&1
+}
+
+cdp_slot_scan() {
+  # Usage: cdp_slot_scan <max_slots> <keep> [need]
+  # Lists free slots (no live foreign claim, flock -n succeeds) in
+  # CDP_SLOT_FREE, stopping once `need` are found. With keep=1 the flock of
+  # the first free slot stays held in CDP_SLOT_FD; every other probe lock is
+  # dropped again.
+  local max_slots="$1" keep="$2" need="${3:-$1}" i fd
+  CDP_SLOT_FREE=()
+  for (( i = 0; i < max_slots && ${#CDP_SLOT_FREE[@]} < need; i++ )); do
+    cdp_slot_claim_ours_or_stale "${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.${i}.holder.json" || continue
+    exec {fd}>"${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.${i}.lock"
+    if flock -n "$fd"; then
+      CDP_SLOT_FREE+=("$i")
+      if [[ "$keep" == "1" && ${#CDP_SLOT_FREE[@]} -eq 1 ]]; then
+        CDP_SLOT_FD="$fd"
+        continue
+      fi
+    fi
+    exec {fd}>&-
+  done
+}
+
+cdp_slot_claim() {
+  # Usage: cdp_slot_claim <slot> <phase>
+  # Written in place: the slot flock is already ours, and a half-written
+  # claim reads as "no claim", which the held flock covers.
+  cdp_slot_clock
+  printf '{"acquired_ms": %s, "phase": "%s", "pid": %s, "run_id": "%s"}\n' \
+    "$CDP_SLOT_NOW_MS" "$2" "$$" "$RUN_ID" >"${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.${1}.holder.json"
+}
+
+cdp_slot_live_tickets() {
+  # Fills CDP_SLOT_TICKETS with live queue tickets, oldest first; tickets of
+  # dead waiters (the pid is the ticket name suffix) are dropped.
+  local path name
+  CDP_SLOT_TICKETS=()
+  for path in "${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.queue/"*.json; do
+    [[ -e "$path" ]] || continue
+    name="${path##*/}"
+    name="${name%.json}"
+    if kill -0 "${name##*_}" >/dev/null 2>&1; then
+      CDP_SLOT_TICKETS+=("$name")
+    else
+      rm -f "$path" "${path%.json}.fifo"
+    fi
+  done
+}
+
+cdp_slot_wake_heads() {
+  # Usage: cdp_slot_wake_heads <max_slots>   (queue guard held)
+  # Wakes as many head-of-queue waiters as there are free slots. The FIFO is
+  # opened read-write so a waiter that is gone cannot block the waker.
+  local i w fifo
+  cdp_slot_live_tickets
+  (( ${#CDP_SLOT_TICKETS[@]} > 0 )) || return 0
+  cdp_slot_scan "$1" 0 "${#CDP_SLOT_TICKETS[@]}"
+  for (( i = 0; i < ${#CDP_SLOT_FREE[@]} && i < ${#CDP_SLOT_TICKETS[@]}; i++ )); do
+    fifo="${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.queue/${CDP_SLOT_TICKETS[$i]}.fifo"
+    [[ -p "$fifo" ]] || continue
+    exec {w}<>"$fifo" || continue
+    printf '1' >&"$w" || true
+    exec {w}>&-
+  done
+}
+
+cdp_slot_wait_queue() {
+  # Usage: cdp_slot_wait_queue <max_slots> <phase> <deadline_ms>
+  # Contended path. Speaks the bin/cdp_slots.py protocol (ticket + wake-up
+  # FIFO in the queue dir, grants under the guard flock, position p granted
+  # only while p+1 slots are free) without starting python per phase. The
+  # slot flock is taken under the guard together with the claim, so there is
+  # no window between grant and lock. Sets CDP_SLOT_FD/CDP_SLOT_ID and
+  # CDP_SLOT_GRANT; rc 73 on timeout.
+  local max_slots="$1" phase="$2" deadline_ms="$3"
+  local q="${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.queue"
+  local ticket rfd guard i position depth queued_behind="" wait_ms wait_s rc=73
+  mkdir -p "$q" >/dev/null 2>&1 || true
+  cdp_slot_clock
+  printf -v ticket '%020d_%s' "$(( CDP_SLOT_NOW_US * 1000 ))" "$$"
+  mkfifo -m 600 "$q/$ticket.fifo" || return 1
+  # Read-write open: never blocks and keeps the FIFO from reporting EOF.
+  exec {rfd}<>"$q/$ticket.fifo"
+  printf '{"enqueued_ms": %s, "phase": "%s", "pid": %s, "run_id": "%s"}\n' \
+    "$CDP_SLOT_NOW_MS" "$phase" "$$" "$RUN_ID" >"$q/.$ticket.tmp"
+  mv -f "$q/.$ticket.tmp" "$q/$ticket.json"
+  while :; do
+    exec {guard}>>"${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.guard"
+    flock -x "$guard"
+    cdp_slot_live_tickets
+    position=0
+    for (( i = 0; i < ${#CDP_SLOT_TICKETS[@]}; i++ )); do
+      if [[ "${CDP_SLOT_TICKETS[$i]}" == "$ticket" ]]; then
+        position="$i"
+        break
+      fi
+    done
+    depth=$(( ${#CDP_SLOT_TICKETS[@]} - 1 ))
+    [[ -n "$queued_behind" ]] || queued_behind="$position"
+    cdp_slot_scan "$max_slots" 1 $(( position + 1 ))
+    if [[ -n "${CDP_SLOT_FD:-}" ]] && (( position < ${#CDP_SLOT_FREE[@]} )); then
+      CDP_SLOT_ID="${CDP_SLOT_FREE[0]}"
+      cdp_slot_claim "$CDP_SLOT_ID" "$phase"
+      CDP_SLOT_GRANT="queued_behind=${queued_behind} queue_depth=${depth}"
+      rc=0
+      break
+    fi
+    if [[ -n "${CDP_SLOT_FD:-}" ]]; then
+      exec {CDP_SLOT_FD}>&-
+      CDP_SLOT_FD=""
+    fi
+    cdp_slot_clock
+    if (( CDP_SLOT_NOW_MS >= deadline_ms )); then
+      CDP_SLOT_GRANT="position=$(( position + 1 )) queue_depth=$(( depth + 1 ))"
+      break
+    fi
+    # Closing the fd drops the guard without another flock(1) run.
+    exec {guard}>&-
+    # Woken by a release; the 1s re-check covers owners that never release.
+    wait_ms=$(( deadline_ms - CDP_SLOT_NOW_MS ))
+    (( wait_ms < 1000 )) || wait_ms=1000
+    printf -v wait_s '%d.%03d' $(( wait_ms / 1000 )) $(( wait_ms % 1000 ))
+    if read -r -t "$wait_s" -n 1 -u "$rfd" _ 2>/dev/null; then
+      while read -r -t 0.001 -n 64 -u "$rfd" _ 2>/dev/null; do :; done
+    fi
+  done
+  rm -f "$q/$ticket.json" "$q/$ticket.fifo"
+  exec {rfd}>&-
+  cdp_slot_wake_heads "$max_slots"
+  exec {guard}>&-
+  return "$rc"
+}
+
+cdp_slot_acquire() {
+  # Usage: cdp_slot_acquire <phase>
+  # Takes one of CDP_SLOT_MAX shared-browser slots (the same flock files the
+  # spawn_second_agent wrapper uses) for one browser-touching phase only, so
+  # reply-wait sleeps leave the browser to other runs. With an empty queue a
+  # free slot is taken directly (flock -n plus a claim); otherwise the run
+  # queues FIFO and sleeps on its FIFO until a release wakes it. The flock
+  # fd held here keeps the slot crash-safe. Nested calls reuse the held slot.
+  local phase="${1:-cdp}"
+  local max_slots wait_timeout t0 wait_ms st=0
+  cdp_slot_enabled || return 0
+  if [[ -n "${CDP_SLOT_FD:-}" ]]; then
+    CDP_SLOT_DEPTH=$((CDP_SLOT_DEPTH + 1))
+    return 0
+  fi
+  # Holding the whole browser: queueing for a slot now could only deadlock
+  # against phases waiting for us.
+  (( CDP_BROWSER_DEPTH == 0 )) || return 0
+  max_slots="${CDP_SLOT_MAX:-2}"
+  wait_timeout="${CDP_SLOT_WAIT_TIMEOUT_SEC:-180}"
+  [[ "$max_slots" =~ ^[0-9]+$ ]] && (( max_slots >= 1 )) || max_slots=2
+  [[ "$wait_timeout" =~ ^[0-9]+$ ]] && (( wait_timeout >= 1 )) || wait_timeout=180
+  mkdir -p "${CDP_SLOT_DIR}" >/dev/null 2>&1 || true
+  cdp_slot_clock
+  t0="$CDP_SLOT_NOW_MS"
+  (( CDP_SLOT_FIRST_MS > 0 )) || CDP_SLOT_FIRST_MS="$t0"
+  CDP_SLOT_FD=""
+  if cdp_slot_queue_empty && { cdp_slot_scan "$max_slots" 1 1; [[ -n "${CDP_SLOT_FD:-}" ]]; }; then
+    CDP_SLOT_ID="${CDP_SLOT_FREE[0]}"
+    cdp_slot_claim "$CDP_SLOT_ID" "$phase"
+    CDP_SLOT_GRANT="queued_behind=0 queue_depth=0"
+  else
+    cdp_slot_wait_queue "$max_slots" "$phase" $(( t0 + wait_timeout * 1000 )) || st=$?
+  fi
+  if [[ $st -eq 0 ]] && ! cdp_browser_lock shared $(( t0 + wait_timeout * 1000 )); then
+    # A browser restart or tab cleanup outlasted the wait: give the slot back.
+    cdp_slot_drop
+    cdp_browser_unlock
+    CDP_SLOT_GRANT="reason=browser_lock"
+    st=73
+  fi
+  cdp_slot_clock
+  wait_ms=$(( CDP_SLOT_NOW_MS - t0 ))
+  CDP_SLOT_WAIT_SAMPLES+=("$wait_ms")
+  if [[ $st -ne 0 ]]; then
+    CDP_SLOT_FD=""
+    echo "E_SLOT_ACQUIRE_TIMEOUT phase=${phase} wait_timeout_sec=${wait_timeout} slots=${max_slots} wait_ms=${wait_ms} ${CDP_SLOT_GRANT:-} run_id=${RUN_ID}" >&2
+    return 73
+  fi
+  CDP_SLOT_PHASE="$phase"
+  CDP_SLOT_DEPTH=1
+  CDP_SLOT_ACQ_MS="$CDP_SLOT_NOW_MS"
+  echo "SLOT_ACQUIRE slot=${CDP_SLOT_ID} phase=${phase} wait_ms=${wait_ms} ${CDP_SLOT_GRANT} ts_ms=${CDP_SLOT_ACQ_MS} run_id=${RUN_ID}" >&2
+  return 0
+}
+
+cdp_slot_drop() {
+  # The claim goes first, while the flock still keeps queued waiters off this
+  # slot, then the flock; waiters are woken only if somebody is queued.
+  local claim line guard
+  claim="${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.${CDP_SLOT_ID}.holder.json"
+  line=""
+  if [[ -s "$claim" ]]; then
+    read -r line <"$claim" || true
+  fi
+  if [[ "$line" == *"\"run_id\": \"${RUN_ID}\""* ]]; then
+    : >"$claim"
+  fi
+  exec {CDP_SLOT_FD}>&- || true
+  CDP_SLOT_FD=""
+  if ! cdp_slot_queue_empty; then
+    exec {guard}>>"${CDP_SLOT_DIR}/chatgpt-send-cdp-slot.guard"
+    flock -x "$guard"
+    cdp_slot_wake_heads "${CDP_SLOT_MAX:-2}"
+    exec {guard}>&-
+  fi
+}
+
+cdp_slot_release() {
+  # Usage: cdp_slot_release [reason]
+  local now held_ms
+  [[ -n "${CDP_SLOT_FD:-}" ]] || return 0
+  CDP_SLOT_DEPTH=$((CDP_SLOT_DEPTH - 1))
+  if (( CDP_SLOT_DEPTH > 0 )) && [[ -z "${1:-}" ]]; then
+    return 0
+  fi
+  cdp_slot_clock
+  now="$CDP_SLOT_NOW_MS"
+  held_ms=$((now - CDP_SLOT_ACQ_MS))
+  CDP_SLOT_HELD_SAMPLES+=("$held_ms")
+  cdp_slot_drop
+  if (( CDP_BROWSER_DEPTH == 0 )); then
+    cdp_browser_unlock
+  fi
+  echo "SLOT_RELEASE slot=${CDP_SLOT_ID} phase=${CDP_SLOT_PHASE} held_ms=${held_ms} ts_ms=${now}${1:+ reason=$1} run_id=${RUN_ID}" >&2
+  CDP_SLOT_DEPTH=0
+}
+
+cdp_browser_lock() {
+  # Usage: cdp_browser_lock <shared|exclusive> <deadline_ms>
+  # Browser-wide reader/writer flock next to the slot files: every slot phase
+  # holds it shared, browser lifecycle and tab hygiene hold it exclusive.
+  # Taking it exclusive while holding it shared converts the lock in place.
+  local mode="$1" deadline_ms="$2" left wait_s
+  if [[ -z "${CDP_BROWSER_FD:-}" ]]; then
+    mkdir -p "${CDP_SLOT_DIR}" >/dev/null 2>&1 || true
+    if ! exec {CDP_BROWSER_FD}>>"${CDP_SLOT_DIR}/chatgpt-send-cdp-browser.lock"; then
+      CDP_BROWSER_FD=""
+      return 1
+    fi
+  fi
+  cdp_slot_clock
+  left=$(( deadline_ms - CDP_SLOT_NOW_MS ))
+  (( left > 0 )) || left=1
+  printf -v wait_s '%d.%03d' $(( left / 1000 )) $(( left % 1000 ))
+  if [[ "$mode" == "exclusive" ]]; then
+    flock -x -w "$wait_s" "$CDP_BROWSER_FD" || return 1
+  else
+    flock -s -w "$wait_s" "$CDP_BROWSER_FD" || return 1
+  fi
+  CDP_BROWSER_MODE="$mode"
+}
+
+cdp_browser_unlock() {
+  [[ -n "${CDP_BROWSER_FD:-}" ]] || return 0
+  exec {CDP_BROWSER_FD}>&- || true
+  CDP_BROWSER_FD=""
+  CDP_BROWSER_MODE=""
+}
+
+cdp_browser_acquire() {
+  # Usage: cdp_browser_acquire <op>
+  # Exclusive hold of the shared browser for operations that affect every run
+  # on it: launching/killing/restarting Chrome and opening, activating or
+  # closing tabs. Waits for in-flight slot phases to finish and keeps new ones
+  # out. Slot phases started while holding it run without a slot (the whole
+  # browser is ours already). Nested calls reuse the hold.
+  local op="${1:-browser}" wait_timeout t0 wait_ms
+  cdp_slot_enabled || return 0
+  if (( CDP_BROWSER_DEPTH > 0 )); then
+    CDP_BROWSER_DEPTH=$((CDP_BROWSER_DEPTH + 1))
+    return 0
+  fi
+  wait_timeout="${CDP_SLOT_WAIT_TIMEOUT_SEC:-180}"
+  [[ "$wait_timeout" =~ ^[0-9]+$ ]] && (( wait_timeout >= 1 )) || wait_timeout=180
+  cdp_slot_clock
+  t0="$CDP_SLOT_NOW_MS"
+  if ! cdp_browser_lock exclusive $(( t0 + wait_timeout * 1000 )); then
+    cdp_slot_clock
+    wait_ms=$(( CDP_SLOT_NOW_MS - t0 ))
+    # A failed conversion may have dropped our shared hold; a phase in
+    # progress must not continue without it.
+    if [[ -n "${CDP_SLOT_FD:-}" ]]; then
+      cdp_browser_lock shared $(( CDP_SLOT_NOW_MS + wait_timeout * 1000 )) || cdp_browser_unlock
+    else
+      cdp_browser_unlock
+    fi
+    echo "E_BROWSER_LOCK_TIMEOUT op=${op} wait_timeout_sec=${wait_timeout} wait_ms=${wait_ms} run_id=${RUN_ID}" >&2
+    return 73
+  fi
+  cdp_slot_clock
+  CDP_BROWSER_DEPTH=1
+  CDP_BROWSER_OP="$op"
+  CDP_BROWSER_ACQ_MS="$CDP_SLOT_NOW_MS"
+  echo "BROWSER_LOCK event=acquire op=${op} wait_ms=$(( CDP_SLOT_NOW_MS - t0 )) ts_ms=${CDP_SLOT_NOW_MS} run_id=${RUN_ID}" >&2
   return 0
 }
 
+cdp_browser_release() {
+  # Inside a slot phase the exclusive hold is kept until the phase ends:
+  # downgrading would let another exclusive holder in mid-phase.
+  (( CDP_BROWSER_DEPTH > 0 )) || return 0
+  CDP_BROWSER_DEPTH=$((CDP_BROWSER_DEPTH - 1))
+  (( CDP_BROWSER_DEPTH == 0 )) || return 0
+  [[ -n "${CDP_SLOT_FD:-}" ]] || cdp_browser_unlock
+  cdp_slot_clock
+  echo "BROWSER_LOCK event=release op=${CDP_BROWSER_OP} held_ms=$(( CDP_SLOT_NOW_MS - CDP_BROWSER_ACQ_MS )) ts_ms=${CDP_SLOT_NOW_MS} run_id=${RUN_ID}" >&2
+}
+
+cdp_slot_summary() {
+  # One line per run: slot wait/hold histograms and the share of the run spent
+  # holding a slot (duty); slots/duty is how many such runs one browser serves.
+  local run_ms
+  (( ${#CDP_SLOT_WAIT_SAMPLES[@]} > 0 )) || return 0
+  cdp_slot_release "exit"
+  run_ms=$(( $(now_ms) - CDP_SLOT_FIRST_MS ))
+  (( run_ms > 0 )) || run_ms=1
+  awk -v run_ms="$run_ms" -v slots="${CDP_SLOT_MAX:-2}" -v run_id="$RUN_ID" \
+    -v waits="${CDP_SLOT_WAIT_SAMPLES[*]}" -v helds="${CDP_SLOT_HELD_SAMPLES[*]}" '
+    function hist(list,    n, a, i, j, out, cnt, edges, ne) {
+      ne = split("10 50 100 250 500 1000 2500 5000 10000", edges, " ")
+      for (j = 1; j <= ne + 1; j++) cnt[j] = 0
+      n = split(list, a, " ")
+      for (i = 1; i <= n; i++) {
+        for (j = 1; j <= ne && a[i] + 0 > edges[j] + 0; j++) {}
+        cnt[j]++
+      }
+      out = ""
+      for (j = 1; j <= ne + 1; j++) {
+        if (cnt[j] == 0) continue
+        out = out (out == "" ? "" : ",") (j <= ne ? "le" edges[j] : "gt" edges[ne]) ":" cnt[j]
+      }
+      return out == "" ? "none" : out
+    }
+    function total(list,    n, a, i, s) {
+      n = split(list, a, " ")
+      s = 0
+      for (i = 1; i <= n; i++) s += a[i]
+      return s
+    }
+    BEGIN {
+      held = total(helds)
+      duty = 100.0 * held / run_ms
+      printf "CDP_SLOT_SUMMARY acquires=%d wait_ms_total=%d held_ms_total=%d run_ms=%d duty_pct=%.1f eff_concurrency=%.1f wait_hist=%s held_hist=%s run_id=%s\n", \
+        split(waits, _w, " "), total(waits), held, run_ms, duty, (duty > 0 ? slots * 100.0 / duty : slots), hist(waits), hist(helds), run_id
+    }' >&2
+}
+
 read_last_specialist_checkpoint_id() {
   if [[ -f "$LAST_SPECIALIST_CHECKPOINT_FILE" ]]; then
     python3 - "$LAST_SPECIALIST_CHECKPOINT_FILE" "$CHECKPOINT_LOCK_FILE" <<'PY'
@@ -1193,34 +1695,24 @@ print(assistant)
 PY
 }
 
+# Accepts any number of paths; one streaming pass per file (bin/log_sanitize.py).
 sanitize_file_inplace() {
-  local path="$1"
   [[ "${SANITIZE_LOGS}" == "1" ]] || return 0
-  [[ -f "$path" ]] || return 0
-  python3 - "$path" <<'PY'
-import pathlib
-import re
-import sys
-
-path = pathlib.Path(sys.argv[1])
-try:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-except Exception:
-    raise SystemExit(0)
-
-patterns = [
-    (re.compile(r"(?i)(bearer\s+)[A-Za-z0-9._\-]{8,}"), r"\1<REDACTED>"),
-    (re.compile(r'(?i)("?(?:api[_-]?key|token|access_token|refresh_token|authorization|cookie|password|secret)"?\s*[:=]\s*"?)([^",\s}]+)'), r"\1<REDACTED>"),
-    (re.compile(r"(?i)\b(access_token|token|api_key|apikey|password|secret)=([^&\s]+)"), r"\1=<REDACTED>"),
-]
-
-san = text
-for rx, repl in patterns:
-    san = rx.sub(repl, san)
-
-if san != text:
-    path.write_text(san, encoding="utf-8")
-PY
+  local -a paths=()
+  local path
+  for path in "$@"; do
+    [[ -f "$path" ]] && paths+=("$path")
+  done
+  (( ${#paths[@]} > 0 )) || return 0
+  local st=0
+  python3 "${SCRIPT_DIR}/log_sanitize.py" "${paths[@]}" || st=$?
+  (( st == 0 )) && return 0
+  # Fail closed: a file we could not scrub may still hold secrets, so it is
+  # emptied rather than kept as is.
+  for path in "${paths[@]}"; do
+    : >"$path" 2>/dev/null || rm -f "$path" >/dev/null 2>&1 || true
+  done
+  echo "E_SANITIZE_FAILED rc=${st} files=${#paths[@]} action=truncated run_id=${RUN_ID:-none}" >&2
 }
 
 ack_db_read() {
@@ -1335,10 +1827,20 @@ write_work_chat_url() {
   local url="$1"
   [[ -n "${url//[[:space:]]/}" ]] || return 0
   mkdir -p "$(dirname "$WORK_CHAT_URL_FILE")" >/dev/null 2>&1 || true
-  printf '%s\n' "$url" >"$WORK_CHAT_URL_FILE"
+  # tmp + mv: a concurrent reader never sees a truncated file.
+  printf '%s\n' "$url" >"${WORK_CHAT_URL_FILE}.tmp.$$"
+  mv -f "${WORK_CHAT_URL_FILE}.tmp.$$" "$WORK_CHAT_URL_FILE"
 }
 
 ensure_single_chat_target() {
+  local st=0
+  cdp_browser_acquire ensure_single_chat_target || return $?
+  ensure_single_chat_target_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+ensure_single_chat_target_locked() {
   # In strict mode enforce that only the target /c/... tab remains.
   # action=block => fail if extra tabs are present
   # action=close => close extra tabs then continue
@@ -1395,7 +1897,8 @@ chats_db_read() {
 
 chats_db_write() {
   mkdir -p "$(dirname "$CHATS_DB")" >/dev/null 2>&1 || true
-  cat >"$CHATS_DB"
+  cat >"${CHATS_DB}.tmp.$$"
+  mv -f "${CHATS_DB}.tmp.$$" "$CHATS_DB"
 }
 
 chats_md_render() {
@@ -1783,9 +2286,27 @@ cdp_open_tab() {
   fi
 
   rm -f "$hdr" "$body"
+  cdp_tab_inventory_invalidate
   return 0
 }
 
+cdp_tab_query() {
+  # Usage: cdp_tab_query <json|chat-urls|chat-tabs|by-chat-id ID|active|duplicates|home|summary>
+  # Reads CDP /json/list through the shared short-TTL tab inventory cache.
+  python3 "${SCRIPT_DIR}/tab_inventory.py" --cdp-port "$CDP_PORT" --ttl-ms "${TAB_CACHE_TTL_MS:-1500}" "$@"
+}
+
+cdp_tab_list_json() {
+  cdp_tab_query json
+}
+
+cdp_tab_inventory_invalidate() {
+  # Call after anything that opens, closes, activates or navigates a tab.
+  local dir="${CHATGPT_SEND_TAB_CACHE_DIR:-$ROOT/state/cdp}"
+  mkdir -p "$dir" >/dev/null 2>&1 || true
+  touch "$dir/tab_inventory_${CDP_PORT}.inval" >/dev/null 2>&1 || true
+}
+
 chat_id_from_url() {
   # Extract ChatGPT conversation id from a URL, if present.
   # Example: https://chatgpt.com/c/<id> -> <id>
@@ -1801,7 +2322,7 @@ capture_chat_title_for_url_from_cdp() {
   # Usage: capture_chat_title_for_url_from_cdp <url>
   # Prints the title (may be empty) for the matching chat URL.
   local target="$1"
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,sys
 target=sys.argv[1]
 try:
@@ -1817,6 +2338,14 @@ for t in tabs:
 }
 
 cdp_cleanup_chat_tabs() {
+  local st=0
+  cdp_browser_acquire cdp_cleanup_chat_tabs || return $?
+  cdp_cleanup_chat_tabs_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+cdp_cleanup_chat_tabs_locked() {
   # Close extra ChatGPT conversation tabs so the user doesn't end up with a pile
   # of /c/... tabs.
   # - legacy mode: keep one target tab, close all other /c/... tabs
@@ -1846,7 +2375,7 @@ cdp_cleanup_chat_tabs() {
   echo "TAB_HYGIENE start mode=${mode} target_id=${target_id:-none} pinned_id=${pinned_id:-none} active_id=${active_id:-none} pinned_tab_protect=${protect_pinned} active_tab_protect=${protect_active} run_id=${RUN_ID}" >&2
 
   close_count=0
-  tab_ids="$(curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  tab_ids="$(cdp_tab_list_json | python3 -c '
 import json,re,sys,urllib.parse
 target_id=sys.argv[1]
 safe_mode=(sys.argv[2] == "1")
@@ -1898,16 +2427,27 @@ for tid in to_close:
     curl -fsS "http://127.0.0.1:${CDP_PORT}/json/close/${tab_id}" >/dev/null 2>&1 || true
     close_count=$((close_count + 1))
   done <<<"${tab_ids:-}"
+  if (( close_count > 0 )); then
+    cdp_tab_inventory_invalidate
+  fi
   echo "TAB_HYGIENE done mode=${mode} closed=${close_count} target_id=${target_id:-none} pinned_tab_protect=${protect_pinned} active_tab_protect=${protect_active} run_id=${RUN_ID}" >&2
 }
 
 cdp_close_all_conversation_tabs() {
+  local st=0
+  cdp_browser_acquire cdp_close_all_conversation_tabs || return $?
+  cdp_close_all_conversation_tabs_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+cdp_close_all_conversation_tabs_locked() {
   # Close all ChatGPT conversation tabs (/c/...). Useful when starting a "new"
   # session to avoid sync ambiguity.
   if ! cdp_is_up; then
     return 0
   fi
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys
 try:
     tabs=json.load(sys.stdin)
@@ -1922,9 +2462,18 @@ for t in tabs:
     [[ -z "${tab_id:-}" ]] && continue
     curl -fsS "http://127.0.0.1:${CDP_PORT}/json/close/${tab_id}" >/dev/null 2>&1 || true
   done
+  cdp_tab_inventory_invalidate
 }
 
 open_browser_impl() {
+  local st=0
+  cdp_browser_acquire open_browser_impl || return $?
+  open_browser_impl_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+open_browser_impl_locked() {
   # Usage: open_browser_impl <url>
   # Opens (or focuses) a shared automation Chrome instance and returns 0 on success.
   local url="$1"
@@ -2038,7 +2587,7 @@ open_browser_impl() {
 
 capture_chat_url_from_cdp() {
   # Prints a single https://chatgpt.com/c/... URL or nothing if not found/ambiguous.
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys
 raw = sys.stdin.read()
 try:
@@ -2066,7 +2615,7 @@ if len(uniq) == 1:
 
 capture_chat_urls_from_cdp() {
   # Prints all unique chat URLs (one per line).
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys
 raw=sys.stdin.read()
 try:
@@ -2088,7 +2637,7 @@ for u in urls:
 
 capture_chat_tab_from_cdp() {
   # Prints "url<TAB>title" when there is exactly one chat tab open.
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys
 raw = sys.stdin.read()
 try:
@@ -2121,7 +2670,7 @@ capture_chat_tab_from_cdp_last() {
   # Prints "url<TAB>title" for the last chat tab in the CDP list (best-effort).
   # This is a fallback for humans: when multiple chat tabs are open, we still
   # want to sync *something* (usually the most recently created tab).
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys
 raw = sys.stdin.read()
 try:
@@ -2154,7 +2703,7 @@ capture_best_chat_tab_from_cdp() {
   # Prints "url<TAB>title" selecting the most likely "new" chat.
   # Heuristic: if multiple chat tabs exist, pick the first URL that is not yet
   # present in our chats DB; otherwise pick the last chat URL.
-  curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+  cdp_tab_list_json | python3 -c '
 import json,re,sys,os
 chats_db_path=sys.argv[1]
 try:
@@ -2204,6 +2753,14 @@ print(u + "\t" + title)
 }
 
 cdp_activate_or_open_url() {
+  local st=0
+  cdp_browser_acquire cdp_activate_or_open_url || return $?
+  cdp_activate_or_open_url_locked "$@" || st=$?
+  cdp_browser_release
+  return $st
+}
+
+cdp_activate_or_open_url_locked() {
   # Usage: cdp_activate_or_open_url <url>
   local target="$1"
   if ! cdp_is_up; then
@@ -2215,7 +2772,7 @@ cdp_activate_or_open_url() {
   match_count="0"
   list_ok="0"
   for attempt in 1 2; do
-    meta="$(curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" | python3 -c '
+    meta="$(cdp_tab_list_json | python3 -c '
 import json,re,sys
 target=sys.argv[1]
 target=target.split("#",1)[0].strip()
@@ -2267,6 +2824,7 @@ print(f"{tab_id}\\t{len(hits)}\\t1")
       echo "W_DUPLICATE_CHAT_TABS target=${target} matches=${match_count} action=activate_existing run_id=${RUN_ID}" >&2
     fi
     curl -fsS "http://127.0.0.1:${CDP_PORT}/json/activate/${tab_id}" >/dev/null 2>&1 || true
+    cdp_tab_inventory_invalidate
   else
     cdp_open_tab "$target" || true
   fi
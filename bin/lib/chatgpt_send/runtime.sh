@@ -14,21 +14,179 @@ chatgpt_send_validate_transport() {
   fi
 }
 
+cdp_prompt_args() {
+  # Sets CDP_PROMPT_ARGS for cdp_chatgpt.py. Large prompts go through the
+  # private file written by prepare_cdp_prompt_file instead of argv.
+  if [[ -n "${CDP_PROMPT_FILE:-}" ]] && [[ -f "$CDP_PROMPT_FILE" ]]; then
+    CDP_PROMPT_ARGS=(--prompt-file "$CDP_PROMPT_FILE")
+  else
+    CDP_PROMPT_ARGS=(--prompt "$PROMPT")
+  fi
+}
+
+prepare_cdp_prompt_file() {
+  # Avoids MAX_ARG_STRLEN (128 KiB per argv string) and keeps big prompts out of `ps`.
+  local limit="${PROMPT_ARGV_MAX_CHARS:-32768}"
+  [[ "$limit" =~ ^[0-9]+$ ]] || limit=32768
+  if (( ${#PROMPT} <= limit )); then
+    return 0
+  fi
+  CDP_PROMPT_FILE="$(mktemp "${TMPDIR:-/tmp}/chatgpt_send_prompt.XXXXXX")" || { CDP_PROMPT_FILE=""; return 0; }
+  printf '%s' "$PROMPT" >"$CDP_PROMPT_FILE"
+  echo "PROMPT_TRANSPORT mode=file chars=${#PROMPT} run_id=${RUN_ID}" >&2
+}
+
+preflight_pipeline_enabled() {
+  [[ "${PREFLIGHT_PIPELINE:-0}" == "1" ]] && ! mock_transport_enabled
+}
+
+preflight_session_live() {
+  [[ -n "${PREFLIGHT_PID:-}" ]]
+}
+
+preflight_session_start() {
+  # Starts cdp_chatgpt.py --preflight-and-send: one Runtime.evaluate covers
+  # route, UI contract, fetch-last, dedupe and the send baseline. The JSON
+  # lands in PREFLIGHT_JSON; the process then waits for the ledger decision
+  # (preflight_session_send / preflight_session_abort) on a FIFO.
+  local dir chunk line="" st
+  PREFLIGHT_PID=""
+  PREFLIGHT_JSON=""
+  PREFLIGHT_DECISION=""
+  PREFLIGHT_UI_CONTRACT_OK=""
+  PREFLIGHT_FETCH_SERVED=0
+  dir="$(mktemp -d "${TMPDIR:-/tmp}/chatgpt_send_preflight.XXXXXX")" || return 1
+  if ! mkfifo "$dir/preflight" "$dir/decision"; then
+    rm -rf "$dir"
+    return 1
+  fi
+  # The shared-browser slot spans the snapshot and the pending send.
+  if ! cdp_slot_acquire "preflight"; then
+    rm -rf "$dir"
+    return 1
+  fi
+  PREFLIGHT_DIR="$dir"
+  # Read-write opens never block on a FIFO, and keep both ends usable if
+  # the other side has not opened yet.
+  exec {PREFLIGHT_OUT_FD}<>"$dir/preflight"
+  exec {PREFLIGHT_DECISION_FD}<>"$dir/decision"
+  local -a mode_args=()
+  if [[ "${REPLY_POLLING}" == "1" ]]; then
+    mode_args=(--send-no-wait)
+  fi
+  cdp_prompt_args
+  python3 "$ROOT/bin/cdp_chatgpt.py" \
+    --cdp-port "$CDP_PORT" \
+    --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
+    --timeout "$timeout_s" \
+    "${CDP_PROMPT_ARGS[@]}" \
+    --fetch-last-n "$FETCH_LAST_N" \
+    --preflight-and-send \
+    --preflight-out "$dir/preflight" \
+    --decision-in "$dir/decision" \
+    "${mode_args[@]}" >"$out" &
+  PREFLIGHT_PID=$!
+  while :; do
+    chunk=""
+    if IFS= read -r -t 1 -u "$PREFLIGHT_OUT_FD" chunk; then
+      line+="$chunk"
+      break
+    fi
+    line+="$chunk"
+    if ! kill -0 "$PREFLIGHT_PID" 2>/dev/null; then
+      break
+    fi
+  done
+  if [[ -z "${line//[[:space:]]/}" ]]; then
+    st=0
+    wait "$PREFLIGHT_PID" || st=$?
+    PREFLIGHT_PID=""
+    preflight_session_cleanup
+    echo "W_PREFLIGHT_FALLBACK status=${st} run_id=${RUN_ID}" >&2
+    return "$st"
+  fi
+  PREFLIGHT_JSON="$dir/preflight.json"
+  printf '%s\n' "$line" >"$PREFLIGHT_JSON"
+  IFS=$'\t' read -r PREFLIGHT_DECISION PREFLIGHT_UI_CONTRACT_OK < <(
+    python3 -c '
+import json, sys
+p = (json.load(open(sys.argv[1], encoding="utf-8")).get("preflight") or {})
+print(str(p.get("decision") or "unknown") + "\t" + ("1" if p.get("ui_contract_ok") else "0"))
+' "$PREFLIGHT_JSON" 2>/dev/null || printf 'unknown\t0\n'
+  )
+  echo "PREFLIGHT_SESSION start decision=${PREFLIGHT_DECISION} ui_contract_ok=${PREFLIGHT_UI_CONTRACT_OK} run_id=${RUN_ID}" >&2
+  return 0
+}
+
+preflight_session_cleanup() {
+  if [[ -n "${PREFLIGHT_OUT_FD:-}" ]]; then
+    exec {PREFLIGHT_OUT_FD}>&-
+    PREFLIGHT_OUT_FD=""
+  fi
+  if [[ -n "${PREFLIGHT_DECISION_FD:-}" ]]; then
+    exec {PREFLIGHT_DECISION_FD}>&-
+    PREFLIGHT_DECISION_FD=""
+  fi
+  if [[ -n "${PREFLIGHT_DIR:-}" ]]; then
+    rm -rf "$PREFLIGHT_DIR"
+    PREFLIGHT_DIR=""
+    cdp_slot_release
+  fi
+  PREFLIGHT_JSON=""
+}
+
+preflight_session_finish() {
+  # Usage: preflight_session_finish <decision line>; returns the process status.
+  local st
+  preflight_session_live || return 0
+  printf '%s\n' "$1" >&"$PREFLIGHT_DECISION_FD" || true
+  st=0
+  wait "$PREFLIGHT_PID" || st=$?
+  PREFLIGHT_PID=""
+  preflight_session_cleanup
+  return "$st"
+}
+
+preflight_session_send() {
+  echo "PREFLIGHT_SESSION send run_id=${RUN_ID}" >&2
+  preflight_session_finish "send"
+}
+
+preflight_session_abort() {
+  preflight_session_live || return 0
+  echo "PREFLIGHT_SESSION abort reason=${1:-unknown} run_id=${RUN_ID}" >&2
+  preflight_session_finish "abort ${1:-unknown}" || true
+}
+
 fetch_last_transport_call() {
-  # Usage: fetch_last_transport_call <out_file> <fetch_last_n>
+  # Usage: fetch_last_transport_call <out_file> <fetch_last_n> [fresh]
   local out_file="$1"
   local fetch_n="$2"
+  local fresh="${3:-}"
   if mock_transport_enabled; then
     mock_fetch_last_json "$out_file" "$fetch_n"
     return $?
   fi
+  if preflight_session_live && [[ "$fresh" != "fresh" ]] && [[ "${PREFLIGHT_FETCH_SERVED:-0}" != "1" ]]; then
+    # Only the first pre-send read: nothing was sent since the snapshot and
+    # the chat lock is held. Later reads want the DOM as it is now.
+    PREFLIGHT_FETCH_SERVED=1
+    cp "$PREFLIGHT_JSON" "$out_file"
+    echo "FETCH_LAST source=preflight run_id=${RUN_ID}" >&2
+    return 0
+  fi
+  local st=0
+  cdp_slot_acquire "fetch_last" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "$timeout_s" \
-    --prompt "$PROMPT" \
+    "${CDP_PROMPT_ARGS[@]}" \
     --fetch-last \
-    --fetch-last-n "$fetch_n" >"$out_file"
+    --fetch-last-n "$fetch_n" >"$out_file" || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 precheck_via_cdp() {
@@ -36,12 +194,25 @@ precheck_via_cdp() {
     mock_precheck "$out"
     return $?
   fi
+  if preflight_session_live; then
+    if [[ "${PREFLIGHT_DECISION}" == "need_send" ]]; then
+      echo "E_PRECHECK_NO_NEW_REPLY: need_send source=preflight" >&2
+      return 10
+    fi
+    # Reuse/wait paths need live polling: hand over to the classic precheck.
+    preflight_session_abort "precheck_${PREFLIGHT_DECISION:-unknown}"
+  fi
+  local st=0
+  cdp_slot_acquire "precheck" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "$timeout_s" \
-    --prompt "$PROMPT" \
-    --precheck-only >"$out"
+    "${CDP_PROMPT_ARGS[@]}" \
+    --precheck-only >"$out" || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 probe_chat_contract_transport_call() {
@@ -53,15 +224,92 @@ probe_chat_contract_transport_call() {
     mock_probe_chat "$chat_url" "$out_file"
     return $?
   fi
+  local st=0
+  cdp_slot_acquire "contract" || return $?
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "$chat_url" \
     --timeout "$timeout_s_override" \
     --prompt "probe" \
-    --probe-contract >"$out_file" 2>&1
+    --probe-contract >"$out_file" 2>&1 || st=$?
+  cdp_slot_release
+  return "$st"
+}
+
+conversation_store_ingest() {
+  # Usage: conversation_store_ingest <fetch_json_path>
+  # Best-effort: keeps the offline message log in step with fetch-last.
+  local fetch_json="$1" line
+  [[ "${CONV_STORE:-1}" == "1" ]] || return 0
+  [[ "${SKIP_STATE_WRITE:-0}" != "1" ]] || return 0
+  line="$(python3 "${SCRIPT_DIR}/conversation_store.py" ingest \
+    --root "$CONV_STORE_DIR" \
+    --fetch-json "$fetch_json" \
+    --chat-id "${FETCH_LAST_CHAT_ID:-}" \
+    --run-id "$RUN_ID" 2>&1 || true)"
+  if [[ -n "${line:-}" ]]; then
+    printf '%s\n' "$line" >&2
+  fi
+  return 0
+}
+
+maybe_rollover_work_chat() {
+  # CHATGPT_SEND_ROLLOVER=1: before sending into a work chat that is past its
+  # message-count / poll scan-time limits, bootstrap a fresh chat in a child
+  # `--rollover` run and send there. Failure keeps the old chat.
+  # Runs under the chat single-flight lock, so runs queued on one chat roll it
+  # over once: a later holder finds the work chat already moved and follows.
+  local line reason st new_url
+  [[ "${ROLLOVER_AUTO:-0}" == "1" ]] || return 0
+  [[ "${INIT_SPECIALIST:-0}" == "0" ]] || return 0
+  [[ "${SKIP_STATE_WRITE:-0}" != "1" ]] || return 0
+  is_chat_conversation_url "${CHATGPT_URL:-}" || return 0
+  if [[ "${CHAT_URL_SOURCE}" == "work_state" || "${CHAT_URL_SOURCE}" == "legacy_pinned" ]] \
+    && [[ -z "${PROTECT_CHAT_URL//[[:space:]]/}" ]]; then
+    new_url="$(read_work_chat_url)"
+    if is_chat_conversation_url "${new_url:-}" && [[ "$new_url" != "$CHATGPT_URL" ]]; then
+      echo "ROLLOVER_FOLLOW from_url=${CHATGPT_URL} to_url=${new_url} run_id=${RUN_ID}" >&2
+      CHATGPT_URL="$new_url"
+      WORK_CHAT_URL="$new_url"
+      CHAT_URL_SOURCE="rollover"
+      return 0
+    fi
+  fi
+  line="$(python3 "${SCRIPT_DIR}/chat_rollover.py" check \
+    --chat-url "$CHATGPT_URL" \
+    --conv-root "$CONV_STORE_DIR" \
+    --poll-stats-dir "$CHATGPT_SEND_POLL_STATS_DIR" 2>/dev/null | head -n 1 || true)"
+  [[ "$line" == "ROLLOVER_CHECK due=1 "* ]] || return 0
+  echo "${line} run_id=${RUN_ID}" >&2
+  # Only the persisted work chat moves. A URL passed in (--chatgpt-url, pool
+  # FORCE_CHAT_URL, default env) would be due again on every run; pool chats
+  # rotate through chat_health.py instead.
+  if [[ "${CHAT_URL_SOURCE}" != "work_state" && "${CHAT_URL_SOURCE}" != "legacy_pinned" ]] \
+    || [[ -n "${PROTECT_CHAT_URL//[[:space:]]/}" ]]; then
+    echo "ROLLOVER_SKIP reason=pinned_chat source=${CHAT_URL_SOURCE} chat_url=${CHATGPT_URL} run_id=${RUN_ID}" >&2
+    return 0
+  fi
+  reason="$(sed -n 's/.* reason=\([^ ]*\).*/\1/p' <<<"$line")"
+  st=0
+  CHATGPT_SEND_RUN_ID="${RUN_ID}-rollover" CHATGPT_SEND_ROLLOVER_REASON="${reason:-auto}" \
+    "$SCRIPT_PATH" --rollover \
+      --chatgpt-url "$CHATGPT_URL" \
+      --transport "$CHATGPT_SEND_TRANSPORT" \
+      --cdp-port "$CDP_PORT" >&2 || st=$?
+  new_url="$(read_work_chat_url)"
+  if [[ $st -ne 0 ]] || ! is_chat_conversation_url "${new_url:-}" || [[ "$new_url" == "$CHATGPT_URL" ]]; then
+    echo "W_ROLLOVER_FAILED status=${st} chat_url=${CHATGPT_URL} run_id=${RUN_ID}" >&2
+    return 0
+  fi
+  echo "ROLLOVER_SWITCH from_url=${CHATGPT_URL} to_url=${new_url} reason=${reason:-auto} run_id=${RUN_ID}" >&2
+  CHATGPT_URL="$new_url"
+  WORK_CHAT_URL="$new_url"
+  CHAT_URL_SOURCE="rollover"
 }
 
 fetch_last_via_cdp() {
+  # Usage: fetch_last_via_cdp [fresh]  (fresh: never served from the preflight snapshot)
+  local fresh="${1:-}"
   local fetch_n fetch_out st fields diag_fields fetch_url target_id actual_id checkpoint_id_write old_url
   local target_is_home actual_is_home
   local target_was_home retarget_tab retarget_url
@@ -74,7 +322,7 @@ fetch_last_via_cdp() {
   fi
   echo "FETCH_LAST start n=${fetch_n} run_id=${RUN_ID}" >&2
   set +e
-  fetch_last_transport_call "$fetch_out" "$fetch_n"
+  fetch_last_transport_call "$fetch_out" "$fetch_n" "$fresh"
   st=$?
   set -e
   if [[ $st -ne 0 ]]; then
@@ -88,7 +336,7 @@ fetch_last_via_cdp() {
         write_work_chat_url "$retarget_url"
         echo "CHAT_ROUTE_UPDATE reason=init_specialist_home_tab_retarget old_url=${old_url:-none} new_url=${retarget_url} run_id=${RUN_ID}" >&2
         set +e
-        fetch_last_transport_call "$fetch_out" "$fetch_n"
+        fetch_last_transport_call "$fetch_out" "$fetch_n" "$fresh"
         st=$?
         set -e
       fi
@@ -189,6 +437,7 @@ fetch_last_via_cdp() {
   fi
   protocol_append_event "FETCH_LAST" "ok" "$PROMPT_HASH" "${FETCH_LAST_CHECKPOINT_ID:-}" "chat_id=${FETCH_LAST_CHAT_ID:-none} user_tail_hash=${FETCH_LAST_USER_TAIL_HASH:-none} asst_tail_hash=${FETCH_LAST_ASSISTANT_TAIL_HASH:-none} messages=${FETCH_LAST_TOTAL_MESSAGES:-0} stop_visible=${FETCH_LAST_STOP_VISIBLE:-0} last_user_sig=${FETCH_LAST_LAST_USER_SIG:-none} last_asst_sig=${FETCH_LAST_LAST_ASSISTANT_SIG:-none} last_user_text_sig=${FETCH_LAST_LAST_USER_TEXT_SIG:-none} ui_state=${FETCH_LAST_UI_STATE:-ok} ui_contract_sig=${FETCH_LAST_UI_CONTRACT_SIG:-none} fingerprint_v1=${FETCH_LAST_FINGERPRINT_V1:-none} norm_version=${FETCH_LAST_NORM_VERSION:-none}"
   echo "FETCH_LAST done chat_id=${FETCH_LAST_CHAT_ID:-none} user_tail_hash=${FETCH_LAST_USER_TAIL_HASH:-none} asst_tail_hash=${FETCH_LAST_ASSISTANT_TAIL_HASH:-none} messages=${FETCH_LAST_TOTAL_MESSAGES:-0} stop_visible=${FETCH_LAST_STOP_VISIBLE:-0} last_user_sig=${FETCH_LAST_LAST_USER_SIG:-none} last_asst_sig=${FETCH_LAST_LAST_ASSISTANT_SIG:-none} last_user_text_sig=${FETCH_LAST_LAST_USER_TEXT_SIG:-none} ui_state=${FETCH_LAST_UI_STATE:-ok} ui_contract_sig=${FETCH_LAST_UI_CONTRACT_SIG:-none} fingerprint_v1=${FETCH_LAST_FINGERPRINT_V1:-none} norm_version=${FETCH_LAST_NORM_VERSION:-none} run_id=${RUN_ID}" >&2
+  conversation_store_ingest "$fetch_out"
 
   FETCH_LAST_JSON="$fetch_out"
   return 0
@@ -466,12 +715,21 @@ contract_probe_via_cdp() {
   if mock_transport_enabled; then
     return 0
   fi
+  if preflight_session_live; then
+    [[ "${PREFLIGHT_UI_CONTRACT_OK}" == "1" ]] && return 0
+    return 22
+  fi
+  local st=0
+  cdp_slot_acquire "contract" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "$timeout_s" \
-    --prompt "$PROMPT" \
-    --probe-contract >/dev/null
+    "${CDP_PROMPT_ARGS[@]}" \
+    --probe-contract >/dev/null || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 precheck_auto_wait_loop() {
@@ -572,11 +830,20 @@ send_via_cdp() {
     mock_wait_reply >"$out"
     return 0
   fi
+  if preflight_session_live; then
+    preflight_session_send
+    return $?
+  fi
+  local st=0
+  cdp_slot_acquire "send" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "$timeout_s" \
-    --prompt "$PROMPT" >"$out"
+    "${CDP_PROMPT_ARGS[@]}" >"$out" || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 send_no_wait_via_cdp() {
@@ -585,12 +852,21 @@ send_no_wait_via_cdp() {
     printf '%s\n' "SEND_NO_WAIT_OK" >"$out"
     return 0
   fi
+  if preflight_session_live; then
+    preflight_session_send
+    return $?
+  fi
+  local st=0
+  cdp_slot_acquire "send" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "$timeout_s" \
-    --prompt "$PROMPT" \
-    --send-no-wait >"$out"
+    "${CDP_PROMPT_ARGS[@]}" \
+    --send-no-wait >"$out" || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 reply_ready_probe_via_cdp() {
@@ -599,12 +875,17 @@ reply_ready_probe_via_cdp() {
     mock_reply_ready_probe "$probe_log"
     return $?
   fi
+  local st=0
+  cdp_slot_acquire "reply_probe" || return $?
+  cdp_prompt_args
   python3 "$ROOT/bin/cdp_chatgpt.py" \
     --cdp-port "$CDP_PORT" \
     --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
     --timeout "20" \
-    --prompt "$PROMPT" \
-    --reply-ready-probe >"$probe_log" 2>&1
+    "${CDP_PROMPT_ARGS[@]}" \
+    --reply-ready-probe >"$probe_log" 2>&1 || st=$?
+  cdp_slot_release
+  return "$st"
 }
 
 current_run_dir() {
@@ -721,10 +1002,13 @@ PY
 run_summary_finalize_on_exit() {
   local st="$?"
   local auto_reason=""
-  if [[ "${RUN_SUMMARY_ENABLED}" != "1" ]]; then
-    return
+  preflight_session_abort "exit"
+  cdp_slot_summary
+  if [[ -n "${CDP_PROMPT_FILE:-}" ]]; then
+    rm -f "$CDP_PROMPT_FILE" >/dev/null 2>&1 || true
   fi
-  if [[ "${RUN_SUMMARY_WRITTEN}" == "1" ]]; then
+  if [[ "${RUN_SUMMARY_ENABLED}" != "1" ]] || [[ "${RUN_SUMMARY_WRITTEN}" == "1" ]]; then
+    release_chat_single_flight_lock
     return
   fi
   if [[ "${RUN_OUTCOME}" == "unknown" ]]; then
@@ -745,23 +1029,90 @@ run_summary_finalize_on_exit() {
     echo "EVIDENCE_AUTOCAPTURE reason=${auto_reason} exit_status=${st} run_id=${RUN_ID}" >&2
   fi
   set +e
+  # After evidence capture, so the next queued run cannot race the probes.
+  release_chat_single_flight_lock
   write_run_summary "$st"
   RUN_SUMMARY_WRITTEN=1
   emit_iter_result_marker "$st"
   set -e
 }
 
+# Wait for background evidence probes until the capture deadline; probes still
+# running at the deadline are killed together with their process group and
+# recorded as truncated. An entry may name several probes run one after the
+# other by a single process ("a,b=pid"); probes that already wrote their own
+# rc file keep it.
+# Args: deadline_ms rc_dir names=pid...
+evidence_wait_probes() {
+  local deadline_ms="$1"
+  local rc_dir="$2"
+  shift 2
+  local -a pending=("$@")
+  local -a still=()
+  local entry pid rc
+  while (( ${#pending[@]} > 0 )); do
+    still=()
+    for entry in "${pending[@]}"; do
+      pid="${entry#*=}"
+      if kill -0 "$pid" >/dev/null 2>&1; then
+        still+=("$entry")
+        continue
+      fi
+      rc=0
+      wait "$pid" >/dev/null 2>&1 || rc=$?
+      evidence_mark_probes "$rc_dir" "${entry%%=*}" "$rc"
+    done
+    pending=("${still[@]}")
+    (( ${#pending[@]} > 0 )) || break
+    if (( $(now_ms) >= deadline_ms )); then
+      for entry in "${pending[@]}"; do
+        evidence_kill_probe TERM "${entry#*=}"
+      done
+      sleep 0.1
+      for entry in "${pending[@]}"; do
+        pid="${entry#*=}"
+        evidence_kill_probe KILL "$pid"
+        wait "$pid" >/dev/null 2>&1 || true
+        evidence_mark_probes "$rc_dir" "${entry%%=*}" "truncated"
+      done
+      break
+    fi
+    sleep 0.05
+  done
+}
+
+# Probes are started via setsid, so the pid is also the process group id and
+# grandchildren (ops_snapshot -> curl/python) go down with the probe.
+evidence_kill_probe() {
+  local sig="$1"
+  local pid="$2"
+  kill "-$sig" -- "-$pid" >/dev/null 2>&1 || kill "-$sig" "$pid" >/dev/null 2>&1 || true
+}
+
+evidence_mark_probes() {
+  local rc_dir="$1"
+  local names="$2"
+  local rc="$3"
+  local name
+  local -a list=()
+  IFS=',' read -r -a list <<<"$names"
+  for name in "${list[@]}"; do
+    [[ -f "$rc_dir/$name.rc" ]] && continue
+    printf '%s\n' "$rc" >"$rc_dir/$name.rc"
+    printf '%s\n' "$(now_ms)" >"$rc_dir/$name.done_ms"
+  done
+}
+
 capture_evidence_snapshot() {
   local reason="${1:-unknown}"
   local probe_log="${2:-}"
   local run_dir ev_dir ts tabs_json version_json chrome_pid
   local ops_json ps_txt net_txt env_json cdp_ok
-  local contract_tmp contract_status contract_line contract_fail_line
+  local contract_tmp contract_line contract_fail_line
   local probe_reason progress_line progress_after_anchor progress_tail_len progress_tail_hash progress_stop_visible
-  local had_errexit=0
-  case "$-" in
-    *e*) had_errexit=1 ;;
-  esac
+  local started_ms deadline_ms budget_ms budget_s rc_dir truncated
+  local -a probes=()
+  local -a sid=()
 
   [[ "${CAPTURE_EVIDENCE}" == "1" ]] || return 0
 
@@ -769,52 +1120,80 @@ capture_evidence_snapshot() {
   ev_dir="$run_dir/evidence"
   mkdir -p "$ev_dir" >/dev/null 2>&1 || return 0
   ts="$(date +%s)"
+  budget_ms="${EVIDENCE_BUDGET_MS:-5000}"
+  if [[ ! "$budget_ms" =~ ^[0-9]+$ ]] || (( budget_ms < 500 )); then
+    budget_ms=5000
+  fi
+  budget_s=$(( (budget_ms + 999) / 1000 ))
+  started_ms="$(now_ms)"
+  deadline_ms=$(( started_ms + budget_ms ))
+  rc_dir="$(mktemp -d)"
 
   tabs_json="$ev_dir/tabs.json"
   version_json="$ev_dir/version.json"
+  ops_json="$ev_dir/ops_snapshot.json"
+  ps_txt="$ev_dir/ps.txt"
+  net_txt="$ev_dir/net.txt"
+  env_json="$ev_dir/env.json"
+  contract_tmp="$rc_dir/contract.err"
+  : >"$contract_tmp"
+
+  # /json/version gates the CDP probes; keep it short so a dead browser costs <=1s.
   cdp_ok=0
-  if curl -fsS "http://127.0.0.1:${CDP_PORT}/json/version" >"$version_json" 2>/dev/null; then
+  if curl -fsS -m 1 "http://127.0.0.1:${CDP_PORT}/json/version" >"$version_json" 2>/dev/null; then
     cdp_ok=1
   else
     printf '%s\n' '{}' >"$version_json"
   fi
+
+  # Everything else runs concurrently under one wall-clock budget. Each probe
+  # gets its own session so a deadline kill also reaps its children.
+  sid=()
+  if command -v setsid >/dev/null 2>&1; then
+    sid=(setsid)
+  fi
   if [[ "$cdp_ok" == "1" ]]; then
-    curl -fsS "http://127.0.0.1:${CDP_PORT}/json/list" >"$tabs_json" 2>/dev/null || printf '%s\n' '[]' >"$tabs_json"
+    "${sid[@]}" curl -fsS -m "$budget_s" "http://127.0.0.1:${CDP_PORT}/json/list" >"$tabs_json" 2>/dev/null &
+    probes+=("tabs=$!")
+    cdp_prompt_args
+    # fetch_last and the UI contract probe drive the same tab, so they run one
+    # after the other: the cheap read-only fetch first, the contract probe with
+    # whatever budget is left.
+    "${sid[@]}" bash -c '
+      rc_dir="$1"; ev_dir="$2"; shift 2
+      rc=0
+      python3 "$@" --fetch-last --fetch-last-n 8 >"$ev_dir/fetch_last.json" 2>"$ev_dir/fetch_last.log" || rc=$?
+      printf "%s\n" "$rc" >"$rc_dir/fetch_last.rc"
+      date +%s%3N >"$rc_dir/fetch_last.done_ms"
+      python3 "$@" --probe-contract >/dev/null 2>"$rc_dir/contract.err"
+    ' evidence-cdp "$rc_dir" "$ev_dir" "$ROOT/bin/cdp_chatgpt.py" \
+      --cdp-port "$CDP_PORT" \
+      --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
+      --timeout "$budget_s" \
+      "${CDP_PROMPT_ARGS[@]}" &
+    probes+=("fetch_last,contract=$!")
   else
     printf '%s\n' '[]' >"$tabs_json"
+    printf '%s\n' '1' >"$rc_dir/contract.rc"
   fi
-
-  contract_tmp="$(mktemp)"
-  set +e
-  python3 "$ROOT/bin/cdp_chatgpt.py" \
-    --cdp-port "$CDP_PORT" \
-    --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
-    --timeout "20" \
-    --prompt "$PROMPT" \
-    --probe-contract >/dev/null 2>"$contract_tmp"
-  contract_status=$?
-  if [[ $had_errexit -eq 1 ]]; then
-    set -e
+  if [[ -x "$ROOT/bin/ops_snapshot" ]]; then
+    CHATGPT_SEND_CDP_PORT="$CDP_PORT" CHATGPT_SEND_STRICT_SINGLE_CHAT="${STRICT_SINGLE_CHAT:-0}" \
+      "${sid[@]}" "$ROOT/bin/ops_snapshot" --json >"$ops_json" 2>/dev/null &
+    probes+=("ops_snapshot=$!")
   else
-    set +e
+    printf '%s\n' '{}' >"$ops_json"
+  fi
+  "${sid[@]}" ps -ef >"$ps_txt" 2>/dev/null &
+  probes+=("ps=$!")
+  if command -v ss >/dev/null 2>&1; then
+    "${sid[@]}" ss -ltnp >"$net_txt" 2>/dev/null &
+    probes+=("net=$!")
+  elif command -v netstat >/dev/null 2>&1; then
+    "${sid[@]}" netstat -ltnp >"$net_txt" 2>/dev/null &
+    probes+=("net=$!")
+  else
+    printf '%s\n' 'net_unavailable' >"$net_txt"
   fi
-  contract_line="$(sed -n 's/^UI_CONTRACT: //p' "$contract_tmp" | tail -n 1)"
-  contract_fail_line="$(sed -n 's/^E_UI_CONTRACT_FAIL: //p' "$contract_tmp" | tail -n 1)"
-  python3 - "$ev_dir/contract.json" "$contract_status" "$contract_line" "$contract_fail_line" "$ts" "$RUN_ID" "$reason" <<'PY'
-import json,sys
-out, st, line, fail, ts, run_id, reason = sys.argv[1:]
-obj = {
-    "ts": int(ts),
-    "run_id": run_id,
-    "reason": reason,
-    "status": int(st),
-    "ui_contract": line,
-    "ui_contract_fail": fail,
-}
-with open(out, "w", encoding="utf-8") as f:
-    json.dump(obj, f, ensure_ascii=False, sort_keys=True)
-PY
-  rm -f "$contract_tmp"
 
   probe_reason="none"
   progress_line=""
@@ -835,11 +1214,92 @@ PY
     [[ -n "${progress_tail_hash:-}" ]] || progress_tail_hash="none"
     [[ -n "${progress_stop_visible:-}" ]] || progress_stop_visible="0"
   fi
-  python3 - "$ev_dir/probe_last.json" "$ts" "$RUN_ID" "$reason" "$probe_reason" "$progress_after_anchor" "$progress_tail_len" "$progress_tail_hash" "$progress_stop_visible" <<'PY'
-import json,sys
-out, ts, run_id, reason, probe_reason, after_anchor, tail_len, tail_hash, stop_visible = sys.argv[1:]
-obj = {
-    "ts": int(ts),
+  chrome_pid=""
+  if [[ -f "$ROOT/state/chrome_${CDP_PORT}.pid" ]]; then
+    chrome_pid="$(cat "$ROOT/state/chrome_${CDP_PORT}.pid" 2>/dev/null | tr -d '\n' || true)"
+  fi
+
+  if (( ${#probes[@]} > 0 )); then
+    evidence_wait_probes "$deadline_ms" "$rc_dir" "${probes[@]}"
+  fi
+  contract_line="$(sed -n 's/^UI_CONTRACT: //p' "$contract_tmp" | tail -n 1)"
+  contract_fail_line="$(sed -n 's/^E_UI_CONTRACT_FAIL: //p' "$contract_tmp" | tail -n 1)"
+
+  # One python pass writes the derived JSON files, fills fallbacks for failed
+  # or truncated probes and prints the truncated probe names.
+  truncated="$(python3 - "$ev_dir" "$rc_dir" "$ts" "$RUN_ID" "$reason" "$started_ms" "$budget_ms" "$cdp_ok" \
+    "$contract_line" "$contract_fail_line" \
+    "$probe_reason" "$progress_after_anchor" "$progress_tail_len" "$progress_tail_hash" "$progress_stop_visible" \
+    "${CHATGPT_URL:-}" "${WORK_CHAT_URL:-}" "$CDP_PORT" "${chrome_pid:-}" "${LOCK_FILE:-}" "$ROOT" \
+    "${CHATGPT_SEND_CDP_TRACE_DIR:-}" "${CHATGPT_SEND_CDP_TRACE_EVENTS:-4000}" <<'PY'
+import json
+import os
+import pathlib
+import sys
+import time
+
+(
+    ev_dir, rc_dir, ts, run_id, reason, started_ms, budget_ms, cdp_ok,
+    contract_line, contract_fail_line,
+    probe_reason, after_anchor, tail_len, tail_hash, stop_visible,
+    chat_url, work_chat_url, cdp_port, chrome_pid, lock_file, root,
+    trace_dir, trace_events,
+) = sys.argv[1:]
+ev = pathlib.Path(ev_dir)
+rcd = pathlib.Path(rc_dir)
+ts = int(ts)
+started = int(started_ms)
+
+
+def dump(name, obj, jsonl=False):
+    with open(ev / name, "w", encoding="utf-8") as f:
+        f.write(json.dumps(obj, ensure_ascii=False, sort_keys=True) + ("\n" if jsonl else ""))
+
+
+def read(path):
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except Exception:
+        return ""
+
+
+probes = {}
+truncated = []
+for rc_path in sorted(rcd.glob("*.rc")):
+    name = rc_path.stem
+    rc_raw = read(rc_path)
+    done_raw = read(rcd / f"{name}.done_ms")
+    elapsed = (int(done_raw) - started) if done_raw.isdigit() else None
+    if rc_raw == "truncated":
+        truncated.append(name)
+        probes[name] = {"rc": None, "truncated": 1, "elapsed_ms": elapsed}
+    else:
+        rc = int(rc_raw) if rc_raw.lstrip("-").isdigit() else None
+        probes[name] = {"rc": rc, "truncated": 0, "elapsed_ms": elapsed}
+
+fallbacks = {
+    "tabs": ("tabs.json", "[]\n"),
+    "ops_snapshot": ("ops_snapshot.json", "{}\n"),
+    "ps": ("ps.txt", "ps_unavailable\n"),
+    "net": ("net.txt", "net_failed\n"),
+}
+for name, (fname, body) in fallbacks.items():
+    info = probes.get(name)
+    if info and (info["truncated"] or info["rc"] != 0):
+        (ev / fname).write_text(body, encoding="utf-8")
+
+contract = probes.get("contract", {})
+contract_status = 124 if contract.get("truncated") else contract.get("rc")
+dump("contract.json", {
+    "ts": ts,
+    "run_id": run_id,
+    "reason": reason,
+    "status": int(contract_status if contract_status is not None else 1),
+    "ui_contract": contract_line,
+    "ui_contract_fail": contract_fail_line,
+})
+dump("probe_last.json", {
+    "ts": ts,
     "run_id": run_id,
     "reason": reason,
     "probe_reason": probe_reason,
@@ -847,77 +1307,24 @@ obj = {
     "assistant_tail_len": int(tail_len or 0),
     "assistant_tail_hash": tail_hash,
     "stop_visible": int(stop_visible or 0),
-}
-with open(out, "w", encoding="utf-8") as f:
-    json.dump(obj, f, ensure_ascii=False, sort_keys=True)
-PY
-
-  if [[ "$cdp_ok" == "1" ]]; then
-    python3 "$ROOT/bin/cdp_chatgpt.py" \
-      --cdp-port "$CDP_PORT" \
-      --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
-      --timeout "20" \
-      --prompt "$PROMPT" \
-      --fetch-last --fetch-last-n 8 >"$ev_dir/fetch_last.json" 2>"$ev_dir/fetch_last.log" || true
-  fi
-
-  chrome_pid=""
-  if [[ -f "$ROOT/state/chrome_${CDP_PORT}.pid" ]]; then
-    chrome_pid="$(cat "$ROOT/state/chrome_${CDP_PORT}.pid" 2>/dev/null | tr -d '\n' || true)"
-  fi
-  python3 - "$ev_dir/process.json" "$ts" "$RUN_ID" "${CHATGPT_URL:-}" "${WORK_CHAT_URL:-}" "$CDP_PORT" "${chrome_pid:-}" "${LOCK_FILE:-}" <<'PY'
-import json,sys
-out, ts, run_id, chat_url, work_chat_url, cdp_port, chrome_pid, lock_file = sys.argv[1:]
-obj = {
-    "ts": int(ts),
+})
+dump("process.json", {
+    "ts": ts,
     "run_id": run_id,
     "chatgpt_url": chat_url,
     "work_chat_url": work_chat_url,
     "cdp_port": int(cdp_port or 0),
     "chrome_pid": chrome_pid,
     "lock_file": lock_file,
-}
-with open(out, "w", encoding="utf-8") as f:
-    json.dump(obj, f, ensure_ascii=False, sort_keys=True)
-PY
-
-  python3 - "$ev_dir/doctor.jsonl" "$ts" "$RUN_ID" "${CHATGPT_URL:-}" "${WORK_CHAT_URL:-}" "$CDP_PORT" "$ROOT" <<'PY'
-import json,sys
-out, ts, run_id, chat_url, work_chat_url, cdp_port, root = sys.argv[1:]
-obj = {
-    "ts": int(ts),
+})
+dump("doctor.jsonl", {
+    "ts": ts,
     "run_id": run_id,
     "root": root,
     "chatgpt_url": chat_url,
     "work_chat_url": work_chat_url,
     "cdp_port": int(cdp_port or 0),
-}
-with open(out, "w", encoding="utf-8") as f:
-    f.write(json.dumps(obj, ensure_ascii=False, sort_keys=True) + "\n")
-PY
-
-  ops_json="$ev_dir/ops_snapshot.json"
-  ps_txt="$ev_dir/ps.txt"
-  net_txt="$ev_dir/net.txt"
-  env_json="$ev_dir/env.json"
-
-  if [[ -x "$ROOT/bin/ops_snapshot" ]]; then
-    CHATGPT_SEND_CDP_PORT="$CDP_PORT" CHATGPT_SEND_STRICT_SINGLE_CHAT="${STRICT_SINGLE_CHAT:-0}" \
-      "$ROOT/bin/ops_snapshot" --json >"$ops_json" 2>/dev/null || printf '%s\n' '{}' >"$ops_json"
-  else
-    printf '%s\n' '{}' >"$ops_json"
-  fi
-  ps -ef >"$ps_txt" 2>/dev/null || printf '%s\n' 'ps_unavailable' >"$ps_txt"
-  if command -v ss >/dev/null 2>&1; then
-    ss -ltnp >"$net_txt" 2>/dev/null || printf '%s\n' 'ss_failed' >"$net_txt"
-  elif command -v netstat >/dev/null 2>&1; then
-    netstat -ltnp >"$net_txt" 2>/dev/null || printf '%s\n' 'netstat_failed' >"$net_txt"
-  else
-    printf '%s\n' 'net_unavailable' >"$net_txt"
-  fi
-  python3 - "$env_json" "$ts" "$RUN_ID" "$CDP_PORT" "${CHATGPT_URL:-}" "${WORK_CHAT_URL:-}" "$cdp_ok" <<'PY'
-import json,os,sys
-out, ts, run_id, cdp_port, chat_url, work_chat_url, cdp_ok = sys.argv[1:]
+}, jsonl=True)
 keys = [
     "CHATGPT_SEND_ROOT",
     "CHATGPT_SEND_PROFILE_DIR",
@@ -926,35 +1333,75 @@ keys = [
     "CHATGPT_SEND_PROTO_ENFORCE_FINGERPRINT",
     "CHATGPT_SEND_PROTO_ENFORCE_POSTSEND_VERIFY",
 ]
-obj = {
-    "ts": int(ts),
+dump("env.json", {
+    "ts": ts,
     "run_id": run_id,
     "cdp_port": int(cdp_port or 0),
     "chatgpt_url": chat_url,
     "work_chat_url": work_chat_url,
     "cdp_ok": int(cdp_ok or 0),
     "env": {k: os.environ.get(k, "") for k in keys},
-}
-with open(out, "w", encoding="utf-8") as f:
-    json.dump(obj, f, ensure_ascii=False, sort_keys=True)
+})
+# Merge the per-process CDP traces (the probes above included) into one
+# Perfetto-loadable file, keeping the newest slices.
+if trace_dir and os.path.isdir(trace_dir):
+    meta, slices, methods = [], [], {}
+    for path in sorted(pathlib.Path(trace_dir).glob("cdp_trace_*.json")):
+        try:
+            obj = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        for e in obj.get("traceEvents") or []:
+            (meta if e.get("ph") == "M" else slices).append(e)
+        for name, row in ((obj.get("otherData") or {}).get("methods") or {}).items():
+            acc = methods.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0, "timeouts": 0, "retries": 0})
+            for k in ("count", "errors", "timeouts", "retries"):
+                acc[k] += int(row.get(k) or 0)
+            acc["total_ms"] = round(acc["total_ms"] + float(row.get("total_ms") or 0), 1)
+            acc["max_ms"] = max(acc["max_ms"], float(row.get("max_ms") or 0))
+    slices.sort(key=lambda e: e.get("ts") or 0)
+    keep = max(100, int(trace_events)) if str(trace_events).isdigit() else 4000
+    with open(ev / "cdp_trace.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "traceEvents": meta + slices[-keep:],
+            "displayTimeUnit": "ms",
+            "otherData": {"run_id": run_id, "reason": reason, "dropped": max(0, len(slices) - keep), "methods": methods},
+        }, f, ensure_ascii=False)
+
+dump("capture.json", {
+    "ts": ts,
+    "run_id": run_id,
+    "reason": reason,
+    "budget_ms": int(budget_ms),
+    "elapsed_ms": int(time.time() * 1000) - started,
+    "cdp_ok": int(cdp_ok or 0),
+    "probes": probes,
+    "truncated": truncated,
+})
+print(",".join(truncated))
 PY
-
-  sanitize_file_inplace "$tabs_json"
-  sanitize_file_inplace "$version_json"
-  sanitize_file_inplace "$ev_dir/contract.json"
-  sanitize_file_inplace "$ev_dir/probe_last.json"
-  sanitize_file_inplace "$ev_dir/fetch_last.json"
-  sanitize_file_inplace "$ev_dir/fetch_last.log"
-  sanitize_file_inplace "$ev_dir/process.json"
-  sanitize_file_inplace "$ev_dir/doctor.jsonl"
-  sanitize_file_inplace "$ops_json"
-  sanitize_file_inplace "$ps_txt"
-  sanitize_file_inplace "$net_txt"
-  sanitize_file_inplace "$env_json"
+)" || truncated=""
+  rm -rf "$rc_dir" >/dev/null 2>&1 || true
+
+  sanitize_file_inplace \
+    "$tabs_json" \
+    "$version_json" \
+    "$ev_dir/contract.json" \
+    "$ev_dir/probe_last.json" \
+    "$ev_dir/fetch_last.json" \
+    "$ev_dir/fetch_last.log" \
+    "$ev_dir/process.json" \
+    "$ev_dir/doctor.jsonl" \
+    "$ops_json" \
+    "$ps_txt" \
+    "$net_txt" \
+    "$env_json" \
+    "$ev_dir/capture.json"
 
   RUN_EVIDENCE_CAPTURED=1
-  if [[ "$cdp_ok" != "1" ]]; then
-    echo "EVIDENCE_PARTIAL cdp_ok=0 reason=${reason} dir=${ev_dir} run_id=${RUN_ID}" >&2
+  echo "EVIDENCE_BUDGET budget_ms=${budget_ms} elapsed_ms=$(( $(now_ms) - started_ms )) truncated=${truncated:-none} run_id=${RUN_ID}" >&2
+  if [[ "$cdp_ok" != "1" ]] || [[ -n "${truncated:-}" ]]; then
+    echo "EVIDENCE_PARTIAL cdp_ok=${cdp_ok} truncated=${truncated:-none} reason=${reason} dir=${ev_dir} run_id=${RUN_ID}" >&2
   fi
   echo "EVIDENCE_CAPTURED reason=${reason} dir=${ev_dir} run_id=${RUN_ID}" >&2
 }
@@ -970,14 +1417,20 @@ soft_reset_via_cdp() {
     *e*) had_errexit=1 ;;
   esac
   set +e
-  python3 "$ROOT/bin/cdp_chatgpt.py" \
-    --cdp-port "$CDP_PORT" \
-    --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
-    --timeout "120" \
-    --prompt "$PROMPT" \
-    --soft-reset-only \
-    --soft-reset-reason "$reason" >/dev/null
+  cdp_slot_acquire "soft_reset"
   st=$?
+  if [[ $st -eq 0 ]]; then
+    cdp_prompt_args
+    python3 "$ROOT/bin/cdp_chatgpt.py" \
+      --cdp-port "$CDP_PORT" \
+      --chatgpt-url "${CHATGPT_URL:-https://chatgpt.com/}" \
+      --timeout "120" \
+      "${CDP_PROMPT_ARGS[@]}" \
+      --soft-reset-only \
+      --soft-reset-reason "$reason" >/dev/null
+    st=$?
+    cdp_slot_release
+  fi
   if [[ $had_errexit -eq 1 ]]; then
     set -e
   else
@@ -1095,6 +1548,7 @@ reply_wait_collect_via_probe() {
     return 76
   }
 
+  chat_single_flight_phase "wait_reply"
   echo "REPLY_WAIT start max_sec=${max_sec} poll_ms=${poll_ms} no_progress_max_ms=${no_progress_max_ms} run_id=${RUN_ID}" >&2
   while true; do
     now="$(now_ms)"
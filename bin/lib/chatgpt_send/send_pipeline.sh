@@ -152,7 +152,8 @@ if [[ $DO_ACK -eq 1 ]]; then
 fi
 
 EXPLICIT_HOME_PROBE=0
-if [[ $CHATGPT_URL_EXPLICIT -eq 1 ]] && [[ "${CHATGPT_URL:-}" == "https://chatgpt.com/" || "${CHATGPT_URL:-}" == "https://chatgpt.com" ]]; then
+if [[ $CHATGPT_URL_EXPLICIT -eq 1 ]] && [[ "${CHATGPT_URL:-}" == "https://chatgpt.com/" || "${CHATGPT_URL:-}" == "https://chatgpt.com" ]] \
+  && [[ -z "${ROLLOVER_FROM_URL:-}" ]]; then
   EXPLICIT_HOME_PROBE=1
 fi
 OLD_ACTIVE_NAME="$(chats_db_get_active_name | head -n 1 || true)"
@@ -208,6 +209,7 @@ fi
 
 PROMPT_SIG="$(text_signature "$PROMPT")"
 echo "PROMPT_META prompt_sig=${PROMPT_SIG:-none} norm_version=${NORM_VERSION:-v1} run_id=${RUN_ID}" >&2
+prepare_cdp_prompt_file
 
 echo "PROFILE_DIR path=${PROFILE_DIR} run_id=${RUN_ID}" >&2
 
@@ -274,9 +276,6 @@ if [[ $INIT_SPECIALIST -eq 0 ]]; then
   fi
 fi
 
-WORK_CHAT_ID="$(chat_id_from_url "${CHATGPT_URL:-}" 2>/dev/null || true)"
-echo "WORK_CHAT url=${CHATGPT_URL:-none} chat_id=${WORK_CHAT_ID:-none} source=${CHAT_URL_SOURCE:-unknown} strict_single_chat=${STRICT_SINGLE_CHAT} run_id=${RUN_ID}" >&2
-
 set +e
 acquire_chat_single_flight_lock "${CHATGPT_URL:-}"
 chat_lock_st=$?
@@ -286,6 +285,25 @@ if [[ $chat_lock_st -ne 0 ]]; then
   exit "$chat_lock_st"
 fi
 
+# The rollover threshold is checked only once this run owns the chat; a
+# switch moves the lock to the new chat.
+rollover_check_url="${CHATGPT_URL:-}"
+maybe_rollover_work_chat
+if [[ "${CHATGPT_URL:-}" != "$rollover_check_url" ]]; then
+  release_chat_single_flight_lock
+  set +e
+  acquire_chat_single_flight_lock "${CHATGPT_URL:-}"
+  chat_lock_st=$?
+  set -e
+  if [[ $chat_lock_st -ne 0 ]]; then
+    RUN_OUTCOME="chat_single_flight_lock_failed"
+    exit "$chat_lock_st"
+  fi
+fi
+
+WORK_CHAT_ID="$(chat_id_from_url "${CHATGPT_URL:-}" 2>/dev/null || true)"
+echo "WORK_CHAT url=${CHATGPT_URL:-none} chat_id=${WORK_CHAT_ID:-none} source=${CHAT_URL_SOURCE:-unknown} strict_single_chat=${STRICT_SINGLE_CHAT} run_id=${RUN_ID}" >&2
+
 PROMPT_HASH="$(printf '%s' "$PROMPT" | stable_hash)"
 LEDGER_LOOKUP_KEY="$(ledger_key_for "${CHATGPT_URL:-}" "${PROMPT_HASH:-}" | head -n 1 || true)"
 ACK_CHAT_ID="$(chat_id_from_url "${CHATGPT_URL:-}" 2>/dev/null || true)"
@@ -339,18 +357,24 @@ fi
 # first send we can pin the newly created conversation URL.
 pre_chat_urls=""
 if [[ $has_convo_url -eq 0 ]] && cdp_is_up; then
+  # Tab inventory and hygiene are browser-wide: with phase-scoped slots no run
+  # holds the whole-run lock, so they take the browser lock exclusively.
+  cdp_browser_acquire chat_urls_pre || true
   pre_chat_urls="$(capture_chat_urls_from_cdp | sort -u || true)"
+  cdp_browser_release
 fi
 
 # If we already have a pinned conversation URL and CDP is available, activate it
 # before sending so the human can see the message being sent in the same tab.
 if [[ $has_convo_url -eq 1 ]] && cdp_is_up; then
+  cdp_browser_acquire tab_hygiene_pre || true
   cdp_activate_or_open_url "$CHATGPT_URL" || true
   if [[ "${STRICT_SINGLE_CHAT}" == "1" ]]; then
     ensure_single_chat_target "$CHATGPT_URL" || exit 78
   else
     cdp_cleanup_chat_tabs "$CHATGPT_URL" || true
   fi
+  cdp_browser_release
 fi
 
 if [[ $DRY_RUN -eq 1 ]]; then
@@ -395,16 +419,27 @@ RUN_STARTED_MS="$(now_ms)"
 trap 'run_summary_finalize_on_exit' EXIT
 write_run_manifest
 
+if preflight_pipeline_enabled; then
+  # On failure the classic fetch-last/precheck below re-detect and report it.
+  preflight_session_start || true
+fi
+
 if [[ "${STRICT_UI_CONTRACT}" == "1" ]]; then
-  log_action "contract_check" "result=start strict=1"
+  # With a live preflight session no probe runs: the verdict comes from the
+  # preflight scan, so it is logged under that name.
+  contract_action="contract_check"
+  if preflight_session_live; then
+    contract_action="preflight_contract_check"
+  fi
+  log_action "$contract_action" "result=start strict=1"
   set +e
   contract_probe_via_cdp
   contract_status=$?
   set -e
   if [[ $contract_status -eq 0 ]]; then
-    log_action "contract_check" "result=ok"
+    log_action "$contract_action" "result=ok"
   else
-    log_action "contract_check" "result=fail status=${contract_status}"
+    log_action "$contract_action" "result=fail status=${contract_status}"
     capture_evidence_snapshot "E_UI_CONTRACT_FAIL"
     echo "chatgpt_send failed (ui contract status=$contract_status)." >&2
     exit "$contract_status"
@@ -505,7 +540,7 @@ pending_auto_heal_reuse() {
   echo "LEDGER_PENDING_AUTO_HEAL start trigger=${trigger} refresh=${refresh_fetch_last} run_id=${RUN_ID}" >&2
   if [[ "${refresh_fetch_last}" == "1" ]]; then
     set +e
-    fetch_last_via_cdp
+    fetch_last_via_cdp fresh
     st=$?
     set -e
     if [[ $st -ne 0 ]]; then
@@ -616,9 +651,10 @@ fi
 # Final dedupe veto before SEND_START. This is the last choke point that must
 # prevent duplicate sends when a previous attempt delivered the prompt but the
 # run/protocol failed before recording normal SEND/REPLY events.
+# It always re-reads the DOM, never the preflight snapshot.
 final_dedupe_prompt_present=0
 if [[ "${NO_BLIND_RESEND}" == "1" ]]; then
-  if fetch_last_via_cdp; then
+  if fetch_last_via_cdp fresh; then
     if [[ -n "${PROMPT_HASH:-}" ]] && [[ -n "${FETCH_LAST_LAST_USER_HASH:-}" ]] \
       && [[ "${FETCH_LAST_LAST_USER_HASH}" == "${PROMPT_HASH}" ]]; then
       final_dedupe_prompt_present=1
@@ -702,6 +738,7 @@ if [[ "${dispatch_preferred}" != "enter" ]] && [[ "${dispatch_preferred}" != "cl
   dispatch_preferred="enter"
 fi
 export CHATGPT_SEND_DISPATCH_PREFERRED="${dispatch_preferred}"
+chat_single_flight_phase "send"
 echo "SEND_DISPATCH attempt=1 method=${dispatch_preferred} run_id=${RUN_ID}" >&2
 set +e
 run_send_checked "initial"
@@ -1070,22 +1107,29 @@ protocol_append_event "REPLY_READY" "ok" "$PROMPT_HASH" "${FETCH_LAST_CHECKPOINT
 # conversation tab to the front in the shared Chrome.
 if cdp_is_up; then
   if [[ -n "${CHATGPT_URL:-}" ]] && is_chat_conversation_url "$CHATGPT_URL"; then
+    cdp_browser_acquire tab_hygiene_post || true
     cdp_activate_or_open_url "$CHATGPT_URL" || true
     if [[ "${STRICT_SINGLE_CHAT}" == "1" ]]; then
       ensure_single_chat_target "$CHATGPT_URL" || exit 78
     else
       cdp_cleanup_chat_tabs "$CHATGPT_URL" || true
     fi
+    cdp_browser_release
   fi
 fi
 
 # If we didn't have a conversation URL before (or we started from https://chatgpt.com/),
 # try to pin it now (after the first message creates the conversation and the
 # /c/<id> URL exists).
-if [[ $has_convo_url -eq 0 ]] && cdp_is_up; then
+new_chat_url=""
+new_title=""
+if [[ $has_convo_url -eq 0 ]] && mock_transport_enabled; then
+  # Mock: the chat URL the fake transport reports stands in for the new tab.
+  new_chat_url="$(mock_capture_chat_url | head -n 1 || true)"
+elif [[ $has_convo_url -eq 0 ]] && cdp_is_up; then
+  cdp_browser_acquire chat_urls_post || true
   post_chat_urls="$(capture_chat_urls_from_cdp | sort -u || true)"
-  new_chat_url=""
-  new_title=""
+  cdp_browser_release
   if [[ -n "${post_chat_urls//[[:space:]]/}" ]]; then
     # Prefer a newly-created URL (post - pre).
     if [[ -n "${pre_chat_urls//[[:space:]]/}" ]]; then
@@ -1111,42 +1155,64 @@ if [[ $has_convo_url -eq 0 ]] && cdp_is_up; then
       fi
     fi
   fi
+fi
 
-  if [[ -n "${new_chat_url:-}" ]] && is_chat_conversation_url "$new_chat_url"; then
-    if [[ -z "${new_title:-}" ]]; then
-      new_title="$(capture_chat_title_for_url_from_cdp "$new_chat_url" | head -n 1 || true)"
-    fi
-    mkdir -p "$(dirname "$CHATGPT_URL_FILE")" >/dev/null 2>&1 || true
-    printf '%s\n' "$new_chat_url" >"$CHATGPT_URL_FILE"
-    write_work_chat_url "$new_chat_url"
-    # Save as last + active session name if needed.
-    chats_db_upsert "last" "$new_chat_url" "${new_title:-}" >/dev/null 2>&1 || true
-    if [[ "${EXPLICIT_HOME_PROBE}" == "1" ]]; then
-      echo "[P2] active_update=skipped reason=explicit_home_probe old_active=${OLD_ACTIVE_URL:-"(none)"} new_candidate=${new_chat_url}" >&2
-    else
-      existing="$(chats_db_find_name_by_url "$new_chat_url" | head -n 1 || true)"
-      if [[ -z "${existing:-}" ]] || [[ "$existing" == "last" ]]; then
-        if [[ -n "${INIT_SESSION_NAME:-}" ]]; then
-          name="$INIT_SESSION_NAME"
-          title="${INIT_SESSION_TITLE:-$new_title}"
-        else
-          name="$(autoname)"
-          title="${new_title:-}"
-        fi
-        name="$(chats_db_unique_name "$name")"
-        chats_db_upsert "$name" "$new_chat_url" "${title:-}" >/dev/null 2>&1 || true
-        chats_db_set_active "$name" >/dev/null 2>&1 || true
+if [[ -n "${new_chat_url:-}" ]] && is_chat_conversation_url "$new_chat_url"; then
+  if [[ -z "${new_title:-}" ]] && cdp_is_up; then
+    new_title="$(capture_chat_title_for_url_from_cdp "$new_chat_url" | head -n 1 || true)"
+  fi
+  mkdir -p "$(dirname "$CHATGPT_URL_FILE")" >/dev/null 2>&1 || true
+  printf '%s\n' "$new_chat_url" >"$CHATGPT_URL_FILE"
+  write_work_chat_url "$new_chat_url"
+  # Save as last + active session name if needed.
+  chats_db_upsert "last" "$new_chat_url" "${new_title:-}" >/dev/null 2>&1 || true
+  if [[ "${EXPLICIT_HOME_PROBE}" == "1" ]]; then
+    echo "[P2] active_update=skipped reason=explicit_home_probe old_active=${OLD_ACTIVE_URL:-"(none)"} new_candidate=${new_chat_url}" >&2
+  else
+    existing="$(chats_db_find_name_by_url "$new_chat_url" | head -n 1 || true)"
+    if [[ -z "${existing:-}" ]] || [[ "$existing" == "last" ]]; then
+      if [[ -n "${INIT_SESSION_NAME:-}" ]]; then
+        name="$INIT_SESSION_NAME"
+        title="${INIT_SESSION_TITLE:-$new_title}"
       else
-        chats_db_set_active "$existing" >/dev/null 2>&1 || true
+        name="$(autoname)"
+        title="${new_title:-}"
       fi
+      name="$(chats_db_unique_name "$name")"
+      chats_db_upsert "$name" "$new_chat_url" "${title:-}" >/dev/null 2>&1 || true
+      chats_db_set_active "$name" >/dev/null 2>&1 || true
+    else
+      chats_db_set_active "$existing" >/dev/null 2>&1 || true
     fi
+  fi
 
-    # Make sure the newly created chat is visible in the browser.
+  if [[ -n "${ROLLOVER_FROM_URL:-}" ]]; then
+    python3 "${SCRIPT_DIR}/chat_rollover.py" record \
+      --from-url "$ROLLOVER_FROM_URL" \
+      --to-url "$new_chat_url" \
+      --reason "$ROLLOVER_REASON" \
+      --run-id "$RUN_ID" \
+      --conv-root "$CONV_STORE_DIR" \
+      --poll-stats-dir "$CHATGPT_SEND_POLL_STATS_DIR" \
+      --lineage "$ROLLOVER_LINEAGE_FILE" >&2 || true
+    echo "ROLLOVER_DONE from_url=${ROLLOVER_FROM_URL} to_url=${new_chat_url} reason=${ROLLOVER_REASON} run_id=${RUN_ID}" >&2
+  fi
+
+  # Make sure the newly created chat is visible in the browser.
+  if cdp_is_up; then
+    cdp_browser_acquire tab_hygiene_new_chat || true
     cdp_activate_or_open_url "$new_chat_url" || true
     cdp_cleanup_chat_tabs "$new_chat_url" || true
+    cdp_browser_release
   fi
 fi
 
+if [[ -n "${ROLLOVER_FROM_URL:-}" ]] && [[ "$(read_work_chat_url)" == "$ROLLOVER_FROM_URL" ]]; then
+  echo "E_ROLLOVER_NO_NEW_CHAT from_url=${ROLLOVER_FROM_URL} run_id=${RUN_ID}" >&2
+  RUN_OUTCOME="rollover_no_new_chat"
+  exit 1
+fi
+
 if [[ "${EXPLICIT_HOME_PROBE}" == "1" ]]; then
   current_active_name="$(chats_db_get_active_name | head -n 1 || true)"
   if [[ "${current_active_name:-}" != "${OLD_ACTIVE_NAME:-}" ]]; then
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_CHUNK_BYTES = int(os.environ.get("CHATGPT_SEND_SANITIZE_CHUNK_BYTES", str(1024 * 1024)))
+REDACTED = b"<REDACTED>"
+# Whitespace runs inside a rule are bounded so every match that starts before
+# a chunk cut is fully visible inside OVERLAP_BYTES of look-ahead.
+OVERLAP_BYTES = 4096
+# Already-emitted bytes kept in front of the next round, so `\b` sees the
+# same left neighbour as in a single pass.
+CONTEXT_BYTES = 16
+CUT_BOUNDARY_RE = re.compile(rb"[\s\"'&,;{}()\[\]<>]")
+
+_KEYS = (
+    r"api[_-]?key|x-api-key|access_token|refresh_token|id_token|session[_-]?token"
+    r"|client_secret|token|cookie|password|passwd|secret"
+)
+
+# (name, pattern). Patterns are matched against ASCII-lowercased bytes, so
+# literals are written in lowercase. A `keep` group is copied from the
+# original text and the rest of the match becomes REDACTED. Rule order is the
+# alternation order, so more specific rules come first.
+RULES: Tuple[Tuple[str, str], ...] = (
+    ("authorization", r"(?P<keep>authorization\"?\s{0,256}[:=]\s{0,256}\"?(?:(?:bearer|basic|token)\s{1,256})?)[^\",\s}]+"),
+    ("cookie_header", r"(?P<keep>\b(?:set-)?cookie:[ \t]{0,256})[^\r\n]+"),
+    ("bearer", r"(?P<keep>bearer\s{1,256})[a-z0-9._\-]{8,}"),
+    ("query_param", r"(?P<keep>\b(?:access_token|token|api_key|apikey|password|secret|client_secret|id_token)=)[^&\s]+"),
+    ("key_value", r"(?P<keep>\"?(?:" + _KEYS + r")\"?\s{0,256}[:=]\s{0,256}\"?)[^\",\s}]+"),
+    ("jwt", r"\beyj[a-z0-9_\-]{8,}\.[a-z0-9_\-]{8,}\.[a-z0-9_\-]{8,}"),
+    ("openai_key", r"\bsk-(?:proj-)?[a-z0-9_\-]{20,}"),
+)
+
+# Every rule match contains one of these literals within TRIGGER_BACK bytes of
+# its start. Chunks without a trigger skip the regex entirely; otherwise the
+# matcher is only anchored next to trigger hits.
+TRIGGERS: Tuple[bytes, ...] = (b"authoriz", b"cookie", b"bearer", b"token", b"key", b"passw", b"secret", b"eyj", b"sk-")
+TRIGGER_BACK = 10
+_KEY_CHARS = frozenset(b"abcdefghijklmnopqrstuvwxyz0123456789_-\"")
+
+
+def build_matcher(rules: Iterable[Tuple[str, str]] = RULES) -> Tuple["re.Pattern[bytes]", Dict[int, Optional[int]]]:
+    """Compile all rules into one alternation; returns (regex, {rule group: keep group})."""
+    parts: List[str] = []
+    for name, pattern in rules:
+        body = pattern.replace("(?P<keep>", "(?P<%s__keep>" % name)
+        parts.append("(?P<%s>%s)" % (name, body))
+    rx = re.compile("|".join(parts).encode("ascii"))
+    keep_groups = {rx.groupindex[name]: rx.groupindex.get("%s__keep" % name) for name, _pattern in rules}
+    return rx, keep_groups
+
+
+MATCHER, KEEP_GROUPS = build_matcher()
+
+
+def _trigger_positions(low: bytes, limit: int) -> List[int]:
+    """Start offsets (< limit) of trigger literals, sorted."""
+    hits: List[int] = []
+    for trig in TRIGGERS:
+        i = low.find(trig, 0, limit + len(trig) - 1)
+        while i >= 0:
+            hits.append(i)
+            i = low.find(trig, i + 1, limit)
+    hits.sort()
+    return hits
+
+
+def iter_matches(low: bytes, limit: int, pos: int = 0) -> Iterator["re.Match[bytes]"]:
+    """Yield non-overlapping leftmost matches that start in low[pos:limit].
+
+    Bytes before `pos` are context only: `\b` sees them, no match starts there.
+    """
+    for t in _trigger_positions(low, min(len(low), limit + TRIGGER_BACK)):
+        if t < pos:
+            continue
+        s = t
+        floor = max(pos, t - TRIGGER_BACK)
+        while s > floor and low[s - 1] in _KEY_CHARS:
+            s -= 1
+        for start in range(s, t + 1):
+            m = MATCHER.match(low, start)
+            if m is not None:
+                break
+        else:
+            continue
+        if m.start() >= limit:
+            return
+        yield m
+        pos = m.end()
+
+
+def redact(orig: bytes, m: "re.Match[bytes]") -> bytes:
+    # The outer rule group closes last, so lastindex identifies the rule.
+    keep_idx = KEEP_GROUPS.get(m.lastindex or 0)
+    if not keep_idx:
+        return REDACTED
+    a, b = m.span(keep_idx)
+    return orig[a:b] + REDACTED
+
+
+def _safe_cut(buf: bytes, start: int = 0) -> int:
+    """Cut point after `start` leaving OVERLAP_BYTES of look-ahead; 0 if none."""
+    limit = len(buf) - OVERLAP_BYTES
+    if limit <= start:
+        return 0
+    nl = buf.rfind(b"\n", start, limit)
+    if nl >= 0:
+        return nl + 1
+    cut = 0
+    for m in CUT_BOUNDARY_RE.finditer(buf, max(start, limit - OVERLAP_BYTES), limit):
+        cut = m.end()
+    return cut or limit
+
+
+def sanitize_chunks(chunks: Iterable[bytes], stats: Optional[dict] = None) -> Iterator[bytes]:
+    """Redact a stream of byte chunks; matches spanning chunk edges are handled.
+
+    `carry` holds the unemitted tail plus up to CONTEXT_BYTES of emitted
+    context in front of it (`head` bytes), so every round matches exactly as
+    a single pass over the whole input would.
+    """
+    carry = b""
+    head = 0
+    hits = 0
+    it = iter(chunks)
+    done = False
+    while not done:
+        chunk = next(it, None)
+        if chunk is None:
+            done = True
+            buf = carry
+        else:
+            buf = carry + chunk
+        cut = len(buf) if done else _safe_cut(buf, head)
+        if cut <= head and not done:
+            carry = buf
+            continue
+        low = buf.lower()
+        out: List[bytes] = []
+        pos = head
+        last_end = 0
+        for m in iter_matches(low, cut, head):
+            if m.end() > cut and not done:
+                # Straddles the cut: defer the whole match to the next round.
+                cut = m.start()
+                break
+            out.append(buf[pos:m.start()])
+            out.append(redact(buf, m))
+            pos = last_end = m.end()
+            hits += 1
+        out.append(buf[pos:cut])
+        keep = max(last_end, cut - CONTEXT_BYTES)
+        carry = buf[keep:]
+        head = cut - keep
+        data = b"".join(out)
+        if data:
+            yield data
+    if stats is not None:
+        stats["hits"] = stats.get("hits", 0) + hits
+
+
+def sanitize_bytes(data: bytes) -> bytes:
+    return b"".join(sanitize_chunks([data]))
+
+
+def sanitize_text(text: str) -> str:
+    raw = text.encode("utf-8", errors="surrogateescape")
+    return sanitize_bytes(raw).decode("utf-8", errors="surrogateescape")
+
+
+def sanitize_file(path: Path, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """Rewrite `path` through a temp file in the same dir; returns redaction count.
+
+    The original file is left untouched (mtime included) when nothing matched.
+    """
+    stats = {"hits": 0}
+    fd, tmp_name = tempfile.mkstemp(prefix=".%s." % path.name, suffix=".san", dir=str(path.parent))
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            chunks = iter(lambda: src.read(chunk_bytes), b"")
+            for piece in sanitize_chunks(chunks, stats):
+                dst.write(piece)
+        if stats["hits"]:
+            shutil.copymode(str(path), tmp_name)
+            os.replace(tmp_name, str(path))
+            return stats["hits"]
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    os.unlink(tmp_name)
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Redact secrets from log/evidence files in place (streaming).")
+    ap.add_argument("paths", nargs="*")
+    ap.add_argument("--chunk-bytes", type=int, default=DEFAULT_CHUNK_BYTES)
+    ap.add_argument("--stdin", action="store_true", help="filter stdin to stdout instead of files")
+    ap.add_argument("--list-rules", action="store_true")
+    ap.add_argument("--verbose", action="store_true", help="print SANITIZED path=... hits=... per changed file")
+    args = ap.parse_args()
+
+    if args.list_rules:
+        for name, pattern in RULES:
+            print(f"{name}\t{pattern}")
+        return 0
+
+    chunk_bytes = max(1, int(args.chunk_bytes))
+    if args.stdin:
+        src = sys.stdin.buffer
+        chunks = iter(lambda: src.read(chunk_bytes), b"")
+        for piece in sanitize_chunks(chunks):
+            sys.stdout.buffer.write(piece)
+        sys.stdout.buffer.flush()
+        return 0
+
+    rc = 0
+    for raw in args.paths:
+        path = Path(raw)
+        if not path.is_file():
+            continue
+        try:
+            hits = sanitize_file(path, chunk_bytes)
+        except OSError as exc:
+            print(f"[log_sanitize] skip path={path} error={exc}", file=sys.stderr)
+            rc = 1
+            continue
+        if hits and args.verbose:
+            print(f"SANITIZED path={path} hits={hits}")
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
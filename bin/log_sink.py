@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+import argparse
+import collections
+import fcntl
+import gzip
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+DEFAULT_MAX_BYTES = int(os.environ.get("CHATGPT_SEND_LOG_SINK_MAX_BYTES", str(8 * 1024 * 1024)))
+DEFAULT_CODEC = (os.environ.get("CHATGPT_SEND_LOG_SINK_CODEC", "zstd") or "zstd").strip().lower()
+DEFAULT_KEEP = int(os.environ.get("CHATGPT_SEND_LOG_SINK_KEEP", "0"))
+COPY_CHUNK = 1024 * 1024
+RLE_MARKER = "[log_sink] HEARTBEAT_RLE"
+
+# Periodic progress lines that only differ by counters. Event lines
+# (`event=...`) and terminal markers are never collapsed.
+HEARTBEAT_PATTERNS = (
+    re.compile(r"^\[cdp_chatgpt\] phase=(wait_activity|wait_finish|wait_send_ready|wait_composer)(?! event=)\b"),
+    re.compile(r"^REPLY_WAIT: heartbeat\b"),
+    re.compile(r"^REPLY_WAIT tick\b"),
+)
+VOLATILE_FIELD_RE = re.compile(r"\b(elapsed|elapsed_ms|ts_ms|no_progress_ms|stable)=\S+")
+SEGMENT_RE = re.compile(r"\.(\d{6})\.(gz|zst)$")
+
+
+def heartbeat_key(line: str) -> Optional[str]:
+    for pat in HEARTBEAT_PATTERNS:
+        if pat.search(line):
+            return VOLATILE_FIELD_RE.sub(r"\1=*", line)
+    return None
+
+
+class HeartbeatCollapser:
+    """Fold repeats inside a run of heartbeat lines into one RLE record per heartbeat kind.
+
+    Heartbeats interleave (`phase=wait_finish` + `REPLY_WAIT: heartbeat`), so a
+    run is any sequence of heartbeat lines; the first line of each kind is kept
+    and the records are emitted when a non-heartbeat line ends the run.
+    """
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+        self.last_lines: Dict[str, str] = {}
+
+    def feed(self, line: str) -> List[str]:
+        key = heartbeat_key(line)
+        if key is None:
+            return self.flush() + [line]
+        if key in self.counts:
+            self.counts[key] += 1
+            self.last_lines[key] = line
+            return []
+        self.counts[key] = 0
+        return [line]
+
+    def flush(self) -> List[str]:
+        out = [
+            f"{RLE_MARKER} collapsed={n} last: {self.last_lines[key]}"
+            for key, n in self.counts.items()
+            if n > 0
+        ]
+        self.counts = {}
+        self.last_lines = {}
+        return out
+
+
+def resolve_codec(codec: str) -> str:
+    codec = (codec or "gzip").strip().lower()
+    if codec == "zstd":
+        try:
+            import zstandard  # noqa: F401
+
+            return "zstd"
+        except Exception:
+            pass
+        if shutil.which("zstd"):
+            return "zstd"
+        return "gzip"
+    if codec != "gzip":
+        raise ValueError(f"unsupported codec: {codec}")
+    return "gzip"
+
+
+def segment_paths(log_path: Path) -> List[Path]:
+    parent = log_path.parent
+    if not parent.is_dir():
+        return []
+    prefix = log_path.name + "."
+    found = []
+    for p in parent.iterdir():
+        if not p.name.startswith(prefix):
+            continue
+        m = SEGMENT_RE.search(p.name)
+        if m and p.name == f"{log_path.name}.{m.group(1)}.{m.group(2)}":
+            found.append((int(m.group(1)), p))
+    return [p for _, p in sorted(found)]
+
+
+def compress_file(src: Path, dst: Path, codec: str) -> None:
+    tmp = dst.with_name(dst.name + ".tmp")
+    if codec == "gzip":
+        with src.open("rb") as fin, gzip.open(tmp, "wb", compresslevel=6) as fout:
+            shutil.copyfileobj(fin, fout, COPY_CHUNK)
+    else:
+        try:
+            import zstandard
+
+            cctx = zstandard.ZstdCompressor(level=6)
+            with src.open("rb") as fin, tmp.open("wb") as fout:
+                cctx.copy_stream(fin, fout, read_size=COPY_CHUNK)
+        except ImportError:
+            with src.open("rb") as fin, tmp.open("wb") as fout:
+                subprocess.run(["zstd", "-q", "-6", "-c"], stdin=fin, stdout=fout, check=True)
+    os.replace(tmp, dst)
+
+
+def open_segment(path: Path):
+    if path.name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.name.endswith(".zst"):
+        try:
+            import zstandard
+
+            raw = path.open("rb")
+            return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8", errors="replace")
+        except ImportError:
+            proc = subprocess.Popen(["zstd", "-q", "-dc", str(path)], stdout=subprocess.PIPE)
+            assert proc.stdout is not None
+            return io.TextIOWrapper(proc.stdout, encoding="utf-8", errors="replace")
+    return path.open("r", encoding="utf-8", errors="replace")
+
+
+class LogSink:
+    def __init__(self, log_path: Path, max_bytes: int = DEFAULT_MAX_BYTES, codec: str = DEFAULT_CODEC, keep: int = DEFAULT_KEEP):
+        self.log_path = log_path
+        self.max_bytes = max(0, int(max_bytes))
+        self.codec = resolve_codec(codec)
+        self.keep = max(0, int(keep))
+        self.lock_path = log_path.with_name(log_path.name + ".lock")
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        data = "".join(line + "\n" for line in lines)
+        if not data:
+            return
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a") as lock_fh:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+            with self.log_path.open("a", encoding="utf-8") as fh:
+                fh.write(data)
+            if self.max_bytes > 0 and self.log_path.stat().st_size >= self.max_bytes:
+                self._rotate_locked()
+
+    def _rotate_locked(self) -> None:
+        segments = segment_paths(self.log_path)
+        seq = 1
+        if segments:
+            seq = int(SEGMENT_RE.search(segments[-1].name).group(1)) + 1
+        ext = "gz" if self.codec == "gzip" else "zst"
+        staging = self.log_path.with_name(f"{self.log_path.name}.{seq:06d}.rotating")
+        os.replace(self.log_path, staging)
+        self.log_path.touch()
+        compress_file(staging, self.log_path.with_name(f"{self.log_path.name}.{seq:06d}.{ext}"), self.codec)
+        staging.unlink()
+        if self.keep > 0:
+            for old in segment_paths(self.log_path)[: -self.keep]:
+                old.unlink()
+
+
+def iter_log_lines(log_path: Path) -> Iterator[str]:
+    for seg in segment_paths(log_path):
+        with open_segment(seg) as fh:
+            for line in fh:
+                yield line.rstrip("\n")
+    if log_path.exists():
+        with open_segment(log_path) as fh:
+            for line in fh:
+                yield line.rstrip("\n")
+
+
+def read_plain_tail(path: Path, n: int, block: int = 64 * 1024) -> List[str]:
+    if n <= 0 or not path.exists():
+        return []
+    with path.open("rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        pos = fh.tell()
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= n:
+            step = min(block, pos)
+            pos -= step
+            fh.seek(pos)
+            buf = fh.read(step) + buf
+    lines = buf.decode("utf-8", errors="replace").splitlines()
+    return lines[-n:]
+
+
+def tail_log_lines(log_path: Path, n: int) -> List[str]:
+    """Last n lines across the active file and rotated segments, newest segment first."""
+    if n <= 0:
+        return []
+    out = read_plain_tail(log_path, n)
+    for seg in reversed(segment_paths(log_path)):
+        if len(out) >= n:
+            break
+        window: collections.deque = collections.deque(maxlen=n - len(out))
+        with open_segment(seg) as fh:
+            for line in fh:
+                window.append(line.rstrip("\n"))
+        out = list(window) + out
+    return out[-n:]
+
+
+def cmd_append(args: argparse.Namespace) -> int:
+    sink = LogSink(Path(args.log), max_bytes=args.max_bytes, codec=args.codec, keep=args.keep)
+    collapser = None if args.no_collapse else HeartbeatCollapser()
+    stdin = sys.stdin
+    pending: List[str] = []
+    for raw in stdin:
+        line = raw.rstrip("\n")
+        if args.tee:
+            sys.stdout.write(raw)
+            sys.stdout.flush()
+        pending.extend(collapser.feed(line) if collapser else [line])
+        # Streaming callers (tee) need lines on disk as they come; batch otherwise.
+        if pending and (args.tee or len(pending) >= 256):
+            sink.write_lines(pending)
+            pending = []
+    if collapser:
+        pending.extend(collapser.flush())
+    sink.write_lines(pending)
+    return 0
+
+
+def cmd_cat(args: argparse.Namespace) -> int:
+    try:
+        for p in args.paths:
+            log_path = Path(p)
+            if args.tail is not None:
+                lines: Iterable[str] = tail_log_lines(log_path, args.tail)
+            else:
+                lines = iter_log_lines(log_path)
+            for line in lines:
+                sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        try:
+            sys.stdout.close()
+        except Exception:
+            pass
+    return 0
+
+
+def cmd_segments(args: argparse.Namespace) -> int:
+    log_path = Path(args.log)
+    for seg in segment_paths(log_path):
+        print(f"{seg} bytes={seg.stat().st_size}")
+    if log_path.exists():
+        print(f"{log_path} bytes={log_path.stat().st_size} active=1")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Rotated, compressed run log sink and reader.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ap_append = sub.add_parser("append", help="append stdin to a log, collapsing repeated heartbeats")
+    ap_append.add_argument("--log", required=True)
+    ap_append.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    ap_append.add_argument("--codec", default=DEFAULT_CODEC, choices=("zstd", "gzip"))
+    ap_append.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="rotated segments to keep (0 = all)")
+    ap_append.add_argument("--tee", action="store_true", help="also copy stdin to stdout unchanged")
+    ap_append.add_argument("--no-collapse", action="store_true")
+    ap_append.set_defaults(func=cmd_append)
+
+    ap_cat = sub.add_parser("cat", help="print a log with rotated segments decompressed in order")
+    ap_cat.add_argument("paths", nargs="+")
+    ap_cat.add_argument("--tail", type=int, default=None)
+    ap_cat.set_defaults(func=cmd_cat)
+
+    ap_seg = sub.add_parser("segments", help="list rotated segments and the active file")
+    ap_seg.add_argument("--log", required=True)
+    ap_seg.set_defaults(func=cmd_segments)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,831 @@
+#!/usr/bin/env python3
+"""Chrome-less CDP endpoint for load-testing bin/cdp_chatgpt.py.
+
+serve: HTTP /json/version, /json/list, /json/new, /json/activate/<id>,
+       /json/close/<id> plus a per-tab websocket that answers the driver's
+       Runtime.evaluate expressions from a scripted conversation model
+       (prefilled turns, streamed replies, stop button while generating).
+       GET /__mock/stats returns call/connection counters as JSON.
+load:  serve in-process and run N real cdp_chatgpt.py sends with bounded
+       concurrency; reports throughput, latency percentiles, peak RSS and
+       open fds per driver process, and server-side connection counts.
+soak:  one cdp_chatgpt.py send whose reply keeps streaming for --polls wait
+       polls; checks that the driver's traced/RSS memory stays flat.
+
+No JavaScript is executed: each expression is recognised by the same kind of
+needles cdp_chatgpt.eval_label uses, so new driver expressions show up as
+`unknown` in the stats instead of silently passing.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+ORIGIN = (os.environ.get("CHATGPT_SEND_CHATGPT_ORIGIN", "https://chatgpt.com") or "https://chatgpt.com").rstrip("/")
+TYPING_CURSOR_RE = re.compile(r"[▍▋▌]+\s*$")
+WS_RE = re.compile(r"\s+")
+TAIL_RE = re.compile(r"\.slice\(-(\d+)\)")
+LIMIT_RE = re.compile(r"const lim = (\d+);")
+TEXT_RE = re.compile(r"const text = (\".*?(?<!\\)\");", re.S)
+FILLER = "Mock assistant output streamed by the fake CDP endpoint for load testing. "
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def norm_assistant(s: str) -> str:
+    txt = (s or "").replace(" ", " ").replace("\r\n", "\n").replace("\r", "\n").strip()
+    return TYPING_CURSOR_RE.sub("", WS_RE.sub(" ", txt)).strip()
+
+
+def norm_composer(s: str) -> str:
+    return WS_RE.sub(" ", (s or "").replace(" ", " ")).strip()
+
+
+def fnv1a_utf16(s: str) -> str:
+    # Same hash as the compact state expression (charCodeAt = UTF-16 units).
+    h = 0x811C9DC5
+    data = s.encode("utf-16-le")
+    for i in range(0, len(data), 2):
+        h = ((h ^ (data[i] | (data[i + 1] << 8))) * 0x01000193) & 0xFFFFFFFF
+    return format(h, "x")
+
+
+class Chat:
+    """Scripted conversation: a message list plus at most one streaming reply."""
+
+    def __init__(self, chat_id: str, cfg: Dict[str, Any]):
+        self.chat_id = chat_id
+        self.cfg = cfg
+        self.messages: List[Dict[str, str]] = []
+        self.composer = ""
+        self.reply: Optional[Tuple[str, float]] = None  # (full text, started monotonic)
+        self.replies_sent = 0
+        self.hold = 0  # keep streaming until this many compact polls were served
+        self.polls = 0
+        for i in range(int(cfg["turns"])):
+            self._append("user", f"prefilled question {i + 1}")
+            self._append("assistant", (f"Prefilled answer {i + 1}. " + FILLER * 64)[: int(cfg["prefill_chars"])])
+
+    def _append(self, role: str, text: str) -> Dict[str, str]:
+        msg = {"role": role, "text": text, "id": f"{self.chat_id[:8]}-{len(self.messages)}"}
+        self.messages.append(msg)
+        return msg
+
+    def tick(self) -> None:
+        """Advance the streaming reply to the current time."""
+        if self.reply is None:
+            return
+        full, started = self.reply
+        elapsed_ms = (time.monotonic() - started) * 1000.0 - float(self.cfg["first_token_ms"])
+        if elapsed_ms < 0:
+            return
+        ticks = int(elapsed_ms // max(1, int(self.cfg["tick_ms"]))) + 1
+        shown = min(len(full), ticks * int(self.cfg["chunk_chars"]))
+        last = self.messages[-1]
+        if last["role"] != "assistant":
+            last = self._append("assistant", "")
+        if self.hold and shown >= len(full):
+            # Held replies keep changing at a fixed size so a long soak does
+            # not turn into a test of the mock's own string handling.
+            last["text"] = f"{full} [{ticks}]"
+            return
+        last["text"] = full[:shown]
+        if shown >= len(full):
+            self.reply = None
+
+    def generating(self) -> bool:
+        self.tick()
+        return self.reply is not None
+
+    def dispatch(self) -> None:
+        prompt = self.composer
+        self.composer = ""
+        self._append("user", prompt)
+        self.replies_sent += 1
+        replies = self.cfg.get("replies") or []
+        if replies:
+            body = replies[(self.replies_sent - 1) % len(replies)]
+        else:
+            head = f"Mock reply {self.replies_sent} to: {prompt[:80]}. "
+            body = (head + FILLER * (int(self.cfg["reply_chars"]) // len(FILLER) + 1))[: max(len(head), int(self.cfg["reply_chars"]))]
+        self.reply = (body.strip(), time.monotonic())
+        self.hold = int(self.cfg["hold_polls"])
+        self.polls = 0
+
+    def stop(self) -> bool:
+        if not self.generating():
+            return False
+        self.reply = None
+        return True
+
+    def sig(self, idx: int) -> str:
+        m = self.messages[idx]
+        return "|".join([m["id"], f"conversation-turn-{idx + 1}", "", str(idx), str(len(m["text"]))])
+
+
+class Tab:
+    def __init__(self, tab_id: str, url: str):
+        self.id = tab_id
+        self.url = url
+
+
+class MockBrowser:
+    def __init__(self, cfg: Dict[str, Any]):
+        self.cfg = cfg
+        self.port = 0
+        self.tabs: Dict[str, Tab] = {}
+        self.chats: Dict[str, Chat] = {}
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "http_requests": 0,
+            "ws_connections": 0,
+            "ws_open": 0,
+            "ws_open_peak": 0,
+            "calls": 0,
+            "evals": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "methods": {},
+            "labels": {},
+        }
+
+    # -- tabs/chats -------------------------------------------------------
+    def new_tab(self, url: str) -> Tab:
+        tab = Tab(uuid.uuid4().hex.upper()[:32], url or "about:blank")
+        self.tabs[tab.id] = tab
+        return tab
+
+    def chat_for(self, tab: Tab) -> Chat:
+        m = re.match(re.escape(ORIGIN) + r"/c/([0-9A-Za-z-]+)", tab.url)
+        key = m.group(1) if m else "home:" + tab.id
+        chat = self.chats.get(key)
+        if chat is None:
+            chat = self.chats[key] = Chat(key, self.cfg)
+        return chat
+
+    def tab_json(self, tab: Tab) -> Dict[str, Any]:
+        ws = f"127.0.0.1:{self.port}/devtools/page/{tab.id}"
+        return {
+            "id": tab.id,
+            "type": "page",
+            "title": "ChatGPT" if tab.url.startswith(ORIGIN) else tab.url,
+            "url": tab.url,
+            "webSocketDebuggerUrl": f"ws://{ws}",
+            "devtoolsFrontendUrl": f"/devtools/inspector.html?ws={ws}",
+        }
+
+    def count(self, bucket: str, key: str) -> None:
+        d = self.stats[bucket]
+        d[key] = d.get(key, 0) + 1
+
+    # -- page model -------------------------------------------------------
+    def state(self, tab: Tab, chat: Chat, expr: str) -> Dict[str, Any]:
+        chat.tick()
+        users = [i for i, m in enumerate(chat.messages) if m["role"] == "user"]
+        assistants = [i for i, m in enumerate(chat.messages) if m["role"] == "assistant"]
+        lu = users[-1] if users else None
+        la = assistants[-1] if assistants else None
+        last_user = chat.messages[lu]["text"] if lu is not None else ""
+        last_asst = chat.messages[la]["text"] if la is not None else ""
+        out: Dict[str, Any] = {
+            "url": tab.url,
+            "userCount": len(users),
+            "lastUserSig": chat.sig(lu) if lu is not None else "",
+            "assistantCount": len(assistants),
+            "lastAssistantSig": chat.sig(la) if la is not None else "",
+            "assistantAfterLastUser": bool(lu is not None and la is not None and la > lu),
+            "stopVisible": chat.reply is not None,
+        }
+        if "lastAssistantTail" in expr:
+            m = TAIL_RE.search(expr)
+            a = norm_assistant(last_asst)
+            out.update(
+                lastUserLen=len(last_user),
+                lastAssistantTail=a[-int(m.group(1)) :] if m else a[-500:],
+                lastAssistantLen=len(a),
+                lastAssistantHash=fnv1a_utf16(a),
+            )
+        else:
+            out.update(lastUser=last_user, lastAssistant=last_asst)
+        return out
+
+    def ready(self, chat: Chat) -> Dict[str, Any]:
+        gen = chat.generating()
+        clen = len(norm_composer(chat.composer))
+        return {
+            "hasEditor": True,
+            "hasSend": not gen,
+            "sendEnabled": (not gen) and clen > 0,
+            "composerLen": clen,
+            "stopVisible": gen,
+        }
+
+    def fetch(self, tab: Tab, chat: Chat, expr: str) -> Dict[str, Any]:
+        m = LIMIT_RE.search(expr)
+        lim = int(m.group(1)) if m else 6
+        ready = self.ready(chat)
+        msgs = [
+            {"role": msg["role"], "text": msg["text"], "sig": chat.sig(i), "text_len": len(msg["text"])}
+            for i, msg in enumerate(chat.messages)
+        ]
+        return {
+            "url": tab.url,
+            "title": "ChatGPT",
+            "visibilityState": "visible",
+            "hasFocus": True,
+            "activeElement": {"tag": "DIV", "role": "", "ariaLabel": "", "id": "prompt-textarea", "className": "ProseMirror"},
+            "stopVisible": ready["stopVisible"],
+            "hasComposer": True,
+            "hasSendButton": ready["hasSend"],
+            "sendEnabled": ready["sendEnabled"],
+            "composerLen": ready["composerLen"],
+            "dialogPresent": False,
+            "dialogText": "",
+            "loginDetected": False,
+            "captchaDetected": False,
+            "offlineDetected": False,
+            "errorBannerDetected": False,
+            "ui_state_hint": "ok",
+            "total": len(msgs),
+            "limit": lim,
+            "messages": msgs[-lim:] if lim > 0 else msgs,
+        }
+
+    def evaluate(self, tab: Tab, expr: str) -> Tuple[str, Any]:
+        """Returns (label, value) for a driver expression."""
+        chat = self.chat_for(tab)
+        if "preflightSnapshot" in expr:
+            return "preflight", {
+                "fetch": self.fetch(tab, chat, expr),
+                "ready": self.ready(chat),
+                "state": self.state(tab, chat, ""),
+            }
+        if "messages: selected" in expr:
+            return "fetch_last", self.fetch(tab, chat, expr)
+        if "lastAssistantSig" in expr:
+            if "lastAssistantTail" not in expr:
+                return "state", self.state(tab, chat, expr)
+            chat.polls += 1
+            chat.tick()
+            last = chat.messages[-1]
+            if chat.hold and chat.polls >= chat.hold and chat.reply is not None and last["role"] == "assistant" and last["text"]:
+                # Release the hold: the reply ends at whatever was streamed so far.
+                chat.hold = 0
+                chat.reply = (last["text"], chat.reply[1])
+            return "state_compact", self.state(tab, chat, expr)
+        if "const text = " in expr and "insertedPreview" in expr:
+            m = TEXT_RE.search(expr)
+            if chat.generating():
+                return "send", {"ok": False, "error": "send button not found"}
+            chat.composer = json.loads(m.group(1)) if m else ""
+            inserted = norm_composer(chat.composer)
+            chat.dispatch()
+            return "send", {"ok": True, "insertedPreview": inserted[:60], "method": "enter" if "'enter'" in expr else "button"}
+        if "crypto.subtle.digest" in expr:
+            inserted = norm_composer(chat.composer)
+            m = re.search(r'const expected = "([0-9a-f]*)";', expr)
+            digest = hashlib.sha256(inserted.encode("utf-8")).hexdigest()
+            if not inserted:
+                return "send_verified", {"ok": False, "error": "failed to insert prompt text"}
+            if m and m.group(1) != digest:
+                return "send_verified", {"ok": False, "error": "prompt_insert_mismatch", "insertedLen": len(inserted)}
+            chat.dispatch()
+            return "send_verified", {"ok": True, "insertedPreview": inserted[:60], "method": "enter"}
+        if "composer_not_cleared" in expr and "afterClearLen" in expr:
+            chat.composer = ""
+            return "prepare_composer", {"ok": True}
+        if "hadStop" in expr:
+            had = chat.stop()
+            return "click_stop", {"ok": had, "hadStop": had, "clicked": had}
+        if "range.collapse(false)" in expr:
+            gen = chat.generating()
+            return "focus_composer", {"ok": True, "hasEditor": True, "hasSend": not gen, "stopVisible": gen}
+        if "enter-only" in expr:
+            if chat.composer and not chat.generating():
+                chat.dispatch()
+            return "press_enter", {"ok": True, "method": "enter-only"}
+        if "sendEnabled" in expr:
+            return "ready", self.ready(chat)
+        if "visibilitychange" in expr:
+            return "soft_nudge", {"ok": True, "turns": len(chat.messages), "hasEditor": True}
+        if "popstate" in expr:
+            return "client_renav", {"ok": True, "via": "popstate"}
+        if expr.strip() == "document.readyState":
+            return "ready_state", "complete"
+        if "return !!ed;" in expr:
+            return "composer", True
+        return "unknown", None
+
+    def call(self, tab: Tab, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            self.stats["calls"] += 1
+            self.count("methods", method)
+            if method == "Runtime.evaluate":
+                self.stats["evals"] += 1
+                label, value = self.evaluate(tab, str(params.get("expression") or ""))
+                self.count("labels", label)
+                if label == "unknown":
+                    return {"result": {"type": "undefined"}}
+                return {"result": {"type": "object" if isinstance(value, dict) else type(value).__name__, "value": value}}
+            if method == "Input.insertText":
+                self.chat_for(tab).composer += str(params.get("text") or "")
+                return {}
+            if method == "Page.navigate":
+                tab.url = str(params.get("url") or tab.url)
+                return {"frameId": tab.id}
+            return {}
+
+
+# -- websocket / http ------------------------------------------------------
+async def ws_read(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    head = await reader.readexactly(2)
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    n = head[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if masked else b""
+    data = await reader.readexactly(n)
+    if masked:
+        key = int.from_bytes((mask * (n // 4 + 1))[:n], "big")
+        data = (int.from_bytes(data, "big") ^ key).to_bytes(n, "big")
+    return opcode, data
+
+
+def ws_frame(opcode: int, data: bytes) -> bytes:
+    n = len(data)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + data
+
+
+class Server:
+    def __init__(self, browser: MockBrowser):
+        self.browser = browser
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        method, target = (parts[0], parts[1]) if len(parts) >= 2 else ("GET", "/")
+        headers = {}
+        for line in lines[1:]:
+            k, _, v = line.partition(":")
+            if k:
+                headers[k.strip().lower()] = v.strip()
+        try:
+            if headers.get("upgrade", "").lower() == "websocket":
+                await self.websocket(target, headers, reader, writer)
+            else:
+                self.http(method, target, writer)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def http(self, method: str, target: str, writer: asyncio.StreamWriter) -> None:
+        b = self.browser
+        url = urllib.parse.urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        code, body = 200, None
+        with b.lock:
+            b.stats["http_requests"] += 1
+            if path == "/json/version":
+                body = {
+                    "Browser": "MockCDP/1.0",
+                    "Protocol-Version": "1.3",
+                    "User-Agent": "mock_cdp.py",
+                    "webSocketDebuggerUrl": f"ws://127.0.0.1:{b.port}/devtools/browser/mock",
+                }
+            elif path in ("/json", "/json/list"):
+                body = [b.tab_json(t) for t in b.tabs.values()]
+            elif path == "/json/new":
+                body = b.tab_json(b.new_tab(urllib.parse.unquote(url.query)))
+            elif path.startswith("/json/activate/") or path.startswith("/json/close/"):
+                tab_id = path.rsplit("/", 1)[1]
+                if tab_id not in b.tabs:
+                    code, body = 404, f"No such target id: {tab_id}"
+                else:
+                    if path.startswith("/json/close/"):
+                        del b.tabs[tab_id]
+                        body = "Target is closing"
+                    else:
+                        body = "Target activated"
+            elif path == "/__mock/stats":
+                body = dict(b.stats, tabs=len(b.tabs), chats=len(b.chats), ts_ms=now_ms())
+            else:
+                code, body = 404, "not found"
+        raw = (json.dumps(body) if not isinstance(body, str) else body).encode("utf-8")
+        ctype = "application/json" if not isinstance(body, str) else "text/plain"
+        reason = "OK" if code == 200 else "Not Found"
+        writer.write(
+            f"HTTP/1.1 {code} {reason}\r\nContent-Type: {ctype}\r\nContent-Length: {len(raw)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + raw
+        )
+
+    async def websocket(self, target: str, headers: Dict[str, str], reader, writer) -> None:
+        b = self.browser
+        tab = b.tabs.get(target.rsplit("/", 1)[-1])
+        if tab is None or not target.startswith("/devtools/page/"):
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1((headers.get("sec-websocket-key", "") + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+        with b.lock:
+            b.stats["ws_connections"] += 1
+            b.stats["ws_open"] += 1
+            b.stats["ws_open_peak"] = max(b.stats["ws_open_peak"], b.stats["ws_open"])
+        latency = float(b.cfg["latency_ms"]) / 1000.0
+        jitter = float(b.cfg["jitter_ms"]) / 1000.0
+        try:
+            while True:
+                opcode, data = await ws_read(reader)
+                if opcode == 0x8:
+                    writer.write(ws_frame(0x8, data[:2]))
+                    await writer.drain()
+                    return
+                if opcode == 0x9:
+                    writer.write(ws_frame(0xA, data))
+                    await writer.drain()
+                    continue
+                if opcode not in (0x1, 0x2):
+                    continue
+                msg = json.loads(data.decode("utf-8"))
+                if latency or jitter:
+                    await asyncio.sleep(latency + random.uniform(0.0, jitter))
+                try:
+                    result = b.call(tab, str(msg.get("method") or ""), msg.get("params") or {})
+                    reply = {"id": msg.get("id"), "result": result}
+                except Exception as e:  # model bugs must surface as CDP errors, not hangs
+                    reply = {"id": msg.get("id"), "error": {"code": -32000, "message": str(e)}}
+                out = json.dumps(reply).encode("utf-8")
+                with b.lock:
+                    b.stats["bytes_in"] += len(data)
+                    b.stats["bytes_out"] += len(out)
+                writer.write(ws_frame(0x1, out))
+                await writer.drain()
+        finally:
+            with b.lock:
+                b.stats["ws_open"] -= 1
+
+
+def build_browser(args) -> MockBrowser:
+    replies: List[str] = []
+    if args.replies_file:
+        with open(args.replies_file, encoding="utf-8") as f:
+            replies = [line.rstrip("\n") for line in f if line.strip()]
+    cfg = {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "first_token_ms": args.first_token_ms,
+        "tick_ms": args.tick_ms,
+        "chunk_chars": args.chunk_chars,
+        "reply_chars": args.reply_chars,
+        "turns": args.turns,
+        "prefill_chars": args.prefill_chars,
+        "hold_polls": args.hold_polls,
+        "replies": replies,
+    }
+    browser = MockBrowser(cfg)
+    for i in range(args.tabs):
+        browser.new_tab(f"{ORIGIN}/c/{uuid.UUID(int=i + 1)}")
+    return browser
+
+
+async def start_server(browser: MockBrowser, port: int) -> asyncio.AbstractServer:
+    srv = await asyncio.start_server(Server(browser).handle, "127.0.0.1", port, backlog=1024, limit=1 << 22)
+    browser.port = srv.sockets[0].getsockname()[1]
+    return srv
+
+
+def cmd_serve(args) -> int:
+    browser = build_browser(args)
+
+    async def run() -> None:
+        srv = await start_server(browser, args.port)
+        print(f"MOCK_CDP_READY port={browser.port} tabs={len(browser.tabs)}", flush=True)
+        async with srv:
+            await srv.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# -- load ------------------------------------------------------------------
+def pct(values: List[int], q: float) -> Optional[int]:
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, -(-int(q * 1000) * len(s) // 1000) - 1))]
+
+
+def fd_count(pid: int) -> int:
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def serve_in_background(browser: MockBrowser, port: int) -> Optional[asyncio.AbstractEventLoop]:
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def serve() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start_server(browser, port))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    if not started.wait(10):
+        sys.stderr.write("E_MOCK_CDP_START\n")
+        return None
+    return loop
+
+
+def cmd_load(args) -> int:
+    browser = build_browser(args)
+    loop = serve_in_background(browser, args.port)
+    if loop is None:
+        return 6
+    urls = [t.url for t in browser.tabs.values()]
+    driver = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cdp_chatgpt.py")
+    tmp = tempfile.mkdtemp(prefix="mock_cdp_load_")
+    env = dict(os.environ)
+    env.update(
+        CHATGPT_SEND_PROGRESS="0",
+        CHATGPT_SEND_CDP_STATS="1",
+        CHATGPT_SEND_TAB_CACHE_DIR=os.path.join(tmp, "tab_cache"),
+    )
+
+    pending = list(range(args.sessions))
+    running: Dict[int, Dict[str, Any]] = {}
+    busy_urls = set()
+    rows: List[Dict[str, Any]] = []
+    t0 = time.monotonic()
+    next_sample = 0.0
+    while pending or running:
+        # One session per chat at a time: concurrent sends into one chat are a
+        # conflict the driver is supposed to refuse, not load.
+        while pending and len(running) < args.concurrency:
+            url = next((u for u in urls if u not in busy_urls), None)
+            if url is None:
+                break
+            i = pending.pop(0)
+            log = open(os.path.join(tmp, f"s{i}.log"), "w+b")
+            cmd = [sys.executable, driver, "--cdp-port", str(browser.port), "--chatgpt-url", url,
+                   "--prompt", f"load session {i} {uuid.uuid4().hex[:8]}", "--timeout", str(args.timeout)]
+            if args.mode != "send":
+                cmd.append(f"--{args.mode}")
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=log, stdin=subprocess.DEVNULL, env=env)
+            # Keep the Popen referenced: a dropped one gets reaped by subprocess
+            # on the next spawn and wait4() below would lose its rusage.
+            running[proc.pid] = {"proc": proc, "i": i, "url": url, "log": log, "t0": time.monotonic(), "fds": 0}
+            busy_urls.add(url)
+        now = time.monotonic()
+        if now >= next_sample:
+            for pid, r in running.items():
+                r["fds"] = max(r["fds"], fd_count(pid))
+            next_sample = now + 0.1
+        for pid in list(running):
+            done_pid, status, ru = os.wait4(pid, os.WNOHANG)
+            if not done_pid:
+                continue
+            r = running.pop(pid)
+            r["proc"].returncode = os.waitstatus_to_exitcode(status)
+            busy_urls.discard(r["url"])
+            r["log"].seek(0)
+            err = r["log"].read().decode("utf-8", errors="replace")
+            r["log"].close()
+            row = {
+                "session": r["i"],
+                "rc": r["proc"].returncode,
+                "wall_ms": int((time.monotonic() - r["t0"]) * 1000),
+                "max_rss_kb": int(ru.ru_maxrss),
+                "fds_peak": r["fds"],
+            }
+            m = re.findall(r"^CDP_STATS (.+)$", err, re.M)
+            if m:
+                row.update({k: int(v) for k, v in (p.split("=", 1) for p in m[-1].split()) if v.isdigit()})
+            if row["rc"] != 0:
+                row["stderr_tail"] = err[-400:]
+            rows.append(row)
+        time.sleep(0.01)
+    wall_ms = int((time.monotonic() - t0) * 1000)
+    loop.call_soon_threadsafe(loop.stop)
+
+    ok = [r for r in rows if r["rc"] == 0]
+    lat = [r["wall_ms"] for r in ok]
+    rss = [r["max_rss_kb"] for r in rows]
+    report = {
+        "generated_at_ms": now_ms(),
+        "mode": args.mode,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "tabs": len(urls),
+        "config": {k: v for k, v in browser.cfg.items() if k != "replies"},
+        "ok": len(ok),
+        "fail": len(rows) - len(ok),
+        "wall_ms": wall_ms,
+        "throughput_per_s": round(len(ok) / (wall_ms / 1000.0), 2) if wall_ms else 0.0,
+        "latency_ms": {"p50": pct(lat, 0.5), "p95": pct(lat, 0.95), "p99": pct(lat, 0.99), "max": max(lat) if lat else None},
+        "max_rss_kb": {"p50": pct(rss, 0.5), "max": max(rss) if rss else None},
+        "fds_peak": max((r["fds_peak"] for r in rows), default=0),
+        "server": dict(browser.stats),
+        "runs": rows,
+    }
+    if args.out:
+        tmp_out = args.out + ".tmp"
+        with open(tmp_out, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        os.replace(tmp_out, args.out)
+    lm = report["latency_ms"]
+    print(
+        f"MOCK_CDP_LOAD mode={args.mode} sessions={args.sessions} concurrency={args.concurrency} tabs={len(urls)}"
+        f" ok={len(ok)} fail={report['fail']} wall_ms={wall_ms} throughput_per_s={report['throughput_per_s']}"
+        f" p50_ms={lm['p50']} p95_ms={lm['p95']} p99_ms={lm['p99']} max_ms={lm['max']}"
+        f" rss_kb_p50={report['max_rss_kb']['p50']} rss_kb_max={report['max_rss_kb']['max']}"
+        f" fds_peak={report['fds_peak']} evals={browser.stats['evals']}"
+        f" unknown_evals={browser.stats['labels'].get('unknown', 0)} ws_open_peak={browser.stats['ws_open_peak']}",
+        flush=True,
+    )
+    for r in rows:
+        if r["rc"] != 0:
+            sys.stderr.write(f"W_MOCK_CDP_SESSION_FAIL session={r['session']} rc={r['rc']} tail={r.get('stderr_tail', '')[-200:]!r}\n")
+    for name in os.listdir(tmp):
+        if name.endswith(".log"):
+            os.unlink(os.path.join(tmp, name))
+    return 0 if report["fail"] == 0 else 1
+
+
+HEARTBEAT_MEM_RE = re.compile(r"^REPLY_WAIT: heartbeat .* mem_kb=(\d+) mem_peak_kb=(\d+) rss_kb=(\d+)$", re.M)
+
+
+def cmd_soak(args) -> int:
+    args.hold_polls = args.polls
+    browser = build_browser(args)
+    loop = serve_in_background(browser, args.port)
+    if loop is None:
+        return 6
+    tab = next(iter(browser.tabs.values()))
+    driver = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cdp_chatgpt.py")
+    tmp = tempfile.mkdtemp(prefix="mock_cdp_soak_")
+    env = dict(os.environ)
+    env.update(
+        CHATGPT_SEND_PROGRESS="0",
+        CHATGPT_SEND_CDP_STATS="1",
+        CHATGPT_SEND_MEM_STATS="1",
+        CHATGPT_SEND_HEARTBEAT_SEC=str(args.heartbeat_sec),
+        CHATGPT_SEND_REPLY_WAIT_POLL_SEC=str(args.poll_sec),
+        CHATGPT_SEND_TAB_CACHE_DIR=os.path.join(tmp, "tab_cache"),
+    )
+    err_path = os.path.join(tmp, "driver.err")
+    t0 = time.monotonic()
+    with open(err_path, "w+b") as err:
+        proc = subprocess.Popen(
+            [sys.executable, driver, "--cdp-port", str(browser.port), "--chatgpt-url", tab.url,
+             "--prompt", f"soak {uuid.uuid4().hex[:8]}", "--timeout", str(args.timeout)],
+            stdout=subprocess.DEVNULL, stderr=err, stdin=subprocess.DEVNULL, env=env,
+        )
+        _, status, ru = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        err.seek(0)
+        text = err.read().decode("utf-8", errors="replace")
+    wall_ms = int((time.monotonic() - t0) * 1000)
+    loop.call_soon_threadsafe(loop.stop)
+    os.unlink(err_path)
+
+    beats = [tuple(int(x) for x in m) for m in HEARTBEAT_MEM_RE.findall(text)]
+    with browser.lock:
+        polls = browser.chat_for(tab).polls
+    # Compare against the first heartbeat after warm-up (imports, first
+    # normalizations, websocket buffers) rather than process start.
+    base = beats[len(beats) // 10] if beats else (0, 0, 0)
+    last = beats[-1] if beats else (0, 0, 0)
+    traced_growth = last[0] - base[0]
+    rss_growth = last[2] - base[2]
+    flat = (
+        proc.returncode == 0
+        and len(beats) >= 3
+        and polls >= args.polls
+        and traced_growth <= args.max_traced_growth_kb
+        and rss_growth <= args.max_rss_growth_kb
+    )
+    report = {
+        "generated_at_ms": now_ms(),
+        "rc": proc.returncode,
+        "polls": polls,
+        "wall_ms": wall_ms,
+        "heartbeats": len(beats),
+        "traced_kb": {"base": base[0], "last": last[0], "peak": max((b[1] for b in beats), default=0), "growth": traced_growth},
+        "rss_kb": {"base": base[2], "last": last[2], "max": int(ru.ru_maxrss), "growth": rss_growth},
+        "limits_kb": {"traced_growth": args.max_traced_growth_kb, "rss_growth": args.max_rss_growth_kb},
+        "verdict": "flat" if flat else "growth",
+        "mem_stats": {k: int(v) for k, v in re.findall(r"(\w+)=(\d+)", (re.findall(r"^MEM_STATS (.+)$", text, re.M) or [""])[-1])},
+        "samples": [{"mem_kb": b[0], "mem_peak_kb": b[1], "rss_kb": b[2]} for b in beats],
+    }
+    if args.out:
+        tmp_out = args.out + ".tmp"
+        with open(tmp_out, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+        os.replace(tmp_out, args.out)
+    print(
+        f"MOCK_CDP_SOAK rc={proc.returncode} polls={polls} wall_ms={wall_ms} heartbeats={len(beats)}"
+        f" traced_kb_base={base[0]} traced_kb_last={last[0]} traced_growth_kb={traced_growth}"
+        f" rss_kb_base={base[2]} rss_kb_last={last[2]} rss_growth_kb={rss_growth} rss_kb_max={int(ru.ru_maxrss)}"
+        f" verdict={report['verdict']}",
+        flush=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(f"W_MOCK_CDP_SOAK_DRIVER_FAIL rc={proc.returncode} tail={text[-300:]!r}\n")
+    return 0 if flat else 1
+
+
+def add_model_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--port", type=int, default=0, help="default: 0 (pick a free port)")
+    p.add_argument("--tabs", type=int, default=1, help="chat tabs opened at start (/c/<uuid>)")
+    p.add_argument("--turns", type=int, default=0, help="prefilled user/assistant pairs per chat")
+    p.add_argument("--prefill-chars", type=int, default=400)
+    p.add_argument("--reply-chars", type=int, default=600)
+    p.add_argument("--chunk-chars", type=int, default=60)
+    p.add_argument("--tick-ms", type=int, default=50, help="ms between streamed chunks")
+    p.add_argument("--first-token-ms", type=int, default=1500, help="time to first streamed chunk")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="added to every CDP response")
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="uniform extra 0..N ms per response")
+    p.add_argument("--replies-file", help="scripted replies, one per line, cycled per chat")
+    p.add_argument("--hold-polls", type=int, default=0, help="keep each reply streaming for N compact state polls")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Chrome-less CDP endpoint for cdp_chatgpt.py load tests.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve", help="serve /json/* and per-tab websockets until killed")
+    add_model_args(s)
+
+    ld = sub.add_parser("load", help="serve in-process and drive N concurrent cdp_chatgpt.py sessions")
+    add_model_args(ld)
+    ld.add_argument("--sessions", type=int, default=20)
+    ld.add_argument("--concurrency", type=int, default=10)
+    ld.add_argument("--mode", choices=("send", "fetch-last"), default="send")
+    ld.add_argument("--timeout", type=float, default=120.0, help="per-session cdp_chatgpt.py --timeout")
+    ld.add_argument("--out", help="write the JSON report here")
+
+    sk = sub.add_parser("soak", help="one send held in wait_for_response for --polls polls; checks flat memory")
+    add_model_args(sk)
+    sk.add_argument("--polls", type=int, default=10000)
+    sk.add_argument("--poll-sec", type=float, default=0.0, help="driver CHATGPT_SEND_REPLY_WAIT_POLL_SEC")
+    sk.add_argument("--heartbeat-sec", type=float, default=1.0)
+    sk.add_argument("--timeout", type=float, default=3600.0)
+    sk.add_argument("--max-traced-growth-kb", type=int, default=256)
+    sk.add_argument("--max-rss-growth-kb", type=int, default=2048)
+    sk.add_argument("--out", help="write the JSON report here")
+
+    args = ap.parse_args()
+    if args.cmd == "load" and args.tabs < args.concurrency:
+        args.tabs = args.concurrency
+    return {"serve": cmd_serve, "load": cmd_load, "soak": cmd_soak}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+import argparse
+import fcntl
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_TTL_MS = int(os.environ.get("CHATGPT_SEND_TAB_CACHE_TTL_MS", "1500"))
+FETCH_TIMEOUT_SEC = float(os.environ.get("CHATGPT_SEND_TAB_FETCH_TIMEOUT_SEC", "2"))
+CHAT_URL_RE = re.compile(r"^https://chatgpt\.com/c/([0-9a-fA-F-]{16,})")
+HOME_URLS = {"https://chatgpt.com", "https://chatgpt.com/"}
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def default_cache_dir() -> Path:
+    env_dir = (os.environ.get("CHATGPT_SEND_TAB_CACHE_DIR") or "").strip()
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).resolve().parent.parent / "state" / "cdp"
+
+
+def cache_paths(cache_dir: Path, port: int) -> Dict[str, Path]:
+    base = cache_dir / f"tab_inventory_{port}"
+    return {
+        "cache": Path(f"{base}.json"),
+        "lock": Path(f"{base}.lock"),
+        # Touched by navigation actions (see cdp_tab_inventory_invalidate).
+        "inval": Path(f"{base}.inval"),
+    }
+
+
+def strip_fragment(url: str) -> str:
+    return (url or "").split("#", 1)[0].strip()
+
+
+def chat_id(url: str) -> str:
+    m = CHAT_URL_RE.match(strip_fragment(url))
+    return m.group(1) if m else ""
+
+
+def fetch_tabs(port: int, timeout: float = FETCH_TIMEOUT_SEC) -> Optional[list]:
+    url = f"http://127.0.0.1:{port}/json/list"
+    raw = ""
+    # curl keeps the same code path as the shell helpers (and their test fakes).
+    if shutil.which("curl"):
+        try:
+            proc = subprocess.run(
+                ["curl", "-fsS", "-m", str(max(1, int(timeout + 0.999))), url],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout + 1.0,
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0:
+            return None
+        raw = proc.stdout.decode("utf-8", errors="ignore")
+    else:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as r:
+                raw = r.read().decode("utf-8", errors="ignore")
+        except Exception:
+            return None
+    try:
+        tabs = json.loads(raw)
+    except Exception:
+        return None
+    return tabs if isinstance(tabs, list) else None
+
+
+def _mtime_ms(path: Path) -> int:
+    try:
+        return int(path.stat().st_mtime_ns // 1_000_000)
+    except OSError:
+        return 0
+
+
+def _read_fresh(paths: Dict[str, Path], ttl_ms: int) -> Optional[list]:
+    try:
+        obj = json.loads(paths["cache"].read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    tabs = obj.get("tabs")
+    started = int(obj.get("fetch_start_ms") or 0)
+    if not isinstance(tabs, list):
+        return None
+    if now_ms() - started > ttl_ms:
+        return None
+    if started <= _mtime_ms(paths["inval"]):
+        return None
+    return tabs
+
+
+def load_tabs(port: int, *, cache_dir: Optional[Path] = None, ttl_ms: int = DEFAULT_TTL_MS, refresh: bool = False) -> Optional[list]:
+    """Return the CDP /json/list payload, served from the shared cache when fresh.
+
+    Concurrent callers single-flight the fetch through a flock; a fetch that
+    started before the last invalidation is never served.
+    """
+    if ttl_ms <= 0:
+        return fetch_tabs(port)
+    paths = cache_paths(cache_dir or default_cache_dir(), port)
+    if not refresh:
+        tabs = _read_fresh(paths, ttl_ms)
+        if tabs is not None:
+            return tabs
+    try:
+        paths["cache"].parent.mkdir(parents=True, exist_ok=True)
+        lock_fh = open(paths["lock"], "a+")
+    except OSError:
+        return fetch_tabs(port)
+    with lock_fh:
+        fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+        if not refresh:
+            tabs = _read_fresh(paths, ttl_ms)
+            if tabs is not None:
+                return tabs
+        started = now_ms()
+        tabs = fetch_tabs(port)
+        if tabs is None:
+            return None
+        tmp = paths["cache"].with_name(paths["cache"].name + f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"port": port, "fetch_start_ms": started, "tabs": tabs}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, paths["cache"])
+        except OSError:
+            pass
+        return tabs
+
+
+def invalidate(port: int, cache_dir: Optional[Path] = None) -> None:
+    paths = cache_paths(cache_dir or default_cache_dir(), port)
+    try:
+        paths["inval"].parent.mkdir(parents=True, exist_ok=True)
+        paths["inval"].touch()
+    except OSError:
+        pass
+
+
+# Query API. All helpers take the raw /json/list payload so callers can reuse
+# one load_tabs() result for several questions.
+
+def page_tabs(tabs: list) -> List[dict]:
+    return [t for t in tabs if isinstance(t, dict) and (t.get("type") or "page") == "page"]
+
+
+def chat_tabs(tabs: list) -> List[dict]:
+    out = []
+    for t in page_tabs(tabs):
+        url = strip_fragment(str(t.get("url") or ""))
+        cid = chat_id(url)
+        if cid:
+            out.append({"id": str(t.get("id") or "").strip(), "url": url, "title": str(t.get("title") or "").strip(), "chat_id": cid})
+    return out
+
+
+def chat_urls(tabs: list) -> List[str]:
+    seen = []
+    for tab in chat_tabs(tabs):
+        if tab["url"] not in seen:
+            seen.append(tab["url"])
+    return seen
+
+
+def tabs_by_chat_id(tabs: list, cid: str) -> List[dict]:
+    return [tab for tab in chat_tabs(tabs) if tab["chat_id"] == cid]
+
+
+def active_tab(tabs: list) -> Optional[dict]:
+    # Chrome lists page targets most-recently-activated first.
+    pages = page_tabs(tabs)
+    if not pages:
+        return None
+    t = pages[0]
+    url = strip_fragment(str(t.get("url") or ""))
+    return {"id": str(t.get("id") or "").strip(), "url": url, "title": str(t.get("title") or "").strip(), "chat_id": chat_id(url)}
+
+
+def duplicate_chat_tabs(tabs: list) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for tab in chat_tabs(tabs):
+        groups.setdefault(tab["chat_id"], []).append(tab["id"])
+    return {cid: ids for cid, ids in groups.items() if len(ids) > 1}
+
+
+def home_tabs(tabs: list) -> List[dict]:
+    out = []
+    for t in page_tabs(tabs):
+        url = strip_fragment(str(t.get("url") or ""))
+        if url in HOME_URLS or url.startswith("https://chatgpt.com/?"):
+            out.append({"id": str(t.get("id") or "").strip(), "url": url, "title": str(t.get("title") or "").strip()})
+    return out
+
+
+def summary(tabs: list) -> dict:
+    chats = chat_tabs(tabs)
+    return {
+        "page_tabs": len(page_tabs(tabs)),
+        "chat_tabs": chats,
+        "chat_tab_count": len(chats),
+        "active": active_tab(tabs),
+        "duplicates": duplicate_chat_tabs(tabs),
+        "home_tabs": home_tabs(tabs),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Shared, short-TTL cache of CDP /json/list with tab queries.")
+    ap.add_argument("--cdp-port", type=int, default=int(os.environ.get("CHATGPT_SEND_CDP_PORT", "9222")))
+    ap.add_argument("--cache-dir", default="")
+    ap.add_argument("--ttl-ms", type=int, default=DEFAULT_TTL_MS)
+    ap.add_argument("--refresh", action="store_true", help="bypass the cache (result is still stored)")
+    ap.add_argument(
+        "query",
+        choices=["json", "chat-urls", "chat-tabs", "by-chat-id", "active", "duplicates", "home", "summary", "invalidate"],
+    )
+    ap.add_argument("arg", nargs="?", default="")
+    args = ap.parse_args()
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+    if args.query == "invalidate":
+        invalidate(args.cdp_port, cache_dir)
+        return 0
+
+    tabs = load_tabs(args.cdp_port, cache_dir=cache_dir, ttl_ms=args.ttl_ms, refresh=args.refresh)
+    if tabs is None:
+        return 1
+
+    if args.query == "json":
+        print(json.dumps(tabs, ensure_ascii=False))
+    elif args.query == "chat-urls":
+        for url in chat_urls(tabs):
+            print(url)
+    elif args.query == "chat-tabs":
+        for tab in chat_tabs(tabs):
+            print(f"{tab['id']}\t{tab['url']}\t{tab['title']}")
+    elif args.query == "by-chat-id":
+        cid = chat_id(args.arg) or args.arg.strip()
+        for tab in tabs_by_chat_id(tabs, cid):
+            print(f"{tab['id']}\t{tab['url']}\t{tab['title']}")
+    elif args.query == "active":
+        tab = active_tab(tabs)
+        if tab:
+            print(f"{tab['id']}\t{tab['url']}\t{tab['title']}")
+    elif args.query == "duplicates":
+        for cid, ids in duplicate_chat_tabs(tabs).items():
+            print(f"{cid}\t{','.join(ids)}")
+    elif args.query == "home":
+        for tab in home_tabs(tabs):
+            print(f"{tab['id']}\t{tab['url']}\t{tab['title']}")
+    elif args.query == "summary":
+        print(json.dumps(summary(tabs), ensure_ascii=False, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 SPAWN="$ROOT_DIR/bin/spawn_second_agent"
 CHATGPT_SEND_BIN="$ROOT_DIR/bin/chatgpt_send"
 CHAT_POOL_MANAGER="$ROOT_DIR/scripts/chat_pool_manager.sh"
+CHAT_HEALTH_TOOL="$ROOT_DIR/bin/chat_health.py"
 
 PROJECT_PATH=""
 TASKS_FILE=""
@@ -26,6 +27,9 @@ SKIP_GIT_REPO_CHECK=1
 CHAT_POOL_CHECK="${POOL_CHAT_POOL_CHECK:-1}"                # 1|0
 CHAT_POOL_PROBE="${POOL_CHAT_POOL_PROBE:-0}"                # 1|0
 CHAT_POOL_PROBE_NO_SEND="${POOL_CHAT_POOL_PROBE_NO_SEND:-1}" # 1|0
+CHAT_HEALTH_RECORD="${POOL_CHAT_HEALTH_RECORD:-1}"           # 1|0
+CHAT_HEALTH_ROUTING="${POOL_CHAT_HEALTH_ROUTING:-0}"         # 1|0
+CHAT_HEALTH_STORE="${POOL_CHAT_HEALTH_STORE:-}"                # default resolved after --mode/--log-dir
 FLEET_MONITOR_SCRIPT="${POOL_FLEET_MONITOR_SCRIPT:-$ROOT_DIR/scripts/child_fleet_monitor.sh}"
 FLEET_MONITOR_ENABLED="${POOL_FLEET_MONITOR_ENABLED:-1}"     # 1|0
 FLEET_MONITOR_POLL_SEC="${POOL_FLEET_MONITOR_POLL_SEC:-2}"
@@ -88,6 +92,10 @@ Options:
   --chat-pool-check / --no-chat-pool-check
   --chat-pool-probe / --no-chat-pool-probe
   --chat-pool-probe-no-send / --chat-pool-probe-send
+  --chat-health-routing / --no-chat-health-routing
+                                   assign the healthiest pool chats first (bin/chat_health.py rank)
+  --chat-health-store FILE         per-chat profile store (default: live: $CHATGPT_SEND_ROOT/state/chat_health.json,
+                                   mock: <log-dir>/chat_health.json)
   --mode MODE                      mock|live (default: mock)
   --concurrency N                  parallel launches (default: 3)
   --iterations N                   per-agent iterations hint (default: 1)
@@ -117,6 +125,9 @@ while [[ $# -gt 0 ]]; do
     --no-chat-pool-probe) CHAT_POOL_PROBE=0; shift ;;
     --chat-pool-probe-no-send) CHAT_POOL_PROBE_NO_SEND=1; shift ;;
     --chat-pool-probe-send) CHAT_POOL_PROBE_NO_SEND=0; shift ;;
+    --chat-health-routing) CHAT_HEALTH_ROUTING=1; shift ;;
+    --no-chat-health-routing) CHAT_HEALTH_ROUTING=0; shift ;;
+    --chat-health-store) CHAT_HEALTH_STORE="${2:-}"; shift 2 ;;
     --mode) MODE="${2:-}"; shift 2 ;;
     --concurrency) CONCURRENCY="${2:-}"; shift 2 ;;
     --iterations) ITERATIONS="${2:-}"; shift 2 ;;
@@ -207,6 +218,7 @@ if [[ ! "$CHAT_POOL_CHECK" =~ ^[01]$ ]] || [[ ! "$CHAT_POOL_PROBE" =~ ^[01]$ ]]
   || [[ ! "$FLEET_WATCHDOG_ENABLED" =~ ^[01]$ ]] || [[ ! "$FLEET_GATE_ENABLED" =~ ^[01]$ ]] \
   || [[ ! "$POOL_WRITE_REPORT" =~ ^[01]$ ]] || [[ ! "$POOL_REPORT_INCLUDE_LOGS" =~ ^[01]$ ]] \
   || [[ ! "$POOL_FOLLOW_NO_ANSI" =~ ^[01]$ ]] \
+  || [[ ! "$CHAT_HEALTH_RECORD" =~ ^[01]$ ]] || [[ ! "$CHAT_HEALTH_ROUTING" =~ ^[01]$ ]] \
   || [[ ! "$POOL_EARLY_GATE_STUCK_FAIL" =~ ^[01]$ ]]; then
   echo "switches must be 0 or 1" >&2
   exit 7
@@ -345,6 +357,31 @@ else
   POOL_RUN_ID="$(basename "$LOG_DIR")"
 fi
 
+# Live runs build up one profile store per install; mock runs keep theirs in
+# the run dir so test pools never write into the checkout.
+if [[ -z "$CHAT_HEALTH_STORE" ]]; then
+  if [[ "$MODE" == "live" ]]; then
+    CHAT_HEALTH_STORE="${CHATGPT_SEND_ROOT:-$ROOT_DIR}/state/chat_health.json"
+  else
+    CHAT_HEALTH_STORE="$LOG_DIR/chat_health.json"
+  fi
+fi
+
+# Predictive routing: healthiest chats first, so spare pool entries absorb the
+# degraded ones (slow long threads, frequent soft resets / echo misses).
+if (( ${#CHAT_POOL[@]} > 0 )) && [[ "$CHAT_HEALTH_ROUTING" == "1" ]]; then
+  rank_args=(--store "$CHAT_HEALTH_STORE" rank --need "$TOTAL_AGENTS")
+  for chat_url in "${CHAT_POOL[@]}"; do
+    rank_args+=(--url "$chat_url")
+  done
+  rank_out="$(python3 "$CHAT_HEALTH_TOOL" "${rank_args[@]}" 2>&1)" || {
+    echo "$rank_out" >&2
+    exit 24
+  }
+  echo "$rank_out"
+  mapfile -t CHAT_POOL < <(printf '%s\n' "$rank_out" | sed -n 's/^CHAT_ROUTE .* chat_url=\([^ ]*\).*$/\1/p')
+fi
+
 POOL_RUN_DIR="$LOG_DIR"
 POOL_ACTIVE_MARKER="$POOL_RUN_DIR/.pool.active"
 POOL_AGENT_DIR="$POOL_RUN_DIR/agents"
@@ -1656,6 +1693,13 @@ PY
     fi
   fi
 
+  # Only logs from the assigned chat feed its profile.
+  if [[ "$CHAT_HEALTH_RECORD" == "1" ]] && [[ -n "$chat_url_assigned" ]] && [[ "$chat_match" != "0" ]] \
+    && [[ -n "$transport_log" ]] && [[ -f "$transport_log" ]]; then
+    python3 "$CHAT_HEALTH_TOOL" --store "$CHAT_HEALTH_STORE" ingest --chat-url "$chat_url_assigned" "$transport_log" \
+      >/dev/null 2>&1 || true
+  fi
+
   if [[ "$spawn_rc" == "99" ]]; then
     fail_kind="FAIL_FAST"
     fail_reason="fail_fast_threshold"
@@ -2050,6 +2094,14 @@ run_pool_report
 stop_early_gate_if_running
 stop_fleet_follow_if_running
 
+if (( ${#CHAT_POOL[@]} > 0 )) && [[ "$CHAT_HEALTH_RECORD" == "1" ]]; then
+  suggest_args=(--store "$CHAT_HEALTH_STORE" suggest)
+  for chat_url in "${CHAT_POOL[@]}"; do
+    suggest_args+=(--url "$chat_url")
+  done
+  python3 "$CHAT_HEALTH_TOOL" "${suggest_args[@]}" 2>&1 || true
+fi
+
 echo "POOL_RUN_ID=$POOL_RUN_ID"
 echo "POOL_RUN_DIR=$POOL_RUN_DIR"
 echo "POOL_RUNS_ROOT=$POOL_RUNS_ROOT"
@@ -2092,6 +2144,8 @@ echo "POOL_FLEET_GATE_MISSING_ARTIFACTS_TOTAL=$FLEET_GATE_MISSING_ARTIFACTS_TOTA
 echo "POOL_CHAT_OK_TOTAL=$FLEET_CHAT_OK_TOTAL"
 echo "POOL_CHAT_MISMATCH_TOTAL=$FLEET_CHAT_MISMATCH_TOTAL"
 echo "POOL_CHAT_UNKNOWN_TOTAL=$FLEET_CHAT_UNKNOWN_TOTAL"
+echo "POOL_CHAT_HEALTH_STORE=$CHAT_HEALTH_STORE"
+echo "POOL_CHAT_HEALTH_ROUTING=$CHAT_HEALTH_ROUTING"
 echo "POOL_STRICT_CHAT_PROOF=$POOL_STRICT_CHAT_PROOF_EFFECTIVE"
 echo "POOL_FLEET_GATE_COUNTS_JSON=$FLEET_GATE_COUNTS_JSON"
 echo "POOL_FLEET_WATCHDOG_RESTARTS=$FLEET_WATCHDOG_RESTARTS"
@@ -14,10 +14,13 @@ Commands:
   add    --url URL --file FILE
   check  --file FILE [--size N]
   probe  --file FILE [--transport cdp|mock] [--chatgpt-send-path PATH] [--no-send]
+  health --file FILE [--store FILE]
 
 Notes:
   - URLs must be in format: https://chatgpt.com/c/<id>
   - probe is opt-in live action; requires RUN_LIVE_CDP_E2E=1 for transport=cdp
+  - health prints per-chat profiles (turns, p50/p95 reply latency, soft-reset and
+    echo-miss rates) from bin/chat_health.py and CHAT_ROTATE for slow threads
 USAGE
 }
 
@@ -294,6 +297,33 @@ PY
     fi
     ;;
 
+  health)
+    file=""
+    store=""
+    while [[ $# -gt 0 ]]; do
+      case "$1" in
+        --file) file="${2:-}"; shift 2 ;;
+        --store) store="${2:-}"; shift 2 ;;
+        -h|--help) usage; exit 0 ;;
+        *) echo "Unknown arg for health: $1" >&2; exit 2 ;;
+      esac
+    done
+    if [[ -z "$file" ]]; then
+      echo "health requires --file" >&2
+      exit 2
+    fi
+    if [[ ! -f "$file" ]]; then
+      echo "pool file not found: $file" >&2
+      exit 2
+    fi
+    store_args=()
+    if [[ -n "$store" ]]; then
+      store_args=(--store "$store")
+    fi
+    python3 "$ROOT_DIR/bin/chat_health.py" "${store_args[@]}" score --file "$file"
+    python3 "$ROOT_DIR/bin/chat_health.py" "${store_args[@]}" suggest --file "$file"
+    ;;
+
   -h|--help)
     usage
     ;;
@@ -0,0 +1,331 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+FIXTURE="$ROOT_DIR/test/fixtures/fake_chatgpt/index.html"
+MODE=""
+PORT=0
+CDP_PORT=9333
+CHROME_PATH="${CHROME_BIN:-}"
+CHAT_LENGTHS="0,20,100"
+SENDS=3
+TURNS=0
+PREFILL_CHARS=400
+REPLY_CHARS=1200
+CHUNK_CHARS=40
+TICK_MS=30
+FIRST_TOKEN_MS=150
+TIMEOUT_SEC=120
+OUT=""
+
+usage() {
+  cat <<'USAGE'
+Usage:
+  scripts/fake_chatgpt_bench.sh serve [options]
+  scripts/fake_chatgpt_bench.sh bench [options]
+
+serve: serve the fake ChatGPT page (test/fixtures/fake_chatgpt) on
+       http://127.0.0.1:PORT/ and /c/<id>. GET /__config?turns=N&... updates
+       the page config for later loads and returns it as JSON.
+bench: start the page server and a headless Chrome, then run
+       bin/cdp_chatgpt.py sends against /c/<id> chats prefilled with each
+       --chat-lengths turn count. Reports CDP calls, bytes and
+       dispatch->completion latency per send (BENCH lines + JSON report).
+       Prints SKIP_NO_CHROME and exits 0 when no Chrome is found.
+
+Page options (both modes):
+  --turns N            prefilled user/assistant pairs (serve), default: 0
+  --prefill-chars N    chars per prefilled assistant turn, default: 400
+  --reply-chars N      chars per streamed reply, default: 1200
+  --chunk-chars N      chars per streaming tick, default: 40
+  --tick-ms N          ms between streaming ticks, default: 30
+  --first-token-ms N   ms before the first chunk, default: 150
+
+serve options:
+  --port N             default: 0 (pick a free port)
+
+bench options:
+  --chat-lengths LIST  comma-separated prefilled pair counts, default: 0,20,100
+  --sends N            sends per chat length, default: 3
+  --cdp-port N         default: 9333
+  --chrome-path PATH   default: $CHROME_BIN or google-chrome/chromium from PATH
+  --timeout-sec N      per send, default: 120
+  --out FILE           default: <repo>/state/bench/fake_chatgpt_<timestamp>.json
+USAGE
+}
+
+if [[ $# -gt 0 ]] && [[ "$1" != -* ]]; then
+  MODE="$1"
+  shift
+fi
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    --port) PORT="${2:-}"; shift 2 ;;
+    --cdp-port) CDP_PORT="${2:-}"; shift 2 ;;
+    --chrome-path) CHROME_PATH="${2:-}"; shift 2 ;;
+    --chat-lengths) CHAT_LENGTHS="${2:-}"; shift 2 ;;
+    --sends) SENDS="${2:-}"; shift 2 ;;
+    --turns) TURNS="${2:-}"; shift 2 ;;
+    --prefill-chars) PREFILL_CHARS="${2:-}"; shift 2 ;;
+    --reply-chars) REPLY_CHARS="${2:-}"; shift 2 ;;
+    --chunk-chars) CHUNK_CHARS="${2:-}"; shift 2 ;;
+    --tick-ms) TICK_MS="${2:-}"; shift 2 ;;
+    --first-token-ms) FIRST_TOKEN_MS="${2:-}"; shift 2 ;;
+    --timeout-sec) TIMEOUT_SEC="${2:-}"; shift 2 ;;
+    --out) OUT="${2:-}"; shift 2 ;;
+    -h|--help) usage; exit 0 ;;
+    *) echo "Unknown arg: $1" >&2; usage >&2; exit 2 ;;
+  esac
+done
+
+if [[ "$MODE" != "serve" ]] && [[ "$MODE" != "bench" ]]; then
+  usage >&2
+  exit 2
+fi
+for pair in "port:$PORT" "cdp-port:$CDP_PORT" "sends:$SENDS" "turns:$TURNS" "prefill-chars:$PREFILL_CHARS" \
+  "reply-chars:$REPLY_CHARS" "chunk-chars:$CHUNK_CHARS" "tick-ms:$TICK_MS" "first-token-ms:$FIRST_TOKEN_MS" \
+  "timeout-sec:$TIMEOUT_SEC"; do
+  if [[ ! "${pair#*:}" =~ ^[0-9]+$ ]]; then
+    echo "--${pair%%:*} must be numeric" >&2
+    exit 2
+  fi
+done
+if [[ ! "$CHAT_LENGTHS" =~ ^[0-9]+(,[0-9]+)*$ ]]; then
+  echo "--chat-lengths must be a comma-separated list of numbers" >&2
+  exit 2
+fi
+
+if [[ "$MODE" == "bench" ]]; then
+  if [[ -z "$CHROME_PATH" ]]; then
+    for c in google-chrome-stable google-chrome chromium chromium-browser; do
+      if command -v "$c" >/dev/null 2>&1; then
+        CHROME_PATH="$(command -v "$c")"
+        break
+      fi
+    done
+  fi
+  if [[ -z "$CHROME_PATH" ]] || [[ ! -x "$CHROME_PATH" ]]; then
+    echo "SKIP_NO_CHROME chrome_path=${CHROME_PATH:-none}"
+    exit 0
+  fi
+  if [[ -z "$OUT" ]]; then
+    OUT="$ROOT_DIR/state/bench/fake_chatgpt_$(date -u +%Y%m%dT%H%M%SZ).json"
+  fi
+  mkdir -p "$(dirname "$OUT")"
+fi
+
+page_cfg="$(printf '{"turns":%s,"prefill_chars":%s,"reply_chars":%s,"chunk_chars":%s,"tick_ms":%s,"first_token_ms":%s}' \
+  "$TURNS" "$PREFILL_CHARS" "$REPLY_CHARS" "$CHUNK_CHARS" "$TICK_MS" "$FIRST_TOKEN_MS")"
+
+python3 - "$MODE" "$ROOT_DIR" "$FIXTURE" "$PORT" "$page_cfg" "$CDP_PORT" "$CHROME_PATH" "$CHAT_LENGTHS" "$SENDS" "$TIMEOUT_SEC" "$OUT" <<'PY'
+import http.server
+import json
+import os
+import pathlib
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Any, Dict, List
+
+mode, root, fixture, port, page_cfg, cdp_port, chrome_path, chat_lengths, sends, timeout_sec, out_path = sys.argv[1:12]
+root = pathlib.Path(root)
+page_cfg = json.loads(page_cfg)
+cdp_port = int(cdp_port)
+sends = int(sends)
+timeout_sec = int(timeout_sec)
+
+CONFIG_MARK = "<!--__FAKE_CHATGPT_CONFIG__-->"
+CDP_STATS_RE = re.compile(r"^CDP_STATS (.+)$", re.M)
+TIMING_RE = re.compile(r"^TIMING (.+)$", re.M)
+
+
+def kv(line: str) -> Dict[str, int]:
+    out = {}
+    for part in line.split():
+        k, _, v = part.partition("=")
+        if v.isdigit():
+            out[k] = int(v)
+    return out
+
+
+class PageHandler(http.server.BaseHTTPRequestHandler):
+    config: Dict[str, int] = page_cfg
+    template = pathlib.Path(fixture).read_text(encoding="utf-8")
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code: int, body: bytes, ctype: str) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/__config":
+            for k, v in urllib.parse.parse_qsl(url.query):
+                if k in self.config and v.isdigit():
+                    self.config[k] = int(v)
+            self._send(200, json.dumps(self.config).encode("utf-8"), "application/json")
+            return
+        if url.path == "/" or re.fullmatch(r"/c/[0-9A-Za-z-]+", url.path):
+            inject = "<script>window.FAKE_CHATGPT_CONFIG = %s;</script>" % json.dumps(self.config)
+            self._send(200, self.template.replace(CONFIG_MARK, inject, 1).encode("utf-8"), "text/html; charset=utf-8")
+            return
+        self._send(404, b"not found\n", "text/plain")
+
+
+def start_server(port: int) -> http.server.ThreadingHTTPServer:
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", port), PageHandler)
+    srv.daemon_threads = True
+    return srv
+
+
+def pct(values: List[int], q: float):
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))]
+
+
+def summarize(values: List[int]) -> Dict[str, Any]:
+    return {
+        "p50": pct(values, 0.5),
+        "p95": pct(values, 0.95),
+        "max": max(values) if values else None,
+        "mean": round(sum(values) / len(values), 1) if values else None,
+    }
+
+
+def cdp_http(path: str, method: str = "GET"):
+    req = urllib.request.Request(f"http://127.0.0.1:{cdp_port}{path}", method=method)
+    with urllib.request.urlopen(req, timeout=5.0) as r:
+        body = r.read()
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
+
+
+def wait_cdp(deadline: float) -> bool:
+    while time.time() < deadline:
+        try:
+            cdp_http("/json/version")
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def run_send(chat_url: str, origin: str, prompt: str, tmp: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update(
+        CHATGPT_SEND_CHATGPT_ORIGIN=origin,
+        CHATGPT_SEND_CDP_STATS="1",
+        CHATGPT_SEND_PROGRESS="0",
+        CHATGPT_SEND_TAB_CACHE_DIR=os.path.join(tmp, "tab_cache"),
+    )
+    t0 = time.monotonic()
+    proc = subprocess.run(
+        [sys.executable, str(root / "bin" / "cdp_chatgpt.py"), "--cdp-port", str(cdp_port),
+         "--chatgpt-url", chat_url, "--prompt", prompt, "--timeout", str(timeout_sec)],
+        capture_output=True, text=True, env=env, timeout=timeout_sec + 30,
+    )
+    row: Dict[str, Any] = {"rc": proc.returncode, "wall_ms": int((time.monotonic() - t0) * 1000)}
+    for rx in (CDP_STATS_RE, TIMING_RE):
+        m = rx.findall(proc.stderr)
+        if m:
+            row.update(kv(m[-1]))
+    if proc.returncode != 0:
+        row["stderr_tail"] = proc.stderr[-600:]
+    return row
+
+
+if mode == "serve":
+    srv = start_server(int(port))
+    print(f"FAKE_CHATGPT_READY url=http://127.0.0.1:{srv.server_address[1]}", flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    raise SystemExit(0)
+
+srv = start_server(0)
+threading.Thread(target=srv.serve_forever, daemon=True).start()
+origin = f"http://127.0.0.1:{srv.server_address[1]}"
+tmp = tempfile.mkdtemp(prefix="fake_chatgpt_bench_")
+chrome_log = open(os.path.join(tmp, "chrome.log"), "wb")
+chrome = subprocess.Popen(
+    [chrome_path, "--headless=new", "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage",
+     "--no-first-run", "--no-default-browser-check",
+     "--remote-debugging-address=127.0.0.1", f"--remote-debugging-port={cdp_port}",
+     f"--remote-allow-origins=http://127.0.0.1:{cdp_port}",
+     f"--user-data-dir={os.path.join(tmp, 'profile')}", "about:blank"],
+    stdout=chrome_log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True,
+)
+rc = 0
+try:
+    if not wait_cdp(time.time() + 20):
+        sys.stderr.write(f"E_BENCH_CHROME_START cdp_port={cdp_port} log={chrome_log.name}\n")
+        raise SystemExit(6)
+    report: Dict[str, Any] = {
+        "generated_at_ms": int(time.time() * 1000),
+        "chrome": chrome_path,
+        "origin": origin,
+        "page": dict(page_cfg),
+        "sends_per_length": sends,
+        "lengths": [],
+    }
+    for turns in [int(x) for x in chat_lengths.split(",")]:
+        PageHandler.config["turns"] = turns
+        chat_url = f"{origin}/c/{uuid.uuid4()}"
+        tab = cdp_http("/json/new?" + urllib.parse.quote(chat_url, safe=""), method="PUT")
+        runs = []
+        for i in range(sends):
+            row = run_send(chat_url, origin, f"bench turns={turns} send={i + 1} {uuid.uuid4().hex[:8]}", tmp)
+            runs.append(row)
+        try:
+            cdp_http(f"/json/close/{tab['id']}")
+        except Exception:
+            pass
+        ok = [r for r in runs if r["rc"] == 0]
+        entry = {"turns": turns, "sends": len(runs), "ok": len(ok), "runs": runs}
+        for key in ("calls", "evals", "bytes_out", "bytes_in", "send_ms", "wait_reply_ms", "total_ms"):
+            entry[key] = summarize([r[key] for r in ok if key in r])
+        report["lengths"].append(entry)
+        print(
+            f"BENCH turns={turns} sends={len(runs)} ok={len(ok)}"
+            f" calls_p50={entry['calls']['p50']} evals_p50={entry['evals']['p50']}"
+            f" bytes_in_p50={entry['bytes_in']['p50']} bytes_out_p50={entry['bytes_out']['p50']}"
+            f" wait_reply_ms_p50={entry['wait_reply_ms']['p50']} wait_reply_ms_p95={entry['wait_reply_ms']['p95']}",
+            flush=True,
+        )
+        if len(ok) != len(runs):
+            rc = 1
+    tmp_out = pathlib.Path(out_path + ".tmp")
+    tmp_out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_out, out_path)
+    print(f"BENCH_REPORT path={out_path}")
+finally:
+    try:
+        os.killpg(chrome.pid, signal.SIGTERM)
+        chrome.wait(timeout=10)
+    except Exception:
+        pass
+    srv.shutdown()
+    chrome_log.close()
+    shutil.rmtree(tmp, ignore_errors=True)
+raise SystemExit(rc)
+PY
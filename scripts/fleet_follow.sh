@@ -4,9 +4,9 @@ set -euo pipefail
 usage() {
   cat <<'USAGE'
 Usage:
-  scripts/fleet_follow.sh [--summary-json FILE | --pool-run-dir DIR] [options]
+  scripts/fleet_follow.sh [--summary-json FILE | --pool-run-dir DIR]... [options]
 
-Required:
+Required (repeat to follow several pools at once):
   --summary-json FILE        path to fleet.summary.json
   --pool-run-dir DIR         shorthand for <DIR>/fleet.summary.json
 
@@ -15,46 +15,54 @@ Options:
   --pid-file FILE            write follower pid (removed on exit)
   --log FILE                 append rendered lines to FILE
   --once                     render one snapshot and exit
+  --no-agents                do not render per-agent AGENT rows
   --no-ansi                  disable ANSI colors
   -h, --help
 USAGE
 }
 
-POOL_RUN_DIR=""
-SUMMARY_JSON=""
+POOL_RUN_DIRS=()
+SUMMARY_JSONS=()
 TICK_MS=1000
 PID_FILE=""
 LOG_FILE=""
 ONCE=0
+AGENTS=1
 NO_ANSI=0
 NO_ANSI_SET=0
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
-    --pool-run-dir) POOL_RUN_DIR="${2:-}"; shift 2 ;;
-    --summary-json) SUMMARY_JSON="${2:-}"; shift 2 ;;
+    --pool-run-dir) POOL_RUN_DIRS+=("${2:-}"); shift 2 ;;
+    --summary-json) SUMMARY_JSONS+=("${2:-}"); shift 2 ;;
     --tick-ms) TICK_MS="${2:-}"; shift 2 ;;
     --pid-file) PID_FILE="${2:-}"; shift 2 ;;
     --log) LOG_FILE="${2:-}"; shift 2 ;;
     --once) ONCE=1; shift ;;
+    --no-agents) AGENTS=0; shift ;;
     --no-ansi) NO_ANSI=1; NO_ANSI_SET=1; shift ;;
     -h|--help) usage; exit 0 ;;
     *) echo "Unknown arg: $1" >&2; usage >&2; exit 2 ;;
   esac
 done
 
-if [[ -z "$SUMMARY_JSON" && -z "$POOL_RUN_DIR" ]]; then
+# Each pool is "<summary_json>\t<pool_run_dir>". A single --summary-json plus a
+# single --pool-run-dir still describe one pool, as before.
+POOLS=()
+if (( ${#SUMMARY_JSONS[@]} == 1 && ${#POOL_RUN_DIRS[@]} == 1 )); then
+  POOLS+=("${SUMMARY_JSONS[0]}"$'\t'"${POOL_RUN_DIRS[0]}")
+else
+  for f in "${SUMMARY_JSONS[@]}"; do
+    POOLS+=("$f"$'\t'"$(dirname "$f")")
+  done
+  for d in "${POOL_RUN_DIRS[@]}"; do
+    POOLS+=("$d/fleet.summary.json"$'\t'"$d")
+  done
+fi
+if (( ${#POOLS[@]} == 0 )); then
   usage >&2
   exit 2
 fi
-if [[ -z "$SUMMARY_JSON" ]]; then
-  SUMMARY_JSON="$POOL_RUN_DIR/fleet.summary.json"
-fi
-if [[ -z "$POOL_RUN_DIR" ]]; then
-  POOL_RUN_DIR="$(dirname "$SUMMARY_JSON")"
-fi
-EARLY_ABORT_FLAG="$POOL_RUN_DIR/.early_abort"
-EARLY_ABORT_REASON_FILE="$POOL_RUN_DIR/.early_abort.reason"
 if [[ ! "$TICK_MS" =~ ^[0-9]+$ ]] || (( TICK_MS < 50 )); then
   echo "--tick-ms must be an integer >= 50" >&2
   exit 2
@@ -73,235 +81,264 @@ if [[ -n "$LOG_FILE" ]]; then
   mkdir -p "$(dirname "$LOG_FILE")"
 fi
 
-cleanup() {
-  if [[ -n "$PID_FILE" ]]; then
-    rm -f "$PID_FILE" >/dev/null 2>&1 || true
-  fi
-}
-trap cleanup EXIT INT TERM
+# One resident renderer for the whole follow session (exec keeps $$, so the
+# pid file stays valid). Each tick costs a stat() per pool; the summary is
+# parsed only when its inode/mtime/size changes, and only agent rows whose
+# state changed are rendered.
+exec python3 - "$TICK_MS" "$ONCE" "$AGENTS" "$NO_ANSI" "$PID_FILE" "$LOG_FILE" "${POOLS[@]}" <<'PY'
+import datetime
+import json
+import os
+import re
+import signal
+import sys
+import time
 
-render_line() {
-  local line="$1"
-  printf '%s\n' "$line"
-  if [[ -n "$LOG_FILE" ]]; then
-    printf '%s\n' "$line" >>"$LOG_FILE"
-  fi
-}
+tick_ms, once, agents, no_ansi, pid_file, log_file = sys.argv[1:7]
+tick_sec = max(int(tick_ms), 1) / 1000.0
+once = once == "1"
+agents = agents == "1"
+no_ansi = no_ansi == "1"
 
-colorize_line() {
-  local state="$1"
-  local line="$2"
-  if [[ "$NO_ANSI" == "1" ]]; then
-    printf '%s' "$line"
-    return 0
-  fi
-  local c_reset=$'\033[0m'
-  local c_green=$'\033[32m'
-  local c_red=$'\033[31m'
-  local c_yellow=$'\033[33m'
-  case "$state" in
-    ok) printf '%s%s%s' "$c_green" "$line" "$c_reset" ;;
-    fail) printf '%s%s%s' "$c_red" "$line" "$c_reset" ;;
-    wait|invalid|running) printf '%s%s%s' "$c_yellow" "$line" "$c_reset" ;;
-    *) printf '%s' "$line" ;;
-  esac
+COLORS = {"ok": "\033[32m", "fail": "\033[31m", "wait": "\033[33m", "invalid": "\033[33m", "running": "\033[33m"}
+AGENT_STATE_COLOR = {
+    "DONE_OK": "ok",
+    "DONE_FAIL": "fail",
+    "ORPHANED": "fail",
+    "RUNNING": "running",
+    "STUCK": "running",
 }
 
-read_snapshot() {
-  python3 - "$SUMMARY_JSON" <<'PY'
-import json
-import pathlib
-import sys
+log_fh = open(log_file, "a", encoding="utf-8") if log_file else None
 
-path = pathlib.Path(sys.argv[1])
-if not path.exists():
-    print("STATE=missing")
-    raise SystemExit(0)
 
-try:
-    obj = json.loads(path.read_text(encoding="utf-8"))
-except Exception:
-    print("STATE=invalid")
-    raise SystemExit(0)
+def cleanup():
+    if pid_file:
+        try:
+            os.unlink(pid_file)
+        except OSError:
+            pass
+
+
+def on_signal(signum, _frame):
+    cleanup()
+    raise SystemExit(128 + signum)
+
+
+signal.signal(signal.SIGTERM, on_signal)
+signal.signal(signal.SIGINT, on_signal)
+
+
+def now_ts():
+    return datetime.datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def render(state, line):
+    if not no_ansi and state in COLORS:
+        line = f"{COLORS[state]}{line}\033[0m"
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+    if log_fh is not None:
+        log_fh.write(line + "\n")
+        log_fh.flush()
+
+
+def file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
 
-def as_int(key, default=0):
+def as_int(obj, key, default=0):
     try:
         return int(obj.get(key, default))
     except Exception:
         return int(default)
 
-total = as_int("total", 0)
-done_ok = as_int("done_ok", as_int("done", 0))
-done_fail = as_int("done_fail", 0)
-running = as_int("running", 0)
-stuck = as_int("stuck", 0)
-orphaned = as_int("orphaned", 0)
-unknown = as_int("unknown", as_int("pending", 0))
-done = done_ok + done_fail + orphaned
-failed = done_fail + orphaned
-pending = running + stuck + unknown
-disk_status = str(obj.get("disk_status", "unknown") or "unknown")
-disk_free_pct_raw = obj.get("disk_free_pct")
-try:
-    disk_free_pct = int(disk_free_pct_raw) if disk_free_pct_raw is not None else None
-except Exception:
-    disk_free_pct = None
-chat_ok_total = as_int("chat_ok_total", 0)
-chat_mismatch_total = as_int("chat_mismatch_total", 0)
-chat_unknown_total = as_int("chat_unknown_total", 0)
-done_flag = 1 if total > 0 and pending == 0 else 0
-fail_flag = 1 if failed > 0 else 0
-status = "ok"
-if done_flag == 1 and fail_flag == 1:
-    status = "fail"
-elif done_flag == 0:
-    status = "running"
-
-disk_sig = "none" if disk_free_pct is None else str(disk_free_pct)
-sig = (
-    f"{total}|{done_ok}|{done_fail}|{running}|{stuck}|{orphaned}|{unknown}|"
-    f"{disk_status}|{disk_sig}|{chat_ok_total}|{chat_mismatch_total}|{chat_unknown_total}"
-)
-
-print("STATE=ok")
-print(f"TOTAL={total}")
-print(f"DONE_OK={done_ok}")
-print(f"DONE_FAIL={done_fail}")
-print(f"RUNNING={running}")
-print(f"STUCK={stuck}")
-print(f"ORPHANED={orphaned}")
-print(f"UNKNOWN={unknown}")
-print(f"DONE={done}")
-print(f"FAILED={failed}")
-print(f"PENDING={pending}")
-print(f"DISK_STATUS={disk_status}")
-print(f"DISK_FREE_PCT={disk_sig}")
-print(f"CHAT_OK_TOTAL={chat_ok_total}")
-print(f"CHAT_MISMATCH_TOTAL={chat_mismatch_total}")
-print(f"CHAT_UNKNOWN_TOTAL={chat_unknown_total}")
-print(f"DONE_FLAG={done_flag}")
-print(f"FAIL_FLAG={fail_flag}")
-print(f"STATUS={status}")
-print(f"SIG={sig}")
-PY
-}
 
-last_sig=""
-last_early_abort_reason=""
-tick_sec="$(python3 - "$TICK_MS" <<'PY'
-import sys
-print(max(int(sys.argv[1]), 1) / 1000.0)
-PY
-)"
-
-while true; do
-  state="missing"
-  total=0
-  done_ok=0
-  done_fail=0
-  running=0
-  stuck=0
-  orphaned=0
-  unknown=0
-  done=0
-  failed=0
-  pending=0
-  disk_status="unknown"
-  disk_free_pct="none"
-  chat_ok_total=0
-  chat_mismatch_total=0
-  chat_unknown_total=0
-  done_flag=0
-  fail_flag=0
-  status="wait"
-  sig="none"
-  early_abort=0
-  early_abort_reason="none"
-  early_abort_event=""
-
-  while IFS='=' read -r key value; do
-    case "$key" in
-      STATE) state="$value" ;;
-      TOTAL) total="$value" ;;
-      DONE_OK) done_ok="$value" ;;
-      DONE_FAIL) done_fail="$value" ;;
-      RUNNING) running="$value" ;;
-      STUCK) stuck="$value" ;;
-      ORPHANED) orphaned="$value" ;;
-      UNKNOWN) unknown="$value" ;;
-      DONE) done="$value" ;;
-      FAILED) failed="$value" ;;
-      PENDING) pending="$value" ;;
-      DISK_STATUS) disk_status="$value" ;;
-      DISK_FREE_PCT) disk_free_pct="$value" ;;
-      CHAT_OK_TOTAL) chat_ok_total="$value" ;;
-      CHAT_MISMATCH_TOTAL) chat_mismatch_total="$value" ;;
-      CHAT_UNKNOWN_TOTAL) chat_unknown_total="$value" ;;
-      DONE_FLAG) done_flag="$value" ;;
-      FAIL_FLAG) fail_flag="$value" ;;
-      STATUS) status="$value" ;;
-      SIG) sig="$value" ;;
-    esac
-  done < <(read_snapshot)
-
-  if [[ -f "$EARLY_ABORT_FLAG" ]]; then
-    early_abort=1
-    if [[ -f "$EARLY_ABORT_REASON_FILE" ]]; then
-      early_abort_reason="$(tr '\n' ' ' <"$EARLY_ABORT_REASON_FILE" | sed -e 's/[[:space:]]\+/ /g' -e 's/[[:space:]]*$//')"
-    else
-      early_abort_reason="reason=unknown"
-    fi
-    early_abort_event="${early_abort_reason}"
-  fi
+def field(value):
+    text = "none" if value is None or value == "" else str(value)
+    return re.sub(r"\s+", "_", text)
 
-  ts="$(date -Iseconds)"
-  if [[ "$state" == "missing" ]]; then
-    line="FLEET_FOLLOW_WAIT ts=$ts reason=summary_missing path=$SUMMARY_JSON"
-    render_line "$(colorize_line wait "$line")"
-    if [[ "$ONCE" == "1" ]]; then
-      exit 0
-    fi
-    sleep "$tick_sec"
-    continue
-  fi
-  if [[ "$state" == "invalid" ]]; then
-    line="FLEET_FOLLOW_WAIT ts=$ts reason=summary_invalid path=$SUMMARY_JSON"
-    render_line "$(colorize_line invalid "$line")"
-    if [[ "$ONCE" == "1" ]]; then
-      exit 0
-    fi
-    sleep "$tick_sec"
-    continue
-  fi
 
-  if [[ "$sig" != "$last_sig" ]] || [[ "$ONCE" == "1" ]]; then
-    line="PROGRESS ts=$ts total=$total ok=$done_ok fail=$failed running=$running stuck=$stuck orphaned=$orphaned unknown=$unknown pending=$pending chat_ok=$chat_ok_total chat_mismatch=$chat_mismatch_total chat_unknown=$chat_unknown_total disk=${disk_status}/${disk_free_pct} status=$status early_abort=$early_abort"
-    if [[ "$early_abort_event" != "" ]]; then
-      line="$line early_reason=\"$early_abort_event\""
-    fi
-    render_line "$(colorize_line "$status" "$line")"
-    last_sig="$sig"
-  fi
+class Pool:
+    def __init__(self, summary_json, run_dir, label):
+        self.summary_json = summary_json
+        self.early_flag = os.path.join(run_dir, ".early_abort")
+        self.early_reason_file = os.path.join(run_dir, ".early_abort.reason")
+        self.prefix = f" pool={label}" if label else ""
+        self.summary_key = None
+        self.snap = None
+        self.wait_reason = None
+        self.last_sig = None
+        self.agent_sigs = {}
+        self.early_key = None
+        self.early_reason = None
+        self.last_early_reason = None
+        self.finished = False
+        self.rc = 0
 
-  if [[ "$early_abort" == "1" ]] && [[ "$ONCE" != "1" ]] && [[ "$early_abort_reason" != "$last_early_abort_reason" ]]; then
-    render_line "$(colorize_line running "EARLY_ABORT ts=$ts $early_abort_reason")"
-    last_early_abort_reason="$early_abort_reason"
-  fi
+    def refresh_summary(self):
+        """Reparse the summary only if the file changed; returns missing|invalid|ok."""
+        key = file_key(self.summary_json)
+        if key is None:
+            self.summary_key = None
+            self.snap = None
+            return "missing"
+        if key == self.summary_key and self.snap is not None:
+            return "ok"
+        try:
+            with open(self.summary_json, encoding="utf-8") as f:
+                obj = json.load(f)
+            if not isinstance(obj, dict):
+                raise ValueError("summary is not an object")
+        except Exception:
+            # Leave summary_key unset so a half-written file is retried next tick.
+            self.summary_key = None
+            self.snap = None
+            return "invalid"
+        self.summary_key = key
+        self.snap = obj
+        return "ok"
 
-  if [[ "$done_flag" == "1" ]]; then
-    done_state="ok"
-    done_rc=0
-    if [[ "$fail_flag" == "1" ]]; then
-      done_state="fail"
-      done_rc=1
-    fi
-    final_line="FLEET_FOLLOW_DONE ts=$ts status=$done_state total=$total done_ok=$done_ok done_fail=$done_fail orphaned=$orphaned"
-    render_line "$(colorize_line "$done_state" "$final_line")"
-    exit "$done_rc"
-  fi
+    def refresh_early_abort(self):
+        key = file_key(self.early_flag)
+        if key is None:
+            self.early_key = None
+            self.early_reason = None
+            return
+        reason_key = file_key(self.early_reason_file)
+        if (key, reason_key) == self.early_key:
+            return
+        self.early_key = (key, reason_key)
+        if reason_key is None:
+            self.early_reason = "reason=unknown"
+            return
+        try:
+            with open(self.early_reason_file, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            text = ""
+        self.early_reason = re.sub(r"\s+", " ", text).rstrip()
 
-  if [[ "$ONCE" == "1" ]]; then
-    exit 0
-  fi
-  sleep "$tick_sec"
-done
+    def render_agents(self, ts, obj):
+        rows = obj.get("agents")
+        if not isinstance(rows, list):
+            return
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            key = str(row.get("key") or row.get("run_id") or row.get("agent_id") or "")
+            state_class = str(row.get("state_class") or "UNKNOWN")
+            cols = (
+                f"agent={field(row.get('agent_id'))} run_id={field(row.get('run_id'))}"
+                f" state={field(state_class)} reason={field(row.get('reason'))}"
+                f" step={field(row.get('last_step'))} chat={field(row.get('chat_proof'))}"
+            )
+            if self.agent_sigs.get(key) == cols:
+                continue
+            self.agent_sigs[key] = cols
+            render(AGENT_STATE_COLOR.get(state_class, ""), f"AGENT ts={ts}{self.prefix} {cols}")
+
+    def tick(self):
+        state = self.refresh_summary()
+        self.refresh_early_abort()
+        ts = now_ts()
+        if state != "ok":
+            reason = "summary_missing" if state == "missing" else "summary_invalid"
+            if reason != self.wait_reason or once:
+                render(
+                    "wait" if state == "missing" else "invalid",
+                    f"FLEET_FOLLOW_WAIT ts={ts}{self.prefix} reason={reason} path={self.summary_json}",
+                )
+                self.wait_reason = reason
+            return
+        self.wait_reason = None
+
+        obj = self.snap
+        total = as_int(obj, "total")
+        done_ok = as_int(obj, "done_ok", as_int(obj, "done"))
+        done_fail = as_int(obj, "done_fail")
+        running = as_int(obj, "running")
+        stuck = as_int(obj, "stuck")
+        orphaned = as_int(obj, "orphaned")
+        unknown = as_int(obj, "unknown", as_int(obj, "pending"))
+        failed = done_fail + orphaned
+        pending = running + stuck + unknown
+        disk_status = str(obj.get("disk_status", "unknown") or "unknown")
+        try:
+            disk_free_pct = "none" if obj.get("disk_free_pct") is None else str(int(obj.get("disk_free_pct")))
+        except Exception:
+            disk_free_pct = "none"
+        chat_ok = as_int(obj, "chat_ok_total")
+        chat_mismatch = as_int(obj, "chat_mismatch_total")
+        chat_unknown = as_int(obj, "chat_unknown_total")
+        done_flag = total > 0 and pending == 0
+        status = "running"
+        if done_flag:
+            status = "fail" if failed > 0 else "ok"
+
+        if agents:
+            self.render_agents(ts, obj)
+
+        sig = (
+            total, done_ok, done_fail, running, stuck, orphaned, unknown,
+            disk_status, disk_free_pct, chat_ok, chat_mismatch, chat_unknown,
+        )
+        early_abort = 1 if self.early_reason is not None else 0
+        if sig != self.last_sig or once:
+            line = (
+                f"PROGRESS ts={ts}{self.prefix} total={total} ok={done_ok} fail={failed} running={running}"
+                f" stuck={stuck} orphaned={orphaned} unknown={unknown} pending={pending}"
+                f" chat_ok={chat_ok} chat_mismatch={chat_mismatch} chat_unknown={chat_unknown}"
+                f" disk={disk_status}/{disk_free_pct} status={status} early_abort={early_abort}"
+            )
+            if self.early_reason:
+                line += f' early_reason="{self.early_reason}"'
+            render(status, line)
+            self.last_sig = sig
+
+        if early_abort and not once and self.early_reason != self.last_early_reason:
+            render("running", f"EARLY_ABORT ts={ts}{self.prefix} {self.early_reason}")
+            self.last_early_reason = self.early_reason
+
+        if done_flag:
+            done_state = "fail" if failed > 0 else "ok"
+            render(
+                done_state,
+                f"FLEET_FOLLOW_DONE ts={ts}{self.prefix} status={done_state} total={total}"
+                f" done_ok={done_ok} done_fail={done_fail} orphaned={orphaned}",
+            )
+            self.finished = True
+            self.rc = 1 if done_state == "fail" else 0
+
+
+def main():
+    specs = [arg.split("\t", 1) for arg in sys.argv[7:]]
+    multi = len(specs) > 1
+    pools = []
+    for summary_json, run_dir in specs:
+        label = os.path.basename(os.path.normpath(run_dir)) if multi else ""
+        pools.append(Pool(summary_json, run_dir, label))
+
+    while True:
+        for pool in pools:
+            if not pool.finished:
+                pool.tick()
+        if all(p.finished for p in pools):
+            return max(p.rc for p in pools)
+        if once:
+            return 0
+        time.sleep(tick_sec)
+
+
+try:
+    rc = main()
+except BrokenPipeError:
+    rc = 0
+finally:
+    cleanup()
+raise SystemExit(rc)
+PY
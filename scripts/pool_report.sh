@@ -1,6 +1,7 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 POOL_RUN_DIR=""
 FLEET_SUMMARY_JSON=""
 SUMMARY_JSONL=""
@@ -77,12 +78,30 @@ fi
 mkdir -p "$(dirname "$OUT_MD")"
 mkdir -p "$(dirname "$OUT_JSON")"
 
-python3 - "$POOL_RUN_DIR" "$FLEET_SUMMARY_JSON" "$SUMMARY_JSONL" "$OUT_MD" "$OUT_JSON" "$MAX_LAST_LINES" "$INCLUDE_LOGS" "$GATE_STATUS" "$GATE_REASON" <<'PY'
+python3 - "$POOL_RUN_DIR" "$FLEET_SUMMARY_JSON" "$SUMMARY_JSONL" "$OUT_MD" "$OUT_JSON" "$MAX_LAST_LINES" "$INCLUDE_LOGS" "$GATE_STATUS" "$GATE_REASON" "$ROOT_DIR" <<'PY'
+import collections
 import datetime as dt
 import json
 import pathlib
+import random
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
+
+tool_root = pathlib.Path(sys.argv[10])
+sys.path.insert(0, str(tool_root / "bin"))
+sys.path.insert(0, str(tool_root))
+try:
+    from log_sink import tail_log_lines as _tail_log_lines  # type: ignore
+except Exception:
+    _tail_log_lines = None
+try:
+    from ux.error_registry import resolve_error_spec as _resolve_error_spec  # type: ignore
+except Exception:
+    _resolve_error_spec = None
+
+# Memory stays O(runs) for latest-per-run rows and O(keys * SAMPLE_CAP) for
+# duration quantiles, whatever the length of summary.jsonl.
+SAMPLE_CAP = 256
 
 
 def read_json(path: pathlib.Path, default: Any) -> Any:
@@ -94,21 +113,85 @@ def read_json(path: pathlib.Path, default: Any) -> Any:
         return default
 
 
-def read_jsonl(path: pathlib.Path) -> List[Dict[str, Any]]:
+def iter_jsonl(path: pathlib.Path) -> Iterator[Dict[str, Any]]:
     if not path.exists():
-        return []
-    rows: List[Dict[str, Any]] = []
-    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        try:
-            obj = json.loads(line)
-        except Exception:
-            continue
-        if isinstance(obj, dict):
-            rows.append(obj)
-    return rows
+        return
+    try:
+        fh = path.open("r", encoding="utf-8", errors="replace")
+    except Exception:
+        return
+    with fh:
+        for raw in fh:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(obj, dict):
+                yield obj
+
+
+class DurationStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self.sample: List[int] = []
+        self._rng = random.Random(0)
+
+    def add(self, value: int) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.sample) < SAMPLE_CAP:
+            self.sample.append(value)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < SAMPLE_CAP:
+                self.sample[j] = value
+
+    def quantile(self, q: float) -> Optional[int]:
+        if not self.sample:
+            return None
+        ordered = sorted(self.sample)
+        return ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1) + 0.5))]
+
+    def to_obj(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_sec": self.total,
+            "min_sec": self.min,
+            "max_sec": self.max,
+            "mean_sec": round(self.total / self.count, 1) if self.count else None,
+            "p50_sec": self.quantile(0.5),
+            "p95_sec": self.quantile(0.95),
+        }
+
+
+def row_error_code(row: Dict[str, Any]) -> str:
+    status = str(row.get("status", "") or "").strip()
+    if status.startswith("E_"):
+        return status
+    fail_kind = str(row.get("fail_kind", "") or "").strip()
+    if fail_kind and fail_kind != "OK":
+        return fail_kind
+    return ""
+
+
+def error_class_of(code: str) -> Dict[str, str]:
+    if _resolve_error_spec is None:
+        return {"class": "", "block": ""}
+    try:
+        spec = _resolve_error_spec(code)
+    except Exception:
+        spec = None
+    if spec is None:
+        return {"class": "", "block": ""}
+    return {"class": str(getattr(spec, "cls", "") or ""), "block": str(getattr(spec, "block", "") or "")}
 
 
 def as_int(v: Any, default: int = 0) -> int:
@@ -142,17 +225,23 @@ def md_escape(s: str) -> str:
 def tail_lines(path: pathlib.Path, n: int) -> List[str]:
     if n <= 0:
         return []
+    if _tail_log_lines is not None:
+        # Handles rotated .gz/.zst segments from CHATGPT_SEND_LOG_SINK=rotate.
+        try:
+            return _tail_log_lines(path, n)
+        except Exception:
+            return []
     try:
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        with path.open("r", encoding="utf-8", errors="replace") as fh:
+            return [line.rstrip("\n") for line in collections.deque(fh, maxlen=n)]
     except Exception:
         return []
-    return lines[-n:]
 
 
 def preview_from_files(last_file: pathlib.Path, result_json: pathlib.Path) -> str:
     if last_file.exists():
         try:
-            lines = last_file.read_text(encoding="utf-8", errors="replace").splitlines()
+            lines = tail_lines(last_file, 200)
             for line in reversed(lines):
                 if "CHILD_RESULT:" in line:
                     return short_text(line)
@@ -216,16 +305,80 @@ fleet_agents = fleet.get("agents") if isinstance(fleet, dict) else []
 if not isinstance(fleet_agents, list):
     fleet_agents = []
 
-summary_rows = read_jsonl(summary_jsonl_path)
+# Single streaming pass over summary.jsonl: latest row per run plus
+# per-agent / per-chat duration stats, retry counts and error histograms.
 latest_by_run: Dict[str, Dict[str, Any]] = {}
-for row in summary_rows:
-    run_id = str(row.get("child_run_id", "")).strip()
-    if not run_id:
-        continue
+agent_stats: Dict[str, Dict[str, Any]] = {}
+chat_stats: Dict[str, DurationStats] = {}
+all_durations = DurationStats()
+error_hist: Dict[str, Dict[str, Any]] = {}
+summary_rows_total = 0
+for row in iter_jsonl(summary_jsonl_path):
+    summary_rows_total += 1
     attempt = as_int(row.get("attempt"), 0)
-    prev = latest_by_run.get(run_id)
-    if prev is None or attempt >= as_int(prev.get("attempt"), 0):
-        latest_by_run[run_id] = row
+    run_id = str(row.get("child_run_id", "")).strip()
+    if run_id:
+        prev = latest_by_run.get(run_id)
+        if prev is None or attempt >= as_int(prev.get("attempt"), 0):
+            latest_by_run[run_id] = row
+
+    agent_key = str(row.get("agent", "") or "").strip() or "unknown"
+    st = agent_stats.get(agent_key)
+    if st is None:
+        st = {"attempts": 0, "max_attempt": 0, "errors": 0, "durations": DurationStats()}
+        agent_stats[agent_key] = st
+    st["attempts"] += 1
+    st["max_attempt"] = max(st["max_attempt"], attempt)
+    duration = as_int(row.get("duration_sec"), -1)
+    chat_key = str(row.get("assigned_chat_url", "") or row.get("chat_url", "") or "").strip() or "none"
+    if duration >= 0:
+        st["durations"].add(duration)
+        all_durations.add(duration)
+        chat_stats.setdefault(chat_key, DurationStats()).add(duration)
+
+    code = row_error_code(row)
+    if code:
+        st["errors"] += 1
+        bucket = error_hist.get(code)
+        if bucket is None:
+            bucket = {"count": 0, **error_class_of(code)}
+            error_hist[code] = bucket
+        bucket["count"] += 1
+
+# Roster is append-only (one row per attempt); keep the latest paths per run
+# to fill gaps in fleet.summary.json agents.
+roster_by_run: Dict[str, Dict[str, Any]] = {}
+for rrow in iter_jsonl(pool_run_dir / "fleet_roster.jsonl"):
+    rid = str(rrow.get("run_id", "") or "").strip()
+    if rid:
+        roster_by_run[rid] = {
+            "log_file": str(rrow.get("log_file", "") or ""),
+            "status_file": str(rrow.get("status_file", "") or ""),
+            "result_json": str(rrow.get("result_json", "") or ""),
+        }
+
+retries_total = sum(max(0, v["attempts"] - 1) for v in agent_stats.values())
+stats_obj = {
+    "summary_rows": summary_rows_total,
+    "retries_total": retries_total,
+    "durations": all_durations.to_obj(),
+    "per_agent": {
+        k: {
+            "attempts": v["attempts"],
+            "retries": max(0, v["attempts"] - 1),
+            "max_attempt": v["max_attempt"],
+            "errors": v["errors"],
+            "durations": v["durations"].to_obj(),
+        }
+        for k, v in sorted(agent_stats.items(), key=lambda kv: (not kv[0].isdigit(), as_int(kv[0], 0), kv[0]))
+    },
+    "per_chat": {k: v.to_obj() for k, v in sorted(chat_stats.items())},
+    "error_codes": dict(sorted(error_hist.items(), key=lambda kv: (-kv[1]["count"], kv[0]))),
+    "error_classes": {},
+}
+for code, bucket in error_hist.items():
+    cls = bucket.get("class") or "UNCLASSIFIED"
+    stats_obj["error_classes"][cls] = stats_obj["error_classes"].get(cls, 0) + bucket["count"]
 
 rows: List[Dict[str, Any]] = []
 for idx, agent in enumerate(fleet_agents, start=1):
@@ -237,8 +390,9 @@ for idx, agent in enumerate(fleet_agents, start=1):
     if exit_code is None:
         exit_code = summary_row.get("exit_code")
 
+    roster_row = roster_by_run.get(run_id, {})
     last_file = pathlib.Path(str(agent.get("last_file", "") or ""))
-    result_json = pathlib.Path(str(agent.get("result_json", "") or ""))
+    result_json = pathlib.Path(str(agent.get("result_json", "") or roster_row.get("result_json", "") or ""))
     preview = preview_from_files(last_file, result_json)
 
     row = {
@@ -255,7 +409,7 @@ for idx, agent in enumerate(fleet_agents, start=1):
         "observed_chat_url_norm": str(agent.get("observed_chat_url_norm", "") or ""),
         "preview": preview,
         "last_file": str(last_file),
-        "log_file": str(agent.get("log_file", "") or ""),
+        "log_file": str(agent.get("log_file", "") or roster_row.get("log_file", "") or ""),
         "result_json": str(result_json),
         "early_abort_blame": 1 if str(agent.get("agent_id", "") or "") in early_abort_blame_agents else 0,
     }
@@ -298,6 +452,7 @@ report_obj = {
     "totals": totals,
     "rows": rows,
     "failures": fail_rows,
+    "stats": stats_obj,
     "early_abort": {
         "triggered": early_abort_triggered,
         "reason": early_abort_reason,
@@ -314,6 +469,7 @@ report_obj = {
     "sources": {
         "fleet_summary_json": str(fleet_summary_path),
         "summary_jsonl": str(summary_jsonl_path),
+        "fleet_roster_jsonl": str(pool_run_dir / "fleet_roster.jsonl"),
     },
 }
 
@@ -399,6 +555,41 @@ for row in rows:
         + " |"
     )
 
+md_lines.append("")
+md_lines.append("## Stats")
+md_lines.append("")
+dur = stats_obj["durations"]
+md_lines.append(f"- `summary_rows`: `{stats_obj['summary_rows']}`")
+md_lines.append(f"- `retries_total`: `{stats_obj['retries_total']}`")
+md_lines.append(
+    f"- `duration_sec`: `count={dur['count']} mean={dur['mean_sec']} p50={dur['p50_sec']} p95={dur['p95_sec']} max={dur['max_sec']}`"
+)
+if stats_obj["per_agent"]:
+    md_lines.append("")
+    md_lines.append("| agent | attempts | retries | errors | mean_sec | p95_sec | max_sec |")
+    md_lines.append("| --- | --- | --- | --- | --- | --- | --- |")
+    for key, val in stats_obj["per_agent"].items():
+        d = val["durations"]
+        md_lines.append(
+            f"| {md_escape(key)} | {val['attempts']} | {val['retries']} | {val['errors']} | {d['mean_sec']} | {d['p95_sec']} | {d['max_sec']} |"
+        )
+if stats_obj["per_chat"]:
+    md_lines.append("")
+    md_lines.append("| chat | runs | mean_sec | p50_sec | p95_sec | max_sec |")
+    md_lines.append("| --- | --- | --- | --- | --- | --- |")
+    for key, d in stats_obj["per_chat"].items():
+        md_lines.append(
+            f"| {md_escape(key)} | {d['count']} | {d['mean_sec']} | {d['p50_sec']} | {d['p95_sec']} | {d['max_sec']} |"
+        )
+if stats_obj["error_codes"]:
+    md_lines.append("")
+    md_lines.append("| error_code | count | class | block |")
+    md_lines.append("| --- | --- | --- | --- |")
+    for code, bucket in stats_obj["error_codes"].items():
+        md_lines.append(
+            f"| {md_escape(code)} | {bucket['count']} | {md_escape(bucket.get('class') or '')} | {md_escape(bucket.get('block') or '')} |"
+        )
+
 md_lines.append("")
 md_lines.append("## Failures / Alerts")
 md_lines.append("")
@@ -442,5 +633,22 @@ if fail_rows:
         md_lines.append("```")
         md_lines.append("")
 
+if fail_rows and include_logs:
+    md_lines.append("")
+    md_lines.append("## Failure LOG Tails")
+    md_lines.append("")
+    for row in fail_rows:
+        log_path = pathlib.Path(str(row.get("log_file") or ""))
+        md_lines.append(f"### run_id `{row.get('run_id')}`")
+        lines = tail_lines(log_path, max_last_lines) if str(row.get("log_file") or "") else []
+        if not lines:
+            md_lines.append("- `(no log)`")
+            md_lines.append("")
+            continue
+        md_lines.append("```text")
+        md_lines.extend(lines)
+        md_lines.append("```")
+        md_lines.append("")
+
 out_md_path.write_text("\n".join(md_lines).rstrip() + "\n", encoding="utf-8")
 PY
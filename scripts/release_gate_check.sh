@@ -48,7 +48,7 @@ if [[ ! -f "$THRESHOLDS_FILE" ]]; then
   exit 2
 fi
 
-mapfile -t LOG_FILES < <(find "$RUN_DIR" -type f ! -name 'gate_check.log' 2>/dev/null | sort)
+mapfile -t LOG_FILES < <(find "$RUN_DIR" -type f ! -name 'gate_check.log' ! -name 'latency_sketch.json' 2>/dev/null | sort)
 if [[ -d "/tmp/chatgpt-send-child" ]]; then
   while IFS= read -r f; do
     LOG_FILES+=("$f")
@@ -60,8 +60,7 @@ if [[ "${#LOG_FILES[@]}" -eq 0 ]]; then
   exit 2
 fi
 
-python3 - "$RUN_ID" "$PROFILE" "$THRESHOLDS_FILE" "${LOG_FILES[@]}" <<'PY'
-import math
+python3 - "$RUN_ID" "$PROFILE" "$THRESHOLDS_FILE" "$ROOT" "$RUN_DIR" "${LOG_FILES[@]}" <<'PY'
 import re
 import sys
 from collections import defaultdict
@@ -70,39 +69,22 @@ from pathlib import Path
 run_id = sys.argv[1]
 profile = sys.argv[2].strip().lower()
 thresholds_path = Path(sys.argv[3])
-files = [Path(p) for p in sys.argv[4:]]
+sys.path.insert(0, str(Path(sys.argv[4]) / "bin"))
+run_dir = Path(sys.argv[5])
+files = [Path(p) for p in sys.argv[6:]]
 
-def parse_thresholds(text: str, profile_name: str):
-    lines = text.splitlines()
-    target = f"THRESHOLDS_{profile_name.upper()}"
-    in_target = False
-    in_code = False
-    out = {}
-    for raw in lines:
-        line = raw.rstrip("\n")
-        stripped = line.strip()
-        if not in_target:
-            if target in stripped:
-                in_target = True
-            continue
-        if not in_code:
-            if stripped.startswith("```"):
-                in_code = True
-            continue
-        if stripped.startswith("```"):
-            break
-        m = re.match(r"^([A-Z0-9_]+)=([0-9]+(?:\.[0-9]+)?)$", stripped)
-        if m:
-            out[m.group(1)] = float(m.group(2))
-    if out:
-        return out
-    # Backward compatibility fallback: parse flat KEY=VALUE lines from whole doc.
-    for raw in lines:
-        stripped = raw.strip()
-        m = re.match(r"^([A-Z0-9_]+)=([0-9]+(?:\.[0-9]+)?)$", stripped)
-        if m:
-            out[m.group(1)] = float(m.group(2))
-    return out
+# Logs are streamed line by line and latencies go into bounded-memory
+# sketches, so long soak runs gate without holding logs or sample lists.
+from latency_sketch import (
+    SKETCH_FILE,
+    LatencySketch,
+    SlotInflight,
+    dump_sketches,
+    is_negative_line,
+    iter_lines,
+    parse_thresholds,
+    scan_line,
+)
 
 thresholds = parse_thresholds(thresholds_path.read_text(encoding="utf-8", errors="ignore"), profile)
 
@@ -110,28 +92,52 @@ if not thresholds:
     print(f"No machine thresholds found in {thresholds_path}", file=sys.stderr)
     sys.exit(2)
 
-counts = defaultdict(int)
-evidence = {}
-lock_wait = []
-lock_held = []
-slot_events = []
-precheck_ms_values = []
-send_ms_values = []
-wait_reply_ms_values = []
-total_ms_values = []
-soak_iters = 0
-soak_fails = 0
-iter_status_per_child = defaultdict(int)
-expected_negative_errors_total = 0
-tests_skipped = 0
-prompt_lint_fails = 0
-doctor_invariants_ok = 0
-doctor_force_set = 0
-doctor_profile_used = 0
+class Tally:
+    """What one log file contributes to the gate. Whether a file is an
+    expected-negative log is only known once its marker shows up (anywhere in
+    the file), so each file is read once into its own Tally and folded into
+    the run total at EOF."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.evidence = {}
+        self.latency = {}
+        self.slots = SlotInflight()
+        self.iter_status_per_child = defaultdict(int)
+        self.soak_iters = 0
+        self.soak_fails = 0
+        self.negative = False
+        self.negative_errors = 0
+        self.tests_skipped = 0
+        self.prompt_lint_fails = 0
+        self.doctor_invariants_ok = 0
+        self.doctor_force_set = 0
+        self.doctor_profile_used = 0
+
+    def set_evidence(self, key: str, path: Path, line_no: int) -> None:
+        if key not in self.evidence:
+            self.evidence[key] = f"{path}:{line_no}"
 
-def set_evidence(key: str, path: Path, line_no: int) -> None:
-    if key not in evidence:
-        evidence[key] = f"{path}:{line_no}"
+    def fold(self, other: "Tally") -> None:
+        for key, n in other.counts.items():
+            self.counts[key] += n
+        for key, ev in other.evidence.items():
+            self.evidence.setdefault(key, ev)
+        for metric, sketch in other.latency.items():
+            self.latency.setdefault(metric, LatencySketch()).merge(sketch)
+        self.slots.merge(other.slots)
+        for child, n in other.iter_status_per_child.items():
+            self.iter_status_per_child[child] += n
+        self.soak_iters += other.soak_iters
+        self.soak_fails += other.soak_fails
+        self.tests_skipped = max(self.tests_skipped, other.tests_skipped)
+        self.prompt_lint_fails = max(self.prompt_lint_fails, other.prompt_lint_fails)
+        self.doctor_invariants_ok = max(self.doctor_invariants_ok, other.doctor_invariants_ok)
+        self.doctor_force_set = max(self.doctor_force_set, other.doctor_force_set)
+        self.doctor_profile_used = max(self.doctor_profile_used, other.doctor_profile_used)
+
+total = Tally()
+expected_negative_errors_total = 0
 
 marker_keys = {
     "E_ROUTE_MISMATCH": "E_ROUTE_MISMATCH",
@@ -166,15 +172,10 @@ recover_re = re.compile(r"E_CDP_UNREACHABLE\.recover_")
 auto_wait_start_re = re.compile(r"\bAUTO_WAIT start\b")
 soft_reset_start_re = re.compile(r"\bSOFT_RESET start\b")
 soft_reset_success_re = re.compile(r"\bSOFT_RESET done outcome=success\b")
+soft_reset_tier_re = re.compile(r"\bSOFT_RESET tier=([a-z_]+) outcome=(ok|fail) elapsed_ms=([0-9]+)")
 slot_re = re.compile(r"SLOT_(ACQUIRE|RELEASE).*?ts_ms=([0-9]+)")
-lock_wait_re = re.compile(r"\[LOCK\].*wait_ms=([0-9]+)")
-lock_held_re = re.compile(r"\[LOCK\].*lock_held_ms=([0-9]+)")
 iter_re = re.compile(r"ITER_STATUS .*child_id=([^ ]+)")
 skip_re = re.compile(r"tests_skipped=([0-9]+)")
-precheck_ms_re = re.compile(r"\bprecheck_ms=([0-9]+(?:\.[0-9]+)?)")
-send_ms_re = re.compile(r"\bsend_ms=([0-9]+(?:\.[0-9]+)?)")
-wait_reply_ms_re = re.compile(r"\bwait_reply_ms=([0-9]+(?:\.[0-9]+)?)")
-total_ms_re = re.compile(r"\btotal_ms=([0-9]+(?:\.[0-9]+)?)")
 soak_done_re = re.compile(r"SOAK_ITER done .*?rc=([0-9]+)")
 profile_dir_re = re.compile(r"\bPROFILE_DIR path=")
 profile_wrap_re = re.compile(r"\bPROFILE_WRAP run_id=")
@@ -186,131 +187,111 @@ doctor_profile_re = re.compile(r'"profile_dir_used"\s*:\s*([01]|true|false)', re
 prompt_lint_re = re.compile(r"\bPROMPT_LINT_FAILS=([0-9]+)")
 
 for path in files:
+    t = Tally()
     try:
-        lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
-    except Exception:
-        continue
-    is_negative_file = any(("NEGATIVE_EXPECTED" in ln) or ("EXPECT_ERROR=" in ln) for ln in lines)
-    for i, line in enumerate(lines, start=1):
-        if line.startswith("RELEASE_GATE:") or line.startswith("METRIC ") or line.startswith("FAIL key="):
-            continue
-        if is_negative_file and "E_" in line:
-            expected_negative_errors_total += 1
-        for key, token in marker_keys.items():
-            if is_negative_file:
+        for i, line in enumerate(iter_lines(path), start=1):
+            if line.startswith("RELEASE_GATE:") or line.startswith("METRIC ") or line.startswith("FAIL key="):
                 continue
-            if token in line:
-                counts[key] += 1
-                set_evidence(key, path, i)
-        if not is_negative_file and auto_wait_start_re.search(line):
-            counts["AUTO_WAIT_TOTAL"] += 1
-            set_evidence("AUTO_WAIT_TOTAL", path, i)
-        if not is_negative_file and soft_reset_start_re.search(line):
-            counts["SOFT_RESET_TOTAL"] += 1
-            set_evidence("SOFT_RESET_TOTAL", path, i)
-        if not is_negative_file and soft_reset_success_re.search(line):
-            counts["SOFT_RESET_SUCCESS_TOTAL"] += 1
-            set_evidence("SOFT_RESET_SUCCESS_TOTAL", path, i)
-        if is_negative_file:
-            continue
-        if recover_re.search(line):
-            counts["E_CDP_UNREACHABLE_RECOVER"] += 1
-            set_evidence("E_CDP_UNREACHABLE_RECOVER_PER_100", path, i)
-        m = slot_re.search(line)
-        if m:
-            slot_events.append((int(m.group(2)), m.group(1)))
-            set_evidence("MAX_INFLIGHT_SLOTS", path, i)
-        m = lock_wait_re.search(line)
-        if m:
-            lock_wait.append(int(m.group(1)))
-            set_evidence("P95_LOCK_WAIT_MS", path, i)
-        m = lock_held_re.search(line)
-        if m:
-            lock_held.append(int(m.group(1)))
-            set_evidence("P95_LOCK_HELD_MS", path, i)
-        m = iter_re.search(line)
-        if m:
-            child = m.group(1)
-            iter_status_per_child[child] += 1
-            set_evidence("MIN_ITER_STATUS_LINES_PER_CHILD", path, i)
-        m = skip_re.search(line)
-        if m:
-            tests_skipped = max(tests_skipped, int(m.group(1)))
-            set_evidence("MAX_TESTS_SKIPPED", path, i)
-        m = precheck_ms_re.search(line)
-        if m:
-            precheck_ms_values.append(float(m.group(1)))
-            set_evidence("P95_PRECHECK_MS", path, i)
-        m = send_ms_re.search(line)
-        if m:
-            send_ms_values.append(float(m.group(1)))
-            set_evidence("P95_SEND_MS", path, i)
-        m = wait_reply_ms_re.search(line)
-        if m:
-            wait_reply_ms_values.append(float(m.group(1)))
-            set_evidence("P95_WAIT_REPLY_MS", path, i)
-        m = total_ms_re.search(line)
-        if m:
-            total_ms_values.append(float(m.group(1)))
-            set_evidence("P95_TOTAL_MS", path, i)
-        m = soak_done_re.search(line)
-        if m:
-            soak_iters += 1
-            rc = int(m.group(1))
-            if rc != 0:
-                soak_fails += 1
-                set_evidence("SOAK_FAILS", path, i)
-            set_evidence("SOAK_ITERS", path, i)
-        if profile_dir_re.search(line):
-            counts["PROFILE_DIR_USED_TOTAL"] += 1
-            set_evidence("PROFILE_DIR_USED_TOTAL", path, i)
-        if profile_wrap_re.search(line):
-            counts["PROFILE_DIR_USED_TOTAL"] += 1
-            set_evidence("PROFILE_DIR_USED_TOTAL", path, i)
-        m = cleanup_killed_re.search(line)
-        if m:
-            counts["CLEANUP_KILLED_TOTAL"] += int(float(m.group(1)))
-            set_evidence("CLEANUP_KILLED_TOTAL", path, i)
-        if ack_write_re.search(line):
-            counts["ACK_WRITE_TOTAL"] += 1
-            set_evidence("ACK_WRITE_TOTAL", path, i)
-        m = doctor_inv_re.search(line)
-        if m:
-            v = m.group(1).lower()
-            doctor_invariants_ok = max(doctor_invariants_ok, 1 if v in ("1", "true") else 0)
-            set_evidence("DOCTOR_INVARIANTS_OK", path, i)
-        m = doctor_force_re.search(line)
-        if m:
-            v = m.group(1).lower()
-            doctor_force_set = max(doctor_force_set, 1 if v in ("1", "true") else 0)
-            set_evidence("DOCTOR_FORCE_CHAT_URL_SET", path, i)
-        m = doctor_profile_re.search(line)
-        if m:
-            v = m.group(1).lower()
-            doctor_profile_used = max(doctor_profile_used, 1 if v in ("1", "true") else 0)
-            set_evidence("DOCTOR_PROFILE_DIR_USED", path, i)
-        m = prompt_lint_re.search(line)
-        if m:
-            prompt_lint_fails = max(prompt_lint_fails, int(m.group(1)))
-            set_evidence("PROMPT_LINT_FAILS", path, i)
+            t.negative = t.negative or is_negative_line(line)
+            if "E_" in line:
+                t.negative_errors += 1
+            if t.negative:
+                continue
+            for key, token in marker_keys.items():
+                if token in line:
+                    t.counts[key] += 1
+                    t.set_evidence(key, path, i)
+            if auto_wait_start_re.search(line):
+                t.counts["AUTO_WAIT_TOTAL"] += 1
+                t.set_evidence("AUTO_WAIT_TOTAL", path, i)
+            if soft_reset_start_re.search(line):
+                t.counts["SOFT_RESET_TOTAL"] += 1
+                t.set_evidence("SOFT_RESET_TOTAL", path, i)
+            if soft_reset_success_re.search(line):
+                t.counts["SOFT_RESET_SUCCESS_TOTAL"] += 1
+                t.set_evidence("SOFT_RESET_SUCCESS_TOTAL", path, i)
+            m = soft_reset_tier_re.search(line)
+            if m:
+                tier_key = m.group(1).upper()
+                t.counts[f"SOFT_RESET_TIER_{tier_key}_TOTAL"] += 1
+                t.set_evidence(f"SOFT_RESET_TIER_{tier_key}_TOTAL", path, i)
+                if m.group(2) == "ok":
+                    t.counts[f"SOFT_RESET_TIER_{tier_key}_OK_TOTAL"] += 1
+            if recover_re.search(line):
+                t.counts["E_CDP_UNREACHABLE_RECOVER"] += 1
+                t.set_evidence("E_CDP_UNREACHABLE_RECOVER_PER_100", path, i)
+            m = slot_re.search(line)
+            if m:
+                t.slots.add(int(m.group(2)), m.group(1) == "ACQUIRE")
+                t.set_evidence("MAX_INFLIGHT_SLOTS", path, i)
+            for metric in scan_line(line, t.latency):
+                t.set_evidence(f"P95_{metric}", path, i)
+            m = iter_re.search(line)
+            if m:
+                t.iter_status_per_child[m.group(1)] += 1
+                t.set_evidence("MIN_ITER_STATUS_LINES_PER_CHILD", path, i)
+            m = skip_re.search(line)
+            if m:
+                t.tests_skipped = max(t.tests_skipped, int(m.group(1)))
+                t.set_evidence("MAX_TESTS_SKIPPED", path, i)
+            m = soak_done_re.search(line)
+            if m:
+                t.soak_iters += 1
+                if int(m.group(1)) != 0:
+                    t.soak_fails += 1
+                    t.set_evidence("SOAK_FAILS", path, i)
+                t.set_evidence("SOAK_ITERS", path, i)
+            if profile_dir_re.search(line):
+                t.counts["PROFILE_DIR_USED_TOTAL"] += 1
+                t.set_evidence("PROFILE_DIR_USED_TOTAL", path, i)
+            if profile_wrap_re.search(line):
+                t.counts["PROFILE_DIR_USED_TOTAL"] += 1
+                t.set_evidence("PROFILE_DIR_USED_TOTAL", path, i)
+            m = cleanup_killed_re.search(line)
+            if m:
+                t.counts["CLEANUP_KILLED_TOTAL"] += int(float(m.group(1)))
+                t.set_evidence("CLEANUP_KILLED_TOTAL", path, i)
+            if ack_write_re.search(line):
+                t.counts["ACK_WRITE_TOTAL"] += 1
+                t.set_evidence("ACK_WRITE_TOTAL", path, i)
+            m = doctor_inv_re.search(line)
+            if m:
+                t.doctor_invariants_ok = max(t.doctor_invariants_ok, 1 if m.group(1).lower() in ("1", "true") else 0)
+                t.set_evidence("DOCTOR_INVARIANTS_OK", path, i)
+            m = doctor_force_re.search(line)
+            if m:
+                t.doctor_force_set = max(t.doctor_force_set, 1 if m.group(1).lower() in ("1", "true") else 0)
+                t.set_evidence("DOCTOR_FORCE_CHAT_URL_SET", path, i)
+            m = doctor_profile_re.search(line)
+            if m:
+                t.doctor_profile_used = max(t.doctor_profile_used, 1 if m.group(1).lower() in ("1", "true") else 0)
+                t.set_evidence("DOCTOR_PROFILE_DIR_USED", path, i)
+            m = prompt_lint_re.search(line)
+            if m:
+                t.prompt_lint_fails = max(t.prompt_lint_fails, int(m.group(1)))
+                t.set_evidence("PROMPT_LINT_FAILS", path, i)
+    except OSError:
+        continue
+    if t.negative:
+        expected_negative_errors_total += t.negative_errors
+    else:
+        total.fold(t)
 
-def p95(values):
-    if not values:
-        return 0.0
-    arr = sorted(values)
-    rank = int(math.ceil(0.95 * len(arr))) - 1
-    rank = max(0, min(rank, len(arr) - 1))
-    return float(arr[rank])
+counts = total.counts
+evidence = total.evidence
+latency = total.latency
+soak_iters, soak_fails = total.soak_iters, total.soak_fails
+tests_skipped, prompt_lint_fails = total.tests_skipped, total.prompt_lint_fails
+doctor_invariants_ok = total.doctor_invariants_ok
+doctor_force_set = total.doctor_force_set
+doctor_profile_used = total.doctor_profile_used
+iter_status_per_child = total.iter_status_per_child
 
-slot_events.sort(key=lambda x: (x[0], 0 if x[1] == "RELEASE" else 1))
-inflight = 0
-max_inflight = 0
-for _, kind in slot_events:
-    if kind == "ACQUIRE":
-        inflight += 1
-        max_inflight = max(max_inflight, inflight)
-    else:
-        inflight = max(0, inflight - 1)
+def p95(metric):
+    sketch = latency.get(metric)
+    return sketch.quantile(0.95) if sketch else 0.0
+
+max_inflight = total.slots.peak()
 
 min_iter_status = min(iter_status_per_child.values()) if iter_status_per_child else 0
 
@@ -353,12 +334,14 @@ metrics = {
     "E_CDP_UNREACHABLE_RECOVER_PER_100": float(counts["E_CDP_UNREACHABLE_RECOVER"]),
     "E_CDP_UNREACHABLE_PER_200": float(counts["E_CDP_UNREACHABLE_RECOVER"]),
     "MAX_INFLIGHT_SLOTS": float(max_inflight),
-    "P95_LOCK_WAIT_MS": p95(lock_wait),
-    "P95_LOCK_HELD_MS": p95(lock_held),
-    "P95_PRECHECK_MS": p95(precheck_ms_values),
-    "P95_SEND_MS": p95(send_ms_values),
-    "P95_WAIT_REPLY_MS": p95(wait_reply_ms_values),
-    "P95_TOTAL_MS": p95(total_ms_values),
+    "P95_LOCK_WAIT_MS": p95("LOCK_WAIT_MS"),
+    "P95_LOCK_HELD_MS": p95("LOCK_HELD_MS"),
+    "P95_SLOT_WAIT_MS": p95("SLOT_WAIT_MS"),
+    "P95_SLOT_HELD_MS": p95("SLOT_HELD_MS"),
+    "P95_PRECHECK_MS": p95("PRECHECK_MS"),
+    "P95_SEND_MS": p95("SEND_MS"),
+    "P95_WAIT_REPLY_MS": p95("WAIT_REPLY_MS"),
+    "P95_TOTAL_MS": p95("TOTAL_MS"),
     "SOAK_ITERS": float(soak_iters),
     "SOAK_FAILS": float(soak_fails),
     "PROFILE_DIR_USED_TOTAL": float(counts["PROFILE_DIR_USED_TOTAL"]),
@@ -366,12 +349,24 @@ metrics = {
     "EXPECTED_NEGATIVE_ERRORS_TOTAL": float(expected_negative_errors_total),
     "TESTS_SKIPPED": float(tests_skipped),
 }
+# Per recovery tier: attempts, successes and p95 latency of successful attempts.
+for tier_key in ("NUDGE", "RENAV", "RELOAD", "HARD_RELOAD"):
+    metrics[f"SOFT_RESET_TIER_{tier_key}_TOTAL"] = float(counts[f"SOFT_RESET_TIER_{tier_key}_TOTAL"])
+    metrics[f"SOFT_RESET_TIER_{tier_key}_OK_TOTAL"] = float(counts[f"SOFT_RESET_TIER_{tier_key}_OK_TOTAL"])
+    metrics[f"P95_SOFT_RESET_{tier_key}_MS"] = p95(f"SOFT_RESET_{tier_key}_MS")
 metrics["CHAT_MISROUTE_TOTAL"] = (
     metrics["E_ROUTE_MISMATCH_FATAL"]
     + metrics["E_TARGET_CHAT_REQUIRED"]
     + metrics["E_CHAT_STATE_MISMATCH"]
 )
 
+# Kept next to the logs so later runs can be compared without re-reading
+# them (bin/latency_sketch.py report).
+try:
+    dump_sketches(run_dir / SKETCH_FILE, run_id, latency, profile=profile)
+except OSError:
+    pass
+
 print(f"RELEASE_GATE: run_id={run_id} profile={profile}")
 for key in sorted(metrics.keys()):
     val = metrics[key]
@@ -408,7 +403,12 @@ if fails:
     for key, actual, limit, ev in fails:
         a = int(actual) if abs(actual - int(actual)) < 1e-9 else round(actual, 3)
         l = int(limit) if abs(limit - int(limit)) < 1e-9 else round(limit, 3)
-        print(f"FAIL key={key} actual={a} limit={l} evidence={ev}")
+        ci = ""
+        sketch = latency.get(key[len("MAX_P95_"):]) if key.startswith("MAX_P95_") else None
+        if sketch:
+            lo, hi = sketch.quantile_ci(0.95)
+            ci = f" p95_ci={lo:g}..{hi:g} n={sketch.count}"
+        print(f"FAIL key={key} actual={a} limit={l}{ci} evidence={ev}")
     sys.exit(1)
 
 print(f"RELEASE_GATE: PASS run_id={run_id} profile={profile}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+TEST_DIR="$ROOT_DIR/test"
+JOBS=""
+FILTER=""
+OUT_DIR=""
+REPORT_JSON=""
+BASELINE=""
+TIMEOUT_SEC=300
+LIVE=0
+SLOWEST=10
+REGRESS_FACTOR="1.5"
+REGRESS_MIN_MS=1000
+FAIL_ON_REGRESSION=0
+
+usage() {
+  cat <<'USAGE'
+Usage:
+  scripts/run_tests.sh [options]
+
+Runs test/test_*.sh in parallel. Every test gets its own temp
+CHATGPT_SEND_ROOT (state/ plus bin/docs symlinks, also the working dir),
+TMPDIR and tab cache dir.
+Live/CDP tests (gated on RUN_LIVE_CDP_E2E / CHATGPT_SEND_RUN_LIVE_* or on a
+reachable 127.0.0.1:9222) are skipped unless --live 1, and then run serially after the offline ones.
+
+Options:
+  --jobs N                  default: nproc
+  --filter REGEX            only tests whose file name matches
+  --test-dir DIR            default: <repo>/test
+  --out-dir DIR             default: <repo>/state/test_runs/<timestamp>
+  --report-json FILE        default: <out-dir>/report.json
+  --baseline FILE           earlier report.json to compare durations against
+  --regress-factor X        default: 1.5 (slower than X * baseline)
+  --regress-min-ms N        default: 1000 (and at least N ms slower)
+  --fail-on-regression 0|1  default: 0
+  --timeout-sec N           per test, default: 300
+  --live 0|1                default: 0
+  --slowest N               default: 10
+  -h, --help
+USAGE
+}
+
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    --jobs) JOBS="${2:-}"; shift 2 ;;
+    --filter) FILTER="${2:-}"; shift 2 ;;
+    --test-dir) TEST_DIR="${2:-}"; shift 2 ;;
+    --out-dir) OUT_DIR="${2:-}"; shift 2 ;;
+    --report-json) REPORT_JSON="${2:-}"; shift 2 ;;
+    --baseline) BASELINE="${2:-}"; shift 2 ;;
+    --regress-factor) REGRESS_FACTOR="${2:-}"; shift 2 ;;
+    --regress-min-ms) REGRESS_MIN_MS="${2:-}"; shift 2 ;;
+    --fail-on-regression) FAIL_ON_REGRESSION="${2:-}"; shift 2 ;;
+    --timeout-sec) TIMEOUT_SEC="${2:-}"; shift 2 ;;
+    --live) LIVE="${2:-}"; shift 2 ;;
+    --slowest) SLOWEST="${2:-}"; shift 2 ;;
+    -h|--help) usage; exit 0 ;;
+    *) echo "Unknown arg: $1" >&2; usage >&2; exit 2 ;;
+  esac
+done
+
+if [[ -z "$JOBS" ]]; then
+  JOBS="$(nproc 2>/dev/null || echo 2)"
+fi
+for pair in "jobs:$JOBS" "timeout-sec:$TIMEOUT_SEC" "regress-min-ms:$REGRESS_MIN_MS" "slowest:$SLOWEST"; do
+  if [[ ! "${pair#*:}" =~ ^[0-9]+$ ]]; then
+    echo "--${pair%%:*} must be numeric" >&2
+    exit 2
+  fi
+done
+if [[ ! "$LIVE" =~ ^[01]$ ]] || [[ ! "$FAIL_ON_REGRESSION" =~ ^[01]$ ]]; then
+  echo "--live and --fail-on-regression must be 0 or 1" >&2
+  exit 2
+fi
+if [[ -n "$BASELINE" ]] && [[ ! -f "$BASELINE" ]]; then
+  echo "baseline not found: $BASELINE" >&2
+  exit 2
+fi
+if [[ -z "$OUT_DIR" ]]; then
+  OUT_DIR="$ROOT_DIR/state/test_runs/$(date -u +%Y%m%dT%H%M%SZ)"
+fi
+if [[ -z "$REPORT_JSON" ]]; then
+  REPORT_JSON="$OUT_DIR/report.json"
+fi
+mkdir -p "$OUT_DIR/logs" "$OUT_DIR/roots" "$(dirname "$REPORT_JSON")"
+
+python3 - "$ROOT_DIR" "$TEST_DIR" "$OUT_DIR" "$REPORT_JSON" "$JOBS" "$FILTER" "$BASELINE" "$TIMEOUT_SEC" "$LIVE" "$SLOWEST" "$REGRESS_FACTOR" "$REGRESS_MIN_MS" "$FAIL_ON_REGRESSION" <<'PY'
+import concurrent.futures
+import json
+import os
+import pathlib
+import re
+import signal
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+(tool_root, test_dir, out_dir, report_json, jobs, filter_re, baseline_path,
+ timeout_sec, live, slowest, regress_factor, regress_min_ms, fail_on_regression) = sys.argv[1:14]
+tool_root = pathlib.Path(tool_root)
+test_dir = pathlib.Path(test_dir)
+out_dir = pathlib.Path(out_dir)
+jobs = max(1, int(jobs))
+timeout_sec = int(timeout_sec)
+live = live == "1"
+slowest = int(slowest)
+regress_factor = float(regress_factor)
+regress_min_ms = int(regress_min_ms)
+
+# Live tests gate on an opt-in env var or on a reachable local Chrome.
+LIVE_RE = re.compile(r"\$\{(?:RUN_LIVE_CDP_E2E|CHATGPT_SEND_RUN_LIVE_[A-Z_]+)[:}-]|if ! curl [^#\n]*127\.0\.0\.1:9222")
+# Tests print these when a precondition is missing and they exit 0.
+SKIP_RE = re.compile(r"^(SKIP_[A-Z0-9_]+|.*: SKIP\b.*)$", re.M)
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def load_baseline(path: str) -> Dict[str, int]:
+    if not path:
+        return {}
+    try:
+        obj = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    out = {}
+    for row in obj.get("tests") or []:
+        if row.get("status") == "pass" and isinstance(row.get("duration_ms"), int):
+            out[str(row.get("name"))] = row["duration_ms"]
+    return out
+
+
+def isolated_env(name: str) -> Dict[str, str]:
+    root = out_dir / "roots" / name
+    (root / "state").mkdir(parents=True, exist_ok=True)
+    (root / "tmp").mkdir(exist_ok=True)
+    for sub in ("bin", "docs"):
+        link = root / sub
+        if not link.exists():
+            link.symlink_to(tool_root / sub)
+    env = dict(os.environ)
+    # Paths derived from the root (or, for the pool's chat health store, from
+    # the mode and log dir) are left unset, so tests that build their own
+    # roots keep their own defaults.
+    for var in ("CHATGPT_SEND_TAB_CACHE_DIR", "CHATGPT_SEND_LOCK_FILE", "POOL_CHAT_HEALTH_STORE"):
+        env.pop(var, None)
+    env.update(
+        CHATGPT_SEND_ROOT=str(root),
+        # Shared-by-default locations: CDP phase slots live in /tmp and the
+        # pool scripts derive state/ from their own checkout.
+        CHATGPT_SEND_CDP_SLOT_DIR=str(root / "state" / "cdp_slots"),
+        POOL_RUNS_ROOT=str(root / "state" / "runs"),
+        FLEET_GC_ROOT=str(root / "state" / "runs"),
+        TMPDIR=str(root / "tmp"),
+    )
+    return env
+
+
+def run_one(path: pathlib.Path) -> Dict[str, Any]:
+    name = path.name
+    log_path = out_dir / "logs" / (path.stem + ".log")
+    started = now_ms()
+    t0 = time.monotonic()
+    status = "fail"
+    rc = None
+    env = isolated_env(path.stem)
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(
+            ["bash", str(path)],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            # Not the checkout: relative state/ writes land in the test's root.
+            cwd=env["CHATGPT_SEND_ROOT"],
+            env=env,
+            start_new_session=True,
+        )
+        try:
+            rc = proc.wait(timeout=timeout_sec)
+            status = "pass" if rc == 0 else "fail"
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            status = "timeout"
+    duration_ms = int((time.monotonic() - t0) * 1000)
+    if status == "pass":
+        try:
+            tail = log_path.read_bytes()[-4096:].decode("utf-8", errors="replace")
+        except OSError:
+            tail = ""
+        if SKIP_RE.search(tail) and "OK" not in tail.split():
+            status = "skip"
+    print(f"TEST_RESULT status={status} name={name} ms={duration_ms}", flush=True)
+    return {"name": name, "status": status, "rc": rc, "duration_ms": duration_ms, "started_ms": started, "log": str(log_path)}
+
+
+tests = sorted(test_dir.glob("test_*.sh"))
+if filter_re:
+    rx = re.compile(filter_re)
+    tests = [p for p in tests if rx.search(p.name)]
+offline: List[pathlib.Path] = []
+live_tests: List[pathlib.Path] = []
+for p in tests:
+    try:
+        body = p.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        body = ""
+    (live_tests if LIVE_RE.search(body) else offline).append(p)
+
+baseline = load_baseline(baseline_path)
+# Longest-first keeps the pool busy at the tail of the run.
+offline.sort(key=lambda p: -baseline.get(p.name, 0))
+
+results: List[Dict[str, Any]] = []
+wall0 = time.monotonic()
+with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+    for row in pool.map(run_one, offline):
+        results.append(row)
+for p in live_tests:
+    if live:
+        row = run_one(p)
+        row["live"] = True
+    else:
+        row = {"name": p.name, "status": "skip", "rc": None, "duration_ms": 0, "live": True, "reason": "live"}
+        print(f"TEST_RESULT status=skip name={p.name} ms=0 reason=live", flush=True)
+    results.append(row)
+wall_ms = int((time.monotonic() - wall0) * 1000)
+results.sort(key=lambda r: r["name"])
+
+regressions = []
+for row in results:
+    base = baseline.get(row["name"])
+    if base is None or row["status"] != "pass":
+        continue
+    cur = row["duration_ms"]
+    if cur > base * regress_factor and cur - base >= regress_min_ms:
+        regressions.append({"name": row["name"], "baseline_ms": base, "duration_ms": cur, "ratio": round(cur / max(1, base), 2)})
+
+counts: Dict[str, int] = {}
+for row in results:
+    counts[row["status"]] = counts.get(row["status"], 0) + 1
+serial_ms = sum(r["duration_ms"] for r in results)
+ran = [r for r in results if r["status"] != "skip"]
+report = {
+    "generated_at_ms": now_ms(),
+    "jobs": jobs,
+    "wall_ms": wall_ms,
+    "serial_ms": serial_ms,
+    "speedup": round(serial_ms / wall_ms, 2) if wall_ms else None,
+    "counts": counts,
+    "slowest": [
+        {"name": r["name"], "duration_ms": r["duration_ms"], "status": r["status"]}
+        for r in sorted(ran, key=lambda r: -r["duration_ms"])[:slowest]
+    ],
+    "baseline": baseline_path or None,
+    "regressions": regressions,
+    "tests": results,
+}
+tmp = pathlib.Path(report_json + ".tmp")
+tmp.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+os.replace(tmp, report_json)
+
+for r in report["slowest"]:
+    print(f"TEST_SLOW name={r['name']} ms={r['duration_ms']}")
+for r in regressions:
+    print(f"TEST_REGRESSION name={r['name']} baseline_ms={r['baseline_ms']} ms={r['duration_ms']} ratio={r['ratio']}")
+print(
+    "TEST_SUMMARY"
+    f" total={len(results)} pass={counts.get('pass', 0)} fail={counts.get('fail', 0)}"
+    f" timeout={counts.get('timeout', 0)} skip={counts.get('skip', 0)}"
+    f" jobs={jobs} wall_ms={wall_ms} serial_ms={serial_ms}"
+    f" regressions={len(regressions)} report={report_json}"
+)
+failed = counts.get("fail", 0) + counts.get("timeout", 0)
+if failed:
+    raise SystemExit(1)
+if regressions and fail_on_regression == "1":
+    raise SystemExit(3)
+PY
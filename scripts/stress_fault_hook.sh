@@ -8,6 +8,8 @@ ITER=""
 CHAT_URL=""
 ALLOW_DESTRUCTIVE="${CHATGPT_SEND_STRESS_ALLOW_DESTRUCTIVE:-0}"
 CDP_PORT="${CHATGPT_SEND_CDP_PORT:-9222}"
+# Sharded stress lanes each run with their own CHATGPT_SEND_ROOT.
+STATE_ROOT="${CHATGPT_SEND_ROOT:-$ROOT}"
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -66,7 +68,7 @@ case "$FAULT" in
     echo "FAULT_APPLY skipped fault=route_restore_pre reason=auto_route_guard"
     ;;
   corrupt_ledger_last_line_pre)
-    printf '%s\n' '{"broken_json_line":' >>"$ROOT/state/protocol.jsonl"
+    printf '%s\n' '{"broken_json_line":' >>"$STATE_ROOT/state/protocol.jsonl"
     echo "FAULT_APPLY ok fault=corrupt_ledger_last_line_pre action=append_broken_json"
     ;;
   *)
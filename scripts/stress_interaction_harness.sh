@@ -16,6 +16,16 @@ pass_count=0
 fail_count=0
 unexpected_fail_count=0
 summary_csv=""
+LANE_SPECS=()
+LANES_FILE=""
+LANE_URLS=()
+LANE_PORTS=()
+LANE_PROFILES=()
+LANE_ROOTS=()
+LANE_PIDS=()
+LANE_UNIT_DOMAINS=()
+SHARDED=0
+HARNESS_START_TS=0
 
 on_int_term() {
   HARNESS_INTERRUPTED=1
@@ -36,6 +46,11 @@ finalize_harness() {
   HARNESS_FINALIZED=1
 
   set +e
+  if [[ "$SHARDED" == "1" ]]; then
+    wait_all_lanes
+    recount_from_summary
+    shard_summary
+  fi
   if compgen -G "$OUT_DIR"/iter_*.markers > /dev/null; then
     score_output="$("$ROOT/scripts/score_stress_run.sh" "$OUT_DIR"/iter_*.markers 2>/dev/null)"
     score_status=$?
@@ -92,6 +107,8 @@ Options:
   --out-dir DIR
   --fault-hook PATH
   --prompt-prefix TEXT
+  --lane CHAT_URL[,CDP_PORT[,PROFILE_DIR]]   repeatable; 2+ lanes run shards in parallel
+  --lanes-file FILE          one lane per line, same format as --lane
 EOF
 }
 
@@ -104,6 +121,8 @@ while [[ $# -gt 0 ]]; do
     --out-dir) OUT_DIR="$2"; shift 2 ;;
     --fault-hook) FAULT_HOOK="$2"; shift 2 ;;
     --prompt-prefix) PROMPT_PREFIX="$2"; shift 2 ;;
+    --lane) LANE_SPECS+=("$2"); shift 2 ;;
+    --lanes-file) LANES_FILE="$2"; shift 2 ;;
     -h|--help) usage; exit 0 ;;
     *) echo "Unknown arg: $1" >&2; usage >&2; exit 2 ;;
   esac
@@ -113,6 +132,17 @@ done
 (( ITERS > 0 )) || { echo "--iters must be > 0" >&2; exit 2; }
 [[ -f "$PLAN_FILE" ]] || { echo "Plan file not found: $PLAN_FILE" >&2; exit 2; }
 
+if [[ -n "${LANES_FILE:-}" ]]; then
+  [[ -f "$LANES_FILE" ]] || { echo "Lanes file not found: $LANES_FILE" >&2; exit 2; }
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    line="${line%%#*}"
+    line="$(printf '%s' "$line" | tr -d '[:space:]')"
+    [[ -n "$line" ]] && LANE_SPECS+=("$line")
+  done <"$LANES_FILE"
+fi
+if [[ -z "${CHAT_URL:-}" ]] && (( ${#LANE_SPECS[@]} > 0 )); then
+  CHAT_URL="${LANE_SPECS[0]%%,*}"
+fi
 if [[ -z "${CHAT_URL:-}" ]] && [[ -f "$ROOT/state/work_chat_url.txt" ]]; then
   CHAT_URL="$(head -n 1 "$ROOT/state/work_chat_url.txt" || true)"
 fi
@@ -128,11 +158,51 @@ fi
 
 mkdir -p "$OUT_DIR" >/dev/null 2>&1 || true
 rm -f "$OUT_DIR"/iter_*.log "$OUT_DIR"/iter_*.markers "$OUT_DIR"/summary.csv "$OUT_DIR"/score.txt "$OUT_DIR"/harness_end.txt "$OUT_DIR"/stress_summary.txt >/dev/null 2>&1 || true
+rm -rf "$OUT_DIR"/lanes >/dev/null 2>&1 || true
+HARNESS_START_TS="$(date +%s)"
 echo "HARNESS_START test_id=${TEST_ID} outdir=${OUT_DIR} iters=${ITERS} plan=${PLAN_FILE} chat_url=${CHAT_URL}"
 # Start each stress run with a fresh checkpoint to avoid stale fingerprint
 # mismatches after protocol/fingerprint migrations.
 rm -f "$ROOT/state/last_specialist_checkpoint.json" >/dev/null 2>&1 || true
 
+# A lane is one chat in one browser. With a single lane everything runs in
+# this process against ROOT/state exactly as before. With 2+ lanes each lane
+# gets its own CHATGPT_SEND_ROOT (ledger, pending, checkpoint) under OUT_DIR,
+# and lanes on different CDP ports run scenario shards in parallel.
+primary_port="${CHATGPT_SEND_CDP_PORT:-9222}"
+primary_profile="${CHATGPT_SEND_PROFILE_DIR:-$ROOT/state/manual-login-profile}"
+if (( ${#LANE_SPECS[@]} == 0 )); then
+  LANE_SPECS=("$CHAT_URL")
+fi
+for spec in "${LANE_SPECS[@]}"; do
+  IFS=',' read -r lane_url lane_port lane_profile <<<"$spec"
+  lane_port="${lane_port:-$primary_port}"
+  [[ "$lane_port" =~ ^[0-9]+$ ]] || { echo "Invalid lane CDP port: $spec" >&2; exit 2; }
+  if [[ -z "${lane_profile:-}" ]]; then
+    if [[ "$lane_port" == "$primary_port" ]]; then
+      lane_profile="$primary_profile"
+    else
+      lane_profile="$ROOT/state/stress-profiles/cdp${lane_port}"
+    fi
+  fi
+  LANE_URLS+=("$lane_url")
+  LANE_PORTS+=("$lane_port")
+  LANE_PROFILES+=("$lane_profile")
+  LANE_ROOTS+=("")
+  LANE_PIDS+=("")
+  LANE_UNIT_DOMAINS+=("")
+done
+if (( ${#LANE_URLS[@]} > 1 )); then
+  SHARDED=1
+  for ((lane=0; lane<${#LANE_URLS[@]}; lane++)); do
+    lane_root="$OUT_DIR/lanes/lane${lane}"
+    mkdir -p "$lane_root/state"
+    ln -sfn "$ROOT/bin" "$lane_root/bin"
+    ln -sfn "$ROOT/docs" "$lane_root/docs"
+    LANE_ROOTS[$lane]="$lane_root"
+  done
+fi
+
 # Stress mode must always run with strict protocol enforcement enabled.
 export CHATGPT_SEND_PROTO_ENFORCE_FINGERPRINT=1
 export CHATGPT_SEND_PROTO_ENFORCE_POSTSEND_VERIFY=1
@@ -148,6 +218,22 @@ fi
 
 mapfile -t SCENARIOS < <(python3 - "$PLAN_FILE" <<'PY'
 import json, sys
+
+LANE_FAULTS = {
+    "none",
+    "stop_visible_pre",
+    "tight_timeout_pre",
+    "interrupt_after_dispatch",
+    "corrupt_ledger_last_line_pre",
+    "wrong_tab_pre",
+    "route_switch_pre",
+    "route_restore_pre",
+    "browser_down_pre",
+    "browser_up_pre",
+    "browser_restart_pre",
+}
+CHAIN_FAULTS = {"route_restore_pre", "browser_up_pre"}
+
 path = sys.argv[1]
 with open(path, "r", encoding="utf-8") as f:
     data = json.load(f)
@@ -157,7 +243,15 @@ for i, s in enumerate(items, start=1):
     expect = (s.get("expect") or "PASS").strip()
     fault = (s.get("fault") or "none").strip()
     note = (s.get("note") or "").replace("\t", " ").replace("\n", " ").strip()
-    print(f"{sid}\t{expect}\t{fault}\t{note}")
+    # Fault domains for sharding: "lane" faults stay inside one browser/chat
+    # lane; anything unknown runs "global" (alone, all lanes idle).
+    domain = (s.get("domain") or ("lane" if fault in LANE_FAULTS else "global")).strip()
+    # Follow-up scenarios (REUSE after an interrupted run, restore/reopen after
+    # a fault) must run right after their predecessor on the same lane.
+    chain = s.get("chain")
+    if chain is None:
+        chain = expect == "REUSE" or fault in CHAIN_FAULTS
+    print(f"{sid}\t{expect}\t{fault}\t{domain}\t{1 if chain else 0}\t{note}")
 PY
 )
 
@@ -170,18 +264,27 @@ pass_count=0
 fail_count=0
 unexpected_fail_count=0
 summary_csv="$OUT_DIR/summary.csv"
-printf '%s\n' "iter,scenario,expect,fault,run_status,assert_status,log" >"$summary_csv"
+printf '%s\n' "iter,scenario,expect,fault,run_status,assert_status,log,lane,duration_sec" >"$summary_csv"
 trap 'on_int_term' INT TERM
 trap 'cleanup_on_exit' EXIT
 
-for ((iter=1; iter<=ITERS; iter++)); do
-  if [[ "$HARNESS_INTERRUPTED" == "1" ]]; then
-    echo "HARNESS_BREAK interrupted=1 before_iter=${iter}" >&2
-    break
+# run_iteration <iter> <lane>: one scenario run; appends its summary.csv row
+# (a single short O_APPEND write, safe across lanes) and iter_<n>.markers.
+run_iteration() {
+  local iter="$1" lane="$2"
+  local idx sid expect fault domain chain note
+  local chat_url="${LANE_URLS[$lane]}"
+  local cdp_port="${LANE_PORTS[$lane]}"
+  local -a lane_env=(
+    "CHATGPT_SEND_CDP_PORT=${cdp_port}"
+    "CHATGPT_SEND_PROFILE_DIR=${LANE_PROFILES[$lane]}"
+  )
+  if [[ -n "${LANE_ROOTS[$lane]}" ]]; then
+    lane_env+=("CHATGPT_SEND_ROOT=${LANE_ROOTS[$lane]}")
   fi
 
   idx=$(( (iter - 1) % ${#SCENARIOS[@]} ))
-  IFS=$'\t' read -r sid expect fault note <<<"${SCENARIOS[$idx]}"
+  IFS=$'\t' read -r sid expect fault domain chain note <<<"${SCENARIOS[$idx]}"
   run_ts="$(date +%s)"
   log="$OUT_DIR/iter_${iter}.log"
   prompt="${PROMPT_PREFIX}_${sid}_${run_ts}"
@@ -190,7 +293,8 @@ for ((iter=1; iter<=ITERS; iter++)); do
     echo "RUN_START iter=${iter} scenario=${sid} expect=${expect} fault=${fault} ts=${run_ts}"
     echo "TEST_ID=${TEST_ID}"
     echo "OUTDIR=${OUT_DIR}"
-    echo "CHAT_TARGET_URL=${CHAT_URL}"
+    echo "CHAT_TARGET_URL=${chat_url}"
+    echo "HARNESS_LANE lane=${lane} cdp_port=${cdp_port} domain=${domain} chain=${chain}"
     echo "PROTO_ENFORCE fingerprint=1 postsend_verify=1 strict_single_chat=1"
     echo "TAB_HYGIENE_ENFORCE auto_tab_hygiene=${CHATGPT_SEND_AUTO_TAB_HYGIENE:-0}"
     echo "NOTE=${note}"
@@ -198,7 +302,7 @@ for ((iter=1; iter<=ITERS; iter++)); do
 
   if [[ -n "${FAULT_HOOK:-}" ]]; then
     if [[ -x "$FAULT_HOOK" ]]; then
-      if ! "$FAULT_HOOK" --phase pre --fault "$fault" --iter "$iter" --chat-url "$CHAT_URL" >>"$log" 2>&1; then
+      if ! env "${lane_env[@]}" "$FAULT_HOOK" --phase pre --fault "$fault" --iter "$iter" --chat-url "$chat_url" >>"$log" 2>&1; then
         echo "FAULT_HOOK pre failed iter=${iter} scenario=${sid}" >>"$log"
       fi
     else
@@ -209,7 +313,7 @@ for ((iter=1; iter<=ITERS; iter++)); do
   fi
 
   set +e
-  "$ROOT/bin/chatgpt_send" --chatgpt-url "$CHAT_URL" --ack >>"$log" 2>&1
+  env "${lane_env[@]}" "$ROOT/bin/chatgpt_send" --chatgpt-url "$chat_url" --ack >>"$log" 2>&1
   ack_status=$?
   set -e
   echo "PRE_ACK status=${ack_status}" >>"$log"
@@ -220,8 +324,8 @@ for ((iter=1; iter<=ITERS; iter++)); do
   while true; do
     set +e
     python3 "$ROOT/bin/cdp_chatgpt.py" \
-      --cdp-port "${CHATGPT_SEND_CDP_PORT:-9222}" \
-      --chatgpt-url "$CHAT_URL" \
+      --cdp-port "$cdp_port" \
+      --chatgpt-url "$chat_url" \
       --timeout 900 \
       --prompt "$prompt" \
       --precheck-only >>"$log" 2>&1
@@ -240,11 +344,11 @@ for ((iter=1; iter<=ITERS; iter++)); do
 
   if [[ "$HARNESS_INTERRUPTED" == "1" ]]; then
     echo "HARNESS_BREAK interrupted=1 before_send_iter=${iter}" >>"$log"
-    break
+    return 1
   fi
 
   set +e
-  "$ROOT/bin/chatgpt_send" --chatgpt-url "$CHAT_URL" --prompt "$prompt" >>"$log" 2>&1
+  env "${lane_env[@]}" "$ROOT/bin/chatgpt_send" --chatgpt-url "$chat_url" --prompt "$prompt" >>"$log" 2>&1
   run_status=$?
   set -e
 
@@ -254,7 +358,7 @@ for ((iter=1; iter<=ITERS; iter++)); do
   set -e
 
   if [[ -n "${FAULT_HOOK:-}" ]] && [[ -x "$FAULT_HOOK" ]]; then
-    "$FAULT_HOOK" --phase post --fault "$fault" --iter "$iter" --chat-url "$CHAT_URL" >>"$log" 2>&1 || true
+    env "${lane_env[@]}" "$FAULT_HOOK" --phase post --fault "$fault" --iter "$iter" --chat-url "$chat_url" >>"$log" 2>&1 || true
   fi
 
   if [[ $assert_status -eq 0 ]]; then
@@ -266,14 +370,131 @@ for ((iter=1; iter<=ITERS; iter++)); do
     unexpected_fail_count=$((unexpected_fail_count + 1))
   fi
 
-  printf '%s\n' "${iter},${sid},${expect},${fault},${run_status},${assert_status},${log}" >>"$summary_csv"
+  printf '%s\n' "${iter},${sid},${expect},${fault},${run_status},${assert_status},${log},${lane},$(( $(date +%s) - run_ts ))" >>"$summary_csv"
   echo "RUN_END iter=${iter} scenario=${sid} result=${result} run_status=${run_status} assert_status=${assert_status} log=${log}"
   markers="$OUT_DIR/iter_${iter}.markers"
   rg --no-filename '^(HARNESS_|ITER_RESULT|RUN_(START|END)|ASSERT_|PROTO_ENFORCE|TAB_HYGIENE|CHAT_|ROUTE_|RECOVERY_|FETCH_LAST|SEND_|REPLY_|LEDGER_|E_|W_)' "$log" >"$markers" || true
-  DONE_ITERS=$iter
+  return 0
+}
+
+lane_busy() {
+  local pid="${LANE_PIDS[$1]}"
+  [[ -n "$pid" ]] && kill -0 "$pid" >/dev/null 2>&1
+}
 
+wait_all_lanes() {
+  local lane
+  for ((lane=0; lane<${#LANE_PIDS[@]}; lane++)); do
+    if [[ -n "${LANE_PIDS[$lane]}" ]]; then
+      wait "${LANE_PIDS[$lane]}" >/dev/null 2>&1 || true
+      LANE_PIDS[$lane]=""
+    fi
+  done
+}
+
+# pick_lane <domain>: prints a lane that may start a unit now, or fails.
+# Lanes sharing a CDP port never overlap: strict single-chat and the
+# browser_down/restart faults act on the whole browser. "global" units wait
+# until every lane is idle and keep the others idle while they run.
+pick_lane() {
+  local domain="$1" lane other port_busy
+  if [[ "$domain" == "global" ]]; then
+    for ((lane=0; lane<${#LANE_PIDS[@]}; lane++)); do
+      lane_busy "$lane" && return 1
+    done
+    printf '%s\n' 0
+    return 0
+  fi
+  for ((lane=0; lane<${#LANE_PIDS[@]}; lane++)); do
+    if lane_busy "$lane" && [[ "${LANE_UNIT_DOMAINS[$lane]}" == "global" ]]; then
+      return 1
+    fi
+  done
+  for ((lane=0; lane<${#LANE_PIDS[@]}; lane++)); do
+    lane_busy "$lane" && continue
+    port_busy=0
+    for ((other=0; other<${#LANE_PIDS[@]}; other++)); do
+      if [[ "${LANE_PORTS[$other]}" == "${LANE_PORTS[$lane]}" ]] && lane_busy "$other"; then
+        port_busy=1
+        break
+      fi
+    done
+    if [[ "$port_busy" == "0" ]]; then
+      printf '%s\n' "$lane"
+      return 0
+    fi
+  done
+  return 1
+}
+
+recount_from_summary() {
+  local counts
+  counts="$(awk -F',' 'NR > 1 { n++; if ($6 == "0") p++; else f++ } END { printf "%d %d %d", n, p, f }' "$summary_csv" 2>/dev/null || true)"
+  read -r DONE_ITERS pass_count fail_count <<<"${counts:-0 0 0}"
+  unexpected_fail_count="$fail_count"
+}
+
+shard_summary() {
+  local wall busy
+  wall=$(( $(date +%s) - HARNESS_START_TS ))
+  busy="$(awk -F',' 'NR > 1 { s += $9 } END { printf "%d", s }' "$summary_csv" 2>/dev/null || echo 0)"
+  echo "HARNESS_SHARD_SUMMARY lanes=${#LANE_URLS[@]} units=${#UNITS[@]} wall_sec=${wall} busy_sec=${busy} speedup=$(awk -v b="$busy" -v w="$wall" 'BEGIN { printf "%.2f", (w > 0 ? b / w : 0) }')" | tee "$OUT_DIR/shard_summary.txt"
+}
+
+if [[ "$SHARDED" != "1" ]]; then
+  for ((iter=1; iter<=ITERS; iter++)); do
+    if [[ "$HARNESS_INTERRUPTED" == "1" ]]; then
+      echo "HARNESS_BREAK interrupted=1 before_iter=${iter}" >&2
+      break
+    fi
+    run_iteration "$iter" 0 || break
+    DONE_ITERS=$iter
+
+    if [[ "$HARNESS_INTERRUPTED" == "1" ]]; then
+      echo "HARNESS_BREAK interrupted=1 after_iter=${DONE_ITERS}" >&2
+      break
+    fi
+  done
+  exit 0
+fi
+
+# Sharded run: group iterations into units (a scenario plus the follow-ups
+# chained to it), then hand units to idle lanes in plan order.
+UNITS=()
+UNIT_DOMAINS=()
+for ((iter=1; iter<=ITERS; iter++)); do
+  IFS=$'\t' read -r _ _ _ domain chain _ <<<"${SCENARIOS[$(( (iter - 1) % ${#SCENARIOS[@]} ))]}"
+  if [[ "$chain" == "1" ]] && (( ${#UNITS[@]} > 0 )); then
+    last=$(( ${#UNITS[@]} - 1 ))
+    UNITS[$last]="${UNITS[$last]} ${iter}"
+    [[ "$domain" == "global" ]] && UNIT_DOMAINS[$last]="global"
+  else
+    UNITS+=("$iter")
+    UNIT_DOMAINS+=("$domain")
+  fi
+done
+echo "HARNESS_SHARDS lanes=${#LANE_URLS[@]} units=${#UNITS[@]} cdp_ports=$(printf '%s\n' "${LANE_PORTS[@]}" | sort -u | paste -sd, -)"
+
+for ((unit=0; unit<${#UNITS[@]}; unit++)); do
+  lane=""
+  while [[ "$HARNESS_INTERRUPTED" != "1" ]]; do
+    if lane="$(pick_lane "${UNIT_DOMAINS[$unit]}")"; then
+      break
+    fi
+    sleep 0.2
+  done
   if [[ "$HARNESS_INTERRUPTED" == "1" ]]; then
-    echo "HARNESS_BREAK interrupted=1 after_iter=${DONE_ITERS}" >&2
+    echo "HARNESS_BREAK interrupted=1 before_unit=${unit}" >&2
     break
   fi
+  (
+    trap - EXIT
+    for iter in ${UNITS[$unit]}; do
+      run_iteration "$iter" "$lane" || break
+    done
+  ) &
+  LANE_PIDS[$lane]="$!"
+  LANE_UNIT_DOMAINS[$lane]="${UNIT_DOMAINS[$unit]}"
+  echo "HARNESS_UNIT unit=${unit} lane=${lane} domain=${UNIT_DOMAINS[$unit]} iters=${UNITS[$unit]// /,}"
 done
+wait_all_lanes
@@ -0,0 +1,588 @@
+#!/usr/bin/env bash
+set -euo pipefail
+export CHATGPT_SEND_ROOT='/tmp/tmp.9i6btYHb2d/project/.chatgpt_send_child_state/child-20261019-125004-20987'
+export CHATGPT_SEND_CDP_PORT='9222'
+export CHATGPT_SEND_PROFILE_DIR='/root/package/state/manual-login-profile'
+export CHATGPT_SEND_PRESERVE_TABS='1'
+export CHATGPT_SEND_LOCK_FILE='/tmp/chatgpt-send-shared-browser.lock'
+export CHATGPT_SEND_LOCK_TIMEOUT_SEC='180'
+export CHATGPT_SEND_AUTO_TIMEOUT_SEC='120'
+export CHATGPT_SEND_MAX_CDP_SLOTS='2'
+export CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC='180'
+export CHATGPT_SEND_RUN_ID="${CHATGPT_SEND_RUN_ID:-child-20261019-125004-20987}"
+export CHATGPT_SEND_LOG_DIR="${CHATGPT_SEND_LOG_DIR:-/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send}"
+export CHATGPT_SEND_TRANSPORT="${CHATGPT_SEND_TRANSPORT:-mock}"
+export CHATGPT_SEND_LOG_SINK='plain'
+export CHATGPT_SEND_LOG_SINK_MAX_BYTES='8388608'
+export CHATGPT_SEND_LOG_SINK_CODEC='zstd'
+export CHATGPT_SEND_LOG_SINK_KEEP='0'
+CHILD_RESULT_JSON='/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child_result.json'
+STARTED_AT_ISO="$(date -Iseconds)"
+STARTED_AT_EPOCH="$(date +%s)"
+STATUS="UNKNOWN"
+SLOT_USED=0
+BROWSER_USED=0
+BROWSER_EVIDENCE_WRITTEN=0
+: > '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log'
+echo $$ > '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.pid'
+
+now_ms() {
+  date +%s%3N 2>/dev/null || python3 - <<'PY'
+import time
+print(int(time.time()*1000))
+PY
+}
+
+iter_status() {
+  local step="$1"
+  local status="$2"
+  local reason="$3"
+  local ts_ms
+  ts_ms="$(now_ms)"
+  local line="[child] ITER_STATUS step=${step} status=${status} reason=${reason} ts_ms=${ts_ms} run_id=child-20261019-125004-20987 child_id=child-20261019-125004-20987 pinned_url=${CHATGPT_SEND_FORCE_CHAT_URL:-none}"
+  echo "${line}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  echo "${line}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log'
+}
+
+flow_ok() {
+  local phase="$1"
+  local ts_ms
+  ts_ms="$(now_ms)"
+  local line="[child] FLOW_OK phase=${phase} ts_ms=${ts_ms} run_id=child-20261019-125004-20987 child_id=child-20261019-125004-20987"
+  echo "${line}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  echo "${line}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log'
+}
+
+# CHATGPT_SEND_LOG_SINK=rotate: chatgpt_send/codex output goes through
+# bin/log_sink.py (heartbeat RLE + size-rotated compressed segments);
+# readers must use child_log_view (or bin/logcat) to see rotated parts.
+child_log_append() {
+  local dest="$1"
+  if [[ "${CHATGPT_SEND_LOG_SINK}" == "rotate" ]]; then
+    python3 '/root/package/bin/log_sink.py' append --log "${dest}"
+  else
+    cat >> "${dest}"
+  fi
+}
+
+child_log_tee() {
+  if [[ "${CHATGPT_SEND_LOG_SINK}" == "rotate" ]]; then
+    python3 '/root/package/bin/log_sink.py' append --tee --log '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  else
+    tee -a '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  fi
+}
+
+child_log_view() {
+  if [[ "${CHATGPT_SEND_LOG_SINK}" == "rotate" ]]; then
+    python3 '/root/package/bin/log_sink.py' cat '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  elif [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]]; then
+    cat '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  fi
+}
+
+{
+  echo "[child] run_id=child-20261019-125004-20987"
+  echo "[child] project=/tmp/tmp.9i6btYHb2d/project"
+  echo "[child] state_root=${CHATGPT_SEND_ROOT}"
+  echo "[child] coordinator_state_root=/root/package/state/child-agents-shared/child-20261019-125004-20987"
+  echo "[child] cdp_port=${CHATGPT_SEND_CDP_PORT}"
+  echo "[child] profile_dir=${CHATGPT_SEND_PROFILE_DIR}"
+  echo "[child] preserve_tabs=${CHATGPT_SEND_PRESERVE_TABS}"
+  echo "[child] lock_file=${CHATGPT_SEND_LOCK_FILE}"
+  echo "[child] run_id_env=${CHATGPT_SEND_RUN_ID}"
+  echo "[child] log_dir_env=${CHATGPT_SEND_LOG_DIR}"
+  echo "[child] chatgpt_send_transport=${CHATGPT_SEND_TRANSPORT:-cdp}"
+  echo "[child] chatgpt_send_log_dir=/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send"
+  echo "[child] auto_timeout=${CHATGPT_SEND_AUTO_TIMEOUT_SEC}"
+  echo "[child] started_at=${STARTED_AT_ISO}"
+} >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+iter_status "bootstrap" "done" "runner_started"
+if [[ 'optional' == 'disabled' ]]; then
+  echo "[child] SLOT_SKIP reason=browser_disabled mode=global run_id=child-20261019-125004-20987 child_id=child-20261019-125004-20987" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+fi
+
+write_child_result_json() {
+  local rc="$1"
+  local finished_at_iso="$2"
+  local duration_sec="$3"
+  local status_value="${STATUS:-UNKNOWN}"
+
+  if [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]] && grep -q 'CHILD_BROWSER_USED:' < <(child_log_view); then
+    BROWSER_USED=1
+  elif [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' ]] && grep -q 'CHILD_BROWSER_USED:' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt'; then
+    BROWSER_USED=1
+  else
+    BROWSER_USED=0
+  fi
+
+  if [[ "${rc}" == "0" ]]; then
+    status_value="OK"
+  elif [[ -z "${status_value}" ]] || [[ "${status_value}" == "UNKNOWN" ]]; then
+    status_value="E_CHILD_FAILED"
+  fi
+  if [[ 'optional' == 'required' ]] && [[ "${BROWSER_USED}" != "1" ]] && [[ "${rc}" != "0" ]]; then
+    status_value="E_CHILD_BROWSER_REQUIRED_NOT_USED"
+  fi
+
+  python3 - "${CHILD_RESULT_JSON}" 'child-20261019-125004-20987' "${status_value}" "${rc}" 'optional' "${BROWSER_USED}" "${SLOT_USED}" "${child_chat_url:-}" "${CHATGPT_SEND_FORCE_CHAT_URL:-}" "${STARTED_AT_ISO}" "${finished_at_iso}" "${duration_sec}" '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' <<'PY'
+import json
+import pathlib
+import sys
+
+out_path = pathlib.Path(sys.argv[1])
+run_id = sys.argv[2]
+status = sys.argv[3]
+exit_code = int(sys.argv[4])
+browser_policy = sys.argv[5]
+browser_used = sys.argv[6] == "1"
+slot_used = sys.argv[7] == "1"
+specialist_chat_url = sys.argv[8]
+pinned_route_url = sys.argv[9]
+started_at = sys.argv[10]
+finished_at = sys.argv[11]
+duration_sec = int(sys.argv[12])
+log_path = sys.argv[13]
+
+payload = {
+    "run_id": run_id,
+    "status": status,
+    "exit_code": exit_code,
+    "browser_policy": browser_policy,
+    "browser_used": browser_used,
+    "slot_used": slot_used,
+    "specialist_chat_url": specialist_chat_url,
+    "pinned_route_url": pinned_route_url,
+    "started_at": started_at,
+    "finished_at": finished_at,
+    "duration_sec": duration_sec,
+    "log_path": log_path,
+}
+out_path.parent.mkdir(parents=True, exist_ok=True)
+out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+PY
+}
+
+child_finalize() {
+  local rc=$?
+  local finished_at_iso="$(date -Iseconds)"
+  local finished_at_epoch="$(date +%s)"
+  local duration_sec=0
+  if [[ "${finished_at_epoch}" =~ ^[0-9]+$ ]] && [[ "${STARTED_AT_EPOCH}" =~ ^[0-9]+$ ]] && (( finished_at_epoch >= STARTED_AT_EPOCH )); then
+    duration_sec=$((finished_at_epoch - STARTED_AT_EPOCH))
+  fi
+  if [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log' ]]; then
+    cat '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log' >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' 2>/dev/null || true
+  fi
+  echo "${rc}" > '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.exit'
+  echo "[child] exit_code=${rc}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  echo "[child] finished_at=${finished_at_iso}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  write_child_result_json "${rc}" "${finished_at_iso}" "${duration_sec}" || echo "[child] child_result_json_write=failed path=${CHILD_RESULT_JSON}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+}
+trap child_finalize EXIT
+
+run_chatgpt_send() {
+  local max_slots="${CHATGPT_SEND_MAX_CDP_SLOTS:-2}"
+  local wait_timeout="${CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC:-180}"
+  local slot_id=""
+  local slot_fd=""
+  local slot_wait_start_ms=""
+  local slot_acquire_ms=""
+  local slot_hold_start_ms=""
+  local st=0
+  local slot_wait_s0=""
+  local now_s=""
+  local i=0
+  local slot_file=""
+  local fd=""
+  local wait_ms=0
+  local slot_release_ms=0
+  local held_ms=0
+  local errexit_restore=0
+
+  if [[ $- == *e* ]]; then
+    errexit_restore=1
+  fi
+
+  now_ms() {
+    date +%s%3N 2>/dev/null || python3 - <<'PY'
+import time
+print(int(time.time()*1000))
+PY
+  }
+
+  if [[ ! "${max_slots}" =~ ^[0-9]+$ ]] || (( max_slots < 1 )); then
+    max_slots=2
+  fi
+  if [[ ! "${wait_timeout}" =~ ^[0-9]+$ ]] || (( wait_timeout < 1 )); then
+    wait_timeout=180
+  fi
+
+  if [[ 'optional' == 'disabled' ]]; then
+    echo "[child] SLOT_SKIP reason=browser_disabled run_id=child-20261019-125004-20987 child_id=child-20261019-125004-20987" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+    set +e
+    '/root/package/bin/chatgpt_send' "$@"
+    st=$?
+    if (( errexit_restore == 1 )); then
+      set -e
+    else
+      set +e
+    fi
+    return "${st}"
+  fi
+
+  slot_wait_start_ms="$(now_ms)"
+  while true; do
+    for ((i=0; i<max_slots; i++)); do
+      slot_file="/tmp/chatgpt-send-cdp-slot.${i}.lock"
+      exec {fd}>"${slot_file}" || continue
+      if flock -n "${fd}"; then
+        slot_id="${i}"
+        slot_fd="${fd}"
+        slot_acquire_ms="$(now_ms)"
+        slot_hold_start_ms="${slot_acquire_ms}"
+        SLOT_USED=1
+        wait_ms=$((slot_acquire_ms - slot_wait_start_ms))
+        echo "[child] SLOT_ACQUIRE slot=${slot_id} wait_ms=${wait_ms} ts_ms=${slot_acquire_ms} run_id=child-20261019-125004-20987 child_id=child-20261019-125004-20987" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+        break 2
+      fi
+      exec {fd}>&- || true
+    done
+    now_s="$(date +%s)"
+    if [[ -z "${slot_wait_s0:-}" ]]; then
+      slot_wait_s0="${now_s}"
+    fi
+    if (( now_s - slot_wait_s0 >= wait_timeout )); then
+      STATUS="E_SLOT_ACQUIRE_TIMEOUT"
+      echo "[child] E_SLOT_ACQUIRE_TIMEOUT wait_timeout_sec=${wait_timeout} run_id=child-20261019-125004-20987" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+      return 73
+    fi
+    sleep 0.05
+  done
+
+  set +e
+  '/root/package/bin/chatgpt_send' "$@"
+  st=$?
+  if (( errexit_restore == 1 )); then
+    set -e
+  else
+    set +e
+  fi
+
+  if [[ -n "${slot_fd:-}" ]]; then
+    slot_release_ms="$(now_ms)"
+    held_ms=$((slot_release_ms - slot_hold_start_ms))
+    echo "[child] SLOT_RELEASE slot=${slot_id} held_ms=${held_ms} ts_ms=${slot_release_ms}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+    flock -u "${slot_fd}" >/dev/null 2>&1 || true
+    exec {slot_fd}>&- || true
+  fi
+  return "${st}"
+}
+
+emit_browser_used_once() {
+  local op="$1"
+  local rc="${2:-0}"
+  local evidence=""
+  local marker=""
+
+  if [[ "${BROWSER_EVIDENCE_WRITTEN}" == "1" ]]; then
+    return 0
+  fi
+  if [[ "${CHATGPT_SEND_TRANSPORT:-cdp}" != "cdp" ]]; then
+    return 0
+  fi
+  if [[ 'optional' == 'disabled' ]]; then
+    return 0
+  fi
+  if [[ "${rc}" != "0" ]]; then
+    return 0
+  fi
+
+  if [[ -n "${CHATGPT_SEND_FORCE_CHAT_URL:-}" ]] && [[ "${CHATGPT_SEND_FORCE_CHAT_URL}" =~ ^https://chatgpt\.com/c/[A-Za-z0-9-]+$ ]]; then
+    evidence="${CHATGPT_SEND_FORCE_CHAT_URL}"
+  elif [[ -n "${child_chat_url:-}" ]] && [[ "${child_chat_url}" =~ ^https://chatgpt\.com/c/[A-Za-z0-9-]+$ ]]; then
+    evidence="${child_chat_url}"
+  fi
+  if [[ -z "${evidence}" ]]; then
+    return 0
+  fi
+
+  marker="CHILD_BROWSER_USED: yes ; REASON: chatgpt_send_ok ; EVIDENCE: ${evidence} ; OP: ${op}"
+  echo "[child] ${marker}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  BROWSER_EVIDENCE_WRITTEN=1
+}
+
+run_chatgpt_send_logged() {
+  local step="$1"
+  shift
+  local stream_log='/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send/transport.log'
+  local tmp_out=""
+  local tmp_err=""
+  local errexit_restore=0
+  if [[ $- == *e* ]]; then
+    errexit_restore=1
+  fi
+  echo "[child] step=${step} cmd=$*" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  mkdir -p "$(dirname "${stream_log}")"
+  tmp_out="$(mktemp '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send.'"'"'${step}'"'"'.out.XXXXXX')"
+  tmp_err="$(mktemp '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send.'"'"'${step}'"'"'.err.XXXXXX')"
+  set +e
+  run_chatgpt_send "$@" >"${tmp_out}" 2>"${tmp_err}"
+  local rc=$?
+  if (( errexit_restore == 1 )); then
+    set -e
+  else
+    set +e
+  fi
+  child_log_append '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' < "${tmp_out}" 2>/dev/null || true
+  child_log_append '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' < "${tmp_err}" 2>/dev/null || true
+  child_log_append "${stream_log}" < "${tmp_out}" 2>/dev/null || true
+  child_log_append "${stream_log}" < "${tmp_err}" 2>/dev/null || true
+  rm -f "${tmp_out}" "${tmp_err}" 2>/dev/null || true
+  emit_browser_used_once "${step}" "${rc}"
+  echo "[child] step=${step} rc=${rc}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  if [[ "${rc}" == "0" ]]; then
+    iter_status "${step}" "done" "chatgpt_send_rc=0"
+  else
+    iter_status "${step}" "blocked" "chatgpt_send_rc=${rc}"
+  fi
+  return "$rc"
+}
+
+run_chatgpt_send_capture() {
+  local step="$1"
+  shift
+  local out=""
+  local stream_log='/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send/transport.log'
+  local tmp_out=""
+  local tmp_err=""
+  local errexit_restore=0
+  if [[ $- == *e* ]]; then
+    errexit_restore=1
+  fi
+  echo "[child] step=${step} cmd=$*" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  mkdir -p "$(dirname "${stream_log}")"
+  tmp_out="$(mktemp '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send.'"'"'${step}'"'"'.out.XXXXXX')"
+  tmp_err="$(mktemp '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/chatgpt_send.'"'"'${step}'"'"'.err.XXXXXX')"
+  set +e
+  run_chatgpt_send "$@" >"${tmp_out}" 2>"${tmp_err}"
+  local rc=$?
+  if (( errexit_restore == 1 )); then
+    set -e
+  else
+    set +e
+  fi
+  out="$(cat "${tmp_out}" 2>/dev/null || true)"
+  child_log_append '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' < "${tmp_out}" 2>/dev/null || true
+  child_log_append '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' < "${tmp_err}" 2>/dev/null || true
+  child_log_append "${stream_log}" < "${tmp_out}" 2>/dev/null || true
+  child_log_append "${stream_log}" < "${tmp_err}" 2>/dev/null || true
+  rm -f "${tmp_out}" "${tmp_err}" 2>/dev/null || true
+  emit_browser_used_once "${step}" "${rc}"
+  echo "[child] step=${step} rc=${rc} out=${out}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  if [[ "${rc}" == "0" ]]; then
+    iter_status "${step}" "done" "chatgpt_send_capture_rc=0"
+  else
+    iter_status "${step}" "blocked" "chatgpt_send_capture_rc=${rc}"
+  fi
+  printf '%s\n' "$out"
+  return "$rc"
+}
+
+cd '/tmp/tmp.9i6btYHb2d/project'
+child_chat_url=""
+if [[ '1' == '1' ]]; then
+  if [[ 'optional' == 'required' ]]; then
+    run_chatgpt_send_logged "open-browser" --open-browser --chatgpt-url https://chatgpt.com/
+  else
+    run_chatgpt_send_logged "open-browser" --open-browser --chatgpt-url https://chatgpt.com/ || true
+  fi
+fi
+
+if [[ '0' == '1' ]]; then
+  child_topic="child-child-20261019-125004-20987"
+  if [[ 'optional' == 'required' ]]; then
+    init_rc=0
+    run_chatgpt_send_logged "init-specialist" --timeout 120 --init-specialist --topic "${child_topic}" || init_rc=$?
+    if [[ "${init_rc}" != "0" ]]; then
+      echo "[child] step=init-specialist note=non_fatal_failure rc=${init_rc}; continue_with_fallback" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+    fi
+    run_chatgpt_send_logged "sync-chat-url" --sync-chatgpt-url || true
+    child_chat_url="$(run_chatgpt_send_capture "show-chat-url" --show-chatgpt-url | tail -n 1 || true)"
+    echo "[child] specialist_chat_url=${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  else
+    run_chatgpt_send_logged "init-specialist" --timeout 120 --init-specialist --topic "${child_topic}" || true
+    run_chatgpt_send_logged "sync-chat-url" --sync-chatgpt-url || true
+    child_chat_url="$(run_chatgpt_send_capture "show-chat-url" --show-chatgpt-url | tail -n 1 || true)"
+    echo "[child] specialist_chat_url=${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  fi
+fi
+
+if [[ 'optional' != 'disabled' ]] && [[ -z "${child_chat_url:-}" ]]; then
+  child_chat_url="$(run_chatgpt_send_capture "show-chat-url" --show-chatgpt-url | tail -n 1 || true)"
+  if [[ -n "${child_chat_url:-}" ]]; then
+    echo "[child] specialist_chat_url=${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  fi
+fi
+if [[ -n "${child_chat_url:-}" ]] && [[ "${child_chat_url}" =~ ^https://chatgpt\.com/c/[A-Za-z0-9-]+$ ]]; then
+  export CHATGPT_SEND_FORCE_CHAT_URL="${child_chat_url}"
+  echo "[child] pinned_route_url=${CHATGPT_SEND_FORCE_CHAT_URL}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  cat >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.prompt.txt' <<PINNED_ROUTE
+12) Для каждого вызова /home/matrix/projects/chatgpt-send/bin/chatgpt_send с отправкой сообщения ( --prompt / --prompt-file ) обязательно указывай явный --chatgpt-url '${child_chat_url}'.
+PINNED_ROUTE
+fi
+
+set +e
+extra_git_arg=""
+if [[ '1' == '1' ]]; then
+  extra_git_arg="--skip-git-repo-check"
+fi
+
+if [[ -n '' ]]; then
+  flow_ok "read"
+  '/tmp/tmp.9i6btYHb2d/fake_codex' exec --full-auto ${extra_git_arg} -m '' -C '/tmp/tmp.9i6btYHb2d/project' -o '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' - < '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.prompt.txt' 2>&1 | child_log_tee
+  st=${PIPESTATUS[0]}
+else
+  flow_ok "read"
+  '/tmp/tmp.9i6btYHb2d/fake_codex' exec --full-auto ${extra_git_arg} -C '/tmp/tmp.9i6btYHb2d/project' -o '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' - < '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.prompt.txt' 2>&1 | child_log_tee
+  st=${PIPESTATUS[0]}
+fi
+set -e
+if [[ "${st}" == "0" ]]; then
+  flow_ok "execute"
+fi
+
+# Enforce browser policy from child final message/logs.
+browser_line=""
+if [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' ]]; then
+  browser_line="$(grep -Eo 'CHILD_BROWSER_USED:.*' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' | tail -n 1 || true)"
+fi
+if [[ -z "${browser_line:-}" ]] && [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]]; then
+  browser_line="$(grep -Eo 'CHILD_BROWSER_USED:.*' < <(child_log_view) | tail -n 1 || true)"
+fi
+prompt_cmd_count="$(grep -Ec 'chatgpt_send[^[:cntrl:]]*--prompt' < <(child_log_view) || true)"
+chat_url_line="$(grep -Eo 'specialist_chat_url=https://chatgpt\.com/c/[A-Za-z0-9-]+' < <(child_log_view) | tail -n 1 || true)"
+has_browser_evidence=0
+if [[ "${browser_line}" =~ EVIDENCE:[[:space:]]*https://chatgpt\.com/c/ ]]; then
+  has_browser_evidence=1
+fi
+policy_fail_code=0
+
+if [[ 'optional' == 'required' ]]; then
+  # Do not fail solely because early URL sync did not return /c/... .
+  # If child later proves real browser usage with chat evidence, policy is satisfied.
+  if [[ '0' == '1' ]] && [[ -z "${chat_url_line}" ]] && [[ "${has_browser_evidence}" == "0" ]] && [[ "${prompt_cmd_count}" == "0" ]]; then
+    policy_fail_code=45
+  fi
+  if [[ "${prompt_cmd_count}" == "0" ]] && [[ "${has_browser_evidence}" == "0" ]]; then
+    if [[ "${policy_fail_code}" == "0" ]]; then
+      policy_fail_code=44
+    fi
+  fi
+  if [[ ! "${browser_line}" =~ CHILD_BROWSER_USED:[[:space:]]*yes ]]; then
+    if [[ "${policy_fail_code}" == "0" ]]; then
+      policy_fail_code=41
+    fi
+  fi
+  if [[ ! "${browser_line}" =~ EVIDENCE:[[:space:]]*https://chatgpt\.com/c/ ]]; then
+    if [[ "${policy_fail_code}" == "0" ]]; then
+      policy_fail_code=42
+    fi
+  fi
+elif [[ 'optional' == 'disabled' ]]; then
+  if [[ "${browser_line}" =~ CHILD_BROWSER_USED:[[:space:]]*yes ]]; then
+    policy_fail_code=43
+  fi
+fi
+
+if [[ "${policy_fail_code}" != "0" ]]; then
+  case "${policy_fail_code}" in
+    41) STATUS="E_CHILD_BROWSER_REQUIRED_NOT_USED" ;;
+    42) STATUS="E_CHILD_BROWSER_REQUIRED_NO_EVIDENCE" ;;
+    43) STATUS="E_CHILD_BROWSER_DISABLED_VIOLATION" ;;
+    44) STATUS="E_CHILD_BROWSER_REQUIRED_NO_PROMPT" ;;
+    45) STATUS="E_CHILD_BROWSER_REQUIRED_NO_CHAT_URL" ;;
+    *) STATUS="E_CHILD_BROWSER_POLICY_FAILED" ;;
+  esac
+  echo "[child] browser_policy_check=failed code=${policy_fail_code} prompt_cmd_count=${prompt_cmd_count} line=${browser_line}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  st="${policy_fail_code}"
+fi
+
+# Mark common transient infra failures explicitly in child logs.
+if [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]] && grep -q 'Timed out waiting for assistant response activity' < <(child_log_view); then
+  if [[ "${STATUS}" == "UNKNOWN" ]]; then
+    STATUS="E_ACTIVITY_TIMEOUT"
+  fi
+  echo "[child] error_code=E_ACTIVITY_TIMEOUT reason=assistant_activity_timeout original_exit=${st}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+elif [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' ]] && grep -q 'Timed out waiting for assistant response activity' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt'; then
+  if [[ "${STATUS}" == "UNKNOWN" ]]; then
+    STATUS="E_ACTIVITY_TIMEOUT"
+  fi
+  echo "[child] error_code=E_ACTIVITY_TIMEOUT reason=assistant_activity_timeout original_exit=${st}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+fi
+if [[ "${st}" == "70" ]] || ( [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]] && grep -q 'Failed to acquire chatgpt_send lock within' < <(child_log_view) ); then
+  if [[ "${STATUS}" == "UNKNOWN" ]]; then
+    STATUS="E_LOCK_TIMEOUT"
+  fi
+  echo "[child] error_code=E_LOCK_TIMEOUT reason=lock_timeout original_exit=${st}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+fi
+
+# Codex may return non-zero on rollout-recorder shutdown even after producing
+# a valid final CHILD_RESULT. Keep successful handoffs stable for coordinator.
+if [[ "${st}" != "0" ]]   && [[ "${policy_fail_code}" == "0" ]]   && [[ "${st}" != "70" ]]   && [[ "${st}" != "41" ]] && [[ "${st}" != "42" ]] && [[ "${st}" != "43" ]] && [[ "${st}" != "44" ]] && [[ "${st}" != "45" ]]   && [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt' ]]   && grep -q '^CHILD_RESULT:' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.last.txt'; then
+  echo "[child] normalized_exit=0 reason=child_result_present original_exit=${st}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  st=0
+fi
+
+flow_read_ln="$(grep -n 'FLOW_OK phase=read' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log' | head -n 1 | cut -d: -f1 || true)"
+flow_exec_ln="$(grep -n 'FLOW_OK phase=execute' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log' | head -n 1 | cut -d: -f1 || true)"
+flow_report_ln="$(grep -n 'FLOW_OK phase=report' '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.status.log' | head -n 1 | cut -d: -f1 || true)"
+flow_violation=0
+flow_violation_reason=""
+if [[ -n "${flow_exec_ln:-}" ]] && { [[ -z "${flow_read_ln:-}" ]] || (( flow_exec_ln < flow_read_ln )); }; then
+  flow_violation=1
+  flow_violation_reason="execute_without_read"
+fi
+if [[ -n "${flow_report_ln:-}" ]] && { [[ -z "${flow_exec_ln:-}" ]] || (( flow_report_ln < flow_exec_ln )); }; then
+  flow_violation=1
+  if [[ -n "${flow_violation_reason:-}" ]]; then
+    flow_violation_reason="${flow_violation_reason},report_without_execute"
+  else
+    flow_violation_reason="report_without_execute"
+  fi
+fi
+if [[ "${flow_violation}" == "1" ]]; then
+  STATUS="E_FLOW_ORDER_VIOLATION"
+  echo "[child] E_FLOW_ORDER_VIOLATION reason=${flow_violation_reason}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+  iter_status "flow-order" "blocked" "E_FLOW_ORDER_VIOLATION:${flow_violation_reason}"
+  if [[ 'optional' == 'required' ]] && [[ "${st}" == "0" ]]; then
+    st=46
+  fi
+fi
+
+if [[ "${st}" == "0" ]]; then
+  iter_status "final" "done" "child_completed"
+  flow_ok "report"
+  if [[ -n "${child_chat_url:-}" ]] && [[ "${child_chat_url}" =~ ^https://chatgpt\.com/c/[A-Za-z0-9-]+$ ]]; then
+    set +e
+    run_chatgpt_send --ack --chatgpt-url "${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' 2>&1
+    ack_rc=$?
+    set -e
+    if [[ "${ack_rc}" == "0" ]]; then
+      echo "[child] ack_status=done chat_url=${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+    else
+      echo "[child] ack_status=failed rc=${ack_rc} chat_url=${child_chat_url}" >> '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log'
+    fi
+  fi
+else
+  if [[ -f '/root/package/state/runs/pool-20261019-124911-27955/results/child-20261019-125004-20987/child-20261019-125004-20987.log' ]] && grep -q 'E_PRECHECK_GENERATION_IN_PROGRESS' < <(child_log_view); then
+    iter_status "final" "waiting" "generation_in_progress rc=${st}"
+  else
+    iter_status "final" "blocked" "child_exit=${st}"
+  fi
+  if [[ "${STATUS}" == "UNKNOWN" ]]; then
+    STATUS="E_CHILD_FAILED"
+  fi
+fi
+
+exit $st
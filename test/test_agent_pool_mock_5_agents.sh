@@ -67,6 +67,8 @@ out="$(
 )"
 
 echo "$out" | rg -q -- '^POOL_STATUS=OK$'
+# Mock pools keep the chat health store in their own run dir, not the checkout.
+echo "$out" | rg -q -- "^POOL_CHAT_HEALTH_STORE=$pool_dir/chat_health.json\$"
 summary_jsonl="$(echo "$out" | sed -n 's/^POOL_SUMMARY_JSONL=//p' | tail -n 1)"
 summary_csv="$(echo "$out" | sed -n 's/^POOL_SUMMARY_CSV=//p' | tail -n 1)"
 final_summary_jsonl="$(echo "$out" | sed -n 's/^POOL_FINAL_SUMMARY_JSONL=//p' | tail -n 1)"
@@ -0,0 +1,105 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+dir="$tmp/slots"
+mkdir -p "$dir"
+
+agent() {
+  # agent <run_id> <script>: one run sharing the browser in phase slot scope.
+  RUN_ID="$1" ROOT="$ROOT_DIR" SCRIPT_DIR="$ROOT_DIR/bin" TMP="$tmp" \
+  CDP_SLOT_SCOPE=phase CDP_SLOT_MAX=2 CDP_SLOT_DIR="$dir" CDP_SLOT_WAIT_TIMEOUT_SEC="${WAIT_SEC:-20}" \
+    bash -c '
+      set -euo pipefail
+      source "$ROOT/bin/lib/chatgpt_send/transport_mock.sh"
+      source "$ROOT/bin/lib/chatgpt_send/core.sh"
+      '"$2"
+}
+
+wait_for() {
+  local i
+  for ((i = 0; i < 100; i++)); do
+    [[ -e "$1" ]] && return 0
+    sleep 0.05
+  done
+  return 1
+}
+
+# Agent A is mid-send when agent B restarts the browser: the restart waits for
+# the send phase to end, and a phase started during the restart waits for it.
+agent sender '
+  cdp_slot_acquire send
+  touch "$TMP/sending"
+  sleep 1
+  cdp_slot_release
+' 2>"$tmp/a.err" &
+a_pid=$!
+wait_for "$tmp/sending"
+
+agent restarter '
+  cdp_browser_acquire restart
+  touch "$TMP/restarting"
+  sleep 1
+  cdp_browser_release
+' 2>"$tmp/b.err" &
+b_pid=$!
+wait_for "$tmp/restarting"
+
+agent prober '
+  cdp_slot_acquire reply_probe
+  cdp_slot_release
+' 2>"$tmp/c.err"
+wait "$a_pid"
+wait "$b_pid"
+
+ts() { sed -n "s/^$2 .*ts_ms=\([0-9]*\) .*/\1/p" "$1" | head -n 1; }
+a_release="$(ts "$tmp/a.err" SLOT_RELEASE)"
+b_acquire="$(ts "$tmp/b.err" 'BROWSER_LOCK event=acquire')"
+b_release="$(ts "$tmp/b.err" 'BROWSER_LOCK event=release')"
+c_acquire="$(ts "$tmp/c.err" SLOT_ACQUIRE)"
+[[ -n "$a_release" && -n "$b_acquire" && -n "$b_release" && -n "$c_acquire" ]] || {
+  cat "$tmp"/*.err >&2
+  exit 1
+}
+(( b_acquire >= a_release ))
+(( c_acquire >= b_release ))
+grep -q '^BROWSER_LOCK event=acquire op=restart wait_ms=[0-9]* ' "$tmp/b.err"
+grep -q '^BROWSER_LOCK event=release op=restart held_ms=[0-9]* ' "$tmp/b.err"
+
+# The exclusive holder runs its own phases without a slot, and nested browser
+# ops reuse the hold instead of waiting on themselves.
+agent owner '
+  cdp_browser_acquire restart
+  cdp_browser_acquire tab_cleanup
+  cdp_slot_acquire probe_contract
+  cdp_slot_release
+  cdp_browser_release
+  cdp_browser_release
+' 2>"$tmp/d.err"
+[[ "$(grep -c '^BROWSER_LOCK event=' "$tmp/d.err")" == "2" ]]
+! grep -q '^SLOT_' "$tmp/d.err"
+
+# A phase that cannot get the browser back in time gives its slot up again.
+agent holder '
+  cdp_browser_acquire restart
+  touch "$TMP/held"
+  sleep 3
+  cdp_browser_release
+' 2>/dev/null &
+h_pid=$!
+wait_for "$tmp/held"
+st=0
+WAIT_SEC=1 agent late '
+  cdp_slot_acquire send
+' 2>"$tmp/e.err" || st=$?
+wait "$h_pid"
+[[ "$st" == "73" ]]
+grep -q '^E_SLOT_ACQUIRE_TIMEOUT phase=send .* reason=browser_lock ' "$tmp/e.err"
+for claim in "$dir"/chatgpt-send-cdp-slot.*.holder.json; do
+  [[ ! -s "$claim" ]]
+done
+
+echo "OK"
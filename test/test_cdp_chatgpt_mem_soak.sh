@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+# A real cdp_chatgpt.py send held in wait_for_response by the mock endpoint;
+# the full 10k-poll benchmark is the same command with the default --polls.
+out="$(python3 "$ROOT_DIR/bin/mock_cdp.py" soak --polls 3000 --heartbeat-sec 0.1 \
+  --first-token-ms 300 --tick-ms 50 --timeout 120 --out "$tmp/soak.json" 2>&1)" \
+  || { echo "$out" >&2; exit 1; }
+grep -q '^MOCK_CDP_SOAK rc=0 polls=30[0-9][0-9] .* verdict=flat$' <<<"$out"
+
+python3 - "$tmp/soak.json" <<'PY'
+import json
+import sys
+
+r = json.load(open(sys.argv[1], encoding="utf-8"))
+assert r["heartbeats"] >= 3, r
+assert all(s["mem_kb"] > 0 and s["rss_kb"] > 0 for s in r["samples"]), r["samples"]
+assert r["traced_kb"]["growth"] <= r["limits_kb"]["traced_growth"], r["traced_kb"]
+ms = r["mem_stats"]
+assert ms["traced_kb"] > 0 and ms["rss_peak_kb"] > 0 and ms["evals"] >= 3000, ms
+PY
+
+echo "OK"
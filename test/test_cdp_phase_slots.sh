@@ -0,0 +1,204 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+SCRIPT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)/bin/chatgpt_send"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+fake_bin="$tmp/fake-bin"
+slot_dir="$tmp/slots"
+mkdir -p "$fake_bin" "$slot_dir"
+
+cat >"$fake_bin/curl" <<'EOF_CURL'
+#!/usr/bin/env bash
+set -euo pipefail
+url=""
+for a in "$@"; do
+  if [[ "$a" == http://127.0.0.1:* ]]; then
+    url="$a"
+  fi
+done
+if [[ "$url" == *"/json/version"* ]]; then
+  printf '%s\n' '{"Browser":"fake"}'
+  exit 0
+fi
+if [[ "$url" == *"/json/list"* ]]; then
+  printf '[{"id":"tab1","url":"%s","title":"Fake chat","webSocketDebuggerUrl":"ws://fake"}]\n' "$FAKE_TAB_URL"
+  exit 0
+fi
+printf '%s\n' '{}'
+exit 0
+EOF_CURL
+chmod +x "$fake_bin/curl"
+
+# Fake browser tool: every call takes a little while (the CDP round trip) and
+# the reply only shows up after FAKE_READY_AFTER probes.
+make_root() {
+  local root="$1"
+  mkdir -p "$root/bin" "$root/docs" "$root/state"
+  printf '%s\n' "bootstrap" >"$root/docs/specialist_bootstrap.txt"
+  cat >"$root/bin/cdp_chatgpt.py" <<'EOF_PY'
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--precheck-only", action="store_true")
+ap.add_argument("--fetch-last", action="store_true")
+ap.add_argument("--fetch-last-n", type=int, default=6)
+ap.add_argument("--send-no-wait", action="store_true")
+ap.add_argument("--reply-ready-probe", action="store_true")
+ap.add_argument("--prompt")
+ap.add_argument("--chatgpt-url")
+ap.add_argument("--cdp-port")
+ap.add_argument("--timeout")
+args, _ = ap.parse_known_args()
+
+state = Path(os.environ["FAKE_STATE_DIR"])
+send_done = state / "send_done"
+probes = state / "probes"
+time.sleep(0.05)
+
+if args.fetch_last:
+    norm = re.sub(r"\s+", " ", (args.prompt or "").strip())
+    prompt_hash = hashlib.sha256(norm.encode("utf-8")).hexdigest() if norm else ""
+    print(json.dumps({
+        "url": args.chatgpt_url or "",
+        "stop_visible": False,
+        "total_messages": 0,
+        "limit": int(args.fetch_last_n or 6),
+        "assistant_after_last_user": False,
+        "last_user_text": "",
+        "last_user_hash": "",
+        "assistant_text": "",
+        "assistant_tail_hash": "",
+        "assistant_tail_len": 0,
+        "assistant_preview": "",
+        "user_tail_hash": prompt_hash,
+        "checkpoint_id": "SPC-2099-01-01T00:00:00Z-none",
+        "ts": "2099-01-01T00:00:00Z",
+        "messages": [],
+    }), flush=True)
+    raise SystemExit(0)
+
+def ready():
+    try:
+        return int(probes.read_text().strip()) >= int(os.environ.get("FAKE_READY_AFTER", "6"))
+    except Exception:
+        return False
+
+if args.precheck_only:
+    if send_done.exists() and ready():
+        print("assistant reply " + state.name, flush=True)
+        raise SystemExit(0)
+    print("E_PRECHECK_NO_NEW_REPLY: need_send", flush=True)
+    raise SystemExit(10)
+
+if args.send_no_wait:
+    send_done.write_text("1")
+    print("SEND_NO_WAIT_OK", flush=True)
+    raise SystemExit(0)
+
+if args.reply_ready_probe:
+    n = int(probes.read_text().strip()) + 1 if probes.exists() else 1
+    probes.write_text(str(n))
+    if ready():
+        print("REPLY_READY: 1", flush=True)
+        raise SystemExit(0)
+    print("REPLY_READY: 0", flush=True)
+    raise SystemExit(10)
+
+print("unsupported fake invocation", flush=True)
+raise SystemExit(3)
+EOF_PY
+  chmod +x "$root/bin/cdp_chatgpt.py"
+}
+
+run_one() {
+  # run_one <name> <chat_id>
+  local name="$1" chat="$2"
+  make_root "$tmp/$name"
+  mkdir -p "$tmp/$name/fake"
+  FAKE_STATE_DIR="$tmp/$name/fake" FAKE_TAB_URL="https://chatgpt.com/c/$chat" \
+    CHATGPT_SEND_ROOT="$tmp/$name" \
+    CHATGPT_SEND_RUN_ID="run-$name" \
+    "$SCRIPT" --chatgpt-url "https://chatgpt.com/c/$chat" --prompt "phase slots $name" \
+    >"$tmp/$name.out" 2>"$tmp/$name.err"
+}
+
+export PATH="$fake_bin:$PATH"
+export CHATGPT_SEND_CDP_PORT="9222"
+export CHATGPT_SEND_REPLY_POLLING=1
+export CHATGPT_SEND_REPLY_POLL_MS=100
+export CHATGPT_SEND_REPLY_MAX_SEC=20
+export CHATGPT_SEND_CDP_SLOT_SCOPE=phase
+export CHATGPT_SEND_MAX_CDP_SLOTS=1
+export CHATGPT_SEND_CDP_SLOT_DIR="$slot_dir"
+export CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC=30
+export CHATGPT_SEND_LOCK_FILE="$tmp/browser.lock"
+
+# One slot, two runs: each holds it only while touching the browser, so both
+# reply waits proceed side by side instead of one run after the other.
+st_a=0
+st_b=0
+run_one a "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa" &
+pid_a=$!
+run_one b "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb" &
+pid_b=$!
+wait "$pid_a" || st_a=$?
+wait "$pid_b" || st_b=$?
+if [[ "$st_a" != "0" ]] || [[ "$st_b" != "0" ]]; then
+  cat "$tmp/a.err" "$tmp/b.err" >&2
+  echo "runs failed: a=$st_a b=$st_b" >&2
+  exit 1
+fi
+grep -q 'assistant reply fake' "$tmp/a.out"
+grep -q 'assistant reply fake' "$tmp/b.out"
+grep -q '\[LOCK\] event=skip reason=cdp_slot_scope_phase' "$tmp/a.err"
+
+python3 - "$tmp/a.err" "$tmp/b.err" <<'PY'
+import re
+import sys
+
+events = []
+spans = {}
+for path in sys.argv[1:]:
+    txt = open(path, encoding="utf-8").read()
+    phases = set(re.findall(r"SLOT_ACQUIRE slot=0 phase=([a-z_]+) wait_ms=\d+ queued_behind=\d+ queue_depth=\d+ ts_ms=\d+ run_id=", txt))
+    assert {"precheck", "send", "reply_probe"} <= phases, (path, phases)
+    ts = []
+    for kind, t in re.findall(r"SLOT_(ACQUIRE|RELEASE) .*?ts_ms=(\d+)", txt):
+        events.append((int(t), kind))
+        ts.append(int(t))
+    spans[path] = (min(ts), max(ts))
+    m = re.search(r"CDP_SLOT_SUMMARY acquires=(\d+) wait_ms_total=\d+ held_ms_total=(\d+) run_ms=(\d+) duty_pct=[0-9.]+ eff_concurrency=[0-9.]+ wait_hist=(\S+) held_hist=(\S+) run_id=", txt)
+    assert m, path
+    assert int(m.group(1)) >= 5 and int(m.group(2)) < int(m.group(3)), m.group(0)
+    assert re.fullmatch(r"(le|gt)\d+:\d+(,(le|gt)\d+:\d+)*", m.group(5)), m.group(0)
+
+inflight = peak = 0
+for _, kind in sorted(events, key=lambda e: (e[0], 0 if e[1] == "RELEASE" else 1)):
+    inflight += 1 if kind == "ACQUIRE" else -1
+    peak = max(peak, inflight)
+assert peak == 1, peak
+(a0, a1), (b0, b1) = spans.values()
+assert a0 < b1 and b0 < a1, spans
+PY
+
+# Default scope keeps the whole-run behaviour: no per-phase slot markers.
+rm -rf "$tmp/c"
+st=0
+CHATGPT_SEND_CDP_SLOT_SCOPE=run run_one c "cccccccc-cccc-cccc-cccc-cccccccccccc" || st=$?
+[[ "$st" == "0" ]] || { cat "$tmp/c.err" >&2; exit 1; }
+if grep -q 'SLOT_ACQUIRE\|CDP_SLOT_SUMMARY' "$tmp/c.err"; then
+  echo "phase slots taken with CHATGPT_SEND_CDP_SLOT_SCOPE=run" >&2
+  exit 1
+fi
+
+echo "OK"
@@ -0,0 +1,96 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+SLOTS="$ROOT_DIR/bin/cdp_slots.py"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+dir="$tmp/slots"
+mkdir -p "$dir"
+
+# The release gate bounds p95 slot wait; heavy fan-out must stay under it.
+max_p95="$(sed -n 's/^MAX_P95_LOCK_WAIT_MS=\([0-9][0-9]*\)$/\1/p' "$ROOT_DIR/docs/RELEASE_GATE.md" | head -n 1)"
+[[ "$max_p95" == "500" ]]
+
+worker() {
+  # worker <name> <cycles>: short browser phases separated by reply-wait gaps.
+  RUN_ID="$1" ROOT="$ROOT_DIR" SCRIPT_DIR="$ROOT_DIR/bin" \
+  CDP_SLOT_SCOPE=phase CDP_SLOT_MAX=2 CDP_SLOT_DIR="$dir" CDP_SLOT_WAIT_TIMEOUT_SEC=30 \
+    bash -c '
+      set -euo pipefail
+      source "$ROOT/bin/lib/chatgpt_send/transport_mock.sh"
+      source "$ROOT/bin/lib/chatgpt_send/core.sh"
+      for ((i = 0; i < $1; i++)); do
+        cdp_slot_acquire reply_probe
+        sleep 0.05
+        cdp_slot_release
+        sleep 0.3
+      done
+    ' _ "$2"
+}
+
+# Ten runs, two slots, every run back in the queue after each reply-wait gap.
+pids=()
+for n in $(seq 1 10); do
+  worker "fan$n" 8 2>"$tmp/fan$n.err" &
+  pids+=("$!")
+done
+for pid in "${pids[@]}"; do
+  wait "$pid"
+done
+
+cat "$tmp"/fan*.err >"$tmp/all.err"
+if grep -q '^E_SLOT_ACQUIRE_TIMEOUT' "$tmp/all.err"; then
+  cat "$tmp/all.err" >&2
+  exit 1
+fi
+python3 - "$tmp/all.err" "$max_p95" <<'PY'
+import re
+import sys
+
+text = open(sys.argv[1], encoding="utf-8").read()
+waits = sorted(int(x) for x in re.findall(r"^SLOT_ACQUIRE .* wait_ms=(\d+) ", text, re.M))
+assert len(waits) == 80, len(waits)
+p95 = waits[int(0.95 * (len(waits) - 1))]
+assert p95 <= int(sys.argv[2]), f"p95 slot wait {p95}ms over {sys.argv[2]}ms: {waits}"
+
+# Never more owners than slots, never two owners of one slot.
+events = []
+for m in re.finditer(r"^SLOT_(ACQUIRE|RELEASE) slot=(\d+) .*?ts_ms=(\d+)", text, re.M):
+    events.append((int(m.group(3)), 0 if m.group(1) == "RELEASE" else 1, int(m.group(2))))
+inflight, owners = 0, {}
+for _, acquire, slot in sorted(events):
+    delta = 1 if acquire else -1
+    inflight += delta
+    owners[slot] = owners.get(slot, 0) + delta
+    assert inflight <= 2 and owners[slot] <= 1, (inflight, owners)
+PY
+[[ -z "$(ls -A "$dir/chatgpt-send-cdp-slot.queue")" ]]
+
+# The bash queue and the python broker share one protocol: a broker waiter
+# queued behind two shell-held slots is woken by the shell release.
+RUN_ID=holder ROOT="$ROOT_DIR" SCRIPT_DIR="$ROOT_DIR/bin" \
+CDP_SLOT_SCOPE=phase CDP_SLOT_MAX=2 CDP_SLOT_DIR="$dir" \
+  bash -c '
+    set -euo pipefail
+    source "$ROOT/bin/lib/chatgpt_send/transport_mock.sh"
+    source "$ROOT/bin/lib/chatgpt_send/core.sh"
+    cdp_slot_acquire first
+    CDP_SLOT_FD_A="$CDP_SLOT_FD"
+    CDP_SLOT_FD=""
+    cdp_slot_acquire second
+    # The broker must not inherit the slot fds, or it would hold them itself.
+    python3 "$SCRIPT_DIR/cdp_slots.py" acquire --dir "$CDP_SLOT_DIR" --max-slots 2 \
+      --run-id broker --pid "$$" --timeout-sec 20 >"$1" {CDP_SLOT_FD}>&- {CDP_SLOT_FD_A}>&- &
+    broker=$!
+    for ((i = 0; i < 100; i++)); do
+      ! cdp_slot_queue_empty && break
+      sleep 0.05
+    done
+    cdp_slot_release
+    wait "$broker"
+  ' _ "$tmp/broker.out" 2>"$tmp/mixed.err" || { cat "$tmp/mixed.err" >&2; exit 1; }
+grep -q '^granted slot=[01] wait_ms=[0-9]* queued_behind=0 queue_depth=0$' "$tmp/broker.out"
+
+echo "OK"
@@ -0,0 +1,78 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+SLOTS="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)/bin/cdp_slots.py"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+dir="$tmp/slots"
+mkdir -p "$dir"
+
+take() {
+  # take <name>: queue for the single slot, hold it briefly, log the grant.
+  local name="$1" grant slot fd
+  grant="$(python3 "$SLOTS" acquire --dir "$dir" --max-slots 1 --run-id "$name" --pid "$BASHPID" --timeout-sec 60)"
+  slot="$(sed -n 's/.*slot=\([0-9][0-9]*\).*/\1/p' <<<"$grant")"
+  exec {fd}>"$dir/chatgpt-send-cdp-slot.${slot}.lock"
+  flock -x "$fd"
+  printf '%s %s\n' "$name" "$grant" >>"$tmp/order.txt"
+  sleep 0.1
+  exec {fd}>&-
+  python3 "$SLOTS" release --dir "$dir" --max-slots 1 --slot "$slot" --run-id "$name" >/dev/null
+}
+
+queued() {
+  find "$dir/chatgpt-send-cdp-slot.queue" -name '*.json' | wc -l
+}
+
+wait_queued() {
+  local want="$1" i
+  for ((i=0; i<300; i++)); do
+    [[ "$(queued)" -ge "$want" ]] && return 0
+    sleep 0.1
+  done
+  echo "queue never reached $want" >&2
+  return 1
+}
+
+# The holder keeps the only slot while three waiters line up behind it.
+grant="$(python3 "$SLOTS" acquire --dir "$dir" --max-slots 1 --run-id holder --pid $$ --timeout-sec 5)"
+[[ "$grant" == "granted slot=0 wait_ms="*" queued_behind=0 queue_depth=0" ]]
+# Only the claim, no flock here: the background waiters would inherit the fd.
+
+pids=()
+for name in w1 w2 w3; do
+  take "$name" &
+  pids+=("$!")
+  wait_queued "${#pids[@]}"
+done
+
+status="$(python3 "$SLOTS" status --dir "$dir" --max-slots 1)"
+grep -q '^CDP_SLOTS max=1 busy=1 queue_depth=3 ' <<<"$status"
+grep -q '^CDP_SLOT slot=0 holder_run_id=holder phase=run ' <<<"$status"
+
+# A short wait gives up with rc 73 and reports where it stood.
+st=0
+out="$(python3 "$SLOTS" acquire --dir "$dir" --max-slots 1 --run-id late --pid $$ --timeout-sec 1)" || st=$?
+[[ "$st" == "73" ]]
+grep -q '^timeout wait_ms=[0-9]* position=4 queue_depth=4$' <<<"$out"
+
+# Release wakes only the head of the queue: one free slot, one waiter woken.
+out="$(python3 "$SLOTS" release --dir "$dir" --max-slots 1 --slot 0 --run-id holder)"
+[[ "$out" == "released slot=0 woken=1" ]] || { echo "$out" >&2; exit 1; }
+for pid in "${pids[@]}"; do
+  wait "$pid"
+done
+
+# Grants follow arrival order; each waiter saw how many were ahead of it.
+[[ "$(cut -d' ' -f1 "$tmp/order.txt" | tr '\n' ' ')" == "w1 w2 w3 " ]]
+grep -q '^w3 granted slot=0 wait_ms=[0-9]* queued_behind=2 ' "$tmp/order.txt"
+[[ "$(queued)" == "0" ]]
+
+# A claim left by a dead owner does not block the slot.
+printf '{"run_id": "ghost", "pid": 999999, "acquired_ms": 1}\n' >"$dir/chatgpt-send-cdp-slot.0.holder.json"
+out="$(python3 "$SLOTS" acquire --dir "$dir" --max-slots 1 --run-id fresh --pid $$ --timeout-sec 5 2>"$tmp/err")"
+grep -q '^granted slot=0 ' <<<"$out"
+grep -q 'W_CDP_SLOT_STALE_HOLDER slot=0 holder_run_id=ghost holder_pid=999999' "$tmp/err"
+
+echo "OK"
@@ -0,0 +1,165 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+trace_dir="$tmp/trace"
+
+CHATGPT_SEND_CDP_TRACE_DIR="$trace_dir" python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" "$trace_dir" <<'PY'
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+trace_dir = Path(sys.argv[2])
+
+
+class FakeWS:
+    """First Runtime.evaluate hits a destroyed context; Page.navigate never answers."""
+
+    def __init__(self):
+        self.evaluates = 0
+        self.pending = []
+
+    def send(self, s):
+        msg = json.loads(s)
+        if msg["method"] == "Page.navigate":
+            self.pending = []
+            return
+        if msg["method"] == "Runtime.evaluate":
+            self.evaluates += 1
+            if self.evaluates == 1:
+                self.pending = [json.dumps({"id": msg["id"], "error": {"message": "Execution context was destroyed."}})]
+                return
+        self.pending = [
+            json.dumps({"method": "Network.dataReceived"}),
+            json.dumps({"id": msg["id"], "result": {"result": {"value": {"userCount": 1}}}}),
+        ]
+
+    def recv(self):
+        if not self.pending:
+            raise mod.WebSocketTimeoutException("idle")
+        return self.pending.pop(0)
+
+    def settimeout(self, t):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_cdp(capacity=200):
+    cdp = mod.CDP.__new__(mod.CDP)
+    cdp.ws = FakeWS()
+    cdp.next_id = 1
+    cdp.tracer = mod.CDPTracer(capacity=capacity, process_name="test")
+    return cdp
+
+
+cdp = make_cdp()
+assert cdp.eval(mod.js_state_expr(compact=True)) == {"userCount": 1}
+assert cdp.eval(mod.js_send_ready_expr()) == {"userCount": 1}
+try:
+    cdp.call("Page.navigate", {"url": "x"}, timeout=0.3)
+    raise AssertionError("expected timeout")
+except TimeoutError:
+    pass
+
+names = [e["name"] for e in cdp.tracer.events]
+assert names == ["Runtime.evaluate", "Runtime.evaluate", "eval:state_compact", "Runtime.evaluate", "eval:ready", "Page.navigate"], names
+ev = list(cdp.tracer.events)
+assert ev[0]["args"]["outcome"] == "error" and ev[0]["args"]["label"] == "state_compact", ev[0]
+assert ev[1]["args"]["outcome"] == "ok" and ev[1]["args"]["in_bytes"] > 0, ev[1]
+assert ev[2]["args"]["retries"] == 1 and "Execution context" in ev[2]["args"]["retry_reason"], ev[2]
+# The eval slice encloses its CDP round-trips.
+assert ev[2]["ts"] <= ev[0]["ts"] and ev[2]["ts"] + ev[2]["dur"] >= ev[1]["ts"] + ev[1]["dur"], ev[:3]
+assert ev[5]["args"]["outcome"] == "timeout" and ev[5]["args"]["recv_waits"] > 0, ev[5]
+assert "label" not in ev[5]["args"], ev[5]
+
+summary = cdp.tracer.summary()
+assert summary["Runtime.evaluate"]["count"] == 3 and summary["Runtime.evaluate"]["errors"] == 1, summary
+assert summary["eval:state_compact"]["retries"] == 1, summary
+assert summary["Page.navigate"]["timeouts"] == 1, summary
+
+err = io.StringIO()
+with contextlib.redirect_stderr(err):
+    cdp.close()
+line = err.getvalue().strip()
+assert line.startswith("CDP_TRACE path=") and line.endswith("events=6 dropped=0"), line
+path = Path(line.split()[1].split("=", 1)[1])
+assert path.parent == trace_dir
+dump = json.loads(path.read_text(encoding="utf-8"))
+assert dump["traceEvents"][0]["ph"] == "M" and dump["traceEvents"][0]["args"]["name"] == "test"
+assert all(e["ph"] == "X" and "dur" in e for e in dump["traceEvents"][1:])
+assert dump["otherData"]["methods"]["Page.navigate"]["timeouts"] == 1
+
+# Ring buffer keeps the newest slices; totals still cover everything.
+cdp = make_cdp(capacity=4)
+for _ in range(5):
+    cdp.eval("document.readyState")
+assert len(cdp.tracer.events) == 4 and cdp.tracer.dropped == 7, (len(cdp.tracer.events), cdp.tracer.dropped)
+assert cdp.tracer.summary()["eval:ready_state"]["count"] == 5
+# The combined preflight scan is its own slice, named after the process mode.
+assert mod.eval_label(mod.js_preflight_expr(4)) == "preflight"
+cdp.tracer.mode = "preflight_and_send_no_wait"
+err = io.StringIO()
+with contextlib.redirect_stderr(err):
+    cdp.close()
+assert err.getvalue().strip().endswith("dropped=7 mode=preflight_and_send_no_wait"), err.getvalue()
+
+# Tracing off: no tracer, no dump.
+plain = mod.CDP.__new__(mod.CDP)
+plain.ws = FakeWS()
+plain.next_id = 1
+plain.ws.evaluates = 1
+assert plain.eval("1") == {"userCount": 1} and plain.tracer is None
+print("OK")
+PY
+
+# capture_evidence_snapshot merges per-process traces into one file.
+[[ "$(ls "$trace_dir" | wc -l)" == "2" ]]
+fake_bin="$tmp/fake-bin"
+root="$tmp/root"
+mkdir -p "$fake_bin" "$root/state"
+printf '#!/usr/bin/env bash\nexit 7\n' >"$fake_bin/curl"
+chmod +x "$fake_bin/curl"
+out="$(
+  PATH="$fake_bin:$PATH" CHATGPT_SEND_CDP_TRACE_DIR="$trace_dir" CHATGPT_SEND_CDP_TRACE_EVENTS=100 bash -c '
+    set -euo pipefail
+    repo="$1"
+    ROOT="$2"
+    RUN_ID="run-cdp-trace"
+    LOG_DIR="$ROOT/state/runs/$RUN_ID"
+    CDP_PORT=9
+    CAPTURE_EVIDENCE=1
+    SANITIZE_LOGS=1
+    SCRIPT_DIR="$repo/bin"
+    source "$repo/bin/lib/chatgpt_send/core.sh"
+    source "$repo/bin/lib/chatgpt_send/runtime.sh"
+    capture_evidence_snapshot "E_TEST_TRACE"
+  ' _ "$ROOT_DIR" "$root" 2>&1
+)"
+grep -q 'EVIDENCE_CAPTURED reason=E_TEST_TRACE' <<<"$out" || { echo "$out" >&2; exit 1; }
+python3 - "$root/state/runs/run-cdp-trace/evidence/cdp_trace.json" <<'PY'
+import json
+import sys
+
+obj = json.load(open(sys.argv[1], encoding="utf-8"))
+slices = [e for e in obj["traceEvents"] if e["ph"] == "X"]
+assert len([e for e in obj["traceEvents"] if e["ph"] == "M"]) == 2, obj["traceEvents"][:3]
+assert len(slices) == 10, len(slices)
+assert [e["ts"] for e in slices] == sorted(e["ts"] for e in slices)
+methods = obj["otherData"]["methods"]
+assert methods["Runtime.evaluate"]["count"] == 9 and methods["Page.navigate"]["timeouts"] == 1, methods
+assert obj["otherData"]["reason"] == "E_TEST_TRACE"
+print("OK")
+PY
+
+echo "OK"
@@ -0,0 +1,159 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+LOCK="$ROOT_DIR/bin/chat_lock.py"
+
+tmp="$(mktemp -d)"
+pids=()
+cleanup() {
+  for p in "${pids[@]}"; do
+    kill "$p" 2>/dev/null || true
+  done
+  rm -rf "$tmp"
+}
+trap cleanup EXIT
+dir="$tmp/locks"
+key="k1"
+
+# Owner processes: lock liveness is tied to these PIDs.
+owner() {
+  sleep 300 &
+  pids+=("$!")
+  last_owner=$!
+}
+
+acquire_bg() {
+  # acquire_bg <run_id> <owner_pid> <timeout_sec>
+  (
+    python3 "$LOCK" acquire --dir "$dir" --key "$key" --run-id "$1" --pid "$2" --timeout-sec "$3" \
+      >"$tmp/$1.out" 2>"$tmp/$1.err"
+    echo "$? $(date +%s%3N)" >"$tmp/$1.rc"
+  ) &
+}
+
+wait_rc() {
+  for _ in $(seq 1 100); do
+    [[ -s "$tmp/$1.rc" ]] && return 0
+    sleep 0.05
+  done
+  echo "no result for $1" >&2
+  cat "$tmp/$1.err" >&2 || true
+  return 1
+}
+
+wait_grep() {
+  # wait_grep <pattern> <file>
+  for _ in $(seq 1 100); do
+    grep -q "$1" "$2" 2>/dev/null && return 0
+    sleep 0.05
+  done
+  echo "missing '$1' in $2" >&2
+  cat "$2" >&2 || true
+  return 1
+}
+
+release() {
+  python3 "$LOCK" release --dir "$dir" --key "$key" --run-id "$1"
+}
+
+# A holds; B and C queue behind it in arrival order.
+owner; pid_a=$last_owner
+python3 "$LOCK" acquire --dir "$dir" --key "$key" --run-id A --pid "$pid_a" --timeout-sec 1 | grep -q '^granted wait_ms='
+python3 "$LOCK" phase --dir "$dir" --key "$key" --run-id A --phase wait_reply
+owner; pid_b=$last_owner
+acquire_bg B "$pid_b" 20
+wait_grep 'CHAT_LOCK_QUEUED key=k1 position=1 queue_len=1 holder_run_id=A holder_phase=wait_reply' "$tmp/B.err"
+owner; pid_c=$last_owner
+acquire_bg C "$pid_c" 20
+wait_grep 'CHAT_LOCK_QUEUED key=k1 position=2 queue_len=2 holder_run_id=A' "$tmp/C.err"
+status="$(python3 "$LOCK" status --dir "$dir" --json)"
+python3 - "$status" <<'PY'
+import json
+import sys
+
+st = json.loads(sys.argv[1])
+(row,) = st["locks"]
+assert row["holder"]["run_id"] == "A" and row["holder"]["alive"] and row["holder"]["phase"] == "wait_reply", row
+assert [q["run_id"] for q in row["queue"]] == ["B", "C"], row
+PY
+
+# Release wakes only the head waiter, right away (no polling interval).
+t_rel="$(date +%s%3N)"
+release A | grep -q '^released hold_ms=[0-9]* woken=1$'
+wait_rc B
+read -r rc_b t_b <"$tmp/B.rc"
+[[ "$rc_b" == "0" ]]
+(( t_b - t_rel < 800 )) || { echo "handoff took $((t_b - t_rel))ms" >&2; exit 1; }
+grep -q '^granted .*queued_behind=0' "$tmp/B.out"
+[[ ! -s "$tmp/C.rc" ]] || { echo "C jumped the queue" >&2; exit 1; }
+wait_grep 'CHAT_LOCK_QUEUED key=k1 position=1 queue_len=1 holder_run_id=B' "$tmp/C.err"
+
+# B dies without releasing: C detects the stale holder by PID.
+kill "$pid_b"
+wait_rc C
+read -r rc_c _ <"$tmp/C.rc"
+[[ "$rc_c" == "0" ]]
+grep -q 'W_CHAT_LOCK_STALE_HOLDER key=k1 holder_run_id=B' "$tmp/C.err"
+release C >/dev/null
+
+# Hold-time history lets a waiter outlast its base timeout when the holder
+# is expected to finish soon; the default cap (3x the base) leaves room for it.
+python3 - "$dir/chat_$key.stats.json" <<'PY'
+import json
+import sys
+
+st = json.load(open(sys.argv[1], encoding="utf-8"))
+assert st["releases"] == 2 and st["ewma_hold_ms"] > 0, st
+st["ewma_hold_ms"] = 2000
+json.dump(st, open(sys.argv[1], "w", encoding="utf-8"))
+PY
+owner; pid_d=$last_owner
+python3 "$LOCK" acquire --dir "$dir" --key "$key" --run-id D --pid "$pid_d" --timeout-sec 1 | grep -q 'expected_hold_ms=2000'
+owner; pid_e=$last_owner
+acquire_bg E "$pid_e" 1
+wait_grep 'CHAT_LOCK_WAIT_EXTENDED' "$tmp/E.err"
+sleep 1.2
+release D >/dev/null
+wait_rc E
+read -r rc_e _ <"$tmp/E.rc"
+[[ "$rc_e" == "0" ]] || { cat "$tmp/E.err" >&2; exit 1; }
+deadline_ms="$(sed -n 's/^CHAT_LOCK_WAIT_EXTENDED key=k1 position=1 .* deadline_ms=\([0-9]*\) .*/\1/p' "$tmp/E.err")"
+(( deadline_ms > 1000 && deadline_ms <= 3000 )) || { cat "$tmp/E.err" >&2; exit 1; }
+release E >/dev/null
+
+# Without an estimate the base timeout still applies; the ticket is cleaned up.
+rm -f "$dir/chat_$key.stats.json"
+owner; pid_f=$last_owner
+python3 "$LOCK" acquire --dir "$dir" --key "$key" --run-id F --pid "$pid_f" --timeout-sec 1 >/dev/null
+set +e
+out="$(python3 "$LOCK" acquire --dir "$dir" --key "$key" --run-id G --pid "$pid_f" --timeout-sec 1 2>/dev/null)"
+rc=$?
+set -e
+[[ "$rc" == "75" ]]
+[[ "$out" == "timeout wait_ms="*" position=1 holder_run_id=F holder_phase=acquired" ]] || { echo "$out" >&2; exit 1; }
+[[ -z "$(ls "$dir/chat_$key.queue")" ]]
+python3 "$LOCK" status --dir "$dir" | grep -q '^CHAT_LOCK key=k1 holder_run_id=F alive=1 phase=acquired .* queue=0'
+
+# A flock taken outside the queue (an fd inherited by a child of a dead
+# holder) is attributed to that process instead of being broken.
+key="k2"
+(exec 9>"$dir/chat_$key.lock"; flock -x 9; exec sleep 300) &
+orphan=$!
+pids+=("$orphan")
+sleep 0.2
+inode="$(stat -c %i "$dir/chat_$key.lock")"
+owner; pid_h=$last_owner
+export CHATGPT_SEND_CHAT_LOCK_ORPHAN_CHECK_SEC=0.2
+acquire_bg H "$pid_h" 10
+wait_grep "W_CHAT_LOCK_ORPHAN_FD key=k2 held_ms=[0-9]* pids=$orphan\$" "$tmp/H.err"
+wait_grep "CHAT_LOCK_QUEUED key=k2 position=1 queue_len=1 holder_run_id=orphan-fd-$orphan holder_phase=orphan_fd" "$tmp/H.err"
+[[ ! -s "$tmp/H.rc" ]] || { echo "H got the lock while the orphan fd was held" >&2; exit 1; }
+kill "$orphan"
+wait_rc H
+read -r rc_h _ <"$tmp/H.rc"
+[[ "$rc_h" == "0" ]] || { cat "$tmp/H.err" >&2; exit 1; }
+grep -q "W_CHAT_LOCK_STALE_HOLDER key=k2 holder_run_id=orphan-fd-$orphan" "$tmp/H.err"
+[[ "$(stat -c %i "$dir/chat_$key.lock")" == "$inode" ]]
+
+echo "OK"
@@ -0,0 +1,121 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+HEALTH="$ROOT_DIR/bin/chat_health.py"
+MANAGER="$ROOT_DIR/scripts/chat_pool_manager.sh"
+POOL_RUN="$ROOT_DIR/scripts/agent_pool_run.sh"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+store="$tmp/chat_health.json"
+chat_a="https://chatgpt.com/c/aaaaaaaa-0000-0000-0000-000000000001"
+chat_b="https://chatgpt.com/c/bbbbbbbb-0000-0000-0000-000000000002"
+chat_c="https://chatgpt.com/c/cccccccc-0000-0000-0000-000000000003"
+chat_d="https://chatgpt.com/c/dddddddd-0000-0000-0000-000000000004"
+
+timing() {
+  printf 'TIMING send_ms=800 wait_reply_ms=%s total_ms=%s\n' "$1" "$(( $1 + 900 ))"
+}
+
+# A: latency climbing 20s -> 50s per turn (projected p95 crosses the degraded line).
+log_a="$tmp/a.transport.log"
+for ms in 20000 30000 40000; do timing "$ms"; done >"$log_a"
+echo "SOFT_RESET start reason=stale_composer" >>"$log_a"
+out="$(python3 "$HEALTH" --store "$store" ingest --chat-url "$chat_a" "$log_a")"
+grep -q '^CHAT_HEALTH_INGEST chat_id=aaaaaaaa-0000-0000-0000-000000000001 samples=3 soft_resets=1 echo_misses=0 stored=1$' <<<"$out"
+# Re-ingesting the same log reads nothing new; an appended turn is picked up alone.
+out="$(python3 "$HEALTH" --store "$store" ingest --chat-url "$chat_a" "$log_a")"
+grep -q ' samples=0 soft_resets=0 echo_misses=0 stored=0$' <<<"$out"
+timing 50000 >>"$log_a"
+out="$(python3 "$HEALTH" --store "$store" ingest --chat-url "$chat_a" "$log_a")"
+grep -q ' samples=1 soft_resets=0 echo_misses=0 stored=1$' <<<"$out"
+
+# B: steady and fast.
+log_b="$tmp/b.transport.log"
+{ timing 5000; timing 5200; echo "E_MESSAGE_NOT_ECHOED_SOFT: attempt=1"; timing 4900; } >"$log_b"
+python3 "$HEALTH" --store "$store" ingest --chat-url "$chat_b" "$log_b" >/dev/null
+
+# C: a very long thread.
+log_c="$tmp/c.transport.log"
+for _ in $(seq 1 160); do timing 3000; done >"$log_c"
+python3 "$HEALTH" --store "$store" ingest --chat-url "$chat_c" "$log_c" >/dev/null
+
+out="$(python3 "$HEALTH" --store "$store" score)"
+grep -q '^CHAT_HEALTH chat_id=aaaaaaaa-[^ ]* status=degraded score=[0-9]* reason=latency,soft_resets turns=4 samples=4 p50_ms=30000 p95_ms=50000 slope_ms_per_turn=10000.0 projected_p95_ms=150000 soft_resets=1 ' <<<"$out"
+grep -q '^CHAT_HEALTH chat_id=bbbbbbbb-[^ ]* status=ok .* turns=3 .* echo_misses=0 ' <<<"$out"
+grep -q '^CHAT_HEALTH chat_id=cccccccc-[^ ]* status=rotate .* reason=turns turns=160 samples=50 ' <<<"$out"
+
+# Rank: fresh D and healthy B first; degraded A and rotate C go to the spare slots.
+out="$(python3 "$HEALTH" --store "$store" rank --need 2 --url "$chat_c" --url "$chat_a" --url "$chat_b" --url "$chat_d")"
+grep -q "^CHAT_ROUTE rank=1 use=1 status=new score=100 .* chat_url=$chat_d\$" <<<"$out"
+grep -q "^CHAT_ROUTE rank=2 use=1 status=ok .* chat_url=$chat_b\$" <<<"$out"
+grep -q "^CHAT_ROUTE rank=3 use=0 status=degraded .* chat_url=$chat_a\$" <<<"$out"
+grep -q "^CHAT_ROUTE rank=4 use=0 status=rotate .* chat_url=$chat_c\$" <<<"$out"
+grep -q '^CHAT_HEALTH_ROUTING total=4 need=2 healthy=2 skipped=2 unhealthy_in_use=0$' <<<"$out"
+
+pool_file="$tmp/chat_pool.txt"
+printf '%s\n' "# pool" "$chat_c" "$chat_a" "$chat_b" "$chat_d" >"$pool_file"
+out="$("$MANAGER" health --file "$pool_file" --store "$store")"
+[[ "$(grep -c '^CHAT_HEALTH ' <<<"$out")" == "4" ]]
+grep -q "^CHAT_ROTATE chat_id=cccccccc-[^ ]* reason=turns turns=160 .* chat_url=$chat_c hint=move_thread_to_fresh_chat\$" <<<"$out"
+grep -q '^CHAT_ROTATE_SUMMARY count=1$' <<<"$out"
+
+# Pool run: with routing on, the two agents get D and B.
+proj="$tmp/project"
+mkdir -p "$proj"
+fake_codex="$tmp/fake_codex"
+cat >"$fake_codex" <<'EOF'
+#!/usr/bin/env bash
+set -euo pipefail
+out=""
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    -o|--output-last-message) out="${2:-}"; shift 2 ;;
+    *) shift ;;
+  esac
+done
+cat >/dev/null || true
+if [[ -n "${out:-}" ]]; then
+  printf '%s\n' 'CHILD_RESULT: chat health routing done' >"$out"
+fi
+printf '%s\n' 'CHILD_RESULT: chat health routing done'
+EOF
+chmod +x "$fake_codex"
+printf '%s\n' "Task one" "Task two" >"$tmp/tasks.txt"
+
+st=0
+out="$(
+  POOL_LOCK_FILE="$tmp/pool.lock" \
+  "$POOL_RUN" \
+    --project-path "$proj" \
+    --tasks-file "$tmp/tasks.txt" \
+    --chat-pool-file "$pool_file" \
+    --chat-health-routing \
+    --chat-health-store "$store" \
+    --mode mock \
+    --concurrency 2 \
+    --retry-max 0 \
+    --log-dir "$tmp/pool_run" \
+    --browser-policy optional \
+    --no-init-specialist-chat \
+    --codex-bin "$fake_codex" \
+    --chatgpt-send-path "$ROOT_DIR/bin/chatgpt_send" 2>&1
+)" || st=$?
+if [[ "$st" != "0" ]]; then
+  echo "$out" >&2
+  exit 1
+fi
+grep -q '^CHAT_HEALTH_ROUTING total=4 need=2 healthy=2 skipped=2 unhealthy_in_use=0$' <<<"$out"
+grep -q '^CHAT_ROTATE_SUMMARY count=1$' <<<"$out"
+grep -q '^POOL_CHAT_HEALTH_ROUTING=1$' <<<"$out"
+python3 - "$tmp/pool_run/summary.csv" "$chat_d" "$chat_b" <<'PY'
+import csv
+import sys
+
+rows = {r["agent"]: r["assigned_chat_url"] for r in csv.DictReader(open(sys.argv[1], encoding="utf-8"))}
+assert rows == {"1": sys.argv[2], "2": sys.argv[3]}, rows
+PY
+
+echo "OK"
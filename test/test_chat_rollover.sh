@@ -0,0 +1,228 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+SCRIPT="$ROOT_DIR/bin/chatgpt_send"
+ROLLOVER="$ROOT_DIR/bin/chat_rollover.py"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+old_url="https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+old_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+new_url="https://chatgpt.com/c/bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"
+
+# Reply wait records its poll cost per chat.
+CHATGPT_SEND_POLL_STATS_DIR="$tmp/poll_stats" python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" "$old_url" <<'PY'
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+
+
+class FakeCDP:
+    def __init__(self):
+        self.i = 0
+
+    def eval(self, expression, timeout=10.0):
+        self.i += 1
+        stop = self.i < 4
+        return {
+            "userCount": 60,
+            "lastUserSig": "u60",
+            "assistantCount": 60,
+            "lastAssistantSig": "a60|done" if not stop else f"a60|{self.i}",
+            "assistantAfterLastUser": True,
+            "stopVisible": stop,
+            "lastAssistant": "done",
+            "lastAssistantTail": "done",
+            "lastAssistantLen": 4,
+        }
+
+
+baseline = {"userCount": 59, "assistantCount": 59, "lastAssistantSig": "a59", "lastUserSig": "u59"}
+mod.REPLY_WAIT_POLL_SEC = 0.0
+assert mod.wait_for_response(FakeCDP(), baseline, 4.0, target_url=sys.argv[2]) == "done"
+stats = json.loads((Path(mod.POLL_STATS_DIR) / "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.json").read_text())
+assert stats["messages"] == 120, stats
+assert stats["polls"] >= 4 and stats["scan_max_ms"] >= stats["scan_avg_ms"] >= 0, stats
+PY
+
+# Conversation store fixture: 40 turns of the old chat.
+conv="$tmp/conversations"
+python3 - "$conv/$old_id" <<'PY'
+import json
+import sys
+from pathlib import Path
+
+d = Path(sys.argv[1])
+d.mkdir(parents=True)
+with (d / "messages.jsonl").open("w", encoding="utf-8") as f:
+    for seq in range(1, 41):
+        role = "user" if seq % 2 else "assistant"
+        text = f"{role} message {seq} " + ("x" * 900 if seq == 40 else "")
+        f.write(json.dumps({"seq": seq, "op": "append", "role": role, "hash": f"{seq:08x}", "text": text}) + "\n")
+(d / "index.json").write_text(json.dumps({"chat_id": d.name, "count": 40, "tail": []}))
+PY
+
+out="$(CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=100 python3 "$ROLLOVER" check --chat-url "$old_url" \
+  --conv-root "$conv" --poll-stats-dir "$tmp/poll_stats")"
+grep -q "^ROLLOVER_CHECK due=1 reason=messages chat_id=$old_id messages=120 max_messages=100 " <<<"$out"
+out="$(CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=500 python3 "$ROLLOVER" check --chat-url "$old_url" \
+  --conv-root "$conv" --poll-stats-dir "$tmp/poll_stats")"
+grep -q '^ROLLOVER_CHECK due=0 reason=none ' <<<"$out"
+printf '%s\n' '{"polls": 12, "scan_avg_ms": 650.0, "messages": 120}' >"$tmp/poll_stats/$old_id.json"
+out="$(CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=500 python3 "$ROLLOVER" check --chat-url "$old_url" \
+  --conv-root "$conv" --poll-stats-dir "$tmp/poll_stats")"
+grep -q '^ROLLOVER_CHECK due=1 reason=scan_ms .* scan_avg_ms=650.0 max_scan_ms=400 polls=12$' <<<"$out"
+
+# Handoff: newest messages within the budget, oldest first, checkpoint of this chat only.
+printf '%s\n' "{\"chat_id\": \"$old_id\", \"checkpoint_id\": \"SPC-test-1\", \"ts\": \"2026-01-01T00:00:00Z\", \"summary\": \"tests green\"}" \
+  >"$tmp/checkpoint.json"
+handoff="$(CHATGPT_SEND_ROLLOVER_HANDOFF_CHARS=1500 CHATGPT_SEND_ROLLOVER_HANDOFF_MSG_CHARS=400 python3 "$ROLLOVER" handoff \
+  --chat-url "$old_url" --reason scan_ms --conv-root "$conv" --checkpoint "$tmp/checkpoint.json")"
+grep -q "^Previous chat: $old_url (40 messages)\.$" <<<"$handoff"
+grep -q '^Last checkpoint: SPC-test-1 ' <<<"$handoff"
+grep -q '^Last reply summary: tests green$' <<<"$handoff"
+grep -q '^--- assistant (seq 40)$' <<<"$handoff"
+grep -q '^\[…\]$' <<<"$handoff"
+if grep -q '(seq 1)$' <<<"$handoff" || (( ${#handoff} > 1500 )); then
+  echo "handoff over budget: ${#handoff}" >&2
+  exit 1
+fi
+[[ "$(grep -n '(seq 39)$' <<<"$handoff" | cut -d: -f1)" -lt "$(grep -n '(seq 40)$' <<<"$handoff" | cut -d: -f1)" ]]
+
+# Lineage: a chain of two rollovers.
+lineage="$tmp/lineage.jsonl"
+third_url="https://chatgpt.com/c/cccccccc-cccc-cccc-cccc-cccccccccccc"
+python3 "$ROLLOVER" record --from-url "$old_url" --to-url "$new_url" --reason scan_ms --run-id r1 \
+  --conv-root "$conv" --poll-stats-dir "$tmp/poll_stats" --lineage "$lineage" >/dev/null
+python3 "$ROLLOVER" record --from-url "$new_url" --to-url "$third_url" --reason messages --lineage "$lineage" >/dev/null
+out="$(python3 "$ROLLOVER" lineage --chat-url "$third_url" --lineage "$lineage")"
+grep -q "^CHAT_LINEAGE depth=1 from_chat_id=$old_id to_chat_id=bbbbbbbb-[^ ]* reason=scan_ms messages=120 " <<<"$out"
+grep -q '^CHAT_LINEAGE depth=2 from_chat_id=bbbbbbbb-[^ ]* to_chat_id=cccccccc-[^ ]* reason=messages ' <<<"$out"
+grep -q "^CHAT_LINEAGE_SUMMARY chat_id=cccccccc-[^ ]* rollovers=2 root_chat_id=$old_id$" <<<"$out"
+
+# End to end (mock transport): the next send notices the long thread, a child
+# --rollover run bootstraps the new chat, and the prompt goes there.
+root="$tmp/root"
+mkdir -p "$root/docs" "$root/state/poll_stats"
+cp -R "$conv" "$root/state/conversations"
+printf '%s\n' "bootstrap" >"$root/docs/specialist_bootstrap.txt"
+printf '%s\n' "$old_url" >"$root/state/work_chat_url.txt"
+printf '%s\n' "$old_url" >"$root/state/chatgpt_url.txt"
+printf '%s\n' "{\"active\": \"proj\", \"chats\": {\"proj\": {\"url\": \"$old_url\", \"title\": \"Project (2026-01-01)\"}}}" \
+  >"$root/state/chats.json"
+printf '%s\n' "https://chatgpt.com/" "$new_url" "$new_url" >"$tmp/mock_chat_urls.txt"
+mkdir -p "$tmp/replies"
+printf '%s' "bootstrap ack" >"$tmp/replies/001.txt"
+printf '%s' "work reply" >"$tmp/replies/002.txt"
+
+st=0
+out="$(
+  CHATGPT_SEND_ROOT="$root" \
+  CHATGPT_SEND_TRANSPORT=mock \
+  CHATGPT_SEND_MOCK_CHAT_URL_FILE="$tmp/mock_chat_urls.txt" \
+  CHATGPT_SEND_MOCK_REPLIES_DIR="$tmp/replies" \
+  CHATGPT_SEND_REPLY_MAX_SEC=10 \
+  CHATGPT_SEND_REPLY_POLL_MS=200 \
+  CHATGPT_SEND_PROTO_ENFORCE_POSTSEND_VERIFY=0 \
+  CHATGPT_SEND_ROLLOVER=1 \
+  CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=30 \
+  "$SCRIPT" --prompt "next step" 2>"$tmp/e2e.err"
+)" || st=$?
+if [[ "$st" != "0" ]]; then
+  cat "$tmp/e2e.err" >&2
+  exit 1
+fi
+err="$(cat "$tmp/e2e.err")"
+[[ "$out" == "work reply" ]]
+grep -q "^ROLLOVER_CHECK due=1 reason=messages chat_id=$old_id messages=40 " <<<"$err"
+grep -q "^ROLLOVER_START from_url=$old_url reason=messages handoff_chars=[0-9]* " <<<"$err"
+grep -q "^ROLLOVER_DONE from_url=$old_url to_url=$new_url reason=messages " <<<"$err"
+grep -q "^ROLLOVER_SWITCH from_url=$old_url to_url=$new_url " <<<"$err"
+grep -q "^WORK_CHAT url=$new_url chat_id=bbbbbbbb-[^ ]* source=rollover " <<<"$err"
+[[ "$(cat "$root/state/work_chat_url.txt")" == "$new_url" ]]
+python3 - "$root/state" "$old_url" "$new_url" <<'PY'
+import json
+import sys
+from pathlib import Path
+
+state, old_url, new_url = Path(sys.argv[1]), sys.argv[2], sys.argv[3]
+db = json.loads((state / "chats.json").read_text())
+active = db["chats"][db["active"]]
+assert db["active"].startswith("proj-r"), db
+assert active["url"] == new_url and active["title"].startswith("Project (rollover "), db
+assert db["chats"]["proj"]["url"] == old_url, db
+rec = [json.loads(x) for x in (state / "chat_lineage.jsonl").read_text().splitlines()]
+assert len(rec) == 1 and rec[0]["from_url"] == old_url and rec[0]["to_url"] == new_url, rec
+assert rec[0]["reason"] == "messages" and rec[0]["messages"] == 40, rec
+PY
+
+# Pinned chats are never moved out from under their owner.
+printf '%s' "pinned reply" >"$tmp/replies/003.txt"
+err="$(
+  CHATGPT_SEND_ROOT="$root" \
+  CHATGPT_SEND_TRANSPORT=mock \
+  CHATGPT_SEND_FORCE_CHAT_URL="$old_url" \
+  CHATGPT_SEND_MOCK_REPLIES_DIR="$tmp/replies" \
+  CHATGPT_SEND_REPLY_MAX_SEC=10 \
+  CHATGPT_SEND_PROTO_ENFORCE_POSTSEND_VERIFY=0 \
+  CHATGPT_SEND_ROLLOVER=1 \
+  CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=30 \
+  "$SCRIPT" --prompt "pinned step" 2>&1 >/dev/null
+)" || { echo "$err" >&2; exit 1; }
+grep -q "^ROLLOVER_SKIP reason=pinned_chat source=force_env chat_url=$old_url " <<<"$err"
+if grep -q '^ROLLOVER_START' <<<"$err"; then
+  echo "pinned chat was rolled over" >&2
+  exit 1
+fi
+
+# A run queued on the old chat while its holder rolled it over follows the
+# move once it gets the lock, instead of rolling the old chat over again.
+CHATGPT_SEND_ROOT="$root" CHATGPT_SEND_TRANSPORT=mock "$SCRIPT" --ack --chatgpt-url "$new_url" 2>/dev/null
+printf '%s\n' "$old_url" >"$root/state/work_chat_url.txt"
+key="$(printf '%s' "$old_url" | ROOT="$ROOT_DIR" bash -c 'source "$ROOT/bin/lib/chatgpt_send/core.sh"; stable_hash' | cut -c1-16)"
+sleep 300 >/dev/null 2>&1 &
+holder=$!
+python3 "$ROOT_DIR/bin/chat_lock.py" acquire --dir "$root/state/locks" --key "$key" --run-id holder \
+  --pid "$holder" --timeout-sec 5 | grep -q '^granted '
+(exec 9>"$root/state/locks/chat_$key.lock"; flock -x 9; exec sleep 300) >/dev/null 2>&1 &
+holder_flock=$!
+trap 'kill "$holder" "$holder_flock" 2>/dev/null || true; rm -rf "$tmp"' EXIT
+(
+  CHATGPT_SEND_ROOT="$root" \
+  CHATGPT_SEND_TRANSPORT=mock \
+  CHATGPT_SEND_MOCK_REPLIES_DIR="$tmp/replies" \
+  CHATGPT_SEND_REPLY_MAX_SEC=10 \
+  CHATGPT_SEND_PROTO_ENFORCE_POSTSEND_VERIFY=0 \
+  CHATGPT_SEND_ROLLOVER=1 \
+  CHATGPT_SEND_ROLLOVER_MAX_MESSAGES=30 \
+  "$SCRIPT" --prompt "queued step" >/dev/null 2>"$tmp/queued.err"
+  echo "$?" >"$tmp/queued.rc"
+) &
+for _ in $(seq 1 200); do
+  grep -q '^CHAT_LOCK_QUEUED ' "$tmp/queued.err" 2>/dev/null && break
+  sleep 0.05
+done
+grep -q "^CHAT_LOCK_QUEUED key=$key position=1 .*holder_run_id=holder " "$tmp/queued.err"
+printf '%s\n' "$new_url" >"$root/state/work_chat_url.txt"
+kill "$holder_flock"
+python3 "$ROOT_DIR/bin/chat_lock.py" release --dir "$root/state/locks" --key "$key" --run-id holder >/dev/null
+for _ in $(seq 1 400); do
+  [[ -s "$tmp/queued.rc" ]] && break
+  sleep 0.05
+done
+[[ "$(cat "$tmp/queued.rc" 2>/dev/null)" == "0" ]] || { cat "$tmp/queued.err" >&2; exit 1; }
+grep -q "^ROLLOVER_FOLLOW from_url=$old_url to_url=$new_url " "$tmp/queued.err"
+grep -q "^WORK_CHAT url=$new_url chat_id=bbbbbbbb-[^ ]* source=rollover " "$tmp/queued.err"
+if grep -q '^ROLLOVER_CHECK\|^ROLLOVER_START' "$tmp/queued.err"; then
+  echo "queued run rolled the old chat over again" >&2
+  exit 1
+fi
+
+echo "OK"
@@ -0,0 +1,130 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" <<'PY'
+import importlib.util
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+
+full_answer = ("line of the final answer  \n" * 800).strip()
+
+
+class FakeCDP:
+    """Streams an answer; compact polls only see what the page would return."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.i = 0
+        self.full_evals = 0
+        self.payload_sizes = []
+
+    def _state(self, text, stop):
+        return {
+            "userCount": 6,
+            "lastUserSig": "u6",
+            "assistantCount": 6,
+            "lastAssistantSig": f"a6|{len(text)}",
+            "assistantAfterLastUser": True,
+            "stopVisible": stop,
+        }
+
+    def eval(self, expression, timeout=10.0):
+        text, stop = self.texts[min(self.i, len(self.texts) - 1)]
+        st = self._state(text, stop)
+        if "lastAssistantTail" in expression:
+            self.i += 1
+            nt = mod.norm_text(text)
+            st.update(
+                lastUserLen=10,
+                lastAssistantTail=nt.assistant[-mod.TAIL_CHARS:],
+                lastAssistantLen=len(nt.assistant),
+                lastAssistantHash=nt.hash[:8],
+            )
+            self.payload_sizes.append(len(json.dumps(st)))
+        else:
+            self.full_evals += 1
+            st.update(lastUser="prompt", lastAssistant=text)
+        return st
+
+
+baseline = {"userCount": 5, "assistantCount": 5, "lastAssistantSig": "a5", "lastUserSig": "u5"}
+texts = [(full_answer[: n * 2000], True) for n in range(1, 10)] + [(full_answer, False)] * 4
+cdp = FakeCDP(texts)
+answer = mod.wait_for_response(cdp, baseline, 10.0)
+assert answer == full_answer, (len(answer), len(full_answer))
+assert cdp.full_evals == 1, cdp.full_evals
+assert max(cdp.payload_sizes) < 1200, cdp.payload_sizes
+
+
+class FlakyFullCDP(FakeCDP):
+    """The full-text read throws `failures` times before it answers."""
+
+    def __init__(self, texts, failures):
+        super().__init__(texts)
+        self.failures = failures
+
+    def eval(self, expression, timeout=10.0):
+        if "lastAssistantTail" not in expression and self.failures > 0:
+            self.failures -= 1
+            self.full_evals += 1
+            raise RuntimeError("Runtime.evaluate timed out")
+        return super().eval(expression, timeout)
+
+
+mod.REPLY_WAIT_POLL_SEC = 0.0
+# One failed full read is retried; the reply is the full text, not the tail.
+cdp = FlakyFullCDP(texts, failures=1)
+answer = mod.wait_for_response(cdp, baseline, 10.0)
+assert answer == full_answer, (len(answer), len(full_answer))
+assert cdp.full_evals == 2, cdp.full_evals
+
+# A full read that keeps failing is an error, never the compact snippet.
+cdp = FlakyFullCDP(texts, failures=mod.REPLY_FULL_TEXT_ATTEMPTS)
+try:
+    answer = mod.wait_for_response(cdp, baseline, 10.0)
+except RuntimeError as e:
+    assert "full assistant reply" in str(e), e
+else:
+    raise AssertionError(f"returned {len(answer)} chars without the full text")
+assert cdp.full_evals == mod.REPLY_FULL_TEXT_ATTEMPTS, cdp.full_evals
+
+# The page-side normalization matches NormText.assistant, so tail hashes agree.
+if shutil.which("node"):
+    cases = ["  a b\r\n\r\nc ▍ ", "", "x" * 20000 + "\n\n tail", "строка\tтекст ▌"]
+    harness = """
+const cases = %s; const out = [];
+globalThis.location = {href: 'https://chatgpt.com/c/x'};
+globalThis.Node = {DOCUMENT_POSITION_FOLLOWING: 4};
+for (const c of cases) {
+  const el = {innerText: c, textContent: c, getAttribute() { return ''; }, parentElement: null};
+  globalThis.document = {querySelector: () => null, querySelectorAll: (s) => s.includes('assistant') ? [el] : []};
+  out.push(%s);
+}
+console.log(JSON.stringify(out));
+""" % (json.dumps(cases), mod.js_state_expr(compact=True))
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as fh:
+        fh.write(harness)
+    try:
+        out = subprocess.run(["node", fh.name], capture_output=True, text=True, check=True).stdout
+    finally:
+        Path(fh.name).unlink()
+    for case, st in zip(cases, json.loads(out)):
+        nt = mod.norm_text(case.strip())
+        assert "lastAssistant" not in st and "lastUser" not in st, st
+        assert st["lastAssistantTail"] == nt.assistant[-mod.TAIL_CHARS:], (case, st)
+        assert st["lastAssistantLen"] == len(nt.assistant), (case, st)
+        assert len(json.dumps(st)) < 1200, st
+print("OK")
+PY
+
+echo "OK"
@@ -0,0 +1,155 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+STORE="$ROOT_DIR/bin/conversation_store.py"
+SCRIPT="$ROOT_DIR/bin/chatgpt_send"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+store="$tmp/conversations"
+chat="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+chat_url="https://chatgpt.com/c/$chat"
+
+snapshot() {
+  # snapshot <file> <stop_visible> <role:text>...
+  local out="$1" stop="$2"
+  shift 2
+  python3 - "$out" "$chat" "$stop" "$@" <<'PY'
+import json
+import sys
+
+out, chat_id, stop = sys.argv[1:4]
+msgs = []
+for i, item in enumerate(sys.argv[4:]):
+    role, text = item.split(":", 1)
+    msgs.append({"role": role, "text": text, "sig": f"m{i}|||{i}|{len(text)}"})
+json.dump({"chat_id": chat_id, "stop_visible": stop == "1", "messages": msgs}, open(out, "w", encoding="utf-8"))
+PY
+}
+
+ingest() {
+  python3 "$STORE" ingest --root "$store" --fetch-json "$1" --run-id "${2:-r1}" 2>&1
+}
+
+# First window: everything is new.
+snapshot "$tmp/s1.json" 0 "user:q1" "assistant:a1" "user:q2" "assistant:a2"
+[[ "$(ingest "$tmp/s1.json")" == "CONV_STORE ingest chat_id=$chat appended=4 replaced=0 gap=0 total=4 run_id=r1" ]]
+
+# Same window again (whitespace differences do not matter): nothing to write.
+snapshot "$tmp/s2.json" 0 "user:q1" "assistant:  a1" "user:q2" "assistant:a2"
+ingest "$tmp/s2.json" | grep -q ' appended=0 replaced=0 gap=0 total=4 '
+[[ "$(wc -l <"$store/$chat/messages.jsonl")" == "4" ]]
+
+# Window slid forward; a reply still streaming is left for the next snapshot.
+snapshot "$tmp/s3.json" 1 "user:q2" "assistant:a2" "user:q3" "assistant:a3 partial"
+ingest "$tmp/s3.json" | grep -q ' appended=1 replaced=0 gap=0 total=5 '
+snapshot "$tmp/s4.json" 0 "assistant:a2" "user:q3" "assistant:a3 draft"
+ingest "$tmp/s4.json" | grep -q ' appended=1 replaced=0 gap=0 total=6 '
+
+# A regenerated last reply supersedes the stored one in place.
+snapshot "$tmp/s5.json" 0 "user:q3" "assistant:a3 final" "user:q4"
+ingest "$tmp/s5.json" r5 | grep -q ' appended=1 replaced=1 gap=0 total=7 '
+
+# No overlap with the stored tail: append and flag the gap.
+snapshot "$tmp/s6.json" 0 "user:q9" "assistant:a9"
+out="$(ingest "$tmp/s6.json" r6)"
+grep -q "W_CONV_STORE_GAP chat_id=$chat appended=2 run_id=r6" <<<"$out"
+grep -q ' appended=2 replaced=0 gap=1 total=9 ' <<<"$out"
+
+# Local "messages since anchor" by seq, hash prefix and sig.
+since() {
+  python3 "$STORE" since --root "$store" --chat-id "$chat" "$@"
+}
+python3 - "$(since --json)" "$(since --anchor seq:5 --json)" <<'PY'
+import json
+import sys
+
+full, after5 = (json.loads(a) for a in sys.argv[1:])
+texts = [m["text"] for m in full["messages"]]
+assert texts == ["q1", "a1", "q2", "a2", "q3", "a3 final", "q4", "q9", "a9"], texts
+assert [m["seq"] for m in full["messages"]] == list(range(1, 10))
+assert full["messages"][7]["gap_before"] and full["gap"]
+assert full["messages"][5]["run_id"] == "r5", full["messages"][5]
+assert [m["text"] for m in after5["messages"]] == ["a3 final", "q4", "q9", "a9"], after5
+PY
+q4_hash="$(printf '%s' 'q4' | sha256sum | cut -c1-12)"
+[[ "$(since --anchor "$q4_hash" --limit 1)" == "$(printf -- '--- seq=9 role=assistant hash=%s\na9' "$(printf '%s' 'a9' | sha256sum | cut -c1-12)")" ]]
+out="$(since --anchor "sig:m1|||1|8")"
+grep -q -- '^--- seq=8 role=user .* gap_before=1$' <<<"$out"
+set +e
+since --anchor "hash:ffffffffffff" >/dev/null 2>"$tmp/err"
+rc=$?
+set -e
+[[ "$rc" == "3" ]]
+grep -q "E_CONV_ANCHOR_NOT_FOUND chat_id=$chat anchor=hash:ffffffffffff" "$tmp/err"
+
+python3 "$STORE" export --root "$store" --chat-id "$chat" --format md >"$tmp/export.md"
+head -n 1 "$tmp/export.md" | grep -q "^# Conversation $chat$"
+grep -q '^## Assistant (seq 6)$' "$tmp/export.md"
+grep -q '^> (earlier turns not captured)$' "$tmp/export.md"
+[[ "$(python3 "$STORE" export --root "$store" --chat-id "$chat" --format jsonl | wc -l)" == "9" ]]
+python3 "$STORE" stats --root "$store" | grep -q "^CONV_STORE_STATS chat_id=$chat messages=9 gaps=1 "
+
+# Stored text is redacted; a chat past the byte cap rotates its log.
+chat2="bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"
+python3 - "$tmp/secret.json" "$chat2" <<'PY'
+import json
+import sys
+
+msgs = [{"role": "user", "text": "my key is sk-proj-ABCDEFGHIJKLMNOPQRSTUVWX"}]
+msgs += [{"role": "assistant" if i % 2 else "user", "text": f"turn {i} " + "x" * 200} for i in range(1, 40)]
+json.dump({"chat_id": sys.argv[2], "stop_visible": False, "messages": msgs}, open(sys.argv[1], "w", encoding="utf-8"))
+PY
+CHATGPT_SEND_CONV_STORE_MAX_BYTES=4096 python3 "$STORE" ingest --root "$store" --fetch-json "$tmp/secret.json" >/dev/null
+if grep -rq 'ABCDEFGHIJKLMNOP' "$store/$chat2"; then
+  echo "secret stored in the conversation log" >&2
+  exit 1
+fi
+[[ -s "$store/$chat2/messages.1.jsonl" && ! -e "$store/$chat2/messages.jsonl" ]]
+python3 - "$(python3 "$STORE" since --root "$store" --chat-id "$chat2" --json)" <<'PY'
+import json
+import sys
+
+h = json.loads(sys.argv[1])
+assert h["count"] == 40 and h["messages"][0]["text"] == "my key is <REDACTED>", h["messages"][0]
+PY
+snapshot "$tmp/s7.json" 0 "user:after rotation"
+sed -i "s/$chat/$chat2/" "$tmp/s7.json"
+CHATGPT_SEND_CONV_STORE_MAX_BYTES=4096 python3 "$STORE" ingest --root "$store" --fetch-json "$tmp/s7.json" 2>/dev/null | grep -q ' appended=1 .* total=41 '
+[[ "$(python3 "$STORE" export --root "$store" --chat-id "$chat2" --format jsonl | wc -l)" == "41" ]]
+
+# Wired into chatgpt_send: fetch-last feeds the store, --history reads it offline.
+root="$tmp/root"
+mkdir -p "$root/bin" "$root/state" "$tmp/mock_replies"
+printf '%s\n' "$chat_url" >"$tmp/mock_chat_urls.txt"
+printf '%s\n' "mock reply one" >"$tmp/mock_replies/001.txt"
+printf '%s\n' "mock reply two" >"$tmp/mock_replies/002.txt"
+run_send() {
+  CHATGPT_SEND_ROOT="$root" CHATGPT_SEND_TRANSPORT=mock \
+    CHATGPT_SEND_MOCK_CHAT_URL_FILE="$tmp/mock_chat_urls.txt" \
+    CHATGPT_SEND_MOCK_REPLIES_DIR="$tmp/mock_replies" \
+    CHATGPT_SEND_REPLY_POLLING=0 \
+    "$SCRIPT" --chatgpt-url "$chat_url" "$@" 2>&1
+}
+out="$(run_send --prompt "first question")"
+grep -q "CONV_STORE ingest chat_id=$chat " <<<"$out" || { echo "$out" >&2; exit 1; }
+run_send --ack >/dev/null
+out="$(run_send --prompt "second question")"
+grep -q "CONV_STORE ingest chat_id=$chat appended=2 " <<<"$out" || { echo "$out" >&2; exit 1; }
+hist="$(CHATGPT_SEND_ROOT="$root" "$SCRIPT" --chatgpt-url "$chat_url" --history --json 2>/dev/null)"
+python3 - "$hist" <<'PY'
+import json
+import sys
+
+h = json.loads(sys.argv[1])
+assert h["count"] == 2 and [m["role"] for m in h["messages"]] == ["user", "assistant"], h
+PY
+run_send --ack >/dev/null
+out="$(CHATGPT_SEND_CONV_STORE=0 run_send --prompt "third question")"
+if grep -q 'CONV_STORE ingest' <<<"$out"; then
+  echo "store written with CHATGPT_SEND_CONV_STORE=0" >&2
+  exit 1
+fi
+
+echo "OK"
@@ -0,0 +1,110 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+REPO="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+fake_bin="$tmp/fake-bin"
+root="$tmp/root"
+mkdir -p "$fake_bin" "$root/bin" "$root/state"
+
+cat >"$fake_bin/curl" <<'EOF'
+#!/usr/bin/env bash
+set -euo pipefail
+url=""
+for a in "$@"; do
+  if [[ "$a" == http://127.0.0.1:* ]]; then
+    url="$a"
+  fi
+done
+if [[ "$url" == *"/json/version"* ]]; then
+  printf '%s\n' '{"Browser":"fake","token":"abc123SECRETXYZ"}'
+  exit 0
+fi
+if [[ "$url" == *"/json/list"* ]]; then
+  printf '%s\n' '[{"id":"tab1","url":"https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa?access_token=tok123456","title":"Fake chat"}]'
+  exit 0
+fi
+printf '%s\n' '{}'
+EOF
+chmod +x "$fake_bin/curl"
+
+# Contract probe hangs far beyond the budget; fetch-last answers quickly.
+cat >"$root/bin/cdp_chatgpt.py" <<'EOF'
+#!/usr/bin/env python3
+import sys
+import time
+
+if "--probe-contract" in sys.argv:
+    time.sleep(30)
+    raise SystemExit(0)
+if "--fetch-last" in sys.argv:
+    print('{"url":"https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa","messages":[]}', flush=True)
+    print("Authorization: Bearer abcdefghijklmnop", file=sys.stderr)
+    raise SystemExit(0)
+raise SystemExit(3)
+EOF
+chmod +x "$root/bin/cdp_chatgpt.py"
+
+out="$(
+  PATH="$fake_bin:$PATH" bash -c '
+    set -euo pipefail
+    repo="$1"
+    ROOT="$2"
+    RUN_ID="run-evidence-budget"
+    LOG_DIR="$ROOT/state/runs/$RUN_ID"
+    CDP_PORT=9222
+    PROMPT="budget check"
+    CHATGPT_URL="https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+    CAPTURE_EVIDENCE=1
+    SANITIZE_LOGS=1
+    SCRIPT_DIR="$repo/bin"
+    EVIDENCE_BUDGET_MS=1500
+    source "$repo/bin/lib/chatgpt_send/core.sh"
+    source "$repo/bin/lib/chatgpt_send/runtime.sh"
+    t0="$(now_ms)"
+    capture_evidence_snapshot "E_TEST_BUDGET"
+    echo "ELAPSED_MS=$(( $(now_ms) - t0 ))"
+  ' _ "$REPO" "$root" 2>&1
+)"
+
+echo "$out" | grep -q 'EVIDENCE_CAPTURED reason=E_TEST_BUDGET'
+echo "$out" | grep -q 'EVIDENCE_PARTIAL cdp_ok=1 truncated=contract '
+echo "$out" | grep -q 'EVIDENCE_BUDGET budget_ms=1500 '
+elapsed="$(echo "$out" | sed -n 's/^ELAPSED_MS=//p')"
+[[ -n "$elapsed" ]] && (( elapsed < 4000 )) || { echo "capture took ${elapsed}ms" >&2; echo "$out" >&2; exit 1; }
+# The deadline kill takes the whole probe process group down: nothing may
+# outlive the capture.
+sleep 0.2
+if pgrep -f "$root/bin/cdp_chatgpt.py" >/dev/null 2>&1; then
+  echo "evidence probe outlived the capture" >&2
+  pgrep -af "$root/bin/cdp_chatgpt.py" >&2 || true
+  exit 1
+fi
+
+ev_dir="$root/state/runs/run-evidence-budget/evidence"
+python3 - "$ev_dir" <<'PY'
+import json
+import pathlib
+import sys
+
+ev = pathlib.Path(sys.argv[1])
+cap = json.loads((ev / "capture.json").read_text(encoding="utf-8"))
+assert cap["truncated"] == ["contract"], cap
+assert cap["probes"]["contract"]["truncated"] == 1, cap
+assert cap["probes"]["fetch_last"]["rc"] == 0, cap
+assert cap["probes"]["tabs"]["rc"] == 0, cap
+contract = json.loads((ev / "contract.json").read_text(encoding="utf-8"))
+assert contract["status"] == 124, contract
+for name in ("probe_last.json", "process.json", "doctor.jsonl", "env.json", "ops_snapshot.json", "ps.txt", "net.txt"):
+    assert (ev / name).exists(), name
+assert "abc123SECRETXYZ" not in (ev / "version.json").read_text(encoding="utf-8")
+assert "tok123456" not in (ev / "tabs.json").read_text(encoding="utf-8")
+assert "abcdefghijklmnop" not in (ev / "fetch_last.log").read_text(encoding="utf-8")
+assert "<REDACTED>" in (ev / "tabs.json").read_text(encoding="utf-8")
+print("OK")
+PY
+
+echo "OK"
@@ -0,0 +1,126 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+BENCH="$ROOT_DIR/scripts/fake_chatgpt_bench.sh"
+
+tmp="$(mktemp -d)"
+srv_pid=""
+cleanup() {
+  if [[ -n "$srv_pid" ]]; then
+    kill "$srv_pid" 2>/dev/null || true
+    wait "$srv_pid" 2>/dev/null || true
+  fi
+  rm -rf "$tmp"
+}
+trap cleanup EXIT
+
+# The fake page server injects its config and serves / and /c/<id>.
+bash "$BENCH" serve --turns 3 --reply-chars 500 >"$tmp/serve.log" 2>&1 &
+srv_pid=$!
+for _ in $(seq 1 50); do
+  grep -q '^FAKE_CHATGPT_READY ' "$tmp/serve.log" && break
+  sleep 0.1
+done
+origin="$(sed -n 's/^FAKE_CHATGPT_READY url=//p' "$tmp/serve.log")"
+[[ -n "$origin" ]] || { cat "$tmp/serve.log" >&2; exit 1; }
+
+page="$(curl -fsS "$origin/c/0123abcd-0123-4567-89ab-0123456789ab")"
+for want in \
+  'window.FAKE_CHATGPT_CONFIG = {"turns": 3,' \
+  '"reply_chars": 500' \
+  'id="prompt-textarea" class="ProseMirror" contenteditable="true"' \
+  'data-testid="send-button"' \
+  "'stop-button'" \
+  "'data-message-author-role'"; do
+  grep -qF "$want" <<<"$page" || { echo "page missing: $want" >&2; exit 1; }
+done
+cfg="$(curl -fsS "$origin/__config?turns=40&bogus=1&tick_ms=x")"
+[[ "$cfg" == *'"turns": 40'* && "$cfg" != *bogus* && "$cfg" == *'"tick_ms": 30'* ]] || { echo "bad config: $cfg" >&2; exit 1; }
+page="$(curl -fsS "$origin/")"
+grep -qF '"turns": 40' <<<"$page"
+code="$(curl -s -o /dev/null -w '%{http_code}' "$origin/missing.js")"
+[[ "$code" == "404" ]]
+
+# Without a browser the bench skips cleanly.
+out="$(bash "$BENCH" bench --chrome-path "$tmp/no-chrome" --out "$tmp/report.json")"
+[[ "$out" == "SKIP_NO_CHROME chrome_path=$tmp/no-chrome" ]] || { echo "$out" >&2; exit 1; }
+[[ ! -e "$tmp/report.json" ]]
+set +e
+bash "$BENCH" bench --chat-lengths '1,,2' >/dev/null 2>&1
+rc=$?
+set -e
+[[ "$rc" == "2" ]]
+
+# Driver side: origin override and CDP traffic counters.
+CHATGPT_SEND_CHATGPT_ORIGIN="$origin/" CHATGPT_SEND_CDP_STATS=1 \
+  python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" "$origin" <<'PY'
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+origin = sys.argv[2]
+assert mod.CHATGPT_ORIGIN == origin, mod.CHATGPT_ORIGIN
+
+chat = f"{origin}/c/0123abcd-0123-4567-89ab-0123456789ab"
+assert mod.chat_id_from_url(chat) == "0123abcd-0123-4567-89ab-0123456789ab"
+assert mod.chat_id_from_url("https://chatgpt.com/c/0123abcd-0123-4567-89ab-0123456789ab") is None
+tabs = [
+    {"id": "t1", "url": "https://chatgpt.com/c/0123abcd-0123-4567-89ab-0123456789ab"},
+    {"id": "t2", "url": chat + "?model=x"},
+    {"id": "t3", "url": origin + "/"},
+]
+assert mod.find_target_tab(tabs, chat)["id"] == "t2"
+assert mod.find_target_tab(tabs, origin)["id"] == "t3"
+
+
+class FakeWS:
+    """Answers every call after an unrelated event frame (counted as inbound too)."""
+
+    def __init__(self):
+        self.sent = []
+        self.pending = []
+
+    def send(self, s):
+        self.sent.append(s)
+        msg_id = json.loads(s)["id"]
+        self.pending = [
+            json.dumps({"method": "Page.lifecycleEvent", "params": {"name": "load"}}),
+            json.dumps({"id": msg_id, "result": {"result": {"value": "ок"}}}),
+        ]
+
+    def recv(self):
+        return self.pending.pop(0)
+
+    def settimeout(self, t):
+        pass
+
+    def close(self):
+        pass
+
+
+cdp = mod.CDP.__new__(mod.CDP)
+cdp.ws = FakeWS()
+cdp.next_id = 1
+assert cdp.eval("1 + 1") == "ок"
+cdp.call("Page.enable")
+assert cdp.calls == 2 and cdp.evals == 1, (cdp.calls, cdp.evals)
+assert cdp.bytes_out == sum(len(s.encode("utf-8")) for s in cdp.ws.sent)
+assert cdp.bytes_in > 0
+err = io.StringIO()
+with contextlib.redirect_stderr(err):
+    cdp.close()
+want = f"CDP_STATS calls=2 evals=1 bytes_out={cdp.bytes_out} bytes_in={cdp.bytes_in}"
+assert err.getvalue().strip() == want, err.getvalue()
+# Counters are per connection.
+assert mod.CDP.calls == 0 and mod.CDP.bytes_in == 0
+print("OK")
+PY
+
+echo "OK"
@@ -0,0 +1,112 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+FOLLOW="$ROOT_DIR/scripts/fleet_follow.sh"
+
+tmp="$(mktemp -d)"
+follow_pid=""
+cleanup() {
+  if [[ -n "${follow_pid:-}" ]]; then
+    kill "$follow_pid" >/dev/null 2>&1 || true
+  fi
+  rm -rf "$tmp"
+}
+trap cleanup EXIT
+
+# write_summary <pool_dir> <a1_state> <a2_state> <a2_step>
+write_summary() {
+  python3 - "$@" <<'PY'
+import json
+import os
+import sys
+
+pool_dir, a1, a2, a2_step = sys.argv[1:5]
+agents = [
+    {"key": "r1", "agent_id": "1", "run_id": "r1", "state_class": a1, "reason": "x", "last_step": None, "age_sec": 1},
+    {"key": "r2", "agent_id": "2", "run_id": "r2", "state_class": a2, "reason": "x", "last_step": a2_step, "age_sec": 2},
+]
+states = [a1, a2]
+obj = {
+    "total": 2,
+    "done_ok": states.count("DONE_OK"),
+    "done_fail": states.count("DONE_FAIL"),
+    "running": states.count("RUNNING"),
+    "stuck": 0,
+    "orphaned": 0,
+    "unknown": 0,
+    "disk_status": "ok",
+    "disk_free_pct": 50,
+    "agents": agents,
+}
+os.makedirs(pool_dir, exist_ok=True)
+tmp = os.path.join(pool_dir, "fleet.summary.json.tmp")
+with open(tmp, "w", encoding="utf-8") as f:
+    json.dump(obj, f)
+os.replace(tmp, os.path.join(pool_dir, "fleet.summary.json"))
+PY
+}
+
+wait_for() {
+  local pattern="$1" file="$2"
+  for _ in $(seq 1 100); do
+    if grep -q -- "$pattern" "$file"; then
+      return 0
+    fi
+    sleep 0.05
+  done
+  echo "timeout waiting for: $pattern" >&2
+  cat "$file" >&2
+  return 1
+}
+
+pool_a="$tmp/pool-a"
+pool_b="$tmp/pool-b"
+out="$tmp/follow.out"
+write_summary "$pool_a" RUNNING RUNNING send
+mkdir -p "$pool_b"
+
+"$FOLLOW" --pool-run-dir "$pool_a" --pool-run-dir "$pool_b" --tick-ms 50 --no-ansi \
+  --pid-file "$tmp/follow.pid" >"$out" 2>&1 &
+follow_pid="$!"
+
+wait_for '^PROGRESS .* pool=pool-a total=2 .* running=2 ' "$out"
+wait_for '^FLEET_FOLLOW_WAIT .* pool=pool-b reason=summary_missing ' "$out"
+wait_for '^AGENT .* pool=pool-a agent=2 run_id=r2 state=RUNNING reason=x step=send ' "$out"
+
+# Unchanged summary: nothing new is rendered, and the missing pool is not re-announced.
+sleep 0.5
+[[ "$(grep -c '^AGENT ' "$out")" == "2" ]]
+[[ "$(grep -c '^PROGRESS ' "$out")" == "1" ]]
+[[ "$(grep -c '^FLEET_FOLLOW_WAIT ' "$out")" == "1" ]]
+
+# Rewritten with only agent 2 moving: one AGENT row, one PROGRESS line.
+write_summary "$pool_a" RUNNING RUNNING reply_wait
+wait_for 'step=reply_wait ' "$out"
+sleep 0.3
+[[ "$(grep -c '^AGENT .* run_id=r1 ' "$out")" == "1" ]]
+[[ "$(grep -c '^AGENT .* run_id=r2 ' "$out")" == "2" ]]
+[[ "$(grep -c '^PROGRESS ' "$out")" == "1" ]]
+
+write_summary "$pool_a" DONE_OK DONE_OK report
+wait_for '^FLEET_FOLLOW_DONE .* pool=pool-a status=ok ' "$out"
+kill -0 "$follow_pid"
+
+write_summary "$pool_b" DONE_OK DONE_FAIL report
+st=0
+wait "$follow_pid" || st=$?
+follow_pid=""
+[[ "$st" == "1" ]]
+grep -q '^FLEET_FOLLOW_DONE .* pool=pool-b status=fail ' "$out"
+[[ "$(grep -c '^FLEET_FOLLOW_DONE ' "$out")" == "2" ]]
+[[ ! -e "$tmp/follow.pid" ]]
+
+# Single pool keeps the unprefixed lines; --no-agents drops AGENT rows.
+once="$("$FOLLOW" --pool-run-dir "$pool_a" --once --no-ansi --no-agents)"
+grep -q '^PROGRESS ts=[^ ]* total=2 ok=2 ' <<<"$once"
+if grep -q '^AGENT \| pool=' <<<"$once"; then
+  echo "unexpected output: $once" >&2
+  exit 1
+fi
+
+echo "OK"
@@ -0,0 +1,110 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" "$tmp" <<'PY'
+import importlib.util
+import io
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+tmp = Path(sys.argv[2])
+
+
+class FakeCDP:
+    def __init__(self):
+        self.evals = []
+        self.inserted = []
+
+    def call(self, method, params=None, timeout=None):
+        assert method == "Input.insertText", method
+        self.inserted.append(params["text"])
+        return {}
+
+    def eval(self, expression, timeout=10.0):
+        self.evals.append(expression)
+        if "crypto.subtle.digest" in expression:
+            return {"ok": True, "method": "enter"}
+        return {"ok": True}
+
+
+line = "evidence line é中 \U0001F600 " + "x" * 40 + "\n"
+prompt = line * 6000
+assert len(prompt) > 300_000
+
+cdp = FakeCDP()
+res = mod.send_prompt(cdp, prompt, "enter")
+assert res.get("ok"), res
+assert "".join(cdp.inserted) == prompt
+assert all(len(c) <= mod.INSERT_CHUNK_CHARS for c in cdp.inserted)
+assert len(cdp.inserted) == -(-len(prompt) // mod.INSERT_CHUNK_CHARS)
+assert len(cdp.evals) == 2
+# Neither evaluated expression carries the prompt; only its digest.
+assert all(len(e) < 8000 for e in cdp.evals), [len(e) for e in cdp.evals]
+assert mod.stable_text_hash(prompt) in cdp.evals[1]
+
+# Short prompts keep the single evaluate path.
+small = FakeCDP()
+mod.send_prompt(small, "hello there", "button")
+assert not small.inserted and len(small.evals) == 1 and "hello there" in small.evals[0]
+
+# The in-page digest matches stable_text_hash for the text ProseMirror shows.
+if shutil.which("node"):
+    expr = mod.js_verified_dispatch_expr(mod.stable_text_hash(prompt), "enter")
+    shown = prompt.replace("\n", "\n\n").replace(" ", " ", 3)
+    harness = (
+        "const ed = {innerText: %s, focus(){}, closest(){ return null; }, dispatchEvent(){ return true; }};\n"
+        "globalThis.document = {querySelector: (s) => s.includes('prompt-textarea') ? ed : null};\n"
+        "globalThis.KeyboardEvent = class { constructor(t, o) { this.type = t; } };\n"
+        "(%s).then((r) => { console.log(JSON.stringify(r)); });\n"
+    ) % (json.dumps(shown), expr)
+    (tmp / "verify.js").write_text(harness, encoding="utf-8")
+    proc = subprocess.run(["node", str(tmp / "verify.js")], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    out = proc.stdout
+    r = json.loads(out)
+    assert r.get("ok") and r.get("method") == "enter", r
+
+    bad = mod.js_verified_dispatch_expr(mod.stable_text_hash(prompt + " extra"), "enter")
+    (tmp / "verify_bad.js").write_text(harness.replace(expr, bad), encoding="utf-8")
+    out = subprocess.run(["node", str(tmp / "verify_bad.js")], capture_output=True, text=True, check=True).stdout
+    assert json.loads(out).get("error") == "prompt_insert_mismatch", out
+
+# --prompt-file reads files and stdin.
+(tmp / "p.txt").write_text(prompt, encoding="utf-8")
+assert mod.read_prompt_input(None, str(tmp / "p.txt")) == prompt
+sys.stdin = io.StringIO("from stdin")
+assert mod.read_prompt_input(None, "-") == "from stdin"
+assert mod.read_prompt_input("argv", None) == "argv"
+print("OK")
+PY
+
+# Large prompts reach cdp_chatgpt.py through a private file, not argv.
+out="$(bash -c '
+  set -euo pipefail
+  RUN_ID=run-large-prompt
+  TMPDIR="$2"
+  PROMPT="$(head -c 200000 /dev/zero | tr "\0" "a")"
+  source "$1/bin/lib/chatgpt_send/core.sh"
+  source "$1/bin/lib/chatgpt_send/runtime.sh"
+  prepare_cdp_prompt_file
+  cdp_prompt_args
+  printf "%s %s\n" "${CDP_PROMPT_ARGS[0]}" "$(wc -c <"${CDP_PROMPT_ARGS[1]}")"
+  PROMPT="short"; CDP_PROMPT_FILE=""
+  cdp_prompt_args
+  printf "%s %s\n" "${CDP_PROMPT_ARGS[0]}" "${CDP_PROMPT_ARGS[1]}"
+' _ "$ROOT_DIR" "$tmp" 2>"$tmp/err.log")"
+[[ "$out" == $'--prompt-file 200000\n--prompt short' ]] || { echo "$out" >&2; exit 1; }
+grep -q 'PROMPT_TRANSPORT mode=file chars=200000' "$tmp/err.log"
+
+echo "OK"
@@ -0,0 +1,140 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+TOOL="$ROOT_DIR/bin/latency_sketch.py"
+
+tmp="$(mktemp -d)"
+gate_run_dir=""
+trap 'rm -rf "$tmp" ${gate_run_dir:+"$gate_run_dir"}' EXIT
+
+python3 - "$ROOT_DIR/bin" <<'PY'
+import json
+import math
+import random
+import sys
+
+sys.path.insert(0, sys.argv[1])
+from latency_sketch import LatencySketch, SlotInflight
+
+def exact_q(values, q):
+    arr = sorted(values)
+    return arr[max(0, math.ceil(q * len(arr)) - 1)]
+
+# Small runs stay exact: the gate's old ceil(0.95 n) rank rule, bit for bit.
+small = [float(v) for v in (120, 900, 4100, 37, 2500, 610)]
+s = LatencySketch()
+for v in small:
+    s.add(v)
+assert s.exact is not None and s.quantile(0.95) == exact_q(small, 0.95) == 4100.0
+
+# Large runs switch to log buckets: bounded size, ~1% relative error.
+rnd = random.Random(7)
+values = [rnd.lognormvariate(7, 0.8) for _ in range(200000)]
+big = LatencySketch()
+for v in values:
+    big.add(v)
+assert big.exact is None and len(big.buckets) < 2000, len(big.buckets)
+for q in (0.5, 0.95, 0.99):
+    want = exact_q(values, q)
+    assert abs(big.quantile(q) - want) / want <= 0.011, (q, big.quantile(q), want)
+lo, hi = big.quantile_ci(0.95)
+assert lo <= exact_q(values, 0.95) * 1.011 and hi >= exact_q(values, 0.95) * 0.989, (lo, hi)
+
+# Merge of two halves equals the sketch of the whole; JSON round-trips.
+a, b = LatencySketch(), LatencySketch()
+for i, v in enumerate(values):
+    (a if i % 2 else b).add(v)
+a.merge(b)
+assert a.count == big.count and a.quantile(0.95) == big.quantile(0.95)
+back = LatencySketch.from_json(json.loads(json.dumps(a.to_json())))
+assert back.quantile(0.99) == a.quantile(0.99) and back.count == a.count
+
+# Peak in-flight slots: sorted runs spill to disk and merge back exactly.
+events = []
+for i in range(5000):
+    events.append((i * 10, True))
+    events.append((i * 10 + (25 if i % 100 == 0 else 15), False))
+rnd.shuffle(events)
+inflight = SlotInflight(spill_events=512)
+other = SlotInflight(spill_events=512)
+for n, (ts, acquire) in enumerate(events):
+    (inflight if n % 2 else other).add(ts, acquire)
+inflight.merge(other)
+assert len(inflight.runs) >= 10, len(inflight.runs)
+assert inflight.peak() == 3
+edge = SlotInflight()
+edge.add(100, True)
+edge.add(200, False)
+edge.add(200, True)
+assert edge.peak() == 1
+print("sketch OK")
+PY
+
+# Two soak-like runs: the second one sends slower.
+mkrun() {
+  local dir="$1" base="$2" i
+  mkdir -p "$dir"
+  for ((i = 0; i < 300; i++)); do
+    printf 'ITER_RESULT precheck_ms=%d send_ms=%d total_ms=%d run_id=x\n' \
+      "$((200 + i % 50))" "$((base + (i * 37) % 400))" "$((base * 3 + i))"
+  done >"$dir/run.log"
+  printf 'E_SOMETHING send_ms=999999 NEGATIVE_EXPECTED\n' >"$dir/negative.log"
+}
+mkrun "$tmp/runs/rel-1" 1000
+mkrun "$tmp/runs/rel-2" 2600
+cat >"$tmp/gate.md" <<'EOF2'
+### THRESHOLDS_PROD (machine-parseable)
+```text
+MAX_P95_SEND_MS=2000
+MAX_P95_PRECHECK_MS=3000
+```
+EOF2
+
+python3 "$TOOL" scan --run-id rel-1 --out "$tmp/rel-1.json" "$tmp/runs/rel-1" | grep -q '^LATENCY_SCAN run_id=rel-1 metrics=3 samples=900 '
+report() {
+  python3 "$TOOL" report --thresholds "$tmp/gate.md" --runs-dir "$tmp/runs" "$@"
+}
+out="$(report "$tmp/rel-1.json" rel-2)"
+grep -q '^LATENCY run=rel-1 metric=SEND_MS n=300 .* p95=1378 p99=[0-9]* p95_ci=[0-9]*\.\.[0-9]* max=1399 limit=2000 status=ok$' <<<"$out" || { echo "$out" >&2; exit 1; }
+grep -q '^LATENCY run=rel-2 metric=SEND_MS n=300 .* limit=2000 status=over$' <<<"$out"
+grep -q '^LATENCY run=rel-2 metric=TOTAL_MS .* limit=none status=none$' <<<"$out"
+grep -q '^LATENCY_TREND metric=SEND_MS from=rel-1 to=rel-2 .* verdict=regression$' <<<"$out"
+grep -q '^LATENCY_TREND metric=PRECHECK_MS from=rel-1 to=rel-2 .* verdict=flat$' <<<"$out"
+st=0
+report --strict rel-1 rel-2 >/dev/null || st=$?
+[[ "$st" == "1" ]]
+st=0
+report --strict rel-1 >/dev/null || st=$?
+[[ "$st" == "0" ]]
+
+# A release-level sketch is the merge of its runs.
+python3 "$TOOL" merge --label release-x --out "$tmp/release.json" --runs-dir "$tmp/runs" rel-1 rel-2 >/dev/null
+python3 - "$tmp/release.json" <<'PY'
+import json
+import sys
+
+obj = json.load(open(sys.argv[1]))
+assert obj["merged_runs"] == ["rel-1", "rel-2"] and obj["metrics"]["SEND_MS"]["count"] == 600, obj["merged_runs"]
+PY
+
+# release_gate_check stores the sketch next to the run and reports CIs on failure.
+run_id="test-latency-sketch-$$"
+gate_run_dir="$ROOT_DIR/state/runs/$run_id"
+mkdir -p "$gate_run_dir"
+cp "$tmp/runs/rel-2/run.log" "$gate_run_dir/run.log"
+# A negative marker on the last line still keeps the whole file out of the metrics.
+printf '%s\n' 'ITER_RESULT send_ms=999999 run_id=x' 'SLOT_ACQUIRE slot=1 ts_ms=1500' \
+  'E_SOMETHING EXPECT_ERROR=E_SOMETHING' >"$gate_run_dir/negative.log"
+# Slot events of two agents interleave across files.
+printf '%s\n' 'SLOT_ACQUIRE slot=0 ts_ms=1000' 'SLOT_RELEASE slot=0 ts_ms=2000' >"$gate_run_dir/agent_a.log"
+printf '%s\n' 'SLOT_ACQUIRE slot=1 ts_ms=1200' 'SLOT_RELEASE slot=1 ts_ms=1800' 'SLOT_ACQUIRE slot=1 ts_ms=2000' >"$gate_run_dir/agent_b.log"
+out="$(bash "$ROOT_DIR/scripts/release_gate_check.sh" --run-id "$run_id" 2>&1 || true)"
+grep -qx 'METRIC P95_SEND_MS=2978' <<<"$out" || { echo "$out" >&2; exit 1; }
+grep -qx 'METRIC MAX_INFLIGHT_SLOTS=2' <<<"$out" || { echo "$out" >&2; exit 1; }
+grep -qx 'METRIC EXPECTED_NEGATIVE_ERRORS_TOTAL=1' <<<"$out"
+grep -q '^FAIL key=MAX_P95_SEND_MS actual=2978 limit=20000' <<<"$out" && { echo "unexpected SEND_MS fail" >&2; exit 1; }
+[[ -s "$gate_run_dir/latency_sketch.json" ]]
+grep -q "^LATENCY run=$run_id metric=SEND_MS n=300 " <<<"$(python3 "$TOOL" report "$run_id")"
+
+echo "OK"
@@ -0,0 +1,153 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+SINK="$ROOT_DIR/bin/log_sink.py"
+LOGCAT="$ROOT_DIR/bin/logcat"
+SPAWN="$ROOT_DIR/bin/spawn_second_agent"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+log="$tmp/run.log"
+
+# 1) Heartbeats that differ only by elapsed/stable collapse into one RLE record.
+{
+  echo "[child] step=send cmd=--prompt x"
+  for i in $(seq 1 50); do
+    echo "[cdp_chatgpt] phase=wait_finish elapsed=${i}.0s asst=3/2 stop=1 hash=abc stable=0 changed=1"
+    echo "REPLY_WAIT: heartbeat stop_visible=1 hash=abc"
+  done
+  echo "[cdp_chatgpt] phase=wait_finish event=done elapsed=51.0s"
+  echo "E_REPLY_WAIT_TIMEOUT class=stop_visible run_id=t1"
+} | python3 "$SINK" append --log "$log" --max-bytes 0 --codec gzip
+
+# Interleaved heartbeat kinds collapse per kind: first line of each + one RLE record each.
+[[ "$(wc -l <"$log")" == "7" ]] || { echo "expected collapsed log, got $(wc -l <"$log") lines" >&2; cat "$log" >&2; exit 1; }
+grep -q '^\[log_sink\] HEARTBEAT_RLE collapsed=49 last: \[cdp_chatgpt\] phase=wait_finish elapsed=50.0s' "$log"
+grep -q '^\[log_sink\] HEARTBEAT_RLE collapsed=49 last: REPLY_WAIT: heartbeat' "$log"
+grep -q 'E_REPLY_WAIT_TIMEOUT class=stop_visible' "$log"
+grep -q 'phase=wait_finish event=done' "$log"
+
+: >"$log"
+{
+  for i in $(seq 1 40); do
+    echo "[cdp_chatgpt] phase=wait_activity elapsed=${i}.0s user=1/1 asst=2/2 stop=0 user_sig_changed=0 asst_sig_changed=0"
+  done
+  echo "[cdp_chatgpt] phase=wait_activity event=detected elapsed=41.0s user=2 asst=2 stop=1"
+} | python3 "$SINK" append --log "$log" --max-bytes 0 --codec gzip
+[[ "$(wc -l <"$log")" == "3" ]]
+grep -q '^\[log_sink\] HEARTBEAT_RLE collapsed=39 last: \[cdp_chatgpt\] phase=wait_activity elapsed=40.0s' "$log"
+
+# 2) Size rotation writes compressed segments; logcat restores the full order.
+rm -f "$log"
+for batch in $(seq 1 6); do
+  for i in $(seq 1 200); do
+    printf 'line batch=%s i=%s payload=%s\n' "$batch" "$i" "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+  done | python3 "$SINK" append --log "$log" --max-bytes 20000 --codec gzip
+done
+ls "$tmp"/run.log.*.gz >/dev/null
+seg_count="$(ls "$tmp"/run.log.*.gz | wc -l)"
+[[ "$seg_count" -ge 2 ]] || { echo "expected >=2 segments, got $seg_count" >&2; exit 1; }
+
+"$LOGCAT" "$log" >"$tmp/cat.txt"
+[[ "$(wc -l <"$tmp/cat.txt")" == "1200" ]]
+head -n 1 "$tmp/cat.txt" | grep -q '^line batch=1 i=1 '
+tail -n 1 "$tmp/cat.txt" | grep -q '^line batch=6 i=200 '
+
+"$LOGCAT" "$log" --tail 450 >"$tmp/tail.txt"
+[[ "$(wc -l <"$tmp/tail.txt")" == "450" ]]
+diff <(tail -n 450 "$tmp/cat.txt") "$tmp/tail.txt"
+
+# keep=N prunes the oldest segments.
+rm -f "$tmp"/run.log*
+for batch in $(seq 1 6); do
+  for i in $(seq 1 200); do
+    printf 'line batch=%s i=%s payload=%s\n' "$batch" "$i" "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+  done | python3 "$SINK" append --log "$log" --max-bytes 20000 --codec gzip --keep 1
+done
+[[ "$(ls "$tmp"/run.log.*.gz | wc -l)" == "1" ]]
+
+# Direct appenders share the sink's lock (spawn_second_agent child_log_write):
+# nothing written during a rotation is lost.
+rm -f "$tmp"/run.log*
+(
+  for i in $(seq 1 300); do
+    { flock -x 9; echo "direct i=$i" >>"$log"; } 9>>"$log.lock"
+  done
+) &
+direct=$!
+for batch in $(seq 1 30); do
+  for i in $(seq 1 20); do
+    printf 'sink batch=%s i=%s payload=%s\n' "$batch" "$i" "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+  done | python3 "$SINK" append --log "$log" --max-bytes 4000 --codec gzip
+done
+wait "$direct"
+"$LOGCAT" "$log" >"$tmp/cat.txt"
+[[ "$(grep -c '^direct i=' "$tmp/cat.txt")" == "300" ]] || { echo "lost direct lines" >&2; exit 1; }
+[[ "$(grep -c '^sink batch=' "$tmp/cat.txt")" == "600" ]]
+[[ "$(ls "$tmp"/run.log.*.gz | wc -l)" -ge 2 ]]
+
+# 3) Spawned child in rotate mode: heartbeats from chatgpt_send stderr are collapsed
+#    and runner greps still see markers through child_log_view.
+proj="$tmp/project"
+log_dir="$tmp/logs"
+tool_root="$tmp/tool_root"
+mkdir -p "$proj" "$log_dir" "$tool_root/bin"
+
+fake_codex="$tmp/fake_codex"
+cat >"$fake_codex" <<'EOF'
+#!/usr/bin/env bash
+set -euo pipefail
+out=""
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    -o|--output-last-message) out="${2:-}"; shift 2;;
+    *) shift;;
+  esac
+done
+cat >/dev/null || true
+for i in $(seq 1 30); do
+  echo "REPLY_WAIT tick elapsed_ms=$((i * 1000)) probe_status=0 reason=stop_visible fetch_status=0 no_progress_ms=$((i * 1000)) progress_ticks=0 run_id=x"
+done
+printf '%s\n' 'CHILD_BROWSER_USED: no ; REASON: sink-test ; EVIDENCE: none' >"$out"
+printf '%s\n' 'CHILD_RESULT: sink-test done' >>"$out"
+printf '%s\n' 'CHILD_RESULT: sink-test done'
+EOF
+chmod +x "$fake_codex"
+
+fake_chatgpt_send="$tool_root/bin/chatgpt_send"
+cat >"$fake_chatgpt_send" <<'EOF'
+#!/usr/bin/env bash
+exit 0
+EOF
+chmod +x "$fake_chatgpt_send"
+
+out="$(CHATGPT_SEND_LOG_SINK=rotate CHATGPT_SEND_LOG_SINK_CODEC=gzip CHATGPT_SEND_LOG_SINK_MAX_BYTES=1024 "$SPAWN" \
+  --project-path "$proj" \
+  --task "sink test" \
+  --iterations 1 \
+  --launcher direct \
+  --wait \
+  --timeout-sec 60 \
+  --log-dir "$log_dir" \
+  --codex-bin "$fake_codex" \
+  --chatgpt-send-path "$fake_chatgpt_send" \
+  --no-open-browser \
+  --no-init-specialist-chat \
+  --no-auto-monitor \
+  --browser-optional 2>&1)"
+child_log="$(echo "$out" | sed -n 's/^LOG_FILE=//p' | tail -n 1)"
+[[ -f "$child_log" ]]
+"$LOGCAT" "$child_log" >"$tmp/child.txt"
+grep -q 'HEARTBEAT_RLE collapsed=29' "$tmp/child.txt"
+[[ "$(grep -c '^REPLY_WAIT tick' "$tmp/child.txt")" == "1" ]]
+grep -q 'CHILD_RESULT: sink-test done' "$tmp/child.txt"
+# Runner markers written around the sink survive rotation too.
+ls "$child_log".*.gz >/dev/null
+[[ -f "$child_log.lock" ]]
+for want in '^\[child\] run_id=' 'ITER_STATUS step=bootstrap' '^\[child\] exit_code=0$' '^\[child\] finished_at='; do
+  [[ "$(grep -c "$want" "$tmp/child.txt")" == "1" ]] || { echo "missing/duplicated: $want" >&2; cat "$tmp/child.txt" >&2; exit 1; }
+done
+
+echo "OK"
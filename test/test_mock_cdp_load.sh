@@ -0,0 +1,94 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+MOCK="$ROOT_DIR/bin/mock_cdp.py"
+
+tmp="$(mktemp -d)"
+serve_pid=""
+cleanup() {
+  if [[ -n "${serve_pid:-}" ]]; then
+    kill "$serve_pid" >/dev/null 2>&1 || true
+  fi
+  rm -rf "$tmp"
+}
+trap cleanup EXIT
+
+# serve: /json/* endpoints plus a real cdp_chatgpt.py send through the websocket.
+python3 "$MOCK" serve --tabs 2 --turns 2 --first-token-ms 400 --tick-ms 20 --chunk-chars 200 \
+  >"$tmp/serve.out" 2>&1 &
+serve_pid="$!"
+for _ in $(seq 1 100); do
+  grep -q '^MOCK_CDP_READY ' "$tmp/serve.out" && break
+  sleep 0.05
+done
+port="$(sed -nE 's/^MOCK_CDP_READY port=([0-9]+) tabs=2$/\1/p' "$tmp/serve.out")"
+[[ -n "$port" ]] || { cat "$tmp/serve.out" >&2; exit 1; }
+
+url="$(python3 - "$port" <<'PY'
+import json
+import sys
+import urllib.request
+
+base = f"http://127.0.0.1:{sys.argv[1]}"
+version = json.load(urllib.request.urlopen(base + "/json/version"))
+assert version["Browser"].startswith("MockCDP"), version
+tabs = json.load(urllib.request.urlopen(base + "/json/list"))
+assert len(tabs) == 2 and all(t["webSocketDebuggerUrl"].startswith("ws://") for t in tabs), tabs
+print(tabs[0]["url"])
+PY
+)"
+
+reply="$(CHATGPT_SEND_TAB_CACHE_DIR="$tmp/tab_cache" CHATGPT_SEND_PROGRESS=0 \
+  python3 "$ROOT_DIR/bin/cdp_chatgpt.py" --cdp-port "$port" --chatgpt-url "$url" \
+  --prompt "mock hello" --timeout 30 2>"$tmp/send.err")" || { cat "$tmp/send.err" >&2; exit 1; }
+grep -q '^Mock reply 1 to: mock hello\.' <<<"$reply"
+
+python3 - "$port" <<'PY'
+import json
+import sys
+import urllib.request
+
+stats = json.load(urllib.request.urlopen(f"http://127.0.0.1:{sys.argv[1]}/__mock/stats"))
+assert stats["labels"].get("send") == 1, stats
+assert stats["labels"].get("unknown", 0) == 0, stats
+assert stats["ws_open"] == 0 and stats["ws_connections"] == 1, stats
+PY
+kill "$serve_pid"
+wait "$serve_pid" 2>/dev/null || true
+serve_pid=""
+
+# load: concurrent sessions, one per chat at a time, with a JSON report.
+out="$(python3 "$MOCK" load --sessions 6 --concurrency 3 --first-token-ms 400 --tick-ms 20 \
+  --chunk-chars 200 --latency-ms 2 --jitter-ms 3 --timeout 30 --out "$tmp/report.json" 2>&1)" \
+  || { echo "$out" >&2; exit 1; }
+grep -q '^MOCK_CDP_LOAD mode=send sessions=6 concurrency=3 tabs=3 ok=6 fail=0 ' <<<"$out"
+grep -q ' unknown_evals=0 ws_open_peak=[1-3]$' <<<"$out"
+
+python3 - "$tmp/report.json" <<'PY'
+import json
+import sys
+
+r = json.load(open(sys.argv[1], encoding="utf-8"))
+assert r["ok"] == 6 and len(r["runs"]) == 6, r
+assert r["latency_ms"]["p50"] <= r["latency_ms"]["p95"] <= r["latency_ms"]["max"], r["latency_ms"]
+assert all(run["max_rss_kb"] > 0 and run["evals"] > 0 for run in r["runs"]), r["runs"]
+assert r["server"]["labels"]["send"] == 6, r["server"]
+PY
+
+# Replies that finish before the echo anchor is read (time to first token
+# under one poll) complete instead of waiting for activity that never comes.
+out="$(python3 "$MOCK" load --sessions 3 --concurrency 3 --first-token-ms 0 --tick-ms 5 \
+  --chunk-chars 100000 --timeout 30 --out "$tmp/fast.json" 2>&1)" \
+  || { echo "$out" >&2; exit 1; }
+grep -q '^MOCK_CDP_LOAD mode=send sessions=3 concurrency=3 tabs=3 ok=3 fail=0 ' <<<"$out"
+python3 - "$tmp/fast.json" <<'PY'
+import json
+import sys
+
+r = json.load(open(sys.argv[1], encoding="utf-8"))
+assert r["ok"] == 3, r
+assert r["latency_ms"]["max"] < 10000, r["latency_ms"]
+PY
+
+echo "OK"
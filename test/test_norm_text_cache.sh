@@ -0,0 +1,69 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" <<'PY'
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+
+raw = ("Ответ  модели with   spaces\r\n" * 4000) + "done ▍ "
+nt = mod.norm_text(raw)
+assert mod.norm_text(raw) is nt
+assert nt.norm == mod.canonical_normalize_text(raw)
+assert nt.assistant == nt.norm[: -len(" ▍")].strip() and not nt.assistant.endswith("▍")
+assert nt.hash == mod.stable_text_hash(raw)
+assert nt.signature == mod.text_signature(raw) == f"{nt.hash[:12]}:{len(nt.norm)}"
+assert nt.tail_hash == mod.stable_text_hash(nt.norm[-500:])
+assert nt.assistant_tail_hash == mod.stable_text_hash(nt.assistant[-500:])
+assert mod.norm_text("").hash == "" and mod.norm_text("").signature == ""
+
+# The LRU stays bounded.
+for i in range(mod.NORM_CACHE_SIZE * 3):
+    mod.norm_text(f"text {i}")
+assert len(mod._NORM_CACHE) == mod.NORM_CACHE_SIZE
+
+# Fast path: same lastAssistantSig and raw text reuse the previous object;
+# a changed signature or text gets a fresh one.
+st = {"lastAssistant": raw, "lastAssistantSig": "m1|||3|120000"}
+first = mod.assistant_norm_for_state(st, None, "")
+again = mod.assistant_norm_for_state(dict(st), first, "m1|||3|120000")
+assert again is first
+grown = mod.assistant_norm_for_state({"lastAssistant": raw + "more", "lastAssistantSig": "m1|||3|120004"}, first, "m1|||3|120000")
+assert grown is not first and grown.raw.endswith("more")
+same_sig_other_text = mod.assistant_norm_for_state({"lastAssistant": raw.replace("done", "DONE"), "lastAssistantSig": "m1|||3|120000"}, first, "m1|||3|120000")
+assert same_sig_other_text is not first
+
+# Microbenchmark: an unchanged poll must not scale with reply length.
+def per_poll(fn, n):
+    t0 = time.process_time()
+    for _ in range(n):
+        fn()
+    return (time.process_time() - t0) / n
+
+def old_poll():
+    txt = mod.canonical_normalize_text(mod.canonical_normalize_text(raw).rstrip("▍ "))
+    tail = mod.canonical_normalize_text(txt)[-500:]
+    mod._sha256_text(mod.canonical_normalize_text(tail))
+
+def new_poll():
+    # Each CDP poll decodes a fresh string object for the same reply text.
+    cur = {"lastAssistant": raw[:-1] + raw[-1:], "lastAssistantSig": "m1|||3|120000"}
+    nt2 = mod.assistant_norm_for_state(cur, first, "m1|||3|120000")
+    nt2.assistant, nt2.assistant_tail_hash
+
+first.assistant, first.assistant_tail_hash
+slow = per_poll(old_poll, 20)
+fast = per_poll(new_poll, 200)
+print(f"BENCH reply_chars={len(raw)} full_normalize_us={slow*1e6:.0f} fast_path_us={fast*1e6:.0f}")
+assert fast * 5 < slow, (slow, fast)
+print("OK")
+PY
+
+echo "OK"
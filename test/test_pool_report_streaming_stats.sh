@@ -0,0 +1,73 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+REPORT="$ROOT_DIR/scripts/pool_report.sh"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+pool="$tmp/pool"
+mkdir -p "$pool/logs"
+
+# Agent 2 retried twice; roster (not fleet summary) carries its log path.
+seq 1 5000 | sed 's/^/noise line /' >"$pool/logs/r2b.log"
+echo 'E_REPLY_WAIT_TIMEOUT class=stop_visible' >>"$pool/logs/r2b.log"
+
+cat >"$pool/fleet.summary.json" <<JSON
+{
+  "done_ok": 1,
+  "done_fail": 1,
+  "agents": [
+    {"agent_id": 1, "run_id": "r1", "state_class": "DONE_OK", "chat_proof": "ok"},
+    {"agent_id": 2, "run_id": "r2b", "state_class": "DONE_FAIL", "chat_proof": "ok"}
+  ]
+}
+JSON
+
+cat >"$pool/summary.jsonl" <<'JSONL'
+{"agent":1,"attempt":1,"child_run_id":"r1","status":"OK","fail_kind":"OK","duration_sec":"10","assigned_chat_url":"https://chatgpt.com/c/aaa"}
+{"agent":2,"attempt":1,"child_run_id":"r2","status":"E_REPLY_WAIT_TIMEOUT","fail_kind":"FAIL_AGENT_ERROR","duration_sec":"30","assigned_chat_url":"https://chatgpt.com/c/bbb"}
+not json
+{"agent":2,"attempt":2,"child_run_id":"r2a","status":"E_REPLY_WAIT_TIMEOUT","fail_kind":"FAIL_AGENT_ERROR","duration_sec":"50","assigned_chat_url":"https://chatgpt.com/c/bbb"}
+{"agent":2,"attempt":3,"child_run_id":"r2b","status":"FAILED","fail_kind":"FAIL_CHAT_MIXUP","duration_sec":"70","assigned_chat_url":"https://chatgpt.com/c/bbb"}
+JSONL
+
+cat >"$pool/fleet_roster.jsonl" <<JSONL
+{"agent_id":2,"attempt":3,"run_id":"r2b","log_file":"$pool/logs/r2b.log","result_json":""}
+JSONL
+
+"$REPORT" --pool-run-dir "$pool" --include-logs 1 --max-last-lines 3 >/dev/null
+
+python3 - "$pool/pool_report.json" "$pool/pool_report.md" <<'PY'
+import json
+import sys
+from pathlib import Path
+
+obj = json.loads(Path(sys.argv[1]).read_text(encoding="utf-8"))
+md = Path(sys.argv[2]).read_text(encoding="utf-8")
+st = obj["stats"]
+assert st["summary_rows"] == 4, st
+assert st["retries_total"] == 2, st
+assert st["per_agent"]["2"]["attempts"] == 3, st["per_agent"]
+assert st["per_agent"]["2"]["errors"] == 3, st["per_agent"]
+assert st["per_agent"]["2"]["durations"]["max_sec"] == 70
+assert st["per_chat"]["https://chatgpt.com/c/bbb"]["count"] == 3
+assert st["per_chat"]["https://chatgpt.com/c/bbb"]["p50_sec"] == 50
+assert st["durations"]["mean_sec"] == 40.0, st["durations"]
+codes = st["error_codes"]
+assert codes["E_REPLY_WAIT_TIMEOUT"]["count"] == 2, codes
+assert codes["E_REPLY_WAIT_TIMEOUT"]["class"], codes
+assert codes["FAIL_CHAT_MIXUP"]["count"] == 1, codes
+assert sum(st["error_classes"].values()) == 3, st["error_classes"]
+row = [r for r in obj["rows"] if r["run_id"] == "r2b"][0]
+assert row["log_file"].endswith("r2b.log"), row
+assert "## Stats" in md
+assert "## Failure LOG Tails" in md
+tail = md.split("## Failure LOG Tails", 1)[1]
+assert "E_REPLY_WAIT_TIMEOUT class=stop_visible" in tail
+assert "noise line 4999" in tail and "noise line 4998" not in tail
+print("OK")
+PY
+
+echo "OK"
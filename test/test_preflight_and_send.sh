@@ -0,0 +1,270 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+SCRIPT="$ROOT_DIR/bin/chatgpt_send"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+# One DOM scan covers route, contract, fetch-last, dedupe and baseline.
+python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" "$tmp" <<'PY'
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+tmp = Path(sys.argv[2])
+
+CHAT = "https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+OTHER = "https://chatgpt.com/c/bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"
+
+
+class FakeCDP:
+    def __init__(self, url=CHAT, last_user="old prompt", stop=False):
+        self.url = url
+        self.last_user = last_user
+        self.stop = stop
+        self.evals = 0
+        self.exprs = []
+        self.navigated = []
+
+    def state(self):
+        return {
+            "url": self.url,
+            "userCount": 1,
+            "lastUserSig": "u|||0|10",
+            "assistantCount": 1,
+            "lastAssistantSig": "a|||1|9",
+            "assistantAfterLastUser": True,
+            "stopVisible": self.stop,
+            "lastUser": self.last_user,
+            "lastAssistant": "old answer",
+        }
+
+    def eval(self, expression, timeout=0.0):
+        self.evals += 1
+        self.exprs.append(mod.eval_label(expression))
+        if "preflightSnapshot" in expression:
+            return {
+                "fetch": {
+                    "url": self.url,
+                    "stopVisible": self.stop,
+                    "hasComposer": True,
+                    "hasSendButton": True,
+                    "ui_state_hint": "ok",
+                    "total": 2,
+                    "messages": [
+                        {"role": "user", "text": self.last_user, "sig": "u|||0|10"},
+                        {"role": "assistant", "text": "old answer", "sig": "a|||1|9"},
+                    ],
+                },
+                "ready": {"hasEditor": True, "hasSend": True, "stopVisible": self.stop},
+                "state": self.state(),
+            }
+        return self.state()
+
+    def call(self, method, params=None, timeout=0.0):
+        self.navigated.append(params["url"])
+        self.url = params["url"]
+        return {}
+
+
+mod.wait_for_composer = lambda cdp, timeout_s=30.0: None
+mod.wait_until_send_ready = lambda cdp, timeout_s=180.0: False
+
+err = io.StringIO()
+with contextlib.redirect_stderr(err):
+    cdp = FakeCDP()
+    payload, baseline = mod.preflight_snapshot(cdp, CHAT, "new prompt", limit=4)
+assert cdp.evals == 1 and cdp.exprs == ["preflight"], cdp.exprs
+pf = payload["preflight"]
+assert pf["decision"] == "need_send" and pf["route"] == "ok" and pf["ui_contract_ok"] and pf["evals"] == 1, pf
+assert payload["chat_id"] == "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa" and payload["limit"] == 4, payload
+assert payload["last_user_hash"] == mod.norm_text("old prompt").hash and payload["assistant_after_last_user"]
+assert baseline["userCount"] == 1 and baseline["lastUser"] == "old prompt", baseline
+assert "PREFLIGHT: decision=need_send route=ok ui_contract=ok evals=1" in err.getvalue(), err.getvalue()
+
+with contextlib.redirect_stderr(io.StringIO()):
+    payload, _ = mod.preflight_snapshot(FakeCDP(last_user="new prompt"), CHAT, "new prompt")
+    assert payload["preflight"]["decision"] == "prompt_present", payload["preflight"]
+    payload, _ = mod.preflight_snapshot(FakeCDP(stop=True), CHAT, "new prompt")
+    assert payload["preflight"]["decision"] == "generation_in_progress", payload["preflight"]
+
+    # Wrong conversation: the route guard navigates, then the scan is repeated.
+    cdp = FakeCDP(url=OTHER)
+    payload, baseline = mod.preflight_snapshot(cdp, CHAT, "new prompt")
+assert cdp.navigated == [CHAT] and payload["preflight"]["route"] == "renav", (cdp.navigated, payload["preflight"])
+assert cdp.exprs[0] == "preflight" and cdp.exprs[-1] == "preflight" and baseline["url"] == CHAT, cdp.exprs
+
+# The decision comes back over a FIFO; silence and EOF both abort.
+fifo = tmp / "decision"
+os.mkfifo(fifo)
+
+
+def writer(text, delay):
+    time.sleep(delay)
+    with open(fifo, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+hold = os.open(fifo, os.O_RDWR)
+threading.Thread(target=writer, args=("send\n", 0.2)).start()
+assert mod.read_preflight_decision(str(fifo), 5.0) == "send"
+with contextlib.redirect_stderr(io.StringIO()) as err:
+    t0 = time.time()
+    assert mod.read_preflight_decision(str(fifo), 0.3) == "abort decision_timeout"
+assert time.time() - t0 < 2.0 and "E_PREFLIGHT_DECISION_TIMEOUT" in err.getvalue()
+os.close(hold)
+threading.Thread(target=writer, args=("", 0.1)).start()
+assert mod.read_preflight_decision(str(fifo), 5.0) == "abort eof"
+print("OK")
+PY
+
+# Shell side: the pipeline consumes the snapshot and sends through the same process.
+fake_bin="$tmp/fake-bin"
+root="$tmp/root"
+mkdir -p "$fake_bin" "$root/bin" "$root/state"
+cat >"$fake_bin/curl" <<'EOF'
+#!/usr/bin/env bash
+for a in "$@"; do
+  case "$a" in
+    *"/json/version"*) printf '%s\n' '{"Browser":"fake"}'; exit 0 ;;
+    *"/json/list"*) printf '%s\n' '[{"id":"tab1","type":"page","url":"https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa","title":"Fake chat","webSocketDebuggerUrl":"ws://fake"}]'; exit 0 ;;
+  esac
+done
+printf '%s\n' '{}'
+EOF
+chmod +x "$fake_bin/curl"
+
+cat >"$root/bin/cdp_chatgpt.py" <<'EOF'
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+from pathlib import Path
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--prompt")
+ap.add_argument("--chatgpt-url")
+ap.add_argument("--fetch-last", action="store_true")
+ap.add_argument("--precheck-only", action="store_true")
+ap.add_argument("--preflight-and-send", action="store_true")
+ap.add_argument("--preflight-out")
+ap.add_argument("--decision-in")
+ap.add_argument("--send-no-wait", action="store_true")
+args, _ = ap.parse_known_args()
+case = os.environ["FAKE_CASE"]
+log = Path(os.environ["FAKE_LOG"])
+
+
+def note(line):
+    with log.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def payload(decision):
+    return {
+        "url": args.chatgpt_url,
+        "chat_id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+        "stop_visible": False,
+        "total_messages": 0,
+        "assistant_after_last_user": False,
+        "last_user_text": "",
+        "last_user_hash": "",
+        "assistant_text": "",
+        "ui_state": "ok",
+        "ui_contract_sig": "schema=v1|composer=1|send=1|stop=0|assistant_after_anchor=0",
+        "fingerprint_v1": "fp",
+        "checkpoint_id": "SPC-2099-01-01T00:00:00Z-none",
+        "ts": "2099-01-01T00:00:00Z",
+        "messages": [],
+        "preflight": {"decision": decision, "ui_contract_ok": True},
+    }
+
+
+if args.preflight_and_send:
+    note("preflight")
+    if case == "preflight_broken":
+        raise SystemExit(5)
+    with open(args.preflight_out, "w", encoding="utf-8") as f:
+        f.write(json.dumps(payload(os.environ.get("FAKE_DECISION", "need_send"))) + "\n")
+    with open(args.decision_in, encoding="utf-8") as f:
+        verdict = f.readline().strip()
+    note(f"decision {verdict}")
+    if verdict != "send":
+        raise SystemExit(10)
+    print("reply via preflight session", flush=True)
+    raise SystemExit(0)
+if args.fetch_last:
+    note("fetch_last")
+    print(json.dumps(payload("need_send")), flush=True)
+    raise SystemExit(0)
+if args.precheck_only:
+    note("precheck")
+    raise SystemExit(10)
+note("send")
+print("reply via classic send", flush=True)
+EOF
+chmod +x "$root/bin/cdp_chatgpt.py"
+
+run_case() {
+  # run_case <case> <prompt>: sets out/st
+  rm -rf "$root/state" && mkdir -p "$root/state"
+  : >"$tmp/$1.log"
+  set +e
+  out="$(
+    PATH="$fake_bin:$PATH" CHATGPT_SEND_ROOT="$root" CHATGPT_SEND_CDP_PORT=9222 \
+      CHATGPT_SEND_STRICT_UI_CONTRACT="${STRICT:-0}" \
+      CHATGPT_SEND_REPLY_POLLING=0 CHATGPT_SEND_PREFLIGHT_PIPELINE=1 \
+      FAKE_CASE="$1" FAKE_LOG="$tmp/$1.log" \
+      "$SCRIPT" --chatgpt-url "https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa" --prompt "$2" 2>&1
+  )"
+  st=$?
+  set -e
+}
+
+run_case happy "pipelined prompt"
+[[ "$st" == "0" ]] || { echo "$out" >&2; exit 1; }
+grep -q '^reply via preflight session$' <<<"$out"
+grep -q 'PREFLIGHT_SESSION start decision=need_send ui_contract_ok=1' <<<"$out"
+grep -q 'FETCH_LAST source=preflight' <<<"$out"
+grep -q 'E_PRECHECK_NO_NEW_REPLY: need_send source=preflight' <<<"$out"
+grep -q 'SEND_START ' <<<"$out"
+# Only the initial fetch-last reads the snapshot; the final dedupe veto
+# re-reads the DOM while the preflight process waits for its decision.
+[[ "$(grep -c 'FETCH_LAST source=preflight' <<<"$out")" == "1" ]] || { echo "$out" >&2; exit 1; }
+[[ "$(cat "$tmp/happy.log")" == $'preflight\nfetch_last\ndecision send' ]] || { cat "$tmp/happy.log" >&2; exit 1; }
+
+# The strict UI contract is answered by the preflight scan and logged as such.
+STRICT=1 run_case strict "strict prompt"
+[[ "$st" == "0" ]] || { echo "$out" >&2; exit 1; }
+grep -q 'action=preflight_contract_check .*result=ok' <<<"$out" || { echo "$out" >&2; exit 1; }
+if grep -q 'action=contract_check' <<<"$out"; then
+  echo "preflight contract verdict logged as a probe" >&2
+  exit 1
+fi
+[[ "$(cat "$tmp/strict.log")" == $'preflight\nfetch_last\ndecision send' ]] || { cat "$tmp/strict.log" >&2; exit 1; }
+
+# A snapshot that needs live polling hands over to the classic precheck.
+FAKE_DECISION=generation_in_progress run_case handover "handover prompt"
+[[ "$st" == "0" ]] || { echo "$out" >&2; exit 1; }
+grep -q 'PREFLIGHT_SESSION abort reason=precheck_generation_in_progress' <<<"$out"
+grep -q '^reply via classic send$' <<<"$out"
+[[ "$(head -n 3 "$tmp/handover.log")" == $'preflight\ndecision abort precheck_generation_in_progress\nprecheck' ]] || { cat "$tmp/handover.log" >&2; exit 1; }
+
+# A preflight process that dies early falls back to the classic pipeline.
+run_case preflight_broken "fallback prompt"
+[[ "$st" == "0" ]] || { echo "$out" >&2; exit 1; }
+grep -q 'W_PREFLIGHT_FALLBACK status=5' <<<"$out"
+grep -q '^reply via classic send$' <<<"$out"
+grep -q '^fetch_last$' "$tmp/preflight_broken.log"
+
+echo "OK"
@@ -0,0 +1,93 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+RUNNER="$ROOT_DIR/scripts/run_tests.sh"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+suite="$tmp/suite"
+mkdir -p "$suite"
+for i in 1 2 3 4; do
+  cat >"$suite/test_sleep_$i.sh" <<'EOF'
+#!/usr/bin/env bash
+set -euo pipefail
+sleep 1
+mkdir -p "$CHATGPT_SEND_ROOT/state"
+echo "$$" >"$CHATGPT_SEND_ROOT/state/owner"
+[[ "$(ls "$CHATGPT_SEND_ROOT/state")" == "owner" ]]
+[[ -L "$CHATGPT_SEND_ROOT/bin" ]]
+[[ "$TMPDIR" == "$CHATGPT_SEND_ROOT/tmp" ]]
+[[ "$PWD" == "$CHATGPT_SEND_ROOT" ]]
+echo "WORKER_ROOT=$CHATGPT_SEND_ROOT"
+[[ "$CHATGPT_SEND_CDP_SLOT_DIR" == "$CHATGPT_SEND_ROOT/state/cdp_slots" ]]
+[[ "$POOL_RUNS_ROOT" == "$CHATGPT_SEND_ROOT/state/runs" ]]
+[[ -z "${POOL_CHAT_HEALTH_STORE:-}" ]]
+echo OK
+EOF
+done
+cat >"$suite/test_fails.sh" <<'EOF'
+#!/usr/bin/env bash
+echo "boom" >&2
+exit 1
+EOF
+# Built with printf so this file itself is not classified as a live test.
+gate_var="RUN_LIVE_CDP_E2E"
+printf '#!/usr/bin/env bash\nif [[ "${%s:-0}" != "1" ]]; then\n  echo "SKIP_%s"\n  exit 0\nfi\nexit 1\n' \
+  "$gate_var" "$gate_var" >"$suite/test_live_thing.sh"
+
+set +e
+out="$(bash "$RUNNER" --test-dir "$suite" --jobs 4 --out-dir "$tmp/run1" 2>&1)"
+rc=$?
+set -e
+[[ "$rc" == "1" ]] || { echo "expected rc=1 (one failing test), got $rc" >&2; echo "$out" >&2; exit 1; }
+echo "$out" | grep -q 'TEST_RESULT status=fail name=test_fails.sh'
+echo "$out" | grep -q 'TEST_RESULT status=skip name=test_live_thing.sh ms=0 reason=live'
+echo "$out" | grep -q 'TEST_SUMMARY total=6 pass=4 fail=1 timeout=0 skip=1 jobs=4'
+
+python3 - "$tmp/run1/report.json" <<'PY'
+import json
+import sys
+
+rep = json.load(open(sys.argv[1], encoding="utf-8"))
+rows = {r["name"]: r for r in rep["tests"]}
+assert rows["test_sleep_1.sh"]["status"] == "pass", rows
+assert rows["test_sleep_1.sh"]["duration_ms"] >= 900, rows
+assert rows["test_live_thing.sh"]["live"] is True
+# Four 1s sleeps on four workers: wall time well below the serial sum.
+assert rep["serial_ms"] >= 4000, rep
+assert rep["wall_ms"] < rep["serial_ms"] * 0.6, (rep["wall_ms"], rep["serial_ms"])
+assert rep["slowest"][0]["name"].startswith("test_sleep_"), rep["slowest"]
+PY
+
+# Concurrent workers never share a root or a tmp dir, and none is the checkout.
+roots="$(grep -h '^WORKER_ROOT=' "$tmp"/run1/logs/test_sleep_*.log | sort -u)"
+[[ "$(wc -l <<<"$roots")" == "4" ]] || { echo "expected 4 distinct worker roots: $roots" >&2; exit 1; }
+if grep -q "^WORKER_ROOT=$ROOT_DIR\$" <<<"$roots"; then
+  echo "a worker ran in the checkout root" >&2
+  exit 1
+fi
+[[ ! -e "$ROOT_DIR/state/owner" ]]
+
+# Baseline comparison: pretend test_sleep_1 used to take 100ms.
+python3 - "$tmp/run1/report.json" "$tmp/baseline.json" <<'PY'
+import json
+import sys
+
+rep = json.load(open(sys.argv[1], encoding="utf-8"))
+for r in rep["tests"]:
+    if r["name"] == "test_sleep_1.sh":
+        r["duration_ms"] = 100
+json.dump(rep, open(sys.argv[2], "w", encoding="utf-8"))
+PY
+set +e
+out="$(bash "$RUNNER" --test-dir "$suite" --filter 'sleep_1' --baseline "$tmp/baseline.json" \
+  --regress-min-ms 500 --fail-on-regression 1 --out-dir "$tmp/run2" 2>&1)"
+rc=$?
+set -e
+[[ "$rc" == "3" ]] || { echo "expected rc=3 (regression), got $rc" >&2; echo "$out" >&2; exit 1; }
+echo "$out" | grep -q 'TEST_REGRESSION name=test_sleep_1.sh baseline_ms=100 '
+echo "$out" | grep -q 'TEST_SUMMARY total=1 pass=1 .* regressions=1'
+
+echo "OK"
@@ -51,7 +51,8 @@ outs_file="$tmp/outs.txt"
 : >"$outs_file"
 
 for i in $(seq 1 "$run_count"); do
-  out="$(CHATGPT_SEND_MAX_CDP_SLOTS=2 CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC=30 "$SPAWN" \
+  # The fake chatgpt_send has no phases: exercise the whole-call slot path.
+  out="$(CHATGPT_SEND_CDP_SLOT_SCOPE=run CHATGPT_SEND_MAX_CDP_SLOTS=2 CHATGPT_SEND_SLOT_WAIT_TIMEOUT_SEC=30 "$SPAWN" \
     --project-path "$proj" \
     --task "slot test $i" \
     --iterations 1 \
@@ -0,0 +1,142 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+python3 - "$ROOT_DIR/bin/cdp_chatgpt.py" <<'PY'
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("cdp_chatgpt", Path(sys.argv[1]))
+mod = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mod)
+mod.PROGRESS_ENABLED = False
+mod.STALE_STOP_SEC = 0
+mod.SOFT_RESET_TIER_VERIFY_SEC = {"nudge": 0.4, "renav": 0.4, "reload": 0.4}
+
+TARGET = "https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+
+class FakePage:
+    """Stop button stays visible until the tier named in `fix_at` runs."""
+
+    def __init__(self, fix_at, healthy=False):
+        self.fix_at = fix_at
+        self.healthy = healthy
+        self.actions = []
+
+    def _ran(self, tier):
+        self.actions.append(tier)
+        if tier == self.fix_at:
+            self.healthy = True
+
+    def call(self, method, params=None, timeout=None):
+        if method == "Page.reload":
+            self._ran("hard_reload" if (params or {}).get("ignoreCache") else "reload")
+        return {}
+
+    def eval(self, expression, timeout=10.0):
+        if expression == "document.readyState":
+            return "complete"
+        if "visibilitychange" in expression:
+            self._ran("nudge")
+            return {"ok": True, "turns": 4, "hasEditor": True}
+        if "PopStateEvent" in expression:
+            assert '"/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"' in expression
+            self._ran("renav")
+            return {"ok": True, "via": "popstate"}
+        if "hasSend" in expression:
+            return {"hasEditor": True, "hasSend": True, "stopVisible": not self.healthy}
+        if "lastAssistantSig" in expression:
+            return {"url": TARGET, "userCount": 1, "assistantCount": 1, "lastAssistantSig": "a1", "stopVisible": not self.healthy}
+        return True
+
+
+def run(fix_at, reason="reply_stuck_stop_visible", healthy=False):
+    page = FakePage(fix_at, healthy=healthy)
+    err = io.StringIO()
+    with contextlib.redirect_stderr(err):
+        ok = mod.soft_reset_tab(page, TARGET, reason=reason, timeout_s=5.0)
+    return ok, page, err.getvalue()
+
+
+# Cheapest tier wins: no reload at all.
+ok, page, err = run("nudge")
+assert ok and page.actions == ["nudge"], page.actions
+assert "SOFT_RESET tier=nudge outcome=ok elapsed_ms=" in err, err
+assert "SOFT_RESET done outcome=success reason=reply_stuck_stop_visible tier=nudge" in err, err
+
+# Escalation stops at the first tier that leaves the chat usable.
+ok, page, err = run("renav")
+assert ok and page.actions == ["nudge", "renav"], page.actions
+assert "SOFT_RESET tier=nudge outcome=fail" in err and "SOFT_RESET tier=renav outcome=ok" in err, err
+
+ok, page, err = run("reload")
+assert ok and page.actions == ["nudge", "renav", "reload"], page.actions
+
+ok, page, err = run("hard_reload")
+assert ok and page.actions == ["nudge", "renav", "reload", "hard_reload"], page.actions
+assert "COMPOSER_TIMEOUT" not in err, err
+
+ok, page, err = run("never")
+assert not ok and "E_SOFT_RESET_FAILED" in err, err
+assert err.count("outcome=fail") == 4, err
+
+# Nothing visible for the nudge to clear: it is not credited, renav runs.
+ok, page, err = run("renav", reason="route_mismatch", healthy=True)
+assert ok and page.actions == ["renav"], page.actions
+assert "SOFT_RESET tier=nudge outcome=fail" in err and "err=nudge_nothing_to_clear" in err, err
+assert "SOFT_RESET done outcome=success reason=route_mismatch tier=renav" in err, err
+
+# A stale stop the send-ready wait gives up on is still visible: escalate.
+mod.STALE_STOP_SEC = 0.01
+mod.SOFT_RESET_TIER_VERIFY_SEC["nudge"] = 1.5
+ok, page, err = run("renav")
+assert ok and page.actions == ["nudge", "renav"], page.actions
+assert "E_STALE_STOP_ASSUME_IDLE" in err and "err=nudge_stop_still_visible" in err, err
+mod.STALE_STOP_SEC = 0
+mod.SOFT_RESET_TIER_VERIFY_SEC["nudge"] = 0.4
+
+# Echo misses need fresh conversation data: the in-page nudge is skipped.
+ok, page, err = run("renav", reason="echo_miss_post_verify")
+assert ok and page.actions == ["renav"], page.actions
+
+# Tier list is configurable; unknown names are ignored.
+os.environ["CHATGPT_SEND_SOFT_RESET_TIERS"] = "bogus,hard_reload"
+ok, page, err = run("hard_reload")
+assert ok and page.actions == ["hard_reload"], page.actions
+os.environ["CHATGPT_SEND_SOFT_RESET_TIERS"] = ""
+assert mod.soft_reset_tiers() == ["hard_reload"]
+print("OK")
+PY
+
+# Release gate exposes per-tier counts and latency.
+run_id="test-soft-reset-tiers-$$"
+run_dir="$ROOT_DIR/state/runs/$run_id"
+mkdir -p "$run_dir"
+trap 'rm -rf "$run_dir"' EXIT
+cat >"$run_dir/run.log" <<'EOF'
+SOFT_RESET start reason=reply_stuck_stop_visible
+SOFT_RESET tier=nudge outcome=fail elapsed_ms=4100 reason=reply_stuck_stop_visible err=x
+SOFT_RESET tier=renav outcome=ok elapsed_ms=900 reason=reply_stuck_stop_visible
+SOFT_RESET done outcome=success reason=reply_stuck_stop_visible tier=renav elapsed_ms=5000
+SOFT_RESET start reason=pre_send_idle_stop_stuck
+SOFT_RESET tier=nudge outcome=ok elapsed_ms=120 reason=pre_send_idle_stop_stuck
+SOFT_RESET done outcome=success reason=pre_send_idle_stop_stuck tier=nudge elapsed_ms=120
+EOF
+out="$(bash "$ROOT_DIR/scripts/release_gate_check.sh" --run-id "$run_id" 2>&1 || true)"
+for want in \
+  "METRIC SOFT_RESET_TIER_NUDGE_TOTAL=2" \
+  "METRIC SOFT_RESET_TIER_NUDGE_OK_TOTAL=1" \
+  "METRIC SOFT_RESET_TIER_RENAV_OK_TOTAL=1" \
+  "METRIC P95_SOFT_RESET_RENAV_MS=900" \
+  "METRIC SOFT_RESET_TIER_HARD_RELOAD_TOTAL=0" \
+  "METRIC SOFT_RESET_SUCCESS_TOTAL=2"; do
+  grep -qx "$want" <<<"$out" || { echo "missing: $want" >&2; echo "$out" >&2; exit 1; }
+done
+
+echo "OK"
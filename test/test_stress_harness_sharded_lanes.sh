@@ -0,0 +1,101 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+# Harness copy with fake chatgpt_send / cdp_chatgpt.py under a throwaway ROOT.
+root="$tmp/root"
+mkdir -p "$root/scripts" "$root/bin" "$root/docs" "$root/state"
+for f in stress_interaction_harness.sh assert_run_contract.sh score_stress_run.sh; do
+  cp "$ROOT_DIR/scripts/$f" "$root/scripts/$f"
+done
+events="$tmp/events.log"
+cat >"$root/bin/chatgpt_send" <<'EOF'
+#!/usr/bin/env bash
+set -euo pipefail
+for a in "$@"; do
+  [[ "$a" == "--ack" ]] && exit 0
+done
+prompt="${*: -1}"
+sid="$(sed -E 's/^.*_(S[0-9]+)_[0-9]+$/\1/' <<<"$prompt")"
+lane="$(basename "${CHATGPT_SEND_ROOT:-main}")"
+echo "start $(date +%s%N) $sid $lane ${CHATGPT_SEND_CDP_PORT}" >>"$FAKE_EVENTS"
+sleep 1
+echo "end $(date +%s%N) $sid $lane ${CHATGPT_SEND_CDP_PORT}" >>"$FAKE_EVENTS"
+printf '%s\n' "SEND_START" "POSTSEND_VERIFY result=OK" "REPLY_READY" "REUSE_EXISTING" "E_CDP_UNREACHABLE" >&2
+EOF
+printf '%s\n' 'raise SystemExit(0)' >"$root/bin/cdp_chatgpt.py"
+chmod +x "$root/bin/chatgpt_send"
+
+cat >"$tmp/plan.json" <<'JSON'
+{
+  "scenarios": [
+    {"id": "S01", "expect": "PASS", "fault": "none"},
+    {"id": "S02", "expect": "PASS", "fault": "none"},
+    {"id": "S03", "expect": "BROWSER_DOWN_FAIL", "fault": "interrupt_after_dispatch"},
+    {"id": "S04", "expect": "REUSE", "fault": "none"},
+    {"id": "S05", "expect": "PASS", "fault": "custom_unknown_pre"},
+    {"id": "S06", "expect": "PASS", "fault": "none"}
+  ]
+}
+JSON
+cat >"$tmp/lanes.txt" <<'EOF'
+# chat,cdp_port
+https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa,9301
+https://chatgpt.com/c/bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb,9302
+https://chatgpt.com/c/cccccccc-cccc-cccc-cccc-cccccccccccc,9301
+EOF
+
+out="$(FAKE_EVENTS="$events" "$root/scripts/stress_interaction_harness.sh" \
+  --plan "$tmp/plan.json" --iters 6 --lanes-file "$tmp/lanes.txt" \
+  --test-id shard_test --out-dir "$tmp/out" 2>&1)" || { echo "$out" >&2; exit 1; }
+
+grep -q '^HARNESS_SHARDS lanes=3 units=5 cdp_ports=9301,9302$' <<<"$out"
+grep -q '^HARNESS_UNIT unit=2 lane=[0-9] domain=lane iters=3,4$' <<<"$out"
+grep -q '^HARNESS_UNIT unit=3 lane=0 domain=global iters=5$' <<<"$out"
+grep -q '^STRESS_SCORE total=6 pass=6 fail=0 ' <<<"$out"
+grep -q '^STRESS_SUMMARY pass=6 fail=0 unexpected_fail=0 ' <<<"$out"
+grep -q '^HARNESS_END interrupted=0 done_iters=6 total_iters=6 ' <<<"$out"
+grep -q '^HARNESS_SHARD_SUMMARY lanes=3 units=5 ' <<<"$out"
+[[ "$(tail -n +2 "$tmp/out/summary.csv" | wc -l)" == "6" ]]
+ls "$tmp/out"/iter_{1,2,3,4,5,6}.markers >/dev/null
+
+python3 - "$events" <<'PY'
+import sys
+
+spans = {}
+for line in open(sys.argv[1], encoding="utf-8"):
+    kind, ts, sid, lane, port = line.split()
+    spans.setdefault(sid, {})[kind] = int(ts)
+    spans[sid]["lane"], spans[sid]["port"] = lane, port
+
+
+def overlap(a, b):
+    return a["start"] < b["end"] and b["start"] < a["end"]
+
+
+others = [s for s in spans if s != "S05"]
+assert not any(overlap(spans["S05"], spans[s]) for s in others), spans
+for a in spans:
+    for b in spans:
+        if a < b and spans[a]["port"] == spans[b]["port"]:
+            assert not overlap(spans[a], spans[b]), (a, b, spans)
+assert any(overlap(spans[a], spans[b]) for a in spans for b in spans if a < b), spans
+assert spans["S03"]["lane"] == spans["S04"]["lane"], spans
+assert spans["S03"]["end"] <= spans["S04"]["start"], spans
+PY
+
+# One lane keeps the sequential, in-place behavior.
+out="$(FAKE_EVENTS="$events" "$root/scripts/stress_interaction_harness.sh" \
+  --plan "$tmp/plan.json" --iters 2 --chat-url "https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa" \
+  --test-id seq_test --out-dir "$tmp/seq" 2>&1)" || { echo "$out" >&2; exit 1; }
+grep -q '^STRESS_SCORE total=2 pass=2 ' <<<"$out"
+if grep -q '^HARNESS_SHARD' <<<"$out" || [[ -e "$tmp/seq/lanes" ]]; then
+  echo "single lane run was sharded: $out" >&2
+  exit 1
+fi
+
+echo "OK"
@@ -0,0 +1,76 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+INV="$ROOT_DIR/bin/tab_inventory.py"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+fake_bin="$tmp/fake-bin"
+mkdir -p "$fake_bin"
+calls="$tmp/curl_calls.log"
+: >"$calls"
+
+cat >"$fake_bin/curl" <<EOF
+#!/usr/bin/env bash
+set -euo pipefail
+echo "\$*" >>"$calls"
+sleep 0.2
+cat <<'JSON'
+[
+  {"id":"t-home","type":"page","url":"https://chatgpt.com/","title":"ChatGPT"},
+  {"id":"t-a1","type":"page","url":"https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa#x","title":"Chat A"},
+  {"id":"t-b","type":"page","url":"https://chatgpt.com/c/bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb","title":"Chat B"},
+  {"id":"t-a2","type":"page","url":"https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa","title":"Chat A"},
+  {"id":"sw","type":"service_worker","url":"https://chatgpt.com/c/cccccccc-cccc-cccc-cccc-cccccccccccc","title":""}
+]
+JSON
+EOF
+chmod +x "$fake_bin/curl"
+
+export PATH="$fake_bin:$PATH"
+export CHATGPT_SEND_TAB_CACHE_DIR="$tmp/cache"
+inv() { python3 "$INV" --cdp-port 9333 --ttl-ms 60000 "$@"; }
+
+# Concurrent readers share one fetch.
+for _ in 1 2 3 4 5 6; do
+  inv json >/dev/null &
+done
+wait
+[[ "$(wc -l <"$calls")" == "1" ]] || { echo "expected 1 fetch, got $(wc -l <"$calls")" >&2; exit 1; }
+
+[[ "$(inv chat-urls)" == $'https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa\nhttps://chatgpt.com/c/bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb' ]]
+[[ "$(inv by-chat-id https://chatgpt.com/c/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa | cut -f1 | paste -sd,)" == "t-a1,t-a2" ]]
+[[ "$(inv duplicates)" == $'aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa\tt-a1,t-a2' ]]
+[[ "$(inv home | cut -f1)" == "t-home" ]]
+[[ "$(inv active | cut -f1)" == "t-home" ]]
+inv summary | python3 -c '
+import json,sys
+s=json.load(sys.stdin)
+assert s["chat_tab_count"] == 3, s
+assert s["page_tabs"] == 4, s
+'
+[[ "$(wc -l <"$calls")" == "1" ]]
+
+# Navigation invalidates; TTL expiry refetches.
+inv invalidate
+inv json >/dev/null
+[[ "$(wc -l <"$calls")" == "2" ]]
+python3 "$INV" --cdp-port 9333 --ttl-ms 1 json >/dev/null
+[[ "$(wc -l <"$calls")" == "3" ]]
+
+# Shell helpers used by chatgpt_send consumers read the same cache, but keep
+# their own filters: no target-type check, any /c/<hex> id length.
+out="$(bash -c '
+  set -euo pipefail
+  SCRIPT_DIR="$1/bin"; CDP_PORT=9333; TAB_CACHE_TTL_MS=60000; ROOT="$2"
+  source "$1/bin/lib/chatgpt_send/core.sh"
+  capture_chat_urls_from_cdp | wc -l
+  cdp_tab_inventory_invalidate
+  capture_chat_urls_from_cdp >/dev/null
+' _ "$ROOT_DIR" "$tmp")"
+[[ "$out" == "3" ]] || { echo "expected the pre-cache chat URL filter, got $out urls" >&2; exit 1; }
+[[ "$(wc -l <"$calls")" == "4" ]]
+
+echo "OK"
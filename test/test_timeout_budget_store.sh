@@ -0,0 +1,83 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+REPO="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+tmp="$(mktemp -d)"
+trap 'rm -rf "$tmp"' EXIT
+
+# record <run_id> <kind> [count]: record events through core.sh as a run would.
+record() {
+  bash -c '
+    set -euo pipefail
+    repo="$1"
+    ROOT="$2"
+    RUN_ID="$3"
+    CDP_PORT=9333
+    TIMEOUT_BUDGET_WINDOW_SEC=300
+    TIMEOUT_BUDGET_MAX="${BUDGET_MAX:-1000}"
+    TIMEOUT_BUDGET_ACTION=fail
+    TIMEOUT_BUDGET_LOCK_WAIT_SEC="${LOCK_WAIT:-10}"
+    source "$repo/bin/lib/chatgpt_send/core.sh"
+    for ((i = 0; i < $5; i++)); do
+      timeout_budget_record_event "$4" || true
+    done
+  ' _ "$REPO" "$tmp/root" "$1" "$2" "${3:-1}"
+}
+
+export CHATGPT_SEND_TIMEOUT_BUDGET_DIR="$tmp/shared"
+store="$tmp/shared/chatgpt-send-timeout-budget.cdp9333.tsv"
+
+# Expired buckets and legacy per-event lines are folded into the new store.
+mkdir -p "$tmp/shared"
+now="$(date +%s)"
+printf '%s\tstatus4_timeout\t7\n%s\truntime_eval\n%s\tcomposer\n' "$((now - 4000))" "$((now - 10))" "$((now - 5000))" >"$store"
+out="$(record r0 status4_timeout 2>&1)"
+grep -q 'TIMEOUT_BUDGET event=status4_timeout total=2 runtime_eval=1 composer=0 max=1000 window_sec=300 bucket_sec=5 cdp_port=9333 run_id=r0' <<<"$out" || { echo "$out" >&2; exit 1; }
+
+# Concurrent children on one browser: nothing is lost, and the store stays
+# one line per (bucket, kind) however many events it holds.
+pids=()
+for n in 1 2 3 4 5 6; do
+  record "r$n" "$([[ $((n % 2)) == 0 ]] && echo runtime_eval || echo status4_timeout)" 15 2>/dev/null &
+  pids+=("$!")
+done
+for pid in "${pids[@]}"; do
+  wait "$pid"
+done
+python3 - "$store" <<'PY'
+import sys
+
+rows = [line.rstrip("\n").split("\t") for line in open(sys.argv[1], encoding="utf-8")]
+assert all(len(r) == 3 for r in rows), rows
+total = sum(int(r[2]) for r in rows)
+runtime = sum(int(r[2]) for r in rows if r[1] == "runtime_eval")
+# 2 carried over + 6 x 15 new events.
+assert total == 92 and runtime == 46, (total, runtime, rows)
+assert len(rows) <= 2 * 3, rows
+PY
+
+# The shared budget trips for whichever child crosses it.
+out="$(BUDGET_MAX=93 record r7 composer 2>&1 || true)"
+grep -q 'E_TIMEOUT_BUDGET_EXCEEDED runtime_eval=46 composer=1 total=93 max=93 window_sec=300 action=fail run_id=r7' <<<"$out" || { echo "$out" >&2; exit 1; }
+
+# A lock that never frees up: the event is skipped, not written unlocked.
+before="$(cat "$store")"
+flock -x "$store.lock" sleep 3 &
+holder=$!
+sleep 0.3
+out="$(BUDGET_MAX=93 LOCK_WAIT=1 record r9 composer 2>&1)"
+kill "$holder" 2>/dev/null || true
+wait "$holder" 2>/dev/null || true
+grep -q "^W_TIMEOUT_BUDGET_LOCK_TIMEOUT event=composer wait_sec=1 file=$store.lock action=skip_update run_id=r9$" <<<"$out" || { echo "$out" >&2; exit 1; }
+if grep -q 'TIMEOUT_BUDGET event=\|E_TIMEOUT_BUDGET_EXCEEDED' <<<"$out"; then
+  echo "budget updated without the lock: $out" >&2
+  exit 1
+fi
+[[ "$(cat "$store")" == "$before" ]]
+
+# An explicit file still wins over the shared dir.
+CHATGPT_SEND_TIMEOUT_BUDGET_FILE="$tmp/own.tsv" record r8 composer 2>/dev/null
+[[ "$(cut -f2,3 "$tmp/own.tsv")" == $'composer\t1' ]]
+
+echo "OK"